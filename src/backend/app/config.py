@@ -12,11 +12,25 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # Opt-in async engine (aiosqlite / asyncpg) for the hot routes; sync engine stays available
+    database_async: bool = False
 
     # Security
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Lifetime of the token embedded in webcal:// calendar feed URLs
+    calendar_feed_token_days: int = 365
+    # Verified bearer token -> user snapshot cache in get_current_user (0 disables)
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 1024
+    # Password hashing — bcrypt cost (stored hashes with another cost are rehashed on login), and the
+    # worker threads it runs on; calls beyond `password_hash_max_pending` in flight are refused (503)
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    # Shared secret for GET /internal/metrics (X-Metrics-Token header); empty disables the endpoint
+    metrics_token: str = ""
 
     # Google Gemini API — Tiered Models
     # Accepts either GOOGLE_API_KEY or GEMINI_API_KEY from .env
@@ -24,6 +38,33 @@ class Settings(BaseSettings):
     gemini_flash_model: str = "gemini-3.1-flash-lite-preview"  # Fast routing & classification
     gemini_pro_model: str = "gemma-4-31b-it"  # Deep reasoning (Reflection, Planner)
 
+    # LLM response cache — in-process LRU, plus a shared SQLite tier when a path is set
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 512
+    llm_cache_sqlite_path: str = ""
+
+    # Local intent router — skip the Flash router call when local confidence >= threshold,
+    # and re-check a sampled fraction of short-circuited decisions against the LLM.
+    local_router_threshold: float = 0.85
+    local_router_shadow_rate: float = 0.05
+
+    # Chat pipeline — when False, memory extraction runs concurrently with routing + agent
+    # and does not see the agent's reply; when True it waits for the reply as a hint.
+    chat_memory_agent_hint: bool = False
+
+    # Graph analysis — from `graph_prefilter_min_items` items on, a local TF-IDF prefilter keeps each
+    # item's top-k most similar partners and the LLM only judges those pairs, in batches.
+    graph_candidate_k: int = 5
+    graph_prefilter_min_items: int = 40
+    graph_pair_batch_size: int = 60
+    # Batched requests of one analysis run concurrently, at most this many at a time
+    graph_max_concurrency: int = 4
+
+    # Scheduler — tasks are packed locally into the next `scheduler_horizon_days` days; in fast mode
+    # the LLM neither estimates missing durations nor writes the summary
+    scheduler_fast_mode: bool = False
+    scheduler_horizon_days: int = 7
+
     # CORS
     allowed_origins: str = "http://localhost:3000,http://localhost:5173"
 
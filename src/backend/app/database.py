@@ -1,11 +1,26 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from typing import Any, TypeVar
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import get_settings
 
 settings = get_settings()
 
+T = TypeVar("T")
+AnySession = Session | AsyncSession
+
+# Async drivers used when DATABASE_ASYNC is enabled and the URL names no driver
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
 # Create database engine
 engine = create_engine(
     settings.database_url, connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
@@ -18,6 +33,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def async_database_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL to its async driver (`sqlite://` -> `sqlite+aiosqlite://`)."""
+    scheme, separator, rest = url.partition("://")
+    dialect, _, driver = scheme.partition("+")
+    if driver in {"aiosqlite", "asyncpg"} or dialect not in ASYNC_DRIVERS:
+        return url
+    return f"{ASYNC_DRIVERS[dialect]}{separator}{rest}"
+
+
+# Opt-in async engine; the sync engine above stays the default and backs migrations and tests
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    async_engine = create_async_engine(async_database_url(settings.database_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -25,3 +57,62 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an AsyncSession (requires DATABASE_ASYNC=true)"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database support is disabled; set DATABASE_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_session() -> AsyncIterator[AnySession]:
+    """Dependency for hot routes: an AsyncSession in async mode, otherwise a sync Session"""
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    else:
+        async with AsyncSessionLocal() as db:
+            yield db
+
+
+async def run_db(db: AnySession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run sync ORM code `fn(session, *args, **kwargs)` against either session type.
+
+    On an AsyncSession the call goes through `run_sync`, so driver I/O is awaited instead of
+    blocking the event loop. Calls sharing one AsyncSession are serialized, since concurrent
+    tasks (e.g. the chat agent and memory extraction) may use the same request session.
+    """
+    if not isinstance(db, AsyncSession):
+        return fn(db, *args, **kwargs)
+
+    lock = db.info.setdefault("run_db_lock", asyncio.Lock())
+    async with lock:
+        return await db.run_sync(fn, *args, **kwargs)
+
+
+async def close_db(db: AnySession) -> None:
+    """Close a session obtained outside of a dependency's lifetime (e.g. in a streamed body)."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        db.close()
+
+
+def save_and_refresh(db: Session, *instances: Any) -> None:
+    """Add, commit and refresh `instances` (sync helper meant for `run_db`)."""
+    db.add_all(instances)
+    db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+def delete_and_commit(db: Session, instance: Any) -> None:
+    """Delete `instance` and commit (sync helper meant for `run_db`)."""
+    db.delete(instance)
+    db.commit()
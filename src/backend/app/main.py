@@ -1,9 +1,14 @@
-from fastapi import FastAPI
+import secrets
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.database import Base, engine
-from app.routes import auth, chat, dashboard, graph, items, profile, schedule, users
+from app.routes import auth, chat, dashboard, graph, items, profile, schedule, search, users
+from app.utils.auth import password_pool
+from app.utils.auth_cache import auth_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 # Get settings
 settings = get_settings()
@@ -27,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -38,6 +44,7 @@ app.include_router(schedule.router, prefix="/api")
 app.include_router(graph.router, prefix="/api")
 app.include_router(profile.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
 
 
 @app.get("/")
@@ -52,6 +59,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/internal/metrics", include_in_schema=False)
+async def internal_metrics(x_metrics_token: str = Header(default="")):
+    """Auth cache hit/miss counters and password hashing queue depth, for operators holding METRICS_TOKEN"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_metrics_token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return {"auth_cache": auth_cache.metrics(), "password_hashing": password_pool.metrics()}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class CalendarFeed(Base):
+    """Per-user calendar feed secret; feed tokens carry it, so rotating it revokes every issued feed URL."""
+
+    __tablename__ = "calendar_feeds"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    secret = Column(String(64), nullable=False)
+    rotated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CalendarFeed(user_id={self.user_id})>"
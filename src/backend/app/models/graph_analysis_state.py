@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer
+
+from app.database import Base
+
+
+class GraphAnalysisState(Base):
+    """Per-user watermark of the last graph analysis run (see POST /graph/analyze)."""
+
+    __tablename__ = "graph_analysis_state"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_item_id = Column(Integer, nullable=False, default=0)  # Highest item id included in the last run
+    last_analyzed_at = Column(TIMESTAMP, nullable=True)  # Items updated after this are re-analyzed
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GraphAnalysisState(user_id={self.user_id}, last_item_id={self.last_item_id})>"
@@ -1,15 +1,24 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String, Text
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Index, Integer, String, Text, event, inspect
 from sqlalchemy.orm import relationship
 
 from app.database import Base
 
+# Attributes graph analysis reads; editing one of them bumps `content_updated_at`
+CONTENT_FIELDS = ("title", "description", "category", "subcategory", "life_area")
+
 
 class Item(Base):
     """Item model representing tasks, obligations, wishes, goals, ideas, and habits"""
 
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_user_created", "user_id", "created_at"),
+        Index("ix_items_user_status_category", "user_id", "status", "category"),
+        Index("ix_items_user_scheduled_start", "user_id", "scheduled_start"),
+        Index("ix_items_user_priority_created", "user_id", "priority", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -35,6 +44,7 @@ class Item(Base):
 
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
     updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+    content_updated_at = Column(TIMESTAMP, default=datetime.utcnow)  # Last edit to CONTENT_FIELDS
 
     # Relationships
     user = relationship("User", back_populates="items")
@@ -47,3 +57,11 @@ class Item(Base):
 
     def __repr__(self):
         return f"<Item(id={self.id}, title={self.title}, category={self.category})>"
+
+
+@event.listens_for(Item, "before_update")
+def _touch_content(mapper, connection, target: Item) -> None:
+    # Status, priority and schedule edits leave the content timestamp alone
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in CONTENT_FIELDS):
+        target.content_updated_at = datetime.utcnow()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String, Text
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -10,11 +10,12 @@ class ItemLink(Base):
     """ItemLink model representing edges in the knowledge graph between items."""
 
     __tablename__ = "item_links"
+    __table_args__ = (Index("ux_item_links_source_target_type", "source_id", "target_id", "link_type", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
 
-    source_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
-    target_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    source_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False, index=True)
+    target_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # Link type: "subtask_of", "relates_to", "blocks", "updates"
     link_type = Column(String(50), default="relates_to")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary
+
+from app.database import Base
+
+
+class ItemVector(Base):
+    """Search embedding of an item: a float32 hashed bag-of-words vector (see services/item_search.py)."""
+
+    __tablename__ = "item_vectors"
+
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    vector = Column(LargeBinary, nullable=False)  # SEARCH_DIMS little-endian float32 values
+
+    def __repr__(self):
+        return f"<ItemVector(item_id={self.item_id}, user_id={self.user_id})>"
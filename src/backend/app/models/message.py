@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Column, ForeignKey, Integer, String
+from sqlalchemy import TIMESTAMP, Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -10,6 +10,7 @@ class Message(Base):
     """Message model storing individual chat logs for rolling history"""
 
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_user_timestamp", "user_id", "timestamp"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import JSON, TIMESTAMP, Column, ForeignKey, Integer, Text
+from sqlalchemy import JSON, TIMESTAMP, Column, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -10,6 +10,7 @@ class Reflection(Base):
     """Reflection model storing evolving mental-state summaries from Agent B."""
 
     __tablename__ = "reflections"
+    __table_args__ = (Index("ix_reflections_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
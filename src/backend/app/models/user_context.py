@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import JSON, TIMESTAMP, Column, Float, ForeignKey, Integer, String
+from sqlalchemy import JSON, TIMESTAMP, Column, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -10,6 +10,7 @@ class UserContext(Base):
     """Current normalized long-term facts known about a user."""
 
     __tablename__ = "user_context"
+    __table_args__ = (Index("ix_user_context_user_key", "user_id", "key", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, Column, Date, ForeignKey, Integer, PrimaryKeyConstraint
+
+from app.database import Base
+
+
+class UserDailyStats(Base):
+    """Per-user, per-day rollup of created items, links, profile updates and reflections."""
+
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (PrimaryKeyConstraint("user_id", "day"),)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    tasks = Column(Integer, nullable=False, default=0)
+    ideas = Column(Integer, nullable=False, default=0)
+    thoughts = Column(Integer, nullable=False, default=0)  # Any other item category is counted here
+    links = Column(Integer, nullable=False, default=0)
+    profile_updates = Column(Integer, nullable=False, default=0)
+    reflections = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserDailyStats(user_id={self.user_id}, day={self.day})>"
+
+
+class UserDailyStatsBackfill(Base):
+    """Marks a user whose rollup has been rebuilt from the source tables (history before the hooks included)."""
+
+    __tablename__ = "user_daily_stats_backfills"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    backfilled_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserDailyStatsBackfill(user_id={self.user_id})>"
@@ -4,11 +4,24 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
 from app.schemas import Token, UserLogin, UserRegister
-from app.utils.auth import create_access_token, hash_password, verify_password
+from app.utils.auth import (
+    PasswordPoolSaturated,
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password,
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """Register a new user"""
@@ -18,8 +31,13 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    # Create new user
-    new_user = User(email=user_data.email, password_hash=hash_password(user_data.password), name=user_data.name)
+    # Create new user; no pooled connection is held while bcrypt runs
+    db.rollback()
+    try:
+        password_hash = await hash_password_async(user_data.password)
+    except PasswordPoolSaturated:
+        raise _hashing_busy()
+    new_user = User(email=user_data.email, password_hash=password_hash, name=user_data.name)
 
     db.add(new_user)
     db.commit()
@@ -38,10 +56,23 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     # Find user
     user = db.query(User).filter(User.email == credentials.email).first()
 
-    if not user or not verify_password(credentials.password, user.password_hash):
+    valid, new_hash = False, None
+    if user:
+        user_id, stored_hash = user.id, user.password_hash
+        db.rollback()  # release the connection while bcrypt runs
+        try:
+            valid, new_hash = await verify_and_update_password(credentials.password, stored_hash)
+        except PasswordPoolSaturated:
+            raise _hashing_busy()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
 
+    # Transparently move the stored hash to the configured bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+
     # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user_id)})
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,9 +1,12 @@
+import json
 from datetime import datetime
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, load_only
 
-from app.database import get_db
+from app.database import AnySession, close_db, get_session, run_db
 from app.models.item import Item
 from app.models.item_link import ItemLink
 from app.models.message import Message
@@ -12,70 +15,63 @@ from app.schemas import (
     AgentChatResponse,
     ChatMessage,
     ClassifiedItem,
+    MemoryCandidateResponse,
+    MessageListEntry,
     MessageResponse,
     ReflectionSummary,
     ScheduleBlock,
 )
-from app.services.orchestrator import orchestrator
-from app.services.profile_memory import active_context_facts, extract_memory_candidates
+from app.services.chat_pipeline import build_chat_context, run_chat_pipeline, stream_chat_pipeline
 from app.utils.dependencies import get_current_user
+from app.utils.pagination import cursor_datetime, decode_cursor, encode_cursor, parse_fields, project, set_next_cursor
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+MAX_HISTORY_PAGE_SIZE = 100
+MESSAGE_FIELDS = tuple(MessageResponse.model_fields)
 
-@router.get("/history", response_model=list[MessageResponse])
-async def get_chat_history(
-    limit: int = 10, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
-):
-    """Fetch recent chat history for the user"""
-    messages = (
-        db.query(Message)
-        .filter(Message.user_id == current_user.id)
-        .order_by(Message.timestamp.desc())
-        .limit(limit)
-        .all()
+
+def _recent_messages(
+    db: Session, user_id: int, limit: int, cursor: str | None, fields: tuple[str, ...]
+) -> tuple[list[dict], str | None]:
+    """Newest `limit` messages older than `cursor`, in chronological order."""
+    query = (
+        select(Message)
+        .where(Message.user_id == user_id)
+        .options(load_only(*(getattr(Message, name) for name in {*fields, "timestamp"})))
     )
-    # Reverse to chronological order
-    return messages[::-1]
+    if cursor:
+        timestamp, message_id = decode_cursor(cursor, 2)
+        query = query.where(tuple_(Message.timestamp, Message.id) < (cursor_datetime(timestamp), message_id))
+    messages = db.scalars(query.order_by(Message.timestamp.desc(), Message.id.desc()).limit(limit + 1)).all()
 
+    page = messages[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if len(messages) > limit else None
+    return [project(message, fields) for message in reversed(page)], next_cursor
 
-@router.post("", response_model=AgentChatResponse)
-async def send_message(
-    message: ChatMessage, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+
+@router.get("/history", response_model=list[MessageListEntry], response_model_exclude_unset=True)
+async def get_chat_history(
+    response: Response,
+    limit: int = Query(10, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description="Comma-separated message fields to return; `id` is always included"),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
 ):
     """
-    Main chat endpoint — routes to the appropriate agent via the Orchestrator.
-    Returns a unified response with agent name, message, items, schedule, and/or reflection.
-    """
-
-    context_facts = active_context_facts(db, current_user.id)
-
-    # Build user profile for agents
-    user_profile = {
-        "name": current_user.name,
-        "goals": current_user.goals or {},
-        "personality": current_user.personality or {},
-        "life_areas": current_user.life_areas or [],
-        "context_facts": context_facts,
-    }
+    Fetch recent chat history for the user, oldest first.
 
-    # Fetch recent history
-    history = (
-        db.query(Message).filter(Message.user_id == current_user.id).order_by(Message.timestamp.desc()).limit(10).all()
-    )
-    history_data = [
-        {"role": msg.role, "content": msg.content, "agent_used": msg.agent_used} for msg in reversed(history)
-    ]
+    Pass the `X-Next-Cursor` response header back as `cursor` to page further into the past.
+    """
+    selected = parse_fields(fields, MESSAGE_FIELDS)
+    messages, next_cursor = await run_db(db, _recent_messages, current_user.id, limit, cursor, selected)
+    set_next_cursor(response, next_cursor)
+    return messages
 
-    # Route through orchestrator
-    result = orchestrator.route_and_execute(
-        user_input=message.message,
-        user_profile=user_profile,
-        chat_history=history_data,
-        db=db,
-        user_id=current_user.id,
-    )
 
+def _persist_chat_turn(db: Session, user_id: int, user_message: str, result: dict) -> None:
+    """Save the agent's items, detected links and both chat messages."""
     # Save classified items to database (brain_dump agent)
     saved_item_ids = []
     for item_data in result.get("items", []):
@@ -87,7 +83,7 @@ async def send_message(
                 pass
 
         new_item = Item(
-            user_id=current_user.id,
+            user_id=user_id,
             title=item_data["title"],
             description=item_data.get("description"),
             category=item_data["category"],
@@ -102,14 +98,8 @@ async def send_message(
         db.flush()  # Get the ID before commit
         saved_item_ids.append((new_item.id, item_data.get("title", "")))
 
-    memory_candidates = extract_memory_candidates(
-        db,
-        current_user.id,
-        message.message,
-        agent_message=result.get("message", ""),
-    )
-
-    # Save detected links
+    # Save detected links (item_links is unique on source/target/type)
+    added_links = set()
     for link_data in result.get("links", []):
         target_id = link_data.get("target_id")
         if target_id and saved_item_ids:
@@ -122,7 +112,8 @@ async def send_message(
                     link_type = link_data.get("link_type", "relates_to")
                     if link_type == "related":
                         link_type = "relates_to"
-                    existing_link = (
+                    link_key = (saved_id, target_id, link_type)
+                    existing_link = link_key in added_links or (
                         db.query(ItemLink)
                         .filter(
                             ItemLink.source_id == saved_id,
@@ -132,6 +123,7 @@ async def send_message(
                         .first()
                     )
                     if not existing_link:
+                        added_links.add(link_key)
                         new_link = ItemLink(
                             source_id=saved_id,
                             target_id=target_id,
@@ -145,11 +137,11 @@ async def send_message(
     db.commit()
 
     # Save messages to database
-    user_msg = Message(user_id=current_user.id, role="user", content=message.message)
+    user_msg = Message(user_id=user_id, role="user", content=user_message)
     db.add(user_msg)
 
     assistant_msg = Message(
-        user_id=current_user.id,
+        user_id=user_id,
         role="assistant",
         content=result.get("message", ""),
         agent_used=result.get("agent", "brain_dump"),
@@ -157,7 +149,8 @@ async def send_message(
     db.add(assistant_msg)
     db.commit()
 
-    # Build response
+
+def _build_chat_response(result: dict, memory_candidates: list[dict]) -> AgentChatResponse:
     response_items = [
         ClassifiedItem(
             title=item["title"],
@@ -199,3 +192,69 @@ async def send_message(
         reflection=response_reflection,
         memory_candidates=memory_candidates,
     )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("", response_model=AgentChatResponse)
+async def send_message(
+    message: ChatMessage, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
+):
+    """
+    Main chat endpoint — routes to the appropriate agent via the Orchestrator.
+    Returns a unified response with agent name, message, items, schedule, and/or reflection.
+    """
+
+    user_profile, history_data = await run_db(db, build_chat_context, current_user)
+    result, memory_candidates = await run_chat_pipeline(
+        db,
+        current_user.id,
+        message.message,
+        user_profile,
+        history_data,
+    )
+
+    await run_db(db, _persist_chat_turn, current_user.id, message.message, result)
+    return _build_chat_response(result, memory_candidates)
+
+
+@router.post("/stream")
+async def stream_message(
+    message: ChatMessage, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
+):
+    """
+    Server-Sent Events variant of `POST /chat`.
+
+    Emits `routing`, then `delta` events with reply text as it is generated, then `result`
+    (an `AgentChatResponse` without memory candidates), then `memory`, then `done`.
+    """
+    user_id = current_user.id
+    user_profile, history_data = await run_db(db, build_chat_context, current_user)
+
+    async def event_stream():
+        try:
+            async for event in stream_chat_pipeline(db, user_id, message.message, user_profile, history_data):
+                event_type = event.pop("type")
+                if event_type == "result":
+                    await run_db(db, _persist_chat_turn, user_id, message.message, event["result"])
+                    yield _sse("result", _build_chat_response(event["result"], []).model_dump(mode="json"))
+                elif event_type == "memory":
+                    candidates = [MemoryCandidateResponse(**c).model_dump() for c in event["memory_candidates"]]
+                    yield _sse("memory", {"memory_candidates": candidates})
+                else:
+                    yield _sse(event_type, event)
+            yield _sse("done", {})
+        except Exception as exc:
+            print(f"[Chat] Stream failed: {exc}")
+            yield _sse("error", {"detail": "The assistant could not finish this response."})
+        finally:
+            # The request-scoped session may already be released before the body finishes streaming.
+            await close_db(db)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,12 @@
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import ColumnElement, case, func, or_, select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AnySession, get_session, run_db
 from app.models.item import Item
-from app.models.item_link import ItemLink
-from app.models.profile_update import ProfileUpdate
-from app.models.reflection import Reflection
 from app.models.user import User
 from app.models.user_context import UserContext
 from app.schemas import (
@@ -17,114 +15,114 @@ from app.schemas import (
     DashboardTelemetry,
     DashboardVelocityPoint,
 )
+from app.services.daily_stats import (
+    COUNTER_COLUMNS,
+    bucket_start,
+    daily_stats_between,
+    ensure_daily_stats,
+    totals_before,
+)
+from app.services.graph_queries import user_links
 from app.utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
+MAX_RANGE_DAYS = 3660
+
+
 def _day_range(days: int) -> list[date]:
     end = date.today()
     start = end - timedelta(days=days - 1)
     return [start + timedelta(days=offset) for offset in range(days)]
 
 
-@router.get("/analytics", response_model=DashboardAnalyticsResponse)
-async def get_dashboard_analytics(
-    days: int = Query(default=60, ge=30, le=90),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Return command-center analytics scoped to the current user."""
-    dates = _day_range(days)
-    start_day = dates[0]
-    start_dt = datetime.combine(start_day, datetime.min.time())
-
-    activity_by_day = {day: {"task": 0, "idea": 0, "thought": 0} for day in dates}
-
-    items = db.query(Item).filter(Item.user_id == current_user.id, Item.created_at >= start_dt).all()
-    for item in items:
-        if not item.created_at:
-            continue
-        day = item.created_at.date()
-        if day not in activity_by_day:
-            continue
-        category = item.category if item.category in {"task", "idea", "thought"} else "thought"
-        activity_by_day[day][category] += 1
+def _resolve_range(days: int, start_date: date | None, end_date: date | None) -> tuple[date, date]:
+    if start_date is None:
+        dates = _day_range(days)
+        return dates[0], dates[-1]
+    end = end_date or date.today()
+    if start_date > end:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return start_date, end
+
+
+def _count_if(condition) -> ColumnElement:
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _live_telemetry(db: Session, user_id: int) -> dict[str, int]:
+    """Current-state counters that cannot come from the creation rollup, in one round trip."""
+    links = user_links(user_id).subquery()
+    link_stats = select(
+        func.count().label("graph_connections"),
+        _count_if(or_(links.c.ai_reasoning.isnot(None), links.c.weight.isnot(None))).label("hidden_connections"),
+    ).subquery()
+    pending_tasks = (
+        select(_count_if((Item.category == "task") & (Item.status != "done")))
+        .where(Item.user_id == user_id)
+        .scalar_subquery()
+        .label("pending_tasks")
+    )
+    active_profile_rules = (
+        select(func.count(UserContext.id))
+        .where(UserContext.user_id == user_id)
+        .scalar_subquery()
+        .label("active_profile_rules")
+    )
+
+    row = db.execute(select(link_stats, pending_tasks, active_profile_rules)).one()
+    return dict(row._mapping)
+
+
+def _build_analytics(
+    db: Session, user_id: int, start: date, end: date, granularity: str = "day"
+) -> DashboardAnalyticsResponse:
+    if ensure_daily_stats(db, user_id):
+        db.commit()
+    rollup = daily_stats_between(db, user_id, start, end)
+    baseline = totals_before(db, user_id, start)
+
+    buckets: dict[date, dict[str, int]] = {}
+    day = start
+    while day <= end:
+        bucket = buckets.setdefault(max(bucket_start(day, granularity), start), dict.fromkeys(COUNTER_COLUMNS, 0))
+        for column, count in rollup.get(day, {}).items():
+            bucket[column] += count
+        day += timedelta(days=1)
 
     activity = [
         DashboardActivityDay(
-            date=day,
-            tasks=counts["task"],
-            ideas=counts["idea"],
-            thoughts=counts["thought"],
-            total=counts["task"] + counts["idea"] + counts["thought"],
+            date=bucket_day,
+            tasks=counts["tasks"],
+            ideas=counts["ideas"],
+            thoughts=counts["thoughts"],
+            total=counts["tasks"] + counts["ideas"] + counts["thoughts"],
         )
-        for day, counts in activity_by_day.items()
+        for bucket_day, counts in buckets.items()
     ]
 
-    user_items = db.query(Item).filter(Item.user_id == current_user.id).all()
-    user_item_ids = {item.id for item in user_items}
-    links = []
-    if user_item_ids:
-        links = (
-            db.query(ItemLink)
-            .filter(
-                ItemLink.source_id.in_(user_item_ids),
-                ItemLink.target_id.in_(user_item_ids),
-            )
-            .all()
-        )
-
+    # Velocity: running totals from the pre-range baseline over the buckets.
     velocity = []
-    for day in dates:
-        end_of_day = datetime.combine(day + timedelta(days=1), datetime.min.time())
-        node_count = sum(1 for item in user_items if item.created_at and item.created_at < end_of_day)
-        link_count = sum(1 for link in links if link.created_at and link.created_at < end_of_day)
+    node_count = baseline["tasks"] + baseline["ideas"] + baseline["thoughts"]
+    link_count = baseline["links"]
+    for bucket_day, counts in buckets.items():
+        node_count += counts["tasks"] + counts["ideas"] + counts["thoughts"]
+        link_count += counts["links"]
         velocity.append(
             DashboardVelocityPoint(
-                date=day,
+                date=bucket_day,
                 nodes=node_count,
                 connections=link_count,
             )
         )
 
-    active_profile_rules = db.query(UserContext).filter(UserContext.user_id == current_user.id).count()
-    memory_updates = (
-        db.query(ProfileUpdate)
-        .filter(ProfileUpdate.user_id == current_user.id, ProfileUpdate.created_at >= start_dt)
-        .count()
-    )
-    pending_tasks = (
-        db.query(Item)
-        .filter(
-            Item.user_id == current_user.id,
-            Item.category == "task",
-            Item.status != "done",
-        )
-        .count()
-    )
-    reflections = (
-        db.query(Reflection).filter(Reflection.user_id == current_user.id, Reflection.created_at >= start_dt).count()
-    )
-    hidden_connections = (
-        db.query(ItemLink)
-        .filter(
-            ItemLink.source_id.in_(user_item_ids) if user_item_ids else False,
-            ItemLink.target_id.in_(user_item_ids) if user_item_ids else False,
-            or_(ItemLink.ai_reasoning.isnot(None), ItemLink.weight.isnot(None)),
-        )
-        .count()
-        if user_item_ids
-        else 0
-    )
-
     telemetry = DashboardTelemetry(
-        active_profile_rules=active_profile_rules,
-        memory_updates=memory_updates,
-        graph_connections=len(links),
-        hidden_connections=hidden_connections,
-        pending_tasks=pending_tasks,
-        reflections=reflections,
+        memory_updates=sum(counts["profile_updates"] for counts in buckets.values()),
+        reflections=sum(counts["reflections"] for counts in buckets.values()),
+        **_live_telemetry(db, user_id),
     )
 
     return DashboardAnalyticsResponse(
@@ -132,3 +130,22 @@ async def get_dashboard_analytics(
         velocity=velocity,
         telemetry=telemetry,
     )
+
+
+@router.get("/analytics", response_model=DashboardAnalyticsResponse)
+async def get_dashboard_analytics(
+    days: int = Query(default=60, ge=30, le=90),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    granularity: Literal["day", "week", "month"] = "day",
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """
+    Return command-center analytics scoped to the current user, read from the daily rollup.
+
+    `start_date`/`end_date` select an arbitrary range (overriding `days`); `granularity`
+    groups activity and velocity into week (Monday) or month buckets.
+    """
+    start, end = _resolve_range(days, start_date, end_date)
+    return await run_db(db, _build_analytics, current_user.id, start, end, granularity)
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, false, or_, select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AnySession, delete_and_commit, get_session, run_db, save_and_refresh
+from app.models.graph_analysis_state import GraphAnalysisState
 from app.models.item import Item
 from app.models.item_link import ItemLink
 from app.models.user import User
-from app.schemas import GraphAnalyzeResponse, GraphData, ItemLinkCreate, ItemLinkResponse
+from app.schemas import GraphAnalyzeResponse, GraphData, GraphNeighborhood, ItemLinkCreate, ItemLinkResponse
 from app.services.agents.graph_analyzer import graph_analyzer
+from app.services.graph_index import graph_index
+from app.services.graph_queries import user_links
 from app.utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/graph", tags=["Knowledge Graph"])
 
+# Already-analyzed items sent alongside an incremental batch as link candidates
+ANALYSIS_CONTEXT_LIMIT = 80
+
 
 def _normalize_link_type(link_type: str | None) -> str:
     if link_type == "related":
@@ -20,69 +29,17 @@ def _normalize_link_type(link_type: str | None) -> str:
     return "relates_to"
 
 
-@router.get("", response_model=GraphData)
-async def get_graph_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Get all items as nodes and all item_links as edges for the knowledge graph."""
-    items = db.query(Item).filter(Item.user_id == current_user.id).all()
+def _load_graph(db: Session, user_id: int) -> tuple[list[Item], list[ItemLink]]:
+    items = db.query(Item).filter(Item.user_id == user_id).all()
+    # Links where both source and target belong to this user
+    links = db.execute(user_links(user_id)).scalars().all()
+    return items, links
 
-    # Build node list
-    nodes = [
-        {
-            "id": item.id,
-            "title": item.title,
-            "description": item.description,
-            "category": item.category,
-            "subcategory": item.subcategory,
-            "life_area": item.life_area,
-            "status": item.status,
-            "priority": item.priority or 5,
-            "tags": [tag for tag in [item.category, item.subcategory, item.life_area, item.status] if tag],
-            "val": max(1, (item.priority or 5)),  # Node size based on priority
-        }
-        for item in items
-    ]
-
-    # Get all item IDs for this user
-    item_ids = {item.id for item in items}
 
-    # Get links where both source and target belong to this user
-    links = (
-        db.query(ItemLink)
-        .filter(
-            ItemLink.source_id.in_(item_ids),
-            ItemLink.target_id.in_(item_ids),
-        )
-        .all()
-    )
-
-    links_data = [
-        ItemLinkResponse(
-            id=link.id,
-            source_id=link.source_id,
-            target_id=link.target_id,
-            link_type=_normalize_link_type(link.link_type),
-            weight=link.weight,
-            ai_reasoning=link.ai_reasoning,
-        )
-        for link in links
-    ]
-
-    return GraphData(nodes=nodes, links=links_data)
-
-
-@router.post("/links", response_model=ItemLinkResponse, status_code=status.HTTP_201_CREATED)
-async def create_link(
-    link_data: ItemLinkCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Create a manual link between two items."""
+def _validate_new_link(db: Session, link_data: ItemLinkCreate, user_id: int) -> ItemLink:
     # Verify both items belong to the user
-    source = db.query(Item).filter(Item.id == link_data.source_id, Item.user_id == current_user.id).first()
-    target = db.query(Item).filter(Item.id == link_data.target_id, Item.user_id == current_user.id).first()
+    source = db.query(Item).filter(Item.id == link_data.source_id, Item.user_id == user_id).first()
+    target = db.query(Item).filter(Item.id == link_data.target_id, Item.user_id == user_id).first()
 
     if not source or not target:
         raise HTTPException(status_code=404, detail="One or both items not found")
@@ -102,51 +59,16 @@ async def create_link(
     if existing_link:
         raise HTTPException(status_code=409, detail="Link already exists")
 
-    new_link = ItemLink(
+    return ItemLink(
         source_id=link_data.source_id,
         target_id=link_data.target_id,
         link_type=link_data.link_type,
     )
-    db.add(new_link)
-    db.commit()
-    db.refresh(new_link)
-
-    return new_link
-
-
-@router.post("/analyze", response_model=GraphAnalyzeResponse)
-async def analyze_graph(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Analyze the user's items and create AI-suggested graph links."""
-    items = db.query(Item).filter(Item.user_id == current_user.id).all()
-    if len(items) < 2:
-        return GraphAnalyzeResponse(suggested_links=[], created_count=0, skipped_count=0)
-
-    item_ids = {item.id for item in items}
-    existing_links = (
-        db.query(ItemLink)
-        .filter(
-            ItemLink.source_id.in_(item_ids),
-            ItemLink.target_id.in_(item_ids),
-        )
-        .all()
-    )
-    existing_keys = {(link.source_id, link.target_id, _normalize_link_type(link.link_type)) for link in existing_links}
 
-    graph_items = [
-        {
-            "id": item.id,
-            "type": item.category,
-            "title": item.title,
-            "description": item.description or "",
-            "tags": [tag for tag in [item.category, item.subcategory, item.life_area, item.status] if tag],
-        }
-        for item in items
-    ]
 
-    suggestions = graph_analyzer.analyze(graph_items)
+def _save_suggested_links(
+    db: Session, suggestions: list[dict], item_ids: set[int], existing_keys: set[tuple[int, int, str]]
+) -> tuple[list[ItemLink], int]:
     created_links: list[ItemLink] = []
     skipped_count = 0
 
@@ -185,6 +107,209 @@ async def analyze_graph(
     for link in created_links:
         db.refresh(link)
 
+    return created_links, skipped_count
+
+
+def _graph_item(item: Item) -> dict:
+    return {
+        "id": item.id,
+        "type": item.category,
+        "title": item.title,
+        "description": item.description or "",
+        "tags": [tag for tag in [item.category, item.subcategory, item.life_area, item.status] if tag],
+    }
+
+
+def _load_analysis_batch(
+    db: Session, user_id: int, full: bool
+) -> tuple[list[Item], list[Item], set[tuple[int, int, str]], bool]:
+    """
+    Return `(changed, context, existing_keys, incremental)` for a graph analysis run.
+
+    `changed` are items added (id above the watermark) or with content edited after it (see
+    `Item.content_updated_at`; status and schedule changes don't count) since the last run, or
+    every item on a full run. `context` are up to ANALYSIS_CONTEXT_LIMIT other items, same life
+    area/category first, then most recent. `existing_keys` covers links touching `changed`.
+    A user without a watermark gets a full run.
+    """
+    state = db.get(GraphAnalysisState, user_id)
+    owned = select(Item).where(Item.user_id == user_id)
+    if full or state is None:
+        changed = db.execute(owned.order_by(Item.id)).scalars().all()
+        return changed, [], {_link_key(link) for link in db.execute(user_links(user_id)).scalars()}, False
+
+    is_changed = Item.id > state.last_item_id
+    if state.last_analyzed_at is not None:
+        is_changed = or_(is_changed, Item.content_updated_at > state.last_analyzed_at)
+    changed = db.execute(owned.where(is_changed).order_by(Item.id)).scalars().all()
+    if not changed:
+        return [], [], set(), True
+
+    changed_ids = [item.id for item in changed]
+    life_areas = {item.life_area for item in changed if item.life_area}
+    categories = {item.category for item in changed}
+    related = or_(Item.life_area.in_(life_areas) if life_areas else false(), Item.category.in_(categories))
+    context = (
+        db.execute(
+            owned.where(~is_changed)
+            .order_by(case((related, 0), else_=1), Item.created_at.desc(), Item.id.desc())
+            .limit(ANALYSIS_CONTEXT_LIMIT)
+        )
+        .scalars()
+        .all()
+    )
+    links = db.execute(
+        user_links(user_id).where(or_(ItemLink.source_id.in_(changed_ids), ItemLink.target_id.in_(changed_ids)))
+    ).scalars()
+    return changed, context, {_link_key(link) for link in links}, True
+
+
+def _link_key(link: ItemLink) -> tuple[int, int, str]:
+    return link.source_id, link.target_id, _normalize_link_type(link.link_type)
+
+
+def _advance_watermark(db: Session, user_id: int, last_item_id: int, analyzed_at: datetime) -> None:
+    """Stage the new watermark; it is committed together with the suggested links."""
+    state = db.get(GraphAnalysisState, user_id)
+    if state is None:
+        state = GraphAnalysisState(user_id=user_id, last_item_id=0)
+        db.add(state)
+    state.last_item_id = max(state.last_item_id or 0, last_item_id)
+    state.last_analyzed_at = analyzed_at
+
+
+def _get_user_link(db: Session, link_id: int, user_id: int) -> ItemLink | None:
+    # Get link and verify ownership via the source item
+    link = db.query(ItemLink).filter(ItemLink.id == link_id).first()
+    if not link:
+        return None
+    source_item = db.query(Item).filter(Item.id == link.source_id, Item.user_id == user_id).first()
+    return link if source_item else None
+
+
+@router.get("", response_model=GraphData)
+async def get_graph_data(
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Get all items as nodes and all item_links as edges for the knowledge graph."""
+    items, links = await run_db(db, _load_graph, current_user.id)
+
+    # Build node list
+    nodes = [
+        {
+            "id": item.id,
+            "title": item.title,
+            "description": item.description,
+            "category": item.category,
+            "subcategory": item.subcategory,
+            "life_area": item.life_area,
+            "status": item.status,
+            "priority": item.priority or 5,
+            "tags": [tag for tag in [item.category, item.subcategory, item.life_area, item.status] if tag],
+            "val": max(1, (item.priority or 5)),  # Node size based on priority
+        }
+        for item in items
+    ]
+
+    links_data = [
+        ItemLinkResponse(
+            id=link.id,
+            source_id=link.source_id,
+            target_id=link.target_id,
+            link_type=_normalize_link_type(link.link_type),
+            weight=link.weight,
+            ai_reasoning=link.ai_reasoning,
+        )
+        for link in links
+    ]
+
+    return GraphData(nodes=nodes, links=links_data)
+
+
+@router.get("/neighborhood", response_model=GraphNeighborhood)
+async def get_graph_neighborhood(
+    node_id: int,
+    depth: int = Query(default=1, ge=0, le=4),
+    limit: int = Query(default=200, ge=1, le=1000),
+    life_area: str | None = None,
+    status: str | None = None,
+    category: str | None = None,
+    min_weight: int | None = Query(default=None, ge=0, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """
+    Get the subgraph within `depth` hops of `node_id`, capped at `limit` nodes.
+
+    Neighbors can be filtered by life area, status, category and minimum link weight.
+    Served from the cached per-user adjacency index.
+    """
+    graph = await run_db(db, graph_index.get, current_user.id)
+    if node_id not in graph.nodes:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    nodes, links, truncated = graph.neighborhood(
+        node_id,
+        depth,
+        limit,
+        life_area=life_area,
+        status=status,
+        category=category,
+        min_weight=min_weight,
+    )
+    return GraphNeighborhood(
+        center_id=node_id,
+        depth=depth,
+        truncated=truncated,
+        nodes=nodes,
+        links=[ItemLinkResponse(**{**link, "link_type": _normalize_link_type(link["link_type"])}) for link in links],
+    )
+
+
+@router.post("/links", response_model=ItemLinkResponse, status_code=status.HTTP_201_CREATED)
+async def create_link(
+    link_data: ItemLinkCreate,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Create a manual link between two items."""
+    new_link = await run_db(db, _validate_new_link, link_data, current_user.id)
+    await run_db(db, save_and_refresh, new_link)
+
+    return new_link
+
+
+@router.post("/analyze", response_model=GraphAnalyzeResponse)
+async def analyze_graph(
+    full: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """
+    Analyze the user's items and create AI-suggested graph links.
+
+    Runs are incremental: only items added or edited since the last successful run are
+    analyzed, against a bounded set of related existing items. `full=true` re-analyzes everything.
+    Large analyses are split into concurrent chunks; links from successful chunks are kept even
+    when others fail, and per-chunk timings are reported.
+    """
+    analyzed_at = datetime.utcnow()
+    changed, context, existing_keys, incremental = await run_db(db, _load_analysis_batch, current_user.id, full)
+    if not changed:
+        return GraphAnalyzeResponse(incremental=incremental)
+
+    items = [*changed, *context]
+    focus_ids = {item.id for item in changed} if incremental else None
+    run = await graph_analyzer.analyze_chunks_async([_graph_item(item) for item in items], focus_ids)
+
+    item_ids = {item.id for item in items}
+    if not run.failed_chunks:
+        # After a partial failure the watermark stays put, so the failed chunks are retried next run;
+        # links saved now are skipped then via `existing_keys`.
+        await run_db(db, _advance_watermark, current_user.id, max(item.id for item in changed), analyzed_at)
+    created_links, skipped_count = await run_db(db, _save_suggested_links, run.links, item_ids, existing_keys)
+
     return GraphAnalyzeResponse(
         suggested_links=[
             ItemLinkResponse(
@@ -199,6 +324,10 @@ async def analyze_graph(
         ],
         created_count=len(created_links),
         skipped_count=skipped_count,
+        analyzed_count=len(changed),
+        incremental=incremental,
+        chunks=run.chunks,
+        failed_chunks=run.failed_chunks,
     )
 
 
@@ -206,19 +335,12 @@ async def analyze_graph(
 async def delete_link(
     link_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
     """Delete a link between two items."""
-    # Get link and verify ownership via item
-    link = db.query(ItemLink).filter(ItemLink.id == link_id).first()
+    link = await run_db(db, _get_user_link, link_id, current_user.id)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
 
-    # Verify the source item belongs to the user
-    source_item = db.query(Item).filter(Item.id == link.source_id, Item.user_id == current_user.id).first()
-    if not source_item:
-        raise HTTPException(status_code=404, detail="Link not found")
-
-    db.delete(link)
-    db.commit()
+    await run_db(db, delete_and_commit, link)
     return None
@@ -1,60 +1,268 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, load_only, selectinload
 
-from app.database import get_db
+from app.database import AnySession, delete_and_commit, get_session, run_db, save_and_refresh
 from app.models.item import Item
 from app.models.user import User
-from app.schemas import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas import (
+    ItemBatchOperation,
+    ItemBatchRequest,
+    ItemBatchResponse,
+    ItemBatchResult,
+    ItemCreate,
+    ItemListEntry,
+    ItemResponse,
+    ItemSearchHit,
+    ItemUpdate,
+)
+from app.services.item_search import search_items
 from app.utils.dependencies import get_current_user
+from app.utils.pagination import cursor_datetime, decode_cursor, encode_cursor, parse_fields, project, set_next_cursor
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
+MAX_PAGE_SIZE = 200
+ITEM_FIELDS = tuple(ItemResponse.model_fields)
+ITEM_SORT_KEY = ("priority", "created_at", "id")
+ITEM_STATUSES = ("pending", "in_progress", "done", "archived")
+
+
+def _get_user_item(db: Session, item_id: int, user_id: int) -> Item | None:
+    return db.query(Item).filter(Item.id == item_id, Item.user_id == user_id).first()
+
+
+def _list_items(
+    db: Session,
+    user_id: int,
+    category: str | None,
+    status: str | None,
+    life_area: str | None,
+    limit: int,
+    cursor: str | None,
+    fields: tuple[str, ...],
+) -> tuple[list[dict], str | None]:
+    """
+    One page ordered by priority (descending, unprioritized last), then newest first.
+
+    Prioritized and unprioritized items are read as two keyset ranges over
+    `ix_items_user_priority_created`, since a NULL priority cannot be compared in one seek.
+    """
+    query = select(Item).where(Item.user_id == user_id)
+    if category:
+        query = query.where(Item.category == category)
+    if status:
+        query = query.where(Item.status == status)
+    if life_area:
+        query = query.where(Item.life_area == life_area)
+    query = query.options(load_only(*(getattr(Item, name) for name in {*fields, *ITEM_SORT_KEY})))
+
+    priority = created_at = item_id = None
+    if cursor:
+        priority, created_at, item_id = decode_cursor(cursor, 3)
+        created_at = cursor_datetime(created_at)
+
+    items = []
+    if not cursor or priority is not None:
+        ranked = query.where(Item.priority.is_not(None))
+        if cursor:
+            ranked = ranked.where(tuple_(Item.priority, Item.created_at, Item.id) < (priority, created_at, item_id))
+        items = db.scalars(
+            ranked.order_by(Item.priority.desc(), Item.created_at.desc(), Item.id.desc()).limit(limit + 1)
+        ).all()
+    if len(items) <= limit:
+        unranked = query.where(Item.priority.is_(None))
+        if cursor and priority is None:
+            unranked = unranked.where(tuple_(Item.created_at, Item.id) < (created_at, item_id))
+        items += db.scalars(
+            unranked.order_by(Item.created_at.desc(), Item.id.desc()).limit(limit + 1 - len(items))
+        ).all()
+
+    page = items[:limit]
+    next_cursor = None
+    if len(items) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.priority, last.created_at, last.id)
+    return [project(item, fields) for item in page], next_cursor
+
+
+class _BatchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, issue['loc'])) or 'data'}: {issue['msg']}" for issue in error.errors())
+
+
+def _apply_operation(
+    db: Session, user_id: int, operation: ItemBatchOperation, owned: dict[int, Item], deleted: set[int]
+) -> Item | None:
+    """Stage one operation on the session; returns the created or modified item."""
+    if operation.op == "create":
+        try:
+            item_data = ItemCreate.model_validate(operation.data or {})
+        except ValidationError as error:
+            raise _BatchError(status.HTTP_422_UNPROCESSABLE_ENTITY, _validation_detail(error)) from None
+        item = Item(user_id=user_id, **item_data.model_dump())
+        db.add(item)
+        return item
+
+    if operation.item_id is None:
+        raise _BatchError(status.HTTP_422_UNPROCESSABLE_ENTITY, f"item_id is required for {operation.op}")
+    item = owned.get(operation.item_id)
+    if item is None or operation.item_id in deleted:
+        raise _BatchError(status.HTTP_404_NOT_FOUND, "Item not found")
+
+    if operation.op == "delete":
+        db.delete(item)
+        deleted.add(operation.item_id)
+        return None
+    if operation.op == "status":
+        if operation.status not in ITEM_STATUSES:
+            raise _BatchError(
+                status.HTTP_400_BAD_REQUEST, f"Invalid status. Must be one of: {', '.join(ITEM_STATUSES)}"
+            )
+        item.status = operation.status
+        return item
+
+    try:
+        changes = ItemUpdate.model_validate(operation.data or {}).model_dump(exclude_unset=True)
+    except ValidationError as error:
+        raise _BatchError(status.HTTP_422_UNPROCESSABLE_ENTITY, _validation_detail(error)) from None
+    for field, value in changes.items():
+        setattr(item, field, value)
+    return item
+
 
-@router.get("", response_model=list[ItemResponse])
+def _apply_batch(db: Session, user_id: int, batch: ItemBatchRequest) -> ItemBatchResponse:
+    """
+    Stage every operation, then commit once (or roll back an atomic batch with failures).
+
+    The targeted items (with their links, for cascading deletes) are loaded up front by primary
+    key; the flush then groups the writes into executemany INSERT/UPDATE/DELETE statements.
+    """
+    target_ids = {operation.item_id for operation in batch.operations if operation.item_id is not None}
+    owned = {}
+    if target_ids:
+        query = select(Item).where(Item.id.in_(target_ids))
+        if any(operation.op == "delete" for operation in batch.operations):
+            query = query.options(selectinload(Item.links_from), selectinload(Item.links_to))
+        owned = {item.id: item for item in db.scalars(query) if item.user_id == user_id}
+
+    deleted: set[int] = set()
+    staged: list[tuple[ItemBatchOperation, Item | None, _BatchError | None]] = []
+    for operation in batch.operations:
+        try:
+            staged.append((operation, _apply_operation(db, user_id, operation, owned, deleted), None))
+        except _BatchError as error:
+            staged.append((operation, None, error))
+
+    failed = any(error is not None for _, _, error in staged)
+    applied = not (failed and batch.atomic)
+    if applied:
+        db.flush()
+        touched = {item.id for _, item, _ in staged if item is not None and item.id not in deleted}
+        db.commit()
+        # One query refreshes everything the commit expired
+        if touched:
+            db.scalars(select(Item).where(Item.id.in_(touched))).all()
+    else:
+        db.rollback()
+
+    results = []
+    for index, (operation, item, error) in enumerate(staged):
+        result = ItemBatchResult(index=index, op=operation.op, item_id=operation.item_id, ok=False, status_code=200)
+        if error is not None:
+            result.status_code, result.error = error.status_code, error.detail
+        elif not applied:
+            result.status_code, result.error = 424, "Not applied: another operation in this atomic batch failed"
+        else:
+            result.ok = True
+            if operation.op == "create":
+                result.status_code = status.HTTP_201_CREATED
+            if operation.op == "delete":
+                result.status_code = status.HTTP_204_NO_CONTENT
+            elif item is not None and item.id not in deleted:
+                result.item_id, result.item = item.id, ItemResponse.model_validate(item)
+        results.append(result)
+    return ItemBatchResponse(applied=applied, results=results)
+
+
+@router.get("", response_model=list[ItemListEntry], response_model_exclude_unset=True)
 async def get_items(
+    response: Response,
     category: str | None = Query(None),
     status: str | None = Query(None),
     life_area: str | None = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description="Comma-separated item fields to return; `id` is always included"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
-    """Get all items for current user with optional filters"""
+    """
+    Get a page of the current user's items with optional filters.
 
-    query = db.query(Item).filter(Item.user_id == current_user.id)
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page; it is absent on the last one.
+    """
 
-    if category:
-        query = query.filter(Item.category == category)
-    if status:
-        query = query.filter(Item.status == status)
-    if life_area:
-        query = query.filter(Item.life_area == life_area)
+    selected = parse_fields(fields, ITEM_FIELDS)
+    items, next_cursor = await run_db(
+        db, _list_items, current_user.id, category, status, life_area, limit, cursor, selected
+    )
+    set_next_cursor(response, next_cursor)
+    return items
 
-    # Order by priority (descending) and created date
-    items = query.order_by(Item.priority.desc(), Item.created_at.desc()).all()
 
-    return items
+@router.get("/search", response_model=list[ItemSearchHit])
+async def search_user_items(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Search the user's items by meaning of title, description and tags, best match first"""
+
+    hits = await run_db(db, search_items, current_user.id, q, limit)
+    return [ItemSearchHit.model_validate(item).model_copy(update={"score": round(score, 4)}) for item, score in hits]
 
 
 @router.post("", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(
-    item_data: ItemCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    item_data: ItemCreate, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
 ):
     """Create a new item manually"""
 
     new_item = Item(user_id=current_user.id, **item_data.model_dump())
 
-    db.add(new_item)
-    db.commit()
-    db.refresh(new_item)
+    await run_db(db, save_and_refresh, new_item)
 
     return new_item
 
 
+@router.post("/batch", response_model=ItemBatchResponse)
+async def batch_items(
+    batch: ItemBatchRequest, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
+):
+    """
+    Apply create/update/status/delete operations in one transaction.
+
+    Returns a result per operation, in request order. An atomic batch (the default) with any
+    failed operation applies nothing; a non-atomic one commits the operations that succeeded.
+    """
+
+    return await run_db(db, _apply_batch, current_user.id, batch)
+
+
 @router.get("/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_item(item_id: int, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)):
     """Get a specific item"""
 
-    item = db.query(Item).filter(Item.id == item_id, Item.user_id == current_user.id).first()
+    item = await run_db(db, _get_user_item, item_id, current_user.id)
 
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
@@ -64,11 +272,14 @@ async def get_item(item_id: int, current_user: User = Depends(get_current_user),
 
 @router.put("/{item_id}", response_model=ItemResponse)
 async def update_item(
-    item_id: int, item_data: ItemUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    item_id: int,
+    item_data: ItemUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
 ):
     """Update an item"""
 
-    item = db.query(Item).filter(Item.id == item_id, Item.user_id == current_user.id).first()
+    item = await run_db(db, _get_user_item, item_id, current_user.id)
 
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
@@ -78,44 +289,46 @@ async def update_item(
     for field, value in update_data.items():
         setattr(item, field, value)
 
-    db.commit()
-    db.refresh(item)
+    await run_db(db, save_and_refresh, item)
 
     return item
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_item(item_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def delete_item(
+    item_id: int, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
+):
     """Delete an item"""
 
-    item = db.query(Item).filter(Item.id == item_id, Item.user_id == current_user.id).first()
+    item = await run_db(db, _get_user_item, item_id, current_user.id)
 
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
-    db.delete(item)
-    db.commit()
+    await run_db(db, delete_and_commit, item)
 
     return None
 
 
 @router.patch("/{item_id}/status", response_model=ItemResponse)
 async def update_item_status(
-    item_id: int, status_data: dict, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    item_id: int,
+    status_data: dict,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
 ):
     """Update item status (quick action for marking done/undone)"""
 
     new_status = status_data.get("status")
-    if new_status not in ["pending", "in_progress", "done", "archived"]:
+    if new_status not in ITEM_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status. Must be: pending, in_progress, done, or archived")
 
-    item = db.query(Item).filter(Item.id == item_id, Item.user_id == current_user.id).first()
+    item = await run_db(db, _get_user_item, item_id, current_user.id)
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
     item.status = new_status
-    db.commit()
-    db.refresh(item)
+    await run_db(db, save_and_refresh, item)
 
     return item
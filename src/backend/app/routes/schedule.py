@@ -1,47 +1,140 @@
-from datetime import datetime
+import secrets
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import Response
-from icalendar import Calendar, Event
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.config import get_settings
+from app.database import AnySession, get_session, run_db, save_and_refresh
+from app.models.calendar_feed import CalendarFeed
 from app.models.item import Item
 from app.models.user import User
-from app.schemas import ScheduleUpdate
+from app.schemas import FreeSlot, ScheduleConflict, ScheduleUpdate
+from app.services.ics_feed import calendar_rows, fingerprint, ics_cache
+from app.services.schedule_index import schedule_index
+from app.services.scheduling import MIN_BLOCK_MINUTES, SchedulingRules
+from app.utils.auth import create_calendar_token, verify_calendar_token
 from app.utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/schedule", tags=["Schedule"])
 
 
+def _scheduled_items(
+    db: Session, user_id: int, start: datetime | None = None, end: datetime | None = None
+) -> list[Item]:
+    """Scheduled items whose block overlaps `[start, end)`; blocks without an end count as a point in time."""
+    query = db.query(Item).filter(
+        Item.user_id == user_id,
+        Item.scheduled_start.isnot(None),
+    )
+    if end:
+        query = query.filter(Item.scheduled_start < end)
+    if start:
+        query = query.filter(
+            or_(
+                Item.scheduled_end > start,
+                and_(Item.scheduled_end.is_(None), Item.scheduled_start >= start),
+            )
+        )
+    return query.order_by(Item.scheduled_start.asc()).all()
+
+
+def _parse_date(value: str | None, end_of_day: bool = False) -> datetime | None:
+    """ISO date or datetime; a bare end date covers that whole day. Unparseable values are ignored."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if end_of_day and len(value) == len("YYYY-MM-DD"):
+        moment += timedelta(days=1)
+    return moment
+
+
+def _minutes(start: datetime, end: datetime) -> int:
+    return int((end - start).total_seconds() // 60)
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current calendar."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(UTC).replace(tzinfo=None)
+    return last_modified <= since
+
+
+def _calendar_headers(etag: str, last_modified: datetime, disposition: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.replace(tzinfo=UTC), usegmt=True),
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": disposition,
+    }
+
+
+async def _calendar_response(request: Request, db: AnySession, user_id: int, disposition: str) -> Response:
+    """Cached or streamed ICS body with validators; 304 when the client's copy is current."""
+    entry = ics_cache.get(user_id)
+    if entry is None:
+        version = ics_cache.version(user_id)  # read before the rows: a write after this outdates the render
+        rows = await run_db(db, calendar_rows, user_id)
+        etag = fingerprint(rows)
+        entry = ics_cache.revalidate(user_id, version, etag)
+        if entry is None:
+            last_modified = ics_cache.last_modified(user_id, etag, rows)
+            headers = _calendar_headers(etag, last_modified, disposition)
+            if _not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=headers)
+            return StreamingResponse(
+                ics_cache.render(user_id, version, rows, etag, last_modified),
+                media_type="text/calendar",
+                headers=headers,
+            )
+
+    headers = _calendar_headers(entry.etag, entry.last_modified, disposition)
+    if _not_modified(request, entry.etag, entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="text/calendar", headers=headers)
+
+
+def _get_user_item(db: Session, item_id: int, user_id: int) -> Item | None:
+    return (
+        db.query(Item)
+        .filter(
+            Item.id == item_id,
+            Item.user_id == user_id,
+        )
+        .first()
+    )
+
+
 @router.get("", response_model=list[dict])
 async def get_schedule(
     start_date: str | None = Query(None, description="ISO date string YYYY-MM-DD"),
     end_date: str | None = Query(None, description="ISO date string YYYY-MM-DD"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
-    """Get scheduled items for the user within an optional date range."""
-    query = db.query(Item).filter(
-        Item.user_id == current_user.id,
-        Item.scheduled_start.isnot(None),
-    )
+    """Get scheduled items for the user whose blocks overlap an optional date range."""
+    start = _parse_date(start_date)
+    end = _parse_date(end_date, end_of_day=True)
 
-    if start_date:
-        try:
-            start = datetime.fromisoformat(start_date)
-            query = query.filter(Item.scheduled_start >= start)
-        except ValueError:
-            pass
-
-    if end_date:
-        try:
-            end = datetime.fromisoformat(end_date)
-            query = query.filter(Item.scheduled_end <= end)
-        except ValueError:
-            pass
-
-    items = query.order_by(Item.scheduled_start.asc()).all()
+    items = await run_db(db, _scheduled_items, current_user.id, start, end)
 
     return [
         {
@@ -59,22 +152,57 @@ async def get_schedule(
     ]
 
 
+@router.get("/conflicts", response_model=list[ScheduleConflict])
+async def get_schedule_conflicts(
+    start_date: str | None = Query(None, description="ISO date string YYYY-MM-DD"),
+    end_date: str | None = Query(None, description="ISO date string YYYY-MM-DD"),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Pairs of open items whose scheduled blocks overlap, optionally within a date range."""
+    schedule = await run_db(db, schedule_index.get, current_user.id)
+    conflicts = schedule.conflicts_between(_parse_date(start_date), _parse_date(end_date, end_of_day=True))
+    return [
+        ScheduleConflict(
+            item_id=earlier.item_id,
+            title=earlier.title,
+            other_item_id=later.item_id,
+            other_title=later.title,
+            overlap_start=overlap_start.isoformat(),
+            overlap_end=overlap_end.isoformat(),
+            overlap_minutes=_minutes(overlap_start, overlap_end),
+        )
+        for earlier, later, overlap_start, overlap_end in conflicts
+    ]
+
+
+@router.get("/free-slots", response_model=list[FreeSlot])
+async def get_free_slots(
+    duration: int = Query(..., ge=MIN_BLOCK_MINUTES, le=24 * 60, description="Minutes the slot must fit"),
+    days: int | None = Query(None, ge=1, le=30, description="Days ahead to search (default: scheduler horizon)"),
+    limit: int = Query(20, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Working-hour gaps from now that fit `duration` minutes, keeping breaks around booked blocks."""
+    rules = SchedulingRules(horizon_days=days or get_settings().scheduler_horizon_days)
+    schedule = await run_db(db, schedule_index.get, current_user.id)
+    slots = schedule.free_slots(datetime.now(), duration, rules)[:limit]
+    return [
+        FreeSlot(start=start.isoformat(), end=end.isoformat(), duration_minutes=_minutes(start, end))
+        for start, end in slots
+    ]
+
+
 @router.put("/{item_id}")
 async def update_schedule_block(
     item_id: int,
     schedule_data: ScheduleUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
     """Update a scheduled item's time block (for drag-and-drop on frontend)."""
-    item = (
-        db.query(Item)
-        .filter(
-            Item.id == item_id,
-            Item.user_id == current_user.id,
-        )
-        .first()
-    )
+    item = await run_db(db, _get_user_item, item_id, current_user.id)
 
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -94,8 +222,16 @@ async def update_schedule_block(
     if schedule_data.estimated_duration_minutes is not None:
         item.estimated_duration = schedule_data.estimated_duration_minutes
 
-    db.commit()
-    db.refresh(item)
+    await run_db(db, save_and_refresh, item)
+
+    conflicts_with = []
+    if item.scheduled_start and item.scheduled_end:
+        schedule = await run_db(db, schedule_index.get, current_user.id)
+        conflicts_with = [
+            block.item_id
+            for block in schedule.overlapping(item.scheduled_start, item.scheduled_end)
+            if block.item_id != item.id
+        ]
 
     return {
         "item_id": item.id,
@@ -103,48 +239,72 @@ async def update_schedule_block(
         "scheduled_start": item.scheduled_start.isoformat() if item.scheduled_start else None,
         "scheduled_end": item.scheduled_end.isoformat() if item.scheduled_end else None,
         "estimated_duration_minutes": item.estimated_duration,
+        "conflicts_with": conflicts_with,
     }
 
 
 @router.get("/export")
 async def export_ics(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
 ):
     """Export all scheduled items as an .ics calendar file."""
-    items = (
-        db.query(Item)
-        .filter(
-            Item.user_id == current_user.id,
-            Item.scheduled_start.isnot(None),
-        )
-        .order_by(Item.scheduled_start.asc())
-        .all()
-    )
+    return await _calendar_response(request, db, current_user.id, "attachment; filename=clearmind-schedule.ics")
 
-    cal = Calendar()
-    cal.add("prodid", "-//ClearMind//Phase2//EN")
-    cal.add("version", "2.0")
-    cal.add("calscale", "GREGORIAN")
 
-    for item in items:
-        event = Event()
-        event.add("summary", item.title)
-        event.add("description", item.description or f"Category: {item.category}")
-        event.add("dtstart", item.scheduled_start)
+def _feed_secret(db: Session, user_id: int, rotate: bool = False) -> str:
+    """The user's current calendar feed secret, created on first use or replaced when rotating."""
+    feed = db.get(CalendarFeed, user_id)
+    if feed is None or rotate:
+        feed = feed or CalendarFeed(user_id=user_id)
+        feed.secret = secrets.token_urlsafe(24)
+        save_and_refresh(db, feed)
+    return feed.secret
 
-        if item.scheduled_end:
-            event.add("dtend", item.scheduled_end)
 
-        event.add("priority", max(1, min(9, 10 - (item.priority or 5))))  # iCal priority is inverted (1=high)
-        event.add("uid", f"clearmind-item-{item.id}@clearmind.app")
+def _is_current_feed_secret(db: Session, user_id: int, secret: str) -> bool:
+    feed = db.get(CalendarFeed, user_id)
+    return feed is not None and secrets.compare_digest(feed.secret, secret)
 
-        cal.add_component(event)
 
-    ics_content = cal.to_ical()
+def _feed_urls(request: Request, user_id: int, secret: str) -> dict:
+    # Called from /feed-url and /feed-url/rotate; the feed lives next to /feed-url
+    path = request.url.path.removesuffix("/rotate").rsplit("/", 1)[0] + "/feed.ics"
+    url = request.url.replace(path=path, query=urlencode({"token": create_calendar_token(user_id, secret)}))
+    return {"url": str(url.replace(scheme="webcal")), "https_url": str(url)}
 
-    return Response(
-        content=ics_content,
-        media_type="text/calendar",
-        headers={"Content-Disposition": "attachment; filename=clearmind-schedule.ics"},
-    )
+
+@router.get("/feed-url")
+async def get_calendar_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """A webcal:// subscription URL for calendar apps; its token only grants read access to the feed."""
+    return _feed_urls(request, current_user.id, await run_db(db, _feed_secret, current_user.id))
+
+
+@router.post("/feed-url/rotate")
+async def rotate_calendar_feed_url(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """Revoke every issued feed URL (e.g. after one leaked) and return a new one."""
+    secret = await run_db(db, _feed_secret, current_user.id, True)
+    return _feed_urls(request, current_user.id, secret)
+
+
+@router.get("/feed.ics")
+async def calendar_feed(
+    request: Request,
+    token: str = Query(..., description="Calendar feed token from /schedule/feed-url"),
+    db: AnySession = Depends(get_session),
+):
+    """Subscription feed for calendar apps, authenticated by the token in the URL instead of a bearer header."""
+    claims = verify_calendar_token(token)
+    if claims is None or not await run_db(db, _is_current_feed_secret, *claims):
+        raise HTTPException(status_code=401, detail="Invalid calendar feed token")
+    user_id = claims[0]
+    return await _calendar_response(request, db, user_id, "inline; filename=clearmind-schedule.ics")
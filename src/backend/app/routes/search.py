@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.database import AnySession, get_session, run_db
+from app.models.user import User
+from app.schemas import SearchHit, SearchResponse
+from app.services.full_text import SearchScope, search
+from app.utils.dependencies import get_current_user
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("", response_model=SearchResponse)
+async def full_text_search(
+    q: str = Query(..., min_length=1, max_length=500),
+    scope: SearchScope = "items",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_session),
+):
+    """
+    Keyword and "exact phrase" search over item titles/descriptions or chat messages.
+
+    Results are ranked with highlighted snippets (FTS5), or newest first on the LIKE fallback.
+    """
+    hits, engine, has_more = await run_db(db, search, current_user.id, q, scope, limit, offset)
+    return SearchResponse(
+        query=q,
+        scope=scope,
+        engine=engine,
+        results=[SearchHit(**hit) for hit in hits],
+        next_offset=offset + limit if has_more else None,
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AnySession, get_session, run_db
 from app.models.user import User
 from app.schemas import UserProfile, UserResponse
 from app.utils.dependencies import get_current_user
@@ -17,21 +17,23 @@ async def get_my_profile(current_user: User = Depends(get_current_user)):
 
 @router.put("/me", response_model=UserResponse)
 async def update_my_profile(
-    profile_data: UserProfile, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    profile_data: UserProfile, current_user: User = Depends(get_current_user), db: AnySession = Depends(get_session)
 ):
     """Update current user's profile"""
 
-    # Update fields
-    if profile_data.name is not None:
-        current_user.name = profile_data.name
-    if profile_data.occupation is not None:
-        current_user.occupation = profile_data.occupation
+    def apply(session: Session) -> User:
+        # Update fields
+        if profile_data.name is not None:
+            current_user.name = profile_data.name
+        if profile_data.occupation is not None:
+            current_user.occupation = profile_data.occupation
 
-    current_user.goals = profile_data.goals
-    current_user.personality = profile_data.personality
-    current_user.life_areas = profile_data.life_areas
+        current_user.goals = profile_data.goals
+        current_user.personality = profile_data.personality
+        current_user.life_areas = profile_data.life_areas
 
-    db.commit()
-    db.refresh(current_user)
+        session.commit()
+        session.refresh(current_user)
+        return current_user
 
-    return current_user
+    return await run_db(db, apply)
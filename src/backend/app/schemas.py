@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -111,6 +111,89 @@ class ItemResponse(BaseModel):
         from_attributes = True
 
 
+class ItemListEntry(BaseModel):
+    """Item in a list page; with `fields=` only the requested fields (and `id`) are present"""
+
+    id: int
+    user_id: int | None = None
+    title: str | None = None
+    description: str | None = None
+    category: str | None = None
+    subcategory: str | None = None
+    life_area: str | None = None
+    deadline: datetime | None = None
+    status: str | None = None
+    priority: int | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+class ItemBatchOperation(BaseModel):
+    """
+    One operation of `POST /items/batch`.
+
+    `create` takes `data` (ItemCreate fields), `update` takes `item_id` and `data` (ItemUpdate
+    fields), `status` takes `item_id` and `status`, `delete` takes `item_id`.
+    """
+
+    op: Literal["create", "update", "status", "delete"]
+    item_id: int | None = None
+    data: dict[str, Any] | None = None
+    status: str | None = None
+
+
+class ItemBatchRequest(BaseModel):
+    """Operations applied in order in one transaction; with `atomic`, any failure applies none"""
+
+    operations: list[ItemBatchOperation] = Field(..., min_length=1, max_length=500)
+    atomic: bool = True
+
+
+class ItemBatchResult(BaseModel):
+    """Outcome of one batch operation, in request order"""
+
+    index: int
+    op: str
+    item_id: int | None = None
+    ok: bool
+    status_code: int
+    error: str | None = None
+    item: ItemResponse | None = None  # created or updated item
+
+
+class ItemBatchResponse(BaseModel):
+    """Per-operation results; `applied` is False when an atomic batch was rolled back"""
+
+    applied: bool
+    results: list[ItemBatchResult]
+
+
+class ItemSearchHit(ItemResponse):
+    """Item search result with its cosine similarity to the query"""
+
+    score: float = 0.0
+
+
+class SearchHit(BaseModel):
+    """Full-text search match; `title` is the item title or the message role"""
+
+    id: int
+    title: str | None = None
+    snippet: str
+    timestamp: datetime | None = None
+    score: float | None = None  # bm25 relevance (higher is better); None on the LIKE fallback
+
+
+class SearchResponse(BaseModel):
+    """One page of full-text search results"""
+
+    query: str
+    scope: str
+    engine: str  # "fts5" or "like"
+    results: list[SearchHit] = Field(default_factory=list)
+    next_offset: int | None = None
+
+
 # ============================================================================
 # Chat Schemas
 # ============================================================================
@@ -135,6 +218,16 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class MessageListEntry(BaseModel):
+    """Chat history message; with `fields=` only the requested fields (and `id`) are present"""
+
+    id: int
+    role: str | None = None
+    content: str | None = None
+    agent_used: str | None = None
+    timestamp: datetime | None = None
+
+
 class ClassifiedItem(BaseModel):
     """Schema for a classified item from AI"""
 
@@ -278,6 +371,26 @@ class ScheduleBlock(BaseModel):
     scheduled_end: str  # ISO datetime
 
 
+class ScheduleConflict(BaseModel):
+    """Two open items whose scheduled blocks overlap"""
+
+    item_id: int
+    title: str
+    other_item_id: int
+    other_title: str
+    overlap_start: str  # ISO datetime
+    overlap_end: str  # ISO datetime
+    overlap_minutes: int
+
+
+class FreeSlot(BaseModel):
+    """A gap in working hours long enough for the requested duration"""
+
+    start: str  # ISO datetime
+    end: str  # ISO datetime
+    duration_minutes: int
+
+
 class ReflectionSummary(BaseModel):
     """Schema for reflection data from the Reflection/Planner Agent"""
 
@@ -314,11 +427,23 @@ class ReflectionLLMResponse(BaseModel):
     suggestions: list[str] = Field(default_factory=list)
 
 
-class SchedulerLLMResponse(BaseModel):
-    """Strict JSON response for the Scheduler Agent."""
+class DurationEstimate(BaseModel):
+    """LLM duration estimate for one pending task."""
+
+    item_id: int
+    estimated_duration_minutes: int = Field(ge=5, le=480)
+
+
+class DurationEstimateLLMResponse(BaseModel):
+    """Strict JSON response for the Scheduler Agent's duration estimates."""
+
+    estimates: list[DurationEstimate] = Field(default_factory=list)
+
+
+class ScheduleSummaryLLMResponse(BaseModel):
+    """Strict JSON response for the Scheduler Agent's summary of a packed schedule."""
 
     summary: str
-    schedule: list[ScheduleBlock] = Field(default_factory=list)
 
 
 class PlannerLLMResponse(BaseModel):
@@ -368,12 +493,26 @@ class GraphAnalyzerLLMResponse(BaseModel):
     suggested_links: list[GraphSuggestedLink] = Field(default_factory=list)
 
 
+class GraphAnalysisChunk(BaseModel):
+    """Timing and outcome of one LLM request within a graph analysis run."""
+
+    index: int
+    pairs: int | None = None  # Candidate pairs judged; None for a single full prompt
+    elapsed_ms: float
+    link_count: int = 0
+    error: str | None = None
+
+
 class GraphAnalyzeResponse(BaseModel):
     """Response returned after graph analysis creates or reuses links."""
 
     suggested_links: list[ItemLinkResponse] = Field(default_factory=list)
     created_count: int = 0
     skipped_count: int = 0
+    analyzed_count: int = 0  # New or edited items sent for analysis
+    incremental: bool = False
+    chunks: list[GraphAnalysisChunk] = Field(default_factory=list)
+    failed_chunks: int = 0
 
 
 class DashboardActivityDay(BaseModel):
@@ -420,6 +559,14 @@ class GraphData(BaseModel):
     links: list[ItemLinkResponse]
 
 
+class GraphNeighborhood(GraphData):
+    """k-hop subgraph around one node (compact nodes: no descriptions, plus BFS `depth`)."""
+
+    center_id: int
+    depth: int
+    truncated: bool = False
+
+
 class ScheduleUpdate(BaseModel):
     """Schema for updating a schedule block"""
 
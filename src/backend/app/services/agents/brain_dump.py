@@ -4,6 +4,7 @@ Handles unstructured chaotic thoughts, parsing them into actionable tasks and ca
 This is the core classification engine migrated from the original ClassificationService.
 """
 
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
@@ -11,13 +12,18 @@ import google.generativeai as genai
 
 from app.config import get_settings
 from app.schemas import BrainDumpLLMResponse
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async
+from app.services.prompt_context import ContextBudget, PromptContext, goals_text
+from app.services.token_index import UserTokenIndex
 
 
 class BrainDumpAgent:
     """Classifies user brain dumps into structured items using Gemini Flash."""
 
     AGENT_NAME = "brain_dump"
+    GENERATION_KWARGS = {"temperature": 0.3, "max_output_tokens": 2048, "retries": 1, "cache_ttl": 10 * 60}
+    MAX_LINKS_PER_ITEM = 5
+    CONTEXT_BUDGET = ContextBudget(facts=300, history=600, items=0)
 
     def __init__(self):
         settings = get_settings()
@@ -25,7 +31,11 @@ class BrainDumpAgent:
         self.model = genai.GenerativeModel(settings.gemini_flash_model)
 
     def process(
-        self, user_input: str, user_profile: dict, chat_history: list[dict], existing_items: list[dict] = None
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        existing_items: list[dict] | UserTokenIndex = None,
     ) -> dict[str, Any]:
         """
         Main entry point. Classifies input and returns structured agent response.
@@ -33,7 +43,7 @@ class BrainDumpAgent:
         Args:
             user_input: Raw text from the user
             user_profile: User's goals, personality, and life areas
-            existing_items: Optional list of existing items for link detection
+            existing_items: Optional existing items (or the user's token index) for link detection
 
         Returns:
             {
@@ -44,6 +54,34 @@ class BrainDumpAgent:
             }
         """
         extraction = self._classify_input(user_input, user_profile, chat_history)
+        return self._build_result(user_input, user_profile, extraction, existing_items)
+
+    async def process_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], existing_items: list[dict] = None
+    ) -> dict[str, Any]:
+        """Awaitable variant of `process` for use inside async routes."""
+        extraction = await self._classify_input_async(user_input, user_profile, chat_history)
+        return self._build_result(user_input, user_profile, extraction, existing_items)
+
+    async def process_stream(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], existing_items: list[dict] = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Streaming-protocol variant of `process`.
+
+        The reply text is composed locally from the classified items, so it arrives as a single delta.
+        """
+        result = await self.process_async(user_input, user_profile, chat_history, existing_items)
+        yield {"type": "delta", "text": result["message"]}
+        yield {"type": "result", "result": result}
+
+    def _build_result(
+        self,
+        user_input: str,
+        user_profile: dict,
+        extraction: dict[str, list[dict[str, Any]]],
+        existing_items: list[dict] | None,
+    ) -> dict[str, Any]:
         classified_items = extraction.get("extracted_items", [])
         links = self._detect_links(classified_items, existing_items or [])
         message = self._generate_response(user_input, classified_items, user_profile.get("name"))
@@ -63,41 +101,46 @@ class BrainDumpAgent:
         prompt = self._build_classification_prompt(user_input, user_profile, chat_history)
 
         try:
-            result = generate_json(
-                self.model,
-                prompt,
-                BrainDumpLLMResponse,
-                temperature=0.3,
-                max_output_tokens=2048,
-                retries=1,
-            )
-            return {
-                "extracted_items": [item.model_dump() for item in result.extracted_items],
-                "profile_updates": [update.model_dump() for update in result.profile_updates],
-            }
+            result = generate_json(self.model, prompt, BrainDumpLLMResponse, **self.GENERATION_KWARGS)
+            return self._extraction_from_result(result)
+
+        except Exception as e:
+            print(f"[BrainDumpAgent] Classification error: {e}")
+            return {"extracted_items": [], "profile_updates": []}
+
+    async def _classify_input_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict]
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Classify user's brain dump without blocking the event loop."""
+        prompt = self._build_classification_prompt(user_input, user_profile, chat_history)
+
+        try:
+            result = await generate_json_async(self.model, prompt, BrainDumpLLMResponse, **self.GENERATION_KWARGS)
+            return self._extraction_from_result(result)
 
         except Exception as e:
             print(f"[BrainDumpAgent] Classification error: {e}")
             return {"extracted_items": [], "profile_updates": []}
 
+    @staticmethod
+    def _extraction_from_result(result: BrainDumpLLMResponse) -> dict[str, list[dict[str, Any]]]:
+        return {
+            "extracted_items": [item.model_dump() for item in result.extracted_items],
+            "profile_updates": [update.model_dump() for update in result.profile_updates],
+        }
+
     def _build_classification_prompt(self, user_input: str, user_profile: dict, chat_history: list[dict]) -> str:
-        """Build the complete prompt including system instructions and user context."""
-        goals = user_profile.get("goals", {})
+        """Build the complete prompt including system instructions and user context, within CONTEXT_BUDGET."""
         life_areas = user_profile.get("life_areas", [])
-        profile_facts = user_profile.get("context_facts", [])
-
-        goals_text = "\n".join([f"  - {area.capitalize()}: {goal}" for area, goal in goals.items()])
-        facts_text = "\n".join([f"  - {fact}" for fact in profile_facts])
+        context = PromptContext(self.AGENT_NAME, self.CONTEXT_BUDGET, user_input)
+        facts_text = context.facts(user_profile.get("context_facts", []))
         current_date = datetime.now().strftime("%Y-%m-%d")
 
-        history_text = ""
-        if chat_history:
-            history_text = "\n**Recent Conversation History:**\n"
-            for msg in chat_history:
-                role = "Assistant" if msg.get("role") == "assistant" else "User"
-                history_text += f"[{role}]: {msg.get('content')}\n"
+        history_text = context.history(chat_history)
+        if history_text:
+            history_text = "\n**Recent Conversation History:**\n" + history_text + "\n"
 
-        return f"""You are the "Brain Dump & Memory Agent" for a Personal OS. The user will dictate chaotic streams of consciousness.
+        return context.finish(f"""You are the "Brain Dump & Memory Agent" for a Personal OS. The user will dictate chaotic streams of consciousness.
 
 YOUR TASKS:
 1. Extract actionable items (Tasks, Ideas, Thoughts).
@@ -120,9 +163,9 @@ ITEM CLASSIFICATION RULES:
 **User Profile:**
 Life Areas: {", ".join(life_areas) if life_areas else "Not specified"}
 Goals:
-{goals_text if goals_text else "  (None specified yet)"}
+{goals_text(user_profile.get("goals", {}))}
 Known Long-Term Facts:
-{facts_text if facts_text else "  (None specified yet)"}
+{facts_text}
 {history_text}
 **User Input:**
 "{user_input}"
@@ -144,38 +187,35 @@ You must output ONLY valid JSON in the following structure. If no long-term fact
       "fact": "string (the extracted fact translated into a clear, objective statement, e.g., 'User prefers working out in the mornings.')"
     }}
   ]
-}}"""
+}}""")
 
-    def _detect_links(self, new_items: list[dict], existing_items: list[dict]) -> list[dict]:
+    def _detect_links(self, new_items: list[dict], existing_items: list[dict] | UserTokenIndex) -> list[dict]:
         """
         Detect potential links between newly classified items and existing items.
-        Uses simple keyword matching for now — can be upgraded to semantic similarity later.
+
+        An existing item is linked when it shares the life area and at least one title keyword
+        (stopwords dropped, lightly stemmed). `existing_items` is normally the user's inverted
+        token index, so each new item costs a few dict lookups over their whole history; a plain
+        item list is indexed on the fly.
         """
         links = []
-        if not existing_items:
+        index = (
+            existing_items if isinstance(existing_items, UserTokenIndex) else UserTokenIndex.from_items(existing_items)
+        )
+        if not len(index):
             return links
 
         for new_item in new_items:
-            new_title = new_item.get("title", "").lower()
-            new_area = new_item.get("life_area", "").lower()
-
-            for existing in existing_items:
-                existing_title = existing.get("title", "").lower()
-                existing_area = existing.get("life_area", "").lower()
-
-                # Link if same life area and overlapping keywords
-                if new_area and new_area == existing_area:
-                    new_words = set(new_title.split())
-                    existing_words = set(existing_title.split())
-                    common = new_words & existing_words - {"the", "a", "an", "to", "for", "and", "or", "my", "i"}
-                    if len(common) >= 1:
-                        links.append(
-                            {
-                                "source_title": new_item["title"],
-                                "target_id": existing.get("id"),
-                                "link_type": "relates_to",
-                            }
-                        )
+            for target_id in index.related(
+                new_item.get("title", ""), new_item.get("life_area"), self.MAX_LINKS_PER_ITEM
+            ):
+                links.append(
+                    {
+                        "source_title": new_item["title"],
+                        "target_id": target_id,
+                        "link_type": "relates_to",
+                    }
+                )
 
         return links
 
@@ -1,51 +1,206 @@
+import asyncio
 import json
+import time
+from dataclasses import dataclass, field
 from typing import Any
 
 import google.generativeai as genai
 
 from app.config import get_settings
 from app.schemas import GraphAnalyzerLLMResponse
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async
+from app.services.prompt_context import encode_table, estimate_tokens
+from app.services.similarity import candidate_pairs
+
+# Longest description sent per item in prefiltered (batched) prompts
+COMPACT_DESCRIPTION_CHARS = 280
+ITEM_COLUMNS = ("id", "type", "title", "description", "tags")
+
+
+def _compact_item(item: dict[str, Any]) -> dict[str, Any]:
+    description = item.get("description") or ""
+    if len(description) > COMPACT_DESCRIPTION_CHARS:
+        description = description[:COMPACT_DESCRIPTION_CHARS].rstrip() + "..."
+    return {**item, "description": description}
+
+
+@dataclass
+class GraphAnalysisRun:
+    """Merged result of a chunked analysis; `chunks` holds per-request timings and errors."""
+
+    links: list[dict[str, Any]] = field(default_factory=list)
+    chunks: list[dict[str, Any]] = field(default_factory=list)
+    error: Exception | None = None  # Set only when every chunk failed
+
+    @property
+    def failed_chunks(self) -> int:
+        return sum(1 for chunk in self.chunks if chunk["error"])
 
 
 class GraphAnalyzerAgent:
     """Discovers semantic item links for the knowledge graph using Gemma."""
 
     AGENT_NAME = "graph_analyzer"
+    GENERATION_KWARGS = {"temperature": 0.2, "max_output_tokens": 4096, "retries": 1, "cache_ttl": 6 * 3600}
 
     def __init__(self):
         settings = get_settings()
         genai.configure(api_key=settings.google_api_key)
         self.model = genai.GenerativeModel(settings.gemini_pro_model)
+        self.candidate_k = settings.graph_candidate_k
+        self.prefilter_min_items = settings.graph_prefilter_min_items
+        self.pair_batch_size = settings.graph_pair_batch_size
+        self.max_concurrency = settings.graph_max_concurrency
 
-    def analyze(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    def analyze(self, items: list[dict[str, Any]], focus_ids: set[int] | None = None) -> list[dict[str, Any]]:
         if len(items) < 2:
             return []
 
-        prompt = self._build_prompt(items)
+        links: list[dict[str, Any]] = []
         try:
-            result = generate_json(
-                self.model,
-                prompt,
-                GraphAnalyzerLLMResponse,
-                temperature=0.2,
-                max_output_tokens=4096,
-                retries=1,
-            )
-            return [
-                link.model_dump()
-                for link in result.suggested_links
-                if link.weight > 20 and link.source_id != link.target_id
-            ]
+            for prompt, pairs in self.plan_requests(items, focus_ids):
+                result = generate_json(self.model, prompt, GraphAnalyzerLLMResponse, **self.GENERATION_KWARGS)
+                links.extend(self._links_from_result(result, focus_ids, pairs))
+            return links
         except Exception as exc:
             print(f"[GraphAnalyzerAgent] Error: {exc}")
             return []
 
-    def _build_prompt(self, items: list[dict[str, Any]]) -> str:
+    async def analyze_async(
+        self, items: list[dict[str, Any]], focus_ids: set[int] | None = None, *, raise_errors: bool = False
+    ) -> list[dict[str, Any]]:
+        """
+        Awaitable variant of `analyze` for use inside async routes.
+
+        With `focus_ids`, only links touching at least one of those items are requested and kept.
+        Links from chunks that succeeded are returned even if others failed; `raise_errors` re-raises
+        when every chunk failed, so callers can tell a failed run apart from one that found nothing.
+        """
+        run = await self.analyze_chunks_async(items, focus_ids)
+        if run.error is not None and raise_errors:
+            raise run.error
+        return run.links
+
+    async def analyze_chunks_async(
+        self, items: list[dict[str, Any]], focus_ids: set[int] | None = None
+    ) -> GraphAnalysisRun:
+        """Run every planned chunk concurrently (at most `max_concurrency` in flight) and merge the links."""
+        if len(items) < 2:
+            return GraphAnalysisRun()
+
+        requests = self.plan_requests(items, focus_ids)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_chunk(index: int, prompt: str, pairs: set[tuple[int, int]] | None):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await generate_json_async(
+                        self.model, prompt, GraphAnalyzerLLMResponse, **self.GENERATION_KWARGS
+                    )
+                    links, error = self._links_from_result(result, focus_ids, pairs), None
+                except Exception as exc:
+                    print(f"[GraphAnalyzerAgent] Chunk {index} error: {exc}")
+                    links, error = [], exc
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            chunk = {
+                "index": index,
+                "pairs": len(pairs) if pairs is not None else None,
+                "elapsed_ms": elapsed_ms,
+                "link_count": len(links),
+                "error": str(error) if error else None,
+            }
+            return links, chunk, error
+
+        outcomes = await asyncio.gather(*(run_chunk(i, prompt, pairs) for i, (prompt, pairs) in enumerate(requests)))
+
+        merged: dict[tuple[int, int, str], dict[str, Any]] = {}
+        for links, _, _ in outcomes:
+            for link in links:
+                key = (link["source_id"], link["target_id"], link["link_type"])
+                if key not in merged or link["weight"] > merged[key]["weight"]:
+                    merged[key] = link
+        errors = [error for _, _, error in outcomes if error is not None]
+        return GraphAnalysisRun(
+            links=list(merged.values()),
+            chunks=[chunk for _, chunk, _ in outcomes],
+            error=errors[0] if errors and len(errors) == len(outcomes) else None,
+        )
+
+    def plan_requests(
+        self, items: list[dict[str, Any]], focus_ids: set[int] | None = None
+    ) -> list[tuple[str, set[tuple[int, int]] | None]]:
+        """
+        Split an analysis into `(prompt, allowed_pairs)` LLM requests.
+
+        Small inputs go out as one prompt over every item (`allowed_pairs` is None). From
+        `prefilter_min_items` items on, a local TF-IDF prefilter picks each item's top-`candidate_k`
+        most similar partners and the pairs are sent in compact batches of `pair_batch_size`.
+        """
+        if len(items) < self.prefilter_min_items:
+            prompt = self._build_prompt(items, focus_ids)
+            print(f"[PromptContext] {self.AGENT_NAME}: ~{estimate_tokens(prompt)} prompt tokens ({len(items)} items)")
+            return [(prompt, None)]
+
+        pairs = [(a, b) for a, b, _ in candidate_pairs(items, self.candidate_k, focus_ids)]
+        by_id = {item["id"]: item for item in items}
+        requests = []
+        for start in range(0, len(pairs), self.pair_batch_size):
+            batch = pairs[start : start + self.pair_batch_size]
+            batch_items = [_compact_item(by_id[item_id]) for item_id in sorted({i for pair in batch for i in pair})]
+            requests.append((self._build_prompt(batch_items, focus_ids, batch), set(batch)))
+        print(f"[GraphAnalyzerAgent] Prefilter: {len(items)} items -> {len(pairs)} pairs in {len(requests)} requests")
+        if requests:
+            tokens = [estimate_tokens(prompt) for prompt, _ in requests]
+            print(
+                f"[PromptContext] {self.AGENT_NAME}: ~{sum(tokens)} prompt tokens over {len(tokens)} requests "
+                f"(max ~{max(tokens)})"
+            )
+        return requests
+
+    @staticmethod
+    def _links_from_result(
+        result: GraphAnalyzerLLMResponse,
+        focus_ids: set[int] | None = None,
+        allowed_pairs: set[tuple[int, int]] | None = None,
+    ) -> list[dict[str, Any]]:
+        return [
+            link.model_dump()
+            for link in result.suggested_links
+            if link.weight > 20
+            and link.source_id != link.target_id
+            and (not focus_ids or link.source_id in focus_ids or link.target_id in focus_ids)
+            and (
+                allowed_pairs is None
+                or (min(link.source_id, link.target_id), max(link.source_id, link.target_id)) in allowed_pairs
+            )
+        ]
+
+    def _build_prompt(
+        self,
+        items: list[dict[str, Any]],
+        focus_ids: set[int] | None = None,
+        pairs: list[tuple[int, int]] | None = None,
+    ) -> str:
+        extra_rules = []
+        if focus_ids:
+            extra_rules.append(
+                "Items with ids in NEW_ITEM_IDS were added or edited since the last analysis; the others are "
+                "already analyzed. Every link MUST involve at least one NEW_ITEM_IDS item."
+                f"\n\nNEW_ITEM_IDS: {sorted(focus_ids)}"
+            )
+        if pairs:
+            extra_rules.append(
+                "Only evaluate the id pairs in CANDIDATE_PAIRS (pre-selected as lexically similar); "
+                "never link any other pair."
+                f"\n\nCANDIDATE_PAIRS: {json.dumps([list(pair) for pair in pairs], separators=(',', ':'))}"
+            )
+        extra = "".join(f"\n{number}. {rule}" for number, rule in enumerate(extra_rules, start=4))
+        items_table = encode_table(items, ITEM_COLUMNS, max_cell=None)
         return f"""You are the "Graph Analyzer Agent" for a Personal OS. Your core function is to analyze a list of unstructured user items (Tasks, Thoughts, Ideas) and discover hidden, meaningful semantic relationships between them.
 
 INPUT FORMAT:
-You will receive a JSON list of items. Each item has an `id`, `type`, `title`, `description`, and `tags`.
+You will receive the items as a table: a header row `id|type|title|description|tags`, then one row per item with the fields separated by `|` (tags are comma-separated).
 
 YOUR TASK:
 Analyze the items and find pairs that have a logical connection but are not yet linked. For each discovered connection, calculate a "Connection Weight" from 0 to 100 based on the following criteria:
@@ -56,10 +211,10 @@ Analyze the items and find pairs that have a logical connection but are not yet
 RULES:
 1. Do NOT force connections. If two items are unrelated, do not link them.
 2. Only suggest links with a weight greater than 20.
-3. Keep the `ai_reasoning` extremely concise (under 15 words).
+3. Keep the `ai_reasoning` extremely concise (under 15 words).{extra}
 
 ITEMS:
-{json.dumps(items, ensure_ascii=True, indent=2)}
+{items_table}
 
 OUTPUT FORMAT:
 You must output ONLY valid JSON in the exact following structure, with no markdown formatting or conversational text:
@@ -4,20 +4,25 @@ Acts as an adviser, looking at long-term Goals in the database and
 cross-referencing them with daily actions. Uses Gemma 4 31B for deep reasoning.
 """
 
-import json
+from collections.abc import AsyncIterator
 from typing import Any
 
 import google.generativeai as genai
 
 from app.config import get_settings
 from app.schemas import PlannerLLMResponse
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async, stream_json_field
+from app.services.prompt_context import ContextBudget, PromptContext, goals_text
 
 
 class PlannerAgent:
     """Provides strategic life advice by cross-referencing goals with actions using Gemma 4 31B."""
 
     AGENT_NAME = "planner"
+    GENERATION_KWARGS = {"temperature": 0.7, "max_output_tokens": 4096, "retries": 1, "bypass_cache": True}
+    CONTEXT_BUDGET = ContextBudget(facts=300, history=600, items=2000)
+    TASK_COLUMNS = ("title", "category", "subcategory", "life_area", "priority", "deadline")
+    IDEA_COLUMNS = ("title", "category", "subcategory", "life_area")
 
     def __init__(self):
         settings = get_settings()
@@ -25,7 +30,12 @@ class PlannerAgent:
         self.model = genai.GenerativeModel(settings.gemini_pro_model)
 
     def process(
-        self, user_input: str, user_profile: dict, chat_history: list[dict], all_items: list[dict]
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        all_items: list[dict],
+        item_counts: dict[str, int] | None = None,
     ) -> dict[str, Any]:
         """
         Analyze alignment between user's goals and their actual activity.
@@ -33,66 +43,107 @@ class PlannerAgent:
         Returns:
             { "agent": "planner", "message": "Strategic advice...", "reflection": {...} }
         """
-        prompt = self._build_prompt(user_input, user_profile, chat_history, all_items)
+        prompt = self._build_prompt(user_input, user_profile, chat_history, all_items, item_counts)
 
         try:
-            result = generate_json(
-                self.model,
-                prompt,
-                PlannerLLMResponse,
-                temperature=0.7,
-                max_output_tokens=4096,
-                retries=1,
-            )
-            return {
-                "agent": self.AGENT_NAME,
-                "message": result.strategic_advice,
-                "reflection": {
-                    "summary": result.alignment_summary,
-                    "patterns": result.gap_analysis,
-                    "suggestions": result.action_items,
-                },
-            }
+            result = generate_json(self.model, prompt, PlannerLLMResponse, **self.GENERATION_KWARGS)
+            return self._response_from_result(result)
         except Exception as e:
             print(f"[PlannerAgent] Error: {e}")
-            return {
-                "agent": self.AGENT_NAME,
-                "message": "I had trouble analyzing your goals right now. Please try again.",
-                "reflection": None,
-            }
+            return self._error_response()
+
+    async def process_async(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        all_items: list[dict],
+        item_counts: dict[str, int] | None = None,
+    ) -> dict[str, Any]:
+        """Awaitable variant of `process` for use inside async routes."""
+        prompt = self._build_prompt(user_input, user_profile, chat_history, all_items, item_counts)
+
+        try:
+            result = await generate_json_async(self.model, prompt, PlannerLLMResponse, **self.GENERATION_KWARGS)
+            return self._response_from_result(result)
+        except Exception as e:
+            print(f"[PlannerAgent] Error: {e}")
+            return self._error_response()
+
+    async def process_stream(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        all_items: list[dict],
+        item_counts: dict[str, int] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield `delta` events with the strategic advice as it generates, then one `result` event."""
+        prompt = self._build_prompt(user_input, user_profile, chat_history, all_items, item_counts)
+
+        try:
+            async for kind, payload in stream_json_field(
+                self.model, prompt, PlannerLLMResponse, "strategic_advice", **self.GENERATION_KWARGS
+            ):
+                if kind == "delta":
+                    yield {"type": "delta", "text": payload}
+                else:
+                    response = self._response_from_result(payload)
+        except Exception as e:
+            print(f"[PlannerAgent] Error: {e}")
+            response = self._error_response()
+
+        yield {"type": "result", "result": response}
+
+    def _response_from_result(self, result: PlannerLLMResponse) -> dict[str, Any]:
+        return {
+            "agent": self.AGENT_NAME,
+            "message": result.strategic_advice,
+            "reflection": {
+                "summary": result.alignment_summary,
+                "patterns": result.gap_analysis,
+                "suggestions": result.action_items,
+            },
+        }
+
+    def _error_response(self) -> dict[str, Any]:
+        return {
+            "agent": self.AGENT_NAME,
+            "message": "I had trouble analyzing your goals right now. Please try again.",
+            "reflection": None,
+        }
 
     def _build_prompt(
-        self, user_input: str, user_profile: dict, chat_history: list[dict], all_items: list[dict]
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        all_items: list[dict],
+        item_counts: dict[str, int] | None = None,
     ) -> str:
-        """Build the strategic planning prompt."""
+        """Build the strategic planning prompt within CONTEXT_BUDGET."""
         goals = user_profile.get("goals", {})
         life_areas = user_profile.get("life_areas", [])
         user_name = user_profile.get("name", "User")
-        profile_facts = user_profile.get("context_facts", [])
-        facts_text = "\n".join([f"  - {fact}" for fact in profile_facts]) or "  (None specified yet)"
+        context = PromptContext(self.AGENT_NAME, self.CONTEXT_BUDGET, user_input)
+        facts_text = context.facts(user_profile.get("context_facts", []))
 
         # Separate items by status
         completed = [i for i in all_items if i.get("status") == "done"]
         pending = [i for i in all_items if i.get("status") == "pending"]
-        ideas = [i for i in all_items if i.get("category") == "idea"]
-
-        def format_items(items_list: list[dict], limit: int = 30) -> str:
-            if not items_list:
-                return "  (None)"
-            lines = []
-            for item in items_list[:limit]:
-                lines.append(f"  - ({item.get('category')}/{item.get('subcategory', 'general')}) {item.get('title')}")
-            return "\n".join(lines)
-
-        history_text = ""
-        if chat_history:
-            history_lines = []
-            for msg in chat_history:
-                role = "Assistant" if msg.get("role") == "assistant" else "User"
-                history_lines.append(f"[{role}]: {msg.get('content')}")
-            history_text = "\n**Recent Conversation History:**\n" + "\n".join(history_lines) + "\n"
-
-        return f"""You are a strategic life advisor for {user_name}. Your role is to deeply analyze the alignment between their stated goals and actual behavior.
+        ideas = [i for i in all_items if i.get("category") in ("idea", "thought") and i.get("status") != "done"]
+        counts = {"done": len(completed), "pending": len(pending), "ideas": len(ideas), **(item_counts or {})}
+
+        budget = self.CONTEXT_BUDGET.items
+        pending_text = context.items("pending", pending, self.TASK_COLUMNS, budget * 45 // 100, recency=False)
+        completed_text = context.items("done", completed, self.TASK_COLUMNS, budget * 30 // 100)
+        ideas_text = context.items("ideas", ideas, self.IDEA_COLUMNS, budget * 25 // 100)
+
+        history_text = context.history(chat_history)
+        if history_text:
+            history_text = "\n**Recent Conversation History:**\n" + history_text + "\n"
+
+        return context.finish(f"""You are a strategic life advisor for {user_name}. Your role is to deeply analyze the alignment between their stated goals and actual behavior.
 
 **IMPORTANT: Deep Analysis Required**
 Before writing your response, carefully cross-reference the conversation history, completed tasks, pending tasks, and ideas against the user's stated goals. Consider:
@@ -102,21 +153,23 @@ Before writing your response, carefully cross-reference the conversation history
 - What does the recent conversation history reveal about the user's current priorities and mindset?
 
 **User's Goals:**
-{json.dumps(goals, indent=2) if goals else "(No goals defined yet)"}
+{goals_text(goals, "  (No goals defined yet)")}
 
 **Life Areas:** {", ".join(life_areas) if life_areas else "Not specified"}
 
 **Known Long-Term Facts:**
 {facts_text}
 
-**Completed Tasks ({len(completed)}):**
-{format_items(completed)}
+Items are tables with one header row; the most relevant to the question come first.
+
+**Completed Tasks ({counts["done"]}):**
+{completed_text}
 
-**Pending Tasks ({len(pending)}):**
-{format_items(pending)}
+**Pending Tasks ({counts["pending"]}):**
+{pending_text}
 
-**Ideas & Thoughts ({len(ideas)}):**
-{format_items(ideas)}
+**Ideas & Thoughts ({counts["ideas"]}):**
+{ideas_text}
 {history_text}
 **User's Question:** "{user_input}"
 
@@ -134,4 +187,4 @@ You MUST respond with ONLY a valid JSON object (no extra text before or after),
   "action_items": ["Specific action 1", "Specific action 2", "Specific action 3"]
 }}
 
-Be encouraging but honest. Ground advice in their actual data."""
+Be encouraging but honest. Ground advice in their actual data.""")
@@ -5,20 +5,24 @@ an evolving, summarized profile of the user's mental state and habits.
 Uses Gemma 4 31B for deep reasoning with native thinking capabilities.
 """
 
-import json
+from collections.abc import AsyncIterator
 from typing import Any
 
 import google.generativeai as genai
 
 from app.config import get_settings
 from app.schemas import ReflectionLLMResponse
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async, stream_json_field
+from app.services.prompt_context import ContextBudget, PromptContext, goals_text
 
 
 class ReflectionAgent:
     """Analyzes user history and provides mental-state reflections using Gemma 4 31B."""
 
     AGENT_NAME = "reflection"
+    GENERATION_KWARGS = {"temperature": 0.7, "max_output_tokens": 4096, "retries": 1, "bypass_cache": True}
+    CONTEXT_BUDGET = ContextBudget(facts=300, history=800, items=1500)
+    ITEM_COLUMNS = ("status", "category", "title", "created_at")
 
     def __init__(self):
         settings = get_settings()
@@ -61,32 +65,80 @@ class ReflectionAgent:
         )
 
         try:
-            result = generate_json(
-                self.model,
-                prompt,
-                ReflectionLLMResponse,
-                temperature=0.7,
-                max_output_tokens=4096,
-                retries=1,
-            )
-
-            return {
-                "agent": self.AGENT_NAME,
-                "message": result.conversational_response,
-                "reflection": {
-                    "summary": result.mental_state_summary,
-                    "patterns": result.patterns,
-                    "suggestions": result.suggestions,
-                },
-            }
+            result = generate_json(self.model, prompt, ReflectionLLMResponse, **self.GENERATION_KWARGS)
+            return self._response_from_result(result)
 
         except Exception as e:
             print(f"[ReflectionAgent] Error: {e}")
-            return {
-                "agent": self.AGENT_NAME,
-                "message": "I had trouble analyzing your history right now. Let's try again in a moment.",
-                "reflection": None,
-            }
+            return self._error_response()
+
+    async def process_async(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        recent_items: list[dict],
+        recent_conversations: list[dict],
+        last_reflection: dict | None = None,
+    ) -> dict[str, Any]:
+        """Awaitable variant of `process` for use inside async routes."""
+        prompt = self._build_prompt(
+            user_input, user_profile, chat_history, recent_items, recent_conversations, last_reflection
+        )
+
+        try:
+            result = await generate_json_async(self.model, prompt, ReflectionLLMResponse, **self.GENERATION_KWARGS)
+            return self._response_from_result(result)
+
+        except Exception as e:
+            print(f"[ReflectionAgent] Error: {e}")
+            return self._error_response()
+
+    async def process_stream(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        recent_items: list[dict],
+        recent_conversations: list[dict],
+        last_reflection: dict | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield `delta` events with the conversational reply as it generates, then one `result` event."""
+        prompt = self._build_prompt(
+            user_input, user_profile, chat_history, recent_items, recent_conversations, last_reflection
+        )
+
+        try:
+            async for kind, payload in stream_json_field(
+                self.model, prompt, ReflectionLLMResponse, "conversational_response", **self.GENERATION_KWARGS
+            ):
+                if kind == "delta":
+                    yield {"type": "delta", "text": payload}
+                else:
+                    response = self._response_from_result(payload)
+        except Exception as e:
+            print(f"[ReflectionAgent] Error: {e}")
+            response = self._error_response()
+
+        yield {"type": "result", "result": response}
+
+    def _response_from_result(self, result: ReflectionLLMResponse) -> dict[str, Any]:
+        return {
+            "agent": self.AGENT_NAME,
+            "message": result.conversational_response,
+            "reflection": {
+                "summary": result.mental_state_summary,
+                "patterns": result.patterns,
+                "suggestions": result.suggestions,
+            },
+        }
+
+    def _error_response(self) -> dict[str, Any]:
+        return {
+            "agent": self.AGENT_NAME,
+            "message": "I had trouble analyzing your history right now. Let's try again in a moment.",
+            "reflection": None,
+        }
 
     def _build_prompt(
         self,
@@ -97,52 +149,25 @@ class ReflectionAgent:
         recent_conversations: list[dict],
         last_reflection: dict | None,
     ) -> str:
-        """Build the reflection analysis prompt with full historical context."""
+        """Build the reflection analysis prompt within CONTEXT_BUDGET."""
         goals = user_profile.get("goals", {})
         life_areas = user_profile.get("life_areas", [])
         user_name = user_profile.get("name", "User")
-        profile_facts = user_profile.get("context_facts", [])
-        facts_text = "\n".join([f"  - {fact}" for fact in profile_facts]) or "  (None specified yet)"
-
-        # Format items history
-        items_text = ""
-        if recent_items:
-            items_lines = []
-            for item in recent_items[:50]:  # Cap at 50 items
-                status = item.get("status", "pending")
-                cat = item.get("category", "unknown")
-                title = item.get("title", "")
-                created = item.get("created_at", "")
-                items_lines.append(f"  [{status}] ({cat}) {title} — created {created}")
-            items_text = "\n".join(items_lines)
-        else:
-            items_text = "  (No items yet)"
-
-        # Format chat history
-        history_text = ""
-        if chat_history:
-            history_lines = []
-            for msg in chat_history:
-                role = "Assistant" if msg.get("role") == "assistant" else "User"
-                content = msg.get("content", "")
-                history_lines.append(f"  [{role}]: {content}")
-            history_text = "\n".join(history_lines)
-        else:
-            history_text = "  (No recent messages)"
+        context = PromptContext(self.AGENT_NAME, self.CONTEXT_BUDGET, user_input)
+        facts_text = context.facts(user_profile.get("context_facts", []))
+        items_text = context.items("items", recent_items, self.ITEM_COLUMNS, empty="  (No items yet)")
+        history_text = context.history(chat_history, indent="  ") or "  (No recent messages)"
 
         # Format old conversation history (from previous architecture, if any)
-        conv_text = ""
-        if recent_conversations:
-            conv_lines = []
-            for conv in recent_conversations[:10]:  # Cap at 10
-                messages = conv.get("messages", [])
-                for msg in messages:
-                    role = msg.get("role", "")
-                    content = msg.get("content", "")[:200]  # Truncate
-                    conv_lines.append(f"  [{role}]: {content}")
-            conv_text = "\n".join(conv_lines)
-        else:
-            conv_text = "  (No old conversation history)"
+        conv_lines = []
+        for conv in recent_conversations[:10]:  # Cap at 10
+            for msg in conv.get("messages", []):
+                content = " ".join(str(msg.get("content", "")).split())[:200]  # Truncate
+                conv_lines.append(f"  [{msg.get('role', '')}]: {content}")
+        conv_text = (
+            "\n".join(context.fill("legacy", conv_lines, self.CONTEXT_BUDGET.history // 2))
+            or "  (No old conversation history)"
+        )
 
         # Format previous reflection
         prev_reflection_text = ""
@@ -152,12 +177,12 @@ class ReflectionAgent:
 {last_reflection.get("summary", "None")}
 
 **Previously Identified Patterns:**
-{json.dumps(last_reflection.get("patterns", []), indent=2)}
+{goals_text(last_reflection.get("patterns", []), "  (None)")}
 """
         else:
             prev_reflection_text = "**Previous Reflection:** None (first reflection session)"
 
-        return f"""You are a thoughtful personal reflection advisor for {user_name}. Your role is to deeply analyze the user's recent activities, tasks, thoughts, and conversations to provide insightful observations about their mental state, behavioral patterns, and habits.
+        return context.finish(f"""You are a thoughtful personal reflection advisor for {user_name}. Your role is to deeply analyze the user's recent activities, tasks, thoughts, and conversations to provide insightful observations about their mental state, behavioral patterns, and habits.
 
 **IMPORTANT: Deep Analysis Required**
 Before writing your response, carefully study ALL the data provided below. Cross-reference the conversation history with the items database to find hidden patterns. Consider:
@@ -168,14 +193,14 @@ Before writing your response, carefully study ALL the data provided below. Cross
 
 **User's Life Areas:** {", ".join(life_areas) if life_areas else "Not specified"}
 **User's Goals:**
-{json.dumps(goals, indent=2) if goals else "  (None specified)"}
+{goals_text(goals, "  (None specified)")}
 
 **Known Long-Term Facts:**
 {facts_text}
 
 ---
 
-**Recent Items (Tasks, Ideas, Thoughts):**
+**Recent Items (Tasks, Ideas, Thoughts; table with one header row, most relevant first):**
 {items_text}
 
 **Old Conversations (Legacy):**
@@ -207,4 +232,4 @@ You MUST respond with ONLY a valid JSON object (no extra text before or after),
   "suggestions": ["Actionable suggestion 1", "Actionable suggestion 2"]
 }}
 
-Be empathetic, not clinical. You're a trusted advisor, not a therapist. Ground your observations in the actual data you see."""
+Be empathetic, not clinical. You're a trusted advisor, not a therapist. Ground your observations in the actual data you see.""")
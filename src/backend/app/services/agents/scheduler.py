@@ -1,118 +1,265 @@
 """
 Agent C — Scheduler Agent (gemini-2.5-flash)
-Takes tasks and assigns estimated durations and optimal time blocks.
-Uses Flash model for fast structured JSON output.
+Packs pending tasks into free time with the local scheduling engine
+(`app.services.scheduling`). Flash only estimates durations for tasks that have
+none and writes the summary; in fast mode (SCHEDULER_FAST_MODE) no LLM is called.
 """
 
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
 import google.generativeai as genai
 
 from app.config import get_settings
-from app.schemas import SchedulerLLMResponse
-from app.services.llm_json import generate_json
+from app.schemas import DurationEstimateLLMResponse, ScheduleSummaryLLMResponse
+from app.services.llm_json import generate_json, generate_json_async, stream_json_field
+from app.services.prompt_context import ContextBudget, PromptContext, encode_table
+from app.services.scheduling import SchedulePlan, SchedulingRules, describe_plan, pack_schedule
 
 
 class SchedulerAgent:
-    """Creates optimized daily/weekly schedules from pending tasks using Gemini Flash."""
+    """Creates deterministic schedules from pending tasks; Gemini Flash estimates durations and narrates."""
 
     AGENT_NAME = "scheduler"
+    GENERATION_KWARGS = {"temperature": 0.2, "max_output_tokens": 2048, "retries": 1, "cache_ttl": 5 * 60}
+    SUMMARY_KWARGS = {"temperature": 0.4, "max_output_tokens": 512, "retries": 1}
+    CONTEXT_BUDGET = ContextBudget(facts=200, history=0, items=0)
 
     def __init__(self):
         settings = get_settings()
         genai.configure(api_key=settings.google_api_key)
-        self.model = genai.GenerativeModel(settings.gemini_pro_model)
+        self.model = genai.GenerativeModel(settings.gemini_flash_model)
+        self.fast_mode = settings.scheduler_fast_mode
+        self.rules = SchedulingRules(horizon_days=settings.scheduler_horizon_days)
 
     def process(
-        self, user_input: str, user_profile: dict, chat_history: list[dict], pending_items: list[dict]
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        pending_items: list[dict],
+        busy_blocks: list[tuple[datetime, datetime]] | None = None,
     ) -> dict[str, Any]:
         """
-        Generate an optimized schedule from the user's pending tasks.
+        Generate a schedule from the user's pending tasks around already booked blocks.
 
         Returns:
             { "agent": "scheduler", "message": "...", "schedule": [...] }
         """
         if not pending_items:
-            return {
-                "agent": self.AGENT_NAME,
-                "message": "You don't have any pending tasks to schedule! Add some tasks first via Brain Dump.",
-                "schedule": [],
-            }
+            return self._empty_response(bool(busy_blocks))
 
-        prompt = self._build_prompt(user_input, user_profile, chat_history, pending_items)
+        plan = self._plan(pending_items, busy_blocks, self._estimate_durations(pending_items))
+        if plan is None:
+            return self._error_response()
 
+        summary = describe_plan(plan, self.rules)
+        if not self.fast_mode:
+            try:
+                result = generate_json(
+                    self.model,
+                    self._summary_prompt(user_input, user_profile, plan),
+                    ScheduleSummaryLLMResponse,
+                    **self.SUMMARY_KWARGS,
+                )
+                summary = result.summary
+            except Exception as e:
+                print(f"[SchedulerAgent] Summary failed, using the local one: {e}")
+        return self._response(summary, plan)
+
+    async def process_async(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        pending_items: list[dict],
+        busy_blocks: list[tuple[datetime, datetime]] | None = None,
+    ) -> dict[str, Any]:
+        """Awaitable variant of `process` for use inside async routes."""
+        if not pending_items:
+            return self._empty_response(bool(busy_blocks))
+
+        plan = self._plan(pending_items, busy_blocks, await self._estimate_durations_async(pending_items))
+        if plan is None:
+            return self._error_response()
+
+        summary = describe_plan(plan, self.rules)
+        if not self.fast_mode:
+            try:
+                result = await generate_json_async(
+                    self.model,
+                    self._summary_prompt(user_input, user_profile, plan),
+                    ScheduleSummaryLLMResponse,
+                    **self.SUMMARY_KWARGS,
+                )
+                summary = result.summary
+            except Exception as e:
+                print(f"[SchedulerAgent] Summary failed, using the local one: {e}")
+        return self._response(summary, plan)
+
+    async def process_stream(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict],
+        pending_items: list[dict],
+        busy_blocks: list[tuple[datetime, datetime]] | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield `delta` events with the schedule summary as it generates, then one `result` event."""
+        if not pending_items:
+            response = self._empty_response(bool(busy_blocks))
+            yield {"type": "delta", "text": response["message"]}
+            yield {"type": "result", "result": response}
+            return
+
+        plan = self._plan(pending_items, busy_blocks, await self._estimate_durations_async(pending_items))
+        if plan is None:
+            response = self._error_response()
+            yield {"type": "delta", "text": response["message"]}
+            yield {"type": "result", "result": response}
+            return
+
+        summary = None
+        if not self.fast_mode:
+            try:
+                async for kind, payload in stream_json_field(
+                    self.model,
+                    self._summary_prompt(user_input, user_profile, plan),
+                    ScheduleSummaryLLMResponse,
+                    "summary",
+                    **self.SUMMARY_KWARGS,
+                ):
+                    if kind == "delta":
+                        yield {"type": "delta", "text": payload}
+                    else:
+                        summary = payload.summary
+            except Exception as e:
+                print(f"[SchedulerAgent] Summary failed, using the local one: {e}")
+        if summary is None:
+            summary = describe_plan(plan, self.rules)
+            yield {"type": "delta", "text": summary}
+
+        yield {"type": "result", "result": self._response(summary, plan)}
+
+    def _estimate_durations(self, pending_items: list[dict]) -> dict[int, int]:
+        """LLM minutes per task lacking an estimate; empty in fast mode or on failure (defaults apply)."""
+        if self.fast_mode or not self._needs_estimates(pending_items):
+            return {}
         try:
             result = generate_json(
-                self.model,
-                prompt,
-                SchedulerLLMResponse,
-                temperature=0.2,
-                max_output_tokens=2048,
-                retries=1,
+                self.model, self._estimate_prompt(pending_items), DurationEstimateLLMResponse, **self.GENERATION_KWARGS
             )
-            return {
-                "agent": self.AGENT_NAME,
-                "message": result.summary,
-                "schedule": [block.model_dump() for block in result.schedule],
-            }
+            return self._durations_from_result(result)
         except Exception as e:
-            print(f"[SchedulerAgent] Error: {e}")
-            return {
-                "agent": self.AGENT_NAME,
-                "message": "I had trouble creating your schedule. Please try again.",
-                "schedule": [],
-            }
-
-    def _build_prompt(
-        self, user_input: str, user_profile: dict, chat_history: list[dict], pending_items: list[dict]
-    ) -> str:
-        """Build the scheduling prompt."""
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        current_time = datetime.now().strftime("%H:%M")
-        profile_facts = user_profile.get("context_facts", [])
-        facts_text = "\n".join([f"  - {fact}" for fact in profile_facts]) or "  (None specified yet)"
-
-        items_lines = []
-        for item in pending_items:
-            deadline_text = f", deadline: {item.get('deadline')}" if item.get("deadline") else ""
-            items_lines.append(
-                f'  - ID:{item["id"]} | "{item["title"]}" | '
-                f"priority:{item.get('priority', 5)} | "
-                f"category:{item.get('category', 'task')}"
-                f"{deadline_text}"
+            print(f"[SchedulerAgent] Duration estimates failed, using defaults: {e}")
+            return {}
+
+    async def _estimate_durations_async(self, pending_items: list[dict]) -> dict[int, int]:
+        if self.fast_mode or not self._needs_estimates(pending_items):
+            return {}
+        try:
+            result = await generate_json_async(
+                self.model, self._estimate_prompt(pending_items), DurationEstimateLLMResponse, **self.GENERATION_KWARGS
             )
-        items_text = "\n".join(items_lines)
+            return self._durations_from_result(result)
+        except Exception as e:
+            print(f"[SchedulerAgent] Duration estimates failed, using defaults: {e}")
+            return {}
+
+    def _plan(
+        self,
+        pending_items: list[dict],
+        busy_blocks: list[tuple[datetime, datetime]] | None,
+        durations: dict[int, int],
+    ) -> SchedulePlan | None:
+        try:
+            return pack_schedule(pending_items, busy_blocks, rules=self.rules, durations=durations)
+        except Exception as e:
+            print(f"[SchedulerAgent] Error: {e}")
+            return None
 
-        history_text = ""
-        if chat_history:
-            history_lines = []
-            for msg in chat_history:
-                role = "Assistant" if msg.get("role") == "assistant" else "User"
-                history_lines.append(f"[{role}]: {msg.get('content')}")
-            history_text = "\n**Recent Conversation History:**\n" + "\n".join(history_lines) + "\n"
+    @staticmethod
+    def _needs_estimates(pending_items: list[dict]) -> bool:
+        return any(not item.get("estimated_duration") for item in pending_items)
 
-        return f"""You are a personal scheduling assistant. Create an optimized daily schedule from pending tasks.
+    @staticmethod
+    def _durations_from_result(result: DurationEstimateLLMResponse) -> dict[int, int]:
+        return {estimate.item_id: estimate.estimated_duration_minutes for estimate in result.estimates}
 
-**Today:** {current_date} | **Now:** {current_time}
+    def _response(self, summary: str, plan: SchedulePlan) -> dict[str, Any]:
+        return {"agent": self.AGENT_NAME, "message": summary, "schedule": plan.blocks}
+
+    def _empty_response(self, all_scheduled: bool = False) -> dict[str, Any]:
+        message = "You don't have any pending tasks to schedule! Add some tasks first via Brain Dump."
+        if all_scheduled:
+            message = "All your pending tasks already have a time slot. Move or clear a block to reschedule it."
+        return {"agent": self.AGENT_NAME, "message": message, "schedule": []}
+
+    def _error_response(self) -> dict[str, Any]:
+        return {
+            "agent": self.AGENT_NAME,
+            "message": "I had trouble creating your schedule. Please try again.",
+            "schedule": [],
+        }
+
+    def _estimate_prompt(self, pending_items: list[dict]) -> str:
+        """Duration estimates for the tasks that have none (no dates, so the response caches well)."""
+        context = PromptContext(self.AGENT_NAME, self.CONTEXT_BUDGET)
+        items_text = encode_table(
+            (item for item in pending_items if not item.get("estimated_duration")), ("id", "title", "subcategory")
+        )
+
+        return context.finish(f"""Estimate how long each task takes a focused person, in minutes.
+
+**Tasks (table with one header row):**
+{items_text}
+
+**Rules:**
+1. Be realistic: 15-120 minutes per task; split nothing.
+2. Return one estimate per task id above.
+
+**Output JSON:**
+{{"estimates": [{{"item_id": <int>, "estimated_duration_minutes": <int>}}]}}
+
+Return ONLY valid JSON.""")
+
+    def _summary_prompt(self, user_input: str, user_profile: dict, plan: SchedulePlan) -> str:
+        """Ask for a short narration of a schedule that is already final."""
+        context = PromptContext(self.AGENT_NAME, self.CONTEXT_BUDGET, user_input)
+        facts_text = context.facts(user_profile.get("context_facts", []))
+
+        block_lines = [
+            f"  - {block['scheduled_start'][:16].replace('T', ' ')}-{block['scheduled_end'][11:16]} {block['title']}"
+            for block in plan.blocks
+        ]
+        blocks_text = "\n".join(block_lines) or "  (nothing fit)"
+        notes = []
+        if plan.late_ids:
+            notes.append(f"{len(plan.late_ids)} task(s) end after their deadline.")
+        if plan.unscheduled:
+            titles = ", ".join(f'"{task["title"]}"' for task in plan.unscheduled[:5])
+            notes.append(f"{len(plan.unscheduled)} task(s) did not fit, e.g. {titles}.")
+        notes_text = "\n".join(f"  - {note}" for note in notes) or "  (none)"
+
+        return context.finish(f"""You are a personal scheduling assistant. This schedule is final; do not change any times.
+
+**Today:** {datetime.now().strftime("%Y-%m-%d %H:%M")}
 
 **Known Long-Term Facts:**
 {facts_text}
 
-**Pending Tasks:**
-{items_text}
-{history_text}
+**Schedule:**
+{blocks_text}
+
+**Notes:**
+{notes_text}
+
 **User's Request:** "{user_input}"
 
-**Rules:**
-1. Prioritize tasks with deadlines and higher priority scores.
-2. Place demanding tasks in the morning (09:00-12:00).
-3. Schedule breaks between intensive blocks.
-4. Estimate realistic durations (15-120 min per block).
-5. Don't schedule past 20:00 unless asked.
-6. If too many tasks, schedule highest priority and note the rest.
+Write a friendly 2-3 sentence summary of the plan for the user.
 
 **Output JSON:**
-{{"summary": "Friendly 2-3 sentence summary.", "schedule": [{{"item_id": <int>, "title": "...", "estimated_duration_minutes": <int>, "scheduled_start": "YYYY-MM-DDTHH:MM:SS", "scheduled_end": "YYYY-MM-DDTHH:MM:SS"}}]}}
+{{"summary": "..."}}
 
-Return ONLY valid JSON."""
+Return ONLY valid JSON.""")
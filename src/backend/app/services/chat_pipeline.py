@@ -0,0 +1,130 @@
+"""
+Staged chat pipeline.
+
+Stage 1 loads the user's profile and recent history, stage 2 fans the LLM calls
+out (router -> agent, and memory extraction side by side), stage 3 joins them.
+Memory extraction only needs the user message and saved facts, so unless the
+agent-reply hint is requested it no longer waits for the routed agent.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import AnySession
+from app.models.message import Message
+from app.models.user import User
+from app.services.orchestrator import orchestrator
+from app.services.profile_memory import active_context_facts, extract_memory_candidates_async
+
+
+def build_chat_context(db: Session, user: User) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Return the agent-facing user profile and the last 10 messages in chronological order."""
+    user_profile = {
+        "name": user.name,
+        "goals": user.goals or {},
+        "personality": user.personality or {},
+        "life_areas": user.life_areas or [],
+        "context_facts": active_context_facts(db, user.id),
+    }
+
+    history = db.query(Message).filter(Message.user_id == user.id).order_by(Message.timestamp.desc()).limit(10).all()
+    history_data = [
+        {"role": msg.role, "content": msg.content, "agent_used": msg.agent_used} for msg in reversed(history)
+    ]
+    return user_profile, history_data
+
+
+async def run_chat_pipeline(
+    db: AnySession,
+    user_id: int,
+    user_input: str,
+    user_profile: dict[str, Any],
+    chat_history: list[dict[str, Any]],
+    *,
+    agent_hint: bool | None = None,
+) -> tuple[dict[str, Any], list[dict]]:
+    """
+    Run routing + agent and memory extraction, returning `(agent_result, memory_candidates)`.
+
+    With `agent_hint` disabled (the default, see `Settings.chat_memory_agent_hint`) both
+    branches run concurrently, so latency is roughly the slower branch instead of the sum.
+    """
+    if agent_hint is None:
+        agent_hint = get_settings().chat_memory_agent_hint
+    existing_facts = user_profile.get("context_facts")
+
+    if agent_hint:
+        result = await orchestrator.route_and_execute_async(user_input, user_profile, chat_history, db, user_id)
+        memory_candidates = await extract_memory_candidates_async(
+            db,
+            user_id,
+            user_input,
+            agent_message=result.get("message", ""),
+            existing_facts=existing_facts,
+        )
+        return result, memory_candidates
+
+    memory_task = asyncio.create_task(
+        extract_memory_candidates_async(db, user_id, user_input, existing_facts=existing_facts)
+    )
+    try:
+        result = await orchestrator.route_and_execute_async(user_input, user_profile, chat_history, db, user_id)
+    except BaseException:
+        memory_task.cancel()
+        raise
+
+    return result, await memory_task
+
+
+async def stream_chat_pipeline(
+    db: AnySession,
+    user_id: int,
+    user_input: str,
+    user_profile: dict[str, Any],
+    chat_history: list[dict[str, Any]],
+    *,
+    agent_hint: bool | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Streaming variant of `run_chat_pipeline`.
+
+    Forwards the orchestrator's `routing`, `delta` and `result` events, then yields one
+    `memory` event with the extracted candidates.
+    """
+    if agent_hint is None:
+        agent_hint = get_settings().chat_memory_agent_hint
+    existing_facts = user_profile.get("context_facts")
+
+    memory_task = None
+    if not agent_hint:
+        memory_task = asyncio.create_task(
+            extract_memory_candidates_async(db, user_id, user_input, existing_facts=existing_facts)
+        )
+
+    result: dict[str, Any] = {}
+    try:
+        async for event in orchestrator.route_and_stream(user_input, user_profile, chat_history, db, user_id):
+            if event["type"] == "result":
+                result = event["result"]
+            yield event
+    except BaseException:
+        if memory_task is not None:
+            memory_task.cancel()
+        raise
+
+    if memory_task is None:
+        memory_candidates = await extract_memory_candidates_async(
+            db,
+            user_id,
+            user_input,
+            agent_message=result.get("message", ""),
+            existing_facts=existing_facts,
+        )
+    else:
+        memory_candidates = await memory_task
+
+    yield {"type": "memory", "memory_candidates": memory_candidates}
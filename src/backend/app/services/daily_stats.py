@@ -0,0 +1,270 @@
+"""
+Daily dashboard rollup.
+
+`user_daily_stats` keeps one row per user per day with the number of items (by
+category), graph links, profile updates and reflections created that day. Session
+flush hooks keep it in step with ORM writes anywhere in the app, so the dashboard
+reads a handful of small rows instead of re-aggregating history. Bulk SQL writes
+bypass the hooks; `rebuild_daily_stats` (scripts/rebuild_daily_stats.py) backfills
+or repairs the table from the source tables. The hooks only see writes made after
+the table exists, so a rollup row says nothing about older history: each rebuild
+records the user in `user_daily_stats_backfills`, and `ensure_daily_stats` rebuilds
+any user without that marker on first dashboard read. `migrate_phase6.py` does the
+same for every user on existing SQLite databases.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Connection, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.models.profile_update import ProfileUpdate
+from app.models.reflection import Reflection
+from app.models.user import User
+from app.models.user_daily_stats import UserDailyStats, UserDailyStatsBackfill
+
+COUNTER_COLUMNS = ("tasks", "ideas", "thoughts", "links", "profile_updates", "reflections")
+ITEM_COLUMNS = {"task": "tasks", "idea": "ideas", "thought": "thoughts"}
+
+_DELTAS_KEY = "daily_stats_deltas"
+_ITEM_BUCKET_ATTRS = ("user_id", "category", "created_at")
+_table = UserDailyStats.__table__
+_backfills = UserDailyStatsBackfill.__table__
+
+
+def item_column(category: str | None) -> str:
+    return ITEM_COLUMNS.get(category, "thoughts")
+
+
+def _as_date(value: date | datetime | str | None) -> date | None:
+    # SQLite's date() returns ISO strings; PostgreSQL returns date objects.
+    if value is None or isinstance(value, datetime):
+        return value.date() if value else None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+# ----------------------------------------------------------------------
+# Incremental maintenance
+# ----------------------------------------------------------------------
+def _link_owner(connection: Connection, source_id: int | None, target_id: int | None) -> int | None:
+    """Links count for a user only when both endpoints are theirs (same scope as the graph view)."""
+    if source_id is None or target_id is None:
+        return None
+    owners = dict(connection.execute(select(Item.id, Item.user_id).where(Item.id.in_({source_id, target_id}))).all())
+    owner = owners.get(source_id)
+    return owner if owner is not None and owners.get(target_id) == owner else None
+
+
+def _bucket(connection: Connection, obj, values: dict | None = None) -> tuple[int, date, str] | None:
+    """Return `(user_id, day, column)` for a tracked row, or None."""
+
+    def value(attr):
+        return values[attr] if values and attr in values else getattr(obj, attr)
+
+    if isinstance(obj, Item):
+        user_id, column = value("user_id"), item_column(value("category"))
+    elif isinstance(obj, ItemLink):
+        user_id, column = _link_owner(connection, obj.source_id, obj.target_id), "links"
+    elif isinstance(obj, ProfileUpdate):
+        user_id, column = obj.user_id, "profile_updates"
+    elif isinstance(obj, Reflection):
+        user_id, column = obj.user_id, "reflections"
+    else:
+        return None
+
+    day = _as_date(value("created_at"))
+    if user_id is None or day is None:
+        return None
+    return user_id, day, column
+
+
+def _previous_values(connection: Connection, item: Item) -> dict | None:
+    """Pre-update `user_id`/`category`/`created_at` of a dirty item, or None when none changed."""
+    state = inspect(item)
+    if not any(state.attrs[attr].history.has_changes() for attr in _ITEM_BUCKET_ATTRS):
+        return None
+    # Read the stored row: the old value is not in the attribute history when it was expired.
+    row = connection.execute(
+        select(*(Item.__table__.c[attr] for attr in _ITEM_BUCKET_ATTRS)).where(Item.id == item.id)
+    ).one_or_none()
+    if row is None:
+        return None
+    previous = dict(row._mapping)
+    if all(previous[attr] == getattr(item, attr) for attr in _ITEM_BUCKET_ATTRS):
+        return None
+    return previous
+
+
+def _add(deltas: dict, bucket: tuple[int, date, str] | None, amount: int) -> None:
+    if bucket:
+        user_id, day, column = bucket
+        deltas[(user_id, day)][column] += amount
+
+
+def _pending_deltas(session: Session) -> dict:
+    return session.info.setdefault(_DELTAS_KEY, defaultdict(lambda: defaultdict(int)))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_removals(session: Session, flush_context, instances) -> None:
+    # Deletions and re-categorizations are read before the flush, while the old rows still exist.
+    deltas = None
+    for obj in session.deleted:
+        if isinstance(obj, (Item, ItemLink, ProfileUpdate, Reflection)):
+            deltas = deltas if deltas is not None else _pending_deltas(session)
+            _add(deltas, _bucket(session.connection(), obj), -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Item) or obj in session.deleted:
+            continue
+        previous = _previous_values(session.connection(), obj)
+        if previous:
+            deltas = deltas if deltas is not None else _pending_deltas(session)
+            _add(deltas, _bucket(session.connection(), obj, previous), -1)
+            _add(deltas, _bucket(session.connection(), obj), 1)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup(session: Session, flush_context) -> None:
+    # New rows are counted after the flush, once defaults (created_at) and foreign keys are set.
+    deltas = session.info.pop(_DELTAS_KEY, None) or defaultdict(lambda: defaultdict(int))
+    for obj in session.new:
+        if isinstance(obj, (Item, ItemLink, ProfileUpdate, Reflection)):
+            _add(deltas, _bucket(session.connection(), obj), 1)
+
+    if deltas:
+        _apply_deltas(session.connection(), deltas)
+
+
+def _apply_deltas(connection: Connection, deltas: dict) -> None:
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(connection.dialect.name)
+    for (user_id, day), counts in deltas.items():
+        counts = {column: amount for column, amount in counts.items() if amount}
+        if not counts:
+            continue
+        row = {column: 0 for column in COUNTER_COLUMNS}
+        row.update({column: max(amount, 0) for column, amount in counts.items()})
+
+        if dialect is not None:
+            stmt = dialect.insert(_table).values(user_id=user_id, day=day, **row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={column: _table.c[column] + amount for column, amount in counts.items()},
+            )
+            connection.execute(stmt)
+            continue
+
+        updated = connection.execute(
+            update(_table)
+            .where(_table.c.user_id == user_id, _table.c.day == day)
+            .values({column: _table.c[column] + amount for column, amount in counts.items()})
+        ).rowcount
+        if not updated:
+            connection.execute(insert(_table).values(user_id=user_id, day=day, **row))
+
+
+# ----------------------------------------------------------------------
+# Backfill
+# ----------------------------------------------------------------------
+def rebuild_daily_stats(db: Session, user_id: int | None = None) -> int:
+    """
+    Recompute the rollup from the source tables (all users, or one) and mark those users backfilled.
+
+    Returns rows written; caller commits.
+    """
+    rows: dict[tuple[int, date], dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+
+    def scoped(stmt, column):
+        return stmt.where(column == user_id) if user_id is not None else stmt
+
+    item_day = func.date(Item.created_at)
+    for owner, raw_day, category, count in db.execute(
+        scoped(select(Item.user_id, item_day, Item.category, func.count()), Item.user_id)
+        .where(Item.created_at.isnot(None))
+        .group_by(Item.user_id, item_day, Item.category)
+    ):
+        rows[(owner, _as_date(raw_day))][item_column(category)] += count
+
+    source, target = aliased(Item), aliased(Item)
+    link_day = func.date(ItemLink.created_at)
+    for owner, raw_day, count in db.execute(
+        scoped(select(source.user_id, link_day, func.count()), source.user_id)
+        .join(source, source.id == ItemLink.source_id)
+        .join(target, target.id == ItemLink.target_id)
+        .where(source.user_id == target.user_id, ItemLink.created_at.isnot(None))
+        .group_by(source.user_id, link_day)
+    ):
+        rows[(owner, _as_date(raw_day))]["links"] += count
+
+    for model, column in ((ProfileUpdate, "profile_updates"), (Reflection, "reflections")):
+        day = func.date(model.created_at)
+        for owner, raw_day, count in db.execute(
+            scoped(select(model.user_id, day, func.count()), model.user_id)
+            .where(model.created_at.isnot(None))
+            .group_by(model.user_id, day)
+        ):
+            rows[(owner, _as_date(raw_day))][column] += count
+
+    db.execute(scoped(delete(_table), _table.c.user_id))
+    if rows:
+        db.execute(
+            insert(_table),
+            [{"user_id": owner, "day": day, **counts} for (owner, day), counts in rows.items()],
+        )
+
+    db.execute(scoped(delete(_backfills), _backfills.c.user_id))
+    db.execute(
+        insert(_backfills).from_select(
+            ["user_id", "backfilled_at"], scoped(select(User.id, literal(datetime.utcnow())), User.id)
+        )
+    )
+    return len(rows)
+
+
+def ensure_daily_stats(db: Session, user_id: int) -> bool:
+    """
+    Rebuild the user's rollup unless they are marked backfilled (history from before the table).
+
+    Rows written by the hooks do not count: they may predate the backfill and cover only recent days.
+    One primary-key lookup on the common path. Returns True when it rebuilt; caller commits.
+    """
+    if db.execute(select(_backfills.c.user_id).where(_backfills.c.user_id == user_id)).first() is not None:
+        return False
+    rows = rebuild_daily_stats(db, user_id)
+    print(f"[DailyStats] Backfilled {rows} rollup rows for user {user_id}")
+    return True
+
+
+# ----------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------
+def daily_stats_between(db: Session, user_id: int, start: date, end: date) -> dict[date, dict[str, int]]:
+    """Rollup rows for `start..end` (inclusive), keyed by day; missing days are absent."""
+    result = db.execute(
+        select(_table).where(_table.c.user_id == user_id, _table.c.day >= start, _table.c.day <= end)
+    ).mappings()
+    return {row["day"]: {column: row[column] for column in COUNTER_COLUMNS} for row in result}
+
+
+def totals_before(db: Session, user_id: int, start: date) -> dict[str, int]:
+    """Counter sums over every rollup row before `start` (velocity baselines)."""
+    sums = db.execute(
+        select(*(func.coalesce(func.sum(_table.c[column]), 0) for column in COUNTER_COLUMNS)).where(
+            _table.c.user_id == user_id, _table.c.day < start
+        )
+    ).one()
+    return dict(zip(COUNTER_COLUMNS, sums, strict=True))
@@ -0,0 +1,189 @@
+"""
+Keyword and phrase search over items and chat messages (GET /search).
+
+On SQLite databases migrated with `migrate_phase5.py`, queries go through the
+`items_fts` / `messages_fts` FTS5 tables: bm25-ranked, with highlighted
+snippets. Anywhere else (PostgreSQL, or SQLite without the FTS tables) every
+term is matched with a case-insensitive LIKE and results are newest first.
+
+Snippets are HTML: matches are marked with control-character sentinels, the text
+is escaped, and only then are the sentinels turned into <mark> tags, so item and
+message text can never inject markup.
+"""
+
+import html
+import re
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.models.message import Message
+
+SearchScope = Literal["items", "messages"]
+
+MARK_OPEN, MARK_CLOSE, ELLIPSIS = "<mark>", "</mark>", "…"
+_SENTINEL_OPEN, _SENTINEL_CLOSE = "\x02", "\x03"  # survive html.escape; stripped from text before marking
+SNIPPET_TOKENS = 12
+SNIPPET_CHARS = 80
+
+_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+_FTS_TABLES = {"items": "items_fts", "messages": "messages_fts"}
+
+_FTS_SQL = {
+    "items": f"""
+        SELECT i.id, i.title, i.created_at AS timestamp,
+               snippet(items_fts, -1, :mark_open, :mark_close, :ellipsis, {SNIPPET_TOKENS}) AS snippet,
+               bm25(items_fts, 5.0, 1.0) AS rank
+        FROM items_fts JOIN items i ON i.id = items_fts.rowid
+        WHERE items_fts MATCH :query AND i.user_id = :user_id
+        ORDER BY rank LIMIT :limit OFFSET :offset
+    """,
+    "messages": f"""
+        SELECT m.id, m.role AS title, m.timestamp,
+               snippet(messages_fts, 0, :mark_open, :mark_close, :ellipsis, {SNIPPET_TOKENS}) AS snippet,
+               bm25(messages_fts) AS rank
+        FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+        WHERE messages_fts MATCH :query AND m.user_id = :user_id
+        ORDER BY rank LIMIT :limit OFFSET :offset
+    """,
+}
+
+
+def parse_terms(query: str) -> list[str]:
+    """Split a query into words and "quoted phrases", keeping only word characters."""
+    terms = []
+    for phrase, word in _TERM_RE.findall(query):
+        words = _WORD_RE.findall(phrase or word)
+        if words:
+            terms.append(" ".join(words))
+    return terms
+
+
+def fts_query(terms: list[str]) -> str:
+    """FTS5 MATCH expression requiring every term; quoting keeps user input out of the query syntax."""
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def fts_enabled(db: Session, scope: SearchScope) -> bool:
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    table = _FTS_TABLES[scope]
+    return (
+        db.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"), {"name": table}).first()
+        is not None
+    )
+
+
+def _marked_html(marked: str) -> str:
+    """HTML-escape sentinel-marked text, then turn the sentinels into <mark> tags."""
+    return html.escape(marked).replace(_SENTINEL_OPEN, MARK_OPEN).replace(_SENTINEL_CLOSE, MARK_CLOSE)
+
+
+def highlight(value: str | None, terms: list[str], width: int = SNIPPET_CHARS) -> str:
+    """Escaped window of `value` around the first matching term, with every match wrapped in <mark>."""
+    value = (value or "").replace(_SENTINEL_OPEN, "").replace(_SENTINEL_CLOSE, "")
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(value)
+    start = max(0, first.start() - width // 2) if first else 0
+    end = min(len(value), start + width)
+    window = pattern.sub(lambda match: f"{_SENTINEL_OPEN}{match.group(0)}{_SENTINEL_CLOSE}", value[start:end])
+    return f"{ELLIPSIS if start else ''}{_marked_html(window)}{ELLIPSIS if end < len(value) else ''}"
+
+
+def _matching_field(value: str | None, terms: list[str]) -> str | None:
+    return value if value and any(term.lower() in value.lower() for term in terms) else None
+
+
+def _like(column, term: str):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def _like_search(db: Session, user_id: int, scope: SearchScope, terms: list[str], limit: int, offset: int):
+    if scope == "items":
+        rows = db.execute(
+            select(Item.id, Item.title, Item.description, Item.created_at)
+            .where(
+                Item.user_id == user_id,
+                and_(*(or_(_like(Item.title, term), _like(Item.description, term)) for term in terms)),
+            )
+            .order_by(Item.created_at.desc(), Item.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "snippet": highlight(_matching_field(row.description, terms) or row.title, terms),
+                "timestamp": row.created_at,
+                "score": None,
+            }
+            for row in rows
+        ]
+
+    rows = db.execute(
+        select(Message.id, Message.role, Message.content, Message.timestamp)
+        .where(Message.user_id == user_id, and_(*(_like(Message.content, term) for term in terms)))
+        .order_by(Message.timestamp.desc(), Message.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [
+        {
+            "id": row.id,
+            "title": row.role,
+            "snippet": highlight(row.content, terms),
+            "timestamp": row.timestamp,
+            "score": None,
+        }
+        for row in rows
+    ]
+
+
+def _fts_search(db: Session, user_id: int, scope: SearchScope, terms: list[str], limit: int, offset: int):
+    rows = db.execute(
+        text(_FTS_SQL[scope]),
+        {
+            "query": fts_query(terms),
+            "user_id": user_id,
+            "limit": limit,
+            "offset": offset,
+            "mark_open": _SENTINEL_OPEN,
+            "mark_close": _SENTINEL_CLOSE,
+            "ellipsis": ELLIPSIS,
+        },
+    )
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "snippet": _marked_html(row.snippet or ""),
+            "timestamp": _as_datetime(row.timestamp),
+            "score": round(-row.rank, 4),  # bm25 is lower-is-better
+        }
+        for row in rows
+    ]
+
+
+def _as_datetime(value: datetime | str | None) -> datetime | None:
+    # Raw SQL on SQLite returns timestamps as ISO strings.
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def search(
+    db: Session, user_id: int, query: str, scope: SearchScope = "items", limit: int = 20, offset: int = 0
+) -> tuple[list[dict[str, Any]], str, bool]:
+    """Return `(hits, engine, has_more)`; `engine` is "fts5" or "like"."""
+    terms = parse_terms(query)
+    engine = "fts5" if fts_enabled(db, scope) else "like"
+    if not terms:
+        return [], engine, False
+    runner = _fts_search if engine == "fts5" else _like_search
+    hits = runner(db, user_id, scope, terms, limit + 1, offset)
+    return hits[:limit], engine, len(hits) > limit
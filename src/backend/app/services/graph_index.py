@@ -0,0 +1,234 @@
+"""
+Per-user in-memory adjacency index for the knowledge graph.
+
+Built once from `items`/`item_links` (column-only queries, no descriptions) and
+kept in a small LRU keyed by user. Session hooks drop a user's entry after any
+committed item or link write, so neighborhood queries are a BFS over a dict
+instead of a table scan. Entries also expire after `max_age` seconds, which bounds
+staleness when several worker processes each hold their own index.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.services.graph_queries import user_links
+
+_PENDING_KEY = "graph_index_pending"
+
+
+def _node_payload(row) -> dict[str, Any]:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "category": row.category,
+        "subcategory": row.subcategory,
+        "life_area": row.life_area,
+        "status": row.status,
+        "priority": row.priority or 5,
+        "tags": [tag for tag in [row.category, row.subcategory, row.life_area, row.status] if tag],
+        "val": max(1, (row.priority or 5)),
+    }
+
+
+@dataclass
+class UserGraph:
+    nodes: dict[int, dict[str, Any]] = field(default_factory=dict)
+    links: dict[int, dict[str, Any]] = field(default_factory=dict)
+    adjacency: dict[int, list[tuple[int, int]]] = field(default_factory=dict)  # node -> [(neighbor, link id)]
+    built_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def load(cls, db: Session, user_id: int) -> "UserGraph":
+        graph = cls()
+        items = db.execute(
+            select(
+                Item.id, Item.title, Item.category, Item.subcategory, Item.life_area, Item.status, Item.priority
+            ).where(Item.user_id == user_id)
+        )
+        for row in items:
+            graph.nodes[row.id] = _node_payload(row)
+            graph.adjacency[row.id] = []
+
+        links = db.execute(
+            user_links(user_id).with_only_columns(
+                ItemLink.id,
+                ItemLink.source_id,
+                ItemLink.target_id,
+                ItemLink.link_type,
+                ItemLink.weight,
+                ItemLink.ai_reasoning,
+                maintain_column_froms=True,
+            )
+        )
+        for row in links:
+            graph.links[row.id] = dict(row._mapping)
+            graph.adjacency[row.source_id].append((row.target_id, row.id))
+            graph.adjacency[row.target_id].append((row.source_id, row.id))
+        return graph
+
+    def neighborhood(
+        self,
+        node_id: int,
+        depth: int = 1,
+        limit: int = 200,
+        *,
+        life_area: str | None = None,
+        status: str | None = None,
+        category: str | None = None,
+        min_weight: int | None = None,
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]], bool]:
+        """
+        Breadth-first k-hop expansion from `node_id` (edges are followed in both directions).
+
+        Filters apply to every node except the center and to edges (`weight` < `min_weight`
+        or unset is skipped when `min_weight` is given). Returns `(nodes, links, truncated)`.
+        """
+
+        def node_ok(node: dict[str, Any]) -> bool:
+            return (
+                (life_area is None or node["life_area"] == life_area)
+                and (status is None or node["status"] == status)
+                and (category is None or node["category"] == category)
+            )
+
+        def link_ok(link_id: int) -> bool:
+            return min_weight is None or (self.links[link_id]["weight"] or 0) >= min_weight
+
+        visited = {node_id: 0}
+        queue = deque([node_id])
+        truncated = False
+        while queue:
+            current = queue.popleft()
+            if visited[current] >= depth:
+                continue
+            for neighbor, link_id in self.adjacency[current]:
+                if neighbor in visited or not link_ok(link_id) or not node_ok(self.nodes[neighbor]):
+                    continue
+                if len(visited) >= limit:
+                    truncated = True
+                    queue.clear()
+                    break
+                visited[neighbor] = visited[current] + 1
+                queue.append(neighbor)
+
+        link_ids = {
+            link_id
+            for node in visited
+            for neighbor, link_id in self.adjacency[node]
+            if neighbor in visited and link_ok(link_id)
+        }
+        nodes = [{**self.nodes[node], "depth": hops} for node, hops in visited.items()]
+        links = [self.links[link_id] for link_id in sorted(link_ids)]
+        return nodes, links, truncated
+
+
+class GraphIndexCache:
+    """
+    LRU of `UserGraph`s with write-driven invalidation.
+
+    A write committed while a graph is being loaded cannot be dropped from it, so every
+    invalidation bumps the owner's generation and a load that saw it move is returned
+    but not cached.
+    """
+
+    def __init__(self, max_users: int = 256, max_age: float = 300):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._graphs: OrderedDict[int, UserGraph] = OrderedDict()
+        self._generations: dict[int | None, int] = {}  # None: link writes whose owner was not found
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    def _generation(self, user_id: int) -> tuple[int, int]:
+        return self._generations.get(user_id, 0), self._generations.get(None, 0)
+
+    def get(self, db: Session, user_id: int) -> UserGraph:
+        with self._lock:
+            graph = self._graphs.get(user_id)
+            if graph is not None and time.monotonic() - graph.built_at < self.max_age:
+                self._graphs.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return graph
+            generation = self._generation(user_id)
+
+        graph = UserGraph.load(db, user_id)
+        with self._lock:
+            self.stats["builds"] += 1
+            if self._generation(user_id) != generation:
+                return graph  # a write landed mid-load; the next request loads again
+            self._graphs[user_id] = graph
+            self._graphs.move_to_end(user_id)
+            while len(self._graphs) > self.max_users:
+                self._graphs.popitem(last=False)
+        return graph
+
+    def invalidate(self, user_ids: set[int | None] = frozenset(), item_ids: set[int] = frozenset()) -> None:
+        """
+        Drop graphs for `user_ids` and any cached graph containing one of `item_ids`.
+
+        A None in `user_ids` (a write whose owner is unknown) only fails loads in flight.
+        """
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            stale = [
+                user_id
+                for user_id, graph in self._graphs.items()
+                if user_id in user_ids or any(item_id in graph.nodes for item_id in item_ids)
+            ]
+            for user_id in stale:
+                del self._graphs[user_id]
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graphs.clear()
+            self._generations.clear()
+
+
+graph_index = GraphIndexCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_graph_writes(session: Session, flush_context) -> None:
+    # Read loaded state only: deleted rows must not trigger lazy loads here.
+    pending = None
+    link_items = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Item):
+            state = inspect(obj)
+            pending = pending or session.info.setdefault(_PENDING_KEY, (set(), set()))
+            if state.dict.get("user_id") is not None:
+                pending[0].add(state.dict["user_id"])
+            if state.identity:
+                pending[1].add(state.identity[0])
+        elif isinstance(obj, ItemLink):
+            state = inspect(obj)
+            pending = pending or session.info.setdefault(_PENDING_KEY, (set(), set()))
+            link_items.update(value for value in (state.dict.get("source_id"), state.dict.get("target_id")) if value)
+
+    if link_items:
+        # Link owners are their items' owners; their generations keep in-flight loads from being cached.
+        pending[1].update(link_items)
+        owners = set(session.connection().execute(select(Item.user_id).where(Item.id.in_(link_items))).scalars())
+        pending[0].update(owners or {None})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        graph_index.invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,24 @@
+"""
+Shared knowledge-graph queries.
+
+Links are scoped to a user by joining both endpoints to `items.user_id`, so the cost
+follows the user's link count (via the item_links source/target indexes) rather than
+binding every item id the user owns as an IN-list parameter.
+"""
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased
+
+from app.models.item import Item
+from app.models.item_link import ItemLink
+
+
+def user_links(user_id: int) -> Select[tuple[ItemLink]]:
+    """Links whose source and target items both belong to `user_id`."""
+    source, target = aliased(Item), aliased(Item)
+    return (
+        select(ItemLink)
+        .join(source, source.id == ItemLink.source_id)
+        .join(target, target.id == ItemLink.target_id)
+        .where(source.user_id == user_id, target.user_id == user_id)
+    )
@@ -0,0 +1,219 @@
+"""
+Cached iCalendar rendering of a user's scheduled items.
+
+Calendar clients poll subscription feeds every few minutes, so the rendered body
+is kept per user and reused until the user's schedule version moves. Session
+hooks bump that version after a committed write that adds, removes or edits a
+scheduled item's title, description, category, priority or times. A miss renders
+the calendar event by event (header, one VEVENT per item, footer) so the route
+can stream it while the chunks are appended to a single buffer that becomes the
+cached body. The ETag is a
+digest of the exported fields, computed before rendering, so it is identical in
+every worker and a 304 never needs the body. Entries also expire after
+`max_age` seconds, which bounds staleness across worker processes.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from icalendar import Calendar, Event
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.services.schedule_index import schedule_writes
+
+_PENDING_KEY = "ics_feed_pending"
+ICS_FIELDS = ("user_id", "title", "description", "category", "priority", "scheduled_start", "scheduled_end")
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+
+def calendar_rows(db: Session, user_id: int) -> list:
+    """Exported columns of the user's scheduled items, in start order."""
+    return db.execute(
+        select(
+            Item.id,
+            Item.title,
+            Item.description,
+            Item.category,
+            Item.priority,
+            Item.scheduled_start,
+            Item.scheduled_end,
+            Item.updated_at,
+        )
+        .where(Item.user_id == user_id, Item.scheduled_start.isnot(None))
+        .order_by(Item.scheduled_start.asc(), Item.id.asc())
+    ).all()
+
+
+def fingerprint(rows: list) -> str:
+    """Quoted strong ETag over every exported field."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(tuple(row)[:7]).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def _calendar_header() -> bytes:
+    cal = Calendar()
+    cal.add("prodid", "-//ClearMind//Phase2//EN")
+    cal.add("version", "2.0")
+    cal.add("calscale", "GREGORIAN")
+    return cal.to_ical().removesuffix(CALENDAR_FOOTER)
+
+
+def _event(row) -> bytes:
+    event = Event()
+    event.add("summary", row.title)
+    event.add("description", row.description or f"Category: {row.category}")
+    event.add("dtstart", row.scheduled_start)
+
+    if row.scheduled_end:
+        event.add("dtend", row.scheduled_end)
+
+    event.add("priority", max(1, min(9, 10 - (row.priority or 5))))  # iCal priority is inverted (1=high)
+    event.add("uid", f"clearmind-item-{row.id}@clearmind.app")
+    return event.to_ical()
+
+
+def render_calendar(rows: list) -> Iterator[bytes]:
+    """The calendar as chunks: header, one VEVENT per row, footer (same bytes as `Calendar.to_ical()`)."""
+    yield _calendar_header()
+    for row in rows:
+        yield _event(row)
+    yield CALENDAR_FOOTER
+
+
+@dataclass
+class CachedCalendar:
+    version: int
+    etag: str
+    last_modified: datetime
+    body: bytes
+    item_ids: frozenset[int]
+    built_at: float = field(default_factory=time.monotonic)
+
+
+class IcsCache:
+    """LRU of rendered calendars, valid while the owner's schedule version is unchanged."""
+
+    def __init__(self, max_users: int = 256, max_age: float = 300):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._entries: OrderedDict[int, CachedCalendar] = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "renders": 0, "invalidations": 0}
+
+    def version(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def get(self, user_id: int) -> CachedCalendar | None:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if (
+                entry is not None
+                and entry.version == self._versions.get(user_id, 0)
+                and time.monotonic() - entry.built_at < self.max_age
+            ):
+                self._entries.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return entry
+            return None
+
+    def revalidate(self, user_id: int, version: int, etag: str) -> CachedCalendar | None:
+        """Reuse an outdated entry whose content is unchanged (e.g. only a block's status moved)."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.etag != etag:
+                return None
+            entry.version, entry.built_at = version, time.monotonic()
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return entry
+
+    def last_modified(self, user_id: int, etag: str, rows: list) -> datetime:
+        """
+        When the calendar last changed: the previous render's time if the content is the same,
+        else the newest row edit, or now when that is older (an item was deleted or unscheduled).
+        """
+        now = datetime.utcnow().replace(microsecond=0)
+        with self._lock:
+            previous = self._entries.get(user_id)
+        if previous is not None and previous.etag == etag:
+            return previous.last_modified
+        newest = max((row.updated_at for row in rows if row.updated_at), default=None)
+        if newest is None or (previous is not None and newest <= previous.last_modified):
+            return now
+        return min(newest.replace(microsecond=0), now)
+
+    def render(self, user_id: int, version: int, rows: list, etag: str, last_modified: datetime) -> Iterator[bytes]:
+        """
+        Yield the calendar chunk by chunk and cache the body once it is complete.
+
+        Sent chunks are dropped as they are appended to one buffer, and `getvalue()` hands that buffer
+        over without copying it (CPython), so the body is held once.
+        """
+        buffer = io.BytesIO()
+        for chunk in render_calendar(rows):
+            buffer.write(chunk)
+            yield chunk
+
+        body = buffer.getvalue()
+        buffer.close()
+        entry = CachedCalendar(version, etag, last_modified, body, frozenset(row.id for row in rows))
+        with self._lock:
+            self.stats["renders"] += 1
+            if version != self._versions.get(user_id, 0):
+                return  # a write landed while rendering; the next request renders again
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: set[int] = frozenset(), item_ids: set[int] = frozenset()) -> None:
+        """Bump the schedule version of `user_ids` and of any cached owner of one of `item_ids`."""
+        with self._lock:
+            owners = set(user_ids)
+            owners.update(user_id for user_id, entry in self._entries.items() if entry.item_ids & item_ids)
+            for user_id in owners:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                # The stale entry stays until replaced: its ETag and Last-Modified date the next render
+                if user_id in self._entries:
+                    self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+ics_cache = IcsCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_calendar_writes(session: Session, flush_context) -> None:
+    writes = schedule_writes(session, ICS_FIELDS)
+    if writes:
+        pending = session.info.setdefault(_PENDING_KEY, (set(), set()))
+        pending[0].update(writes[0])
+        pending[1].update(writes[1])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        ics_cache.invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,259 @@
+"""
+Local fast-path intent router.
+
+Sits in front of the Flash router in `Orchestrator._classify_intent`. Keyword rules
+are taken from the router prompt's own keyword lists, and a small hashed-n-gram
+linear model (trained at import time on a seed corpus) breaks ties and scores
+inputs the rules miss. A keyword hit only counts as confident when the model
+independently picks the same agent with at least MIN_MODEL_PROBABILITY, since
+keywords also appear in plain brain dumps ("my goals are: ..."). Only
+low-confidence decisions fall through to the LLM.
+"""
+
+import math
+import random
+import re
+import zlib
+from functools import lru_cache
+
+AGENTS = ("brain_dump", "reflection", "scheduler", "planner")
+# Model probability a keyword-matched agent needs before the rule can short-circuit the LLM
+MIN_MODEL_PROBABILITY = 0.6
+
+# Mirrors the "Keywords:" lists in the router prompt, plus close paraphrases.
+KEYWORD_RULES: dict[str, list[str]] = {
+    "brain_dump": [
+        r"\bi need to\b",
+        r"\bremind me\b",
+        r"\bi have an idea\b",
+        r"\bdon'?t (let me )?forget\b",
+        r"\bto-?do\b",
+        r"\bnote (to self|that)\b",
+        r"\bjot (this )?down\b",
+    ],
+    "reflection": [
+        r"\bhow am i doing\b",
+        r"\bwhat patterns?\b",
+        r"\breflect(ion)?\b",
+        r"\bmy habits?\b",
+        r"\bmental state\b",
+        r"\bhow have i been\b",
+        r"\bwhy do i keep\b",
+    ],
+    "scheduler": [
+        r"\bplan my (day|morning|afternoon|evening|week)\b",
+        r"\bschedul(e|ing)\b",
+        r"\bwhen should i\b",
+        r"\borgani[sz]e my time\b",
+        r"\bweekly plan\b",
+        r"\btime ?blocks?\b",
+        r"\bcalendar\b",
+    ],
+    "planner": [
+        r"\bam i on track\b",
+        r"\bmy goals?\b",
+        r"\bcareer progress\b",
+        r"\blong[- ]term\b",
+        r"\bstrategic\b",
+        r"\blife plan\b",
+        r"\blife direction\b",
+    ],
+}
+
+SEED_EXAMPLES: dict[str, list[str]] = {
+    "brain_dump": [
+        "I need to buy groceries and call the bank",
+        "remind me to email the professor tomorrow",
+        "I have an idea for a budgeting app",
+        "finish the report, pay rent, pick up laundry",
+        "thinking about learning the guitar someday",
+        "dentist appointment next tuesday",
+        "book flights for the conference",
+        "random thought: we could automate the weekly report",
+        "need to fix the login bug and write tests",
+        "renew my passport before june",
+        "call mom this weekend",
+        "idea: podcast about productivity for students",
+        "submit the assignment and clean the kitchen",
+        "I should read that paper on transformers",
+        # Statements that carry other agents' keywords
+        "my goals for this year: save money, read more books",
+        "my goal is to learn french before the trip",
+        "my goals are lose weight and get promoted",
+        "add to my goals: swim twice a week, call grandma",
+        "new goal: learn to cook three dishes",
+        "cancel the music streaming subscription",
+        "update the calendar app on my phone",
+        "renew the gym membership and the cloud storage plan",
+    ],
+    "reflection": [
+        "how am I doing lately",
+        "what patterns do you see in my tasks",
+        "reflect on my last two weeks",
+        "I feel like I keep procrastinating",
+        "why do I keep avoiding the hard tasks",
+        "what does my recent activity say about my mental state",
+        "am I burning out",
+        "how have I been feeling about work",
+        "what habits should I change",
+        "I've been really stressed, what do you notice",
+        "look back at what I've done this month",
+        "tell me about my productivity trends",
+    ],
+    "scheduler": [
+        "plan my day",
+        "schedule my tasks for tomorrow",
+        "when should I work on the thesis",
+        "organize my time this afternoon",
+        "make me a weekly plan",
+        "fit my pending tasks into today",
+        "block time for deep work in the morning",
+        "what should I do first today",
+        "arrange my afternoon around the meeting",
+        "give me a timetable for the week",
+        "put my tasks on the calendar",
+        "plan my week",
+    ],
+    "planner": [
+        "am I on track with my goals",
+        "how is my career progress",
+        "what should my long-term strategy be",
+        "help me build a life plan",
+        "are my daily actions aligned with my goals",
+        "what direction should I take next year",
+        "which goals am I neglecting",
+        "strategic advice for finishing my degree",
+        "review my progress toward becoming a senior engineer",
+        "where do I want to be in five years",
+        "assess my goals for this quarter",
+        "am I making progress on what matters",
+    ],
+}
+
+HASH_BUCKETS = 4096
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def _features(text: str) -> list[int]:
+    """Hashed unigram + bigram bucket ids (plus a bias bucket)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = [f"u:{token}" for token in tokens] + [f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:], strict=False)]
+    return [0] + [1 + zlib.crc32(gram.encode()) % (HASH_BUCKETS - 1) for gram in grams]
+
+
+def _softmax(scores: list[float]) -> list[float]:
+    peak = max(scores)
+    exps = [math.exp(score - peak) for score in scores]
+    total = sum(exps)
+    return [value / total for value in exps]
+
+
+class HashedNgramModel:
+    """Multinomial logistic regression over hashed n-gram buckets."""
+
+    def __init__(self, weights: list[dict[int, float]]):
+        self.weights = weights
+
+    @classmethod
+    def train(
+        cls, examples: dict[str, list[str]], epochs: int = 15, learning_rate: float = 0.5, l2: float = 0.001
+    ) -> "HashedNgramModel":
+        weights: list[dict[int, float]] = [{} for _ in AGENTS]
+        samples = [(_features(text), AGENTS.index(agent)) for agent, texts in examples.items() for text in texts]
+        rng = random.Random(13)
+
+        for _ in range(epochs):
+            rng.shuffle(samples)
+            for features, label in samples:
+                probs = _softmax([sum(w.get(f, 0.0) for f in features) for w in weights])
+                for index, w in enumerate(weights):
+                    gradient = probs[index] - (1.0 if index == label else 0.0)
+                    for feature in features:
+                        value = w.get(feature, 0.0)
+                        w[feature] = value - learning_rate * (gradient + l2 * value)
+
+        return cls(weights)
+
+    def predict_proba(self, text: str) -> list[float]:
+        features = _features(text)
+        return _softmax([sum(w.get(f, 0.0) for f in features) for w in self.weights])
+
+
+@lru_cache
+def _seed_model() -> HashedNgramModel:
+    return HashedNgramModel.train(SEED_EXAMPLES)
+
+
+_COMPILED_RULES = {agent: [re.compile(pattern) for pattern in patterns] for agent, patterns in KEYWORD_RULES.items()}
+
+
+class LocalIntentRouter:
+    """Cheap local routing decision with shadow-sampled agreement tracking against the LLM router."""
+
+    LOG_EVERY = 100
+
+    def __init__(self, threshold: float = 0.85, shadow_rate: float = 0.05, model: HashedNgramModel | None = None):
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.model = model or _seed_model()
+        self.stats = {
+            "decisions": 0,
+            "short_circuits": 0,
+            "llm_fallbacks": 0,
+            "shadow_checks": 0,
+            "shadow_disagreements": 0,
+        }
+
+    def classify(self, user_input: str) -> dict:
+        """Return `{"agent", "confidence", "rule_hits"}` without touching the network."""
+        text = user_input.lower()
+        hits = {agent: sum(1 for rule in rules if rule.search(text)) for agent, rules in _COMPILED_RULES.items()}
+        matched = [agent for agent, count in hits.items() if count]
+        probs = dict(zip(AGENTS, self.model.predict_proba(text), strict=True))
+
+        if len(matched) == 1:
+            agent = matched[0]
+            if max(probs, key=probs.__getitem__) == agent and probs[agent] >= MIN_MODEL_PROBABILITY:
+                rule_confidence = min(0.95, 0.7 + 0.1 * hits[agent])
+                confidence = 1 - (1 - rule_confidence) * (1 - probs[agent])
+            else:
+                # The model disagrees with the keyword (or is unsure): defer to the LLM.
+                confidence = probs[agent] * 0.5
+        elif matched:
+            # Conflicting rules: let the model pick, but defer to the LLM.
+            agent = max(matched, key=probs.__getitem__)
+            confidence = probs[agent] * 0.5
+        else:
+            # Model-only decisions are discounted: the seed corpus is tiny.
+            agent = max(probs, key=probs.__getitem__)
+            confidence = probs[agent] * 0.9
+
+        return {"agent": agent, "confidence": round(confidence, 4), "rule_hits": hits[agent]}
+
+    def is_confident(self, decision: dict) -> bool:
+        return decision["confidence"] >= self.threshold
+
+    def should_shadow(self) -> bool:
+        return self.shadow_rate > 0 and random.random() < self.shadow_rate
+
+    def record_decision(self, short_circuited: bool) -> None:
+        self.stats["decisions"] += 1
+        self.stats["short_circuits" if short_circuited else "llm_fallbacks"] += 1
+        if self.stats["decisions"] % self.LOG_EVERY == 0:
+            self.log_stats()
+
+    def record_shadow(self, local_agent: str, llm_agent: str) -> None:
+        self.stats["shadow_checks"] += 1
+        if local_agent != llm_agent:
+            self.stats["shadow_disagreements"] += 1
+            print(f"[IntentRouter] Shadow disagreement: local='{local_agent}' llm='{llm_agent}'")
+
+    def log_stats(self) -> None:
+        decisions = self.stats["decisions"] or 1
+        checks = self.stats["shadow_checks"] or 1
+        print(
+            f"[IntentRouter] short-circuit rate {self.stats['short_circuits'] / decisions:.1%} "
+            f"over {self.stats['decisions']} decisions; shadow disagreement "
+            f"{self.stats['shadow_disagreements'] / checks:.1%} over {self.stats['shadow_checks']} checks "
+            f"(threshold={self.threshold})"
+        )
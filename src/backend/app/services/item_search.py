@@ -0,0 +1,280 @@
+"""
+Per-user vector index for item search (GET /items/search).
+
+Each item is embedded locally as a signed hashed bag-of-words vector (title,
+description, category, subcategory and life area; stopwords dropped, lightly
+stemmed) and persisted as a float32 blob in `item_vectors`. Session hooks
+re-embed items in the same transaction as their insert, edit or delete, and
+patch cached per-user matrices after commit, so a query is one matrix-vector
+product plus a top-k selection. Items that predate the table are embedded on
+first search. Entries also expire after `max_age` seconds (like the token index),
+which bounds staleness across worker processes.
+"""
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+from sqlalchemy import Connection, delete, event, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.models.item_vector import ItemVector
+from app.services.similarity import tokenize
+
+SEARCH_DIMS = 256
+# Item attributes that feed the embedding
+TEXT_FIELDS = ("title", "description", "category", "subcategory", "life_area")
+
+_PENDING_KEY = "item_search_pending"
+_table = ItemVector.__table__
+
+
+def embed(text: str, dims: int = SEARCH_DIMS) -> np.ndarray:
+    """L2-normalized float32 vector; the hash sign spreads bucket collisions around zero."""
+    vector = np.zeros(dims, dtype=np.float32)
+    for token in tokenize(text):
+        digest = zlib.crc32(token.encode())
+        vector[digest % dims] += 1.0 if digest & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def item_text(values) -> str:
+    """Search text for an item or a row/mapping with the TEXT_FIELDS attributes."""
+    get = values.get if isinstance(values, dict) else lambda attr: getattr(values, attr)
+    return " ".join(get(attr) or "" for attr in TEXT_FIELDS)
+
+
+@dataclass
+class UserVectorIndex:
+    """
+    Growable `(capacity, dims)` float32 matrix with an item id per row.
+
+    The matrix is column-major: a query only has a few non-zero dimensions, so scoring reads
+    just those columns (contiguous) instead of the whole matrix.
+    """
+
+    ids: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    matrix: np.ndarray = field(default_factory=lambda: np.zeros((0, SEARCH_DIMS), dtype=np.float32, order="F"))
+    rows: dict[int, int] = field(default_factory=dict)
+    built_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def load(cls, db: Session, user_id: int) -> "UserVectorIndex":
+        """
+        Read the user's stored vectors, embedding any items that have none yet.
+
+        The backfill commits in its own short-lived session, so the caller's transaction is left alone.
+        """
+        missing = db.execute(
+            select(Item.id, *(getattr(Item, attr) for attr in TEXT_FIELDS))
+            .outerjoin(ItemVector, ItemVector.item_id == Item.id)
+            .where(Item.user_id == user_id, ItemVector.item_id.is_(None))
+        ).all()
+        if missing:
+            with Session(bind=db.get_bind()) as backfill:
+                # Upsert: a concurrent first search may embed the same items before this commits
+                connection = backfill.connection()
+                for row in missing:
+                    _store(connection, row.id, user_id, embed(item_text(row)).tobytes())
+                backfill.commit()
+            print(f"[ItemSearch] Embedded {len(missing)} items for user {user_id}")
+
+        stored = db.execute(select(_table.c.item_id, _table.c.vector).where(_table.c.user_id == user_id)).all()
+        index = cls()
+        if stored:
+            index.ids = np.fromiter((row.item_id for row in stored), dtype=np.int64, count=len(stored))
+            matrix = np.frombuffer(b"".join(row.vector for row in stored), dtype=np.float32)
+            index.matrix = np.asfortranarray(matrix.reshape(len(stored), SEARCH_DIMS))
+            index.rows = {int(item_id): row for row, item_id in enumerate(index.ids)}
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, item_id: int, vector: np.ndarray) -> None:
+        row = self.rows.get(item_id)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.ids):
+                capacity = max(16, 2 * row)
+                self.ids = np.resize(self.ids, capacity)
+                matrix = np.zeros((capacity, SEARCH_DIMS), dtype=np.float32, order="F")
+                matrix[:row] = self.matrix[:row]
+                self.matrix = matrix
+            self.rows[item_id] = row
+            self.ids[row] = item_id
+        self.matrix[row] = vector
+
+    def remove(self, item_id: int) -> None:
+        """Swap the last row into the removed one to keep rows contiguous."""
+        row = self.rows.pop(item_id, None)
+        if row is None:
+            return
+        last = len(self.rows)
+        if row != last:
+            moved = int(self.ids[last])
+            self.ids[row], self.matrix[row] = moved, self.matrix[last]
+            self.rows[moved] = row
+
+    def search(self, query: np.ndarray, limit: int = 20, min_score: float = 0.1) -> list[tuple[int, float]]:
+        """`(item_id, cosine score)` of the best `limit` matches scoring at least `min_score`."""
+        size = len(self.rows)
+        dims = np.flatnonzero(query)
+        if not size or limit < 1 or not len(dims):
+            return []
+        scores = self.matrix[:size, dims] @ query[dims]
+        if limit < size:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[row]), float(scores[row])) for row in top if scores[row] >= min_score]
+
+
+class VectorIndexCache:
+    """
+    LRU of `UserVectorIndex`es, patched in place on committed item writes.
+
+    A write committed while an index is being loaded cannot be patched into it, so
+    every applied change bumps a generation and a load that saw it move is returned
+    but not cached.
+    """
+
+    def __init__(self, max_users: int = 64, max_age: float = 900):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._indexes: OrderedDict[int, UserVectorIndex] = OrderedDict()
+        self._generations: dict[int | None, int] = {}  # None: removals with an unknown owner
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "updates": 0}
+
+    def _cached(self, user_id: int) -> UserVectorIndex | None:
+        index = self._indexes.get(user_id)
+        if index is None or time.monotonic() - index.built_at >= self.max_age:
+            return None
+        self._indexes.move_to_end(user_id)
+        self.stats["hits"] += 1
+        return index
+
+    def _generation(self, user_id: int) -> tuple[int, int]:
+        return self._generations.get(user_id, 0), self._generations.get(None, 0)
+
+    def get(self, db: Session, user_id: int) -> UserVectorIndex:
+        with self._lock:
+            index = self._cached(user_id)
+            if index is not None:
+                return index
+            generation = self._generation(user_id)
+
+        index = UserVectorIndex.load(db, user_id)
+        with self._lock:
+            self.stats["builds"] += 1
+            cached = self._cached(user_id)
+            if cached is not None:
+                return cached  # another request built it first (and it has been patched since)
+            if self._generation(user_id) != generation:
+                return index  # a write landed mid-load; the next search loads again
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def apply(self, changes: list[tuple[int | None, int, np.ndarray | None]]) -> None:
+        """
+        Apply `(user_id, item_id, vector)` changes; a None vector removes the item.
+
+        A removal with an unknown owner (None) is applied to every cached index.
+        """
+        with self._lock:
+            for user_id, item_id, vector in changes:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                targets = [self._indexes.get(user_id)] if user_id is not None else list(self._indexes.values())
+                for index in filter(None, targets):
+                    if vector is None:
+                        index.remove(item_id)
+                    else:
+                        index.upsert(item_id, vector)
+                    self.stats["updates"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._generations.clear()
+
+
+vector_index = VectorIndexCache()
+
+
+def search_items(db: Session, user_id: int, query: str, limit: int = 20) -> list[tuple[Item, float]]:
+    """Best matching items for `query`, most similar first."""
+    hits = vector_index.get(db, user_id).search(embed(query), limit)
+    if not hits:
+        return []
+    # Look rows up by primary key only: with a user_id predicate SQLite may scan the user's items instead.
+    rows = db.execute(select(Item).where(Item.id.in_([item_id for item_id, _ in hits]))).scalars()
+    items = {item.id: item for item in rows if item.user_id == user_id}
+    return [(items[item_id], score) for item_id, score in hits if item_id in items]
+
+
+# ----------------------------------------------------------------------
+# Incremental maintenance
+# ----------------------------------------------------------------------
+def _store(connection: Connection, item_id: int, user_id: int, vector: bytes) -> None:
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(_table).values(item_id=item_id, user_id=user_id, vector=vector)
+        connection.execute(
+            stmt.on_conflict_do_update(index_elements=["item_id"], set_={"user_id": user_id, "vector": vector})
+        )
+        return
+    updated = connection.execute(
+        update(_table).where(_table.c.item_id == item_id).values(user_id=user_id, vector=vector)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(_table).values(item_id=item_id, user_id=user_id, vector=vector))
+
+
+@event.listens_for(Session, "after_flush")
+def _embed_item_writes(session: Session, flush_context) -> None:
+    pending = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Item):
+            continue
+        state = inspect(obj)
+        item_id, user_id = state.dict.get("id"), state.dict.get("user_id")
+        if item_id is None:
+            continue
+        pending = pending if pending is not None else session.info.setdefault(_PENDING_KEY, [])
+        if obj in session.deleted:
+            # Deleted rows must not trigger lazy loads; an unloaded owner is resolved in `apply`.
+            session.connection().execute(delete(_table).where(_table.c.item_id == item_id))
+            pending.append((user_id, item_id, None))
+            continue
+        owner_history = state.attrs.user_id.history
+        if obj in session.dirty and not any(state.attrs[attr].history.has_changes() for attr in TEXT_FIELDS):
+            if not owner_history.deleted:
+                continue
+        vector = embed(item_text(obj))
+        _store(session.connection(), item_id, obj.user_id, vector.tobytes())
+        if owner_history.deleted and owner_history.deleted[0] not in (None, obj.user_id):
+            pending.append((owner_history.deleted[0], item_id, None))
+        pending.append((obj.user_id, item_id, vector))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        vector_index.apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
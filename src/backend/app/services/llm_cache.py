@@ -0,0 +1,156 @@
+"""
+Content-addressed cache for structured LLM responses.
+
+Keys hash the model name, prompt, generation config and response schema. Entries
+live in an in-process LRU tier and, when `LLM_CACHE_SQLITE_PATH` is set, in a
+SQLite tier that survives restarts and is shared by every worker on the host.
+The SQLite tier does blocking file I/O, so async callers check the memory tier
+inline and run SQLite reads and writes in a worker thread (see `llm_json`).
+Values are copied in and out, so callers may mutate what they get back.
+"""
+
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.config import get_settings
+
+
+@lru_cache(maxsize=64)
+def _schema_fingerprint(schema: type[BaseModel]) -> str:
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return f"{schema.__module__}.{schema.__qualname__}:{hashlib.sha256(schema_json.encode()).hexdigest()[:16]}"
+
+
+def model_name(model: Any) -> str:
+    name = getattr(model, "model_name", None)
+    return name if isinstance(name, str) else f"{type(model).__name__}@{id(model)}"
+
+
+def make_cache_key(model: Any, prompt: str, schema: type[BaseModel] | None, **generation_config: Any) -> str:
+    """Stable SHA-256 key over everything that determines the model's answer."""
+    payload = {
+        "model": model_name(model),
+        "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+        "config": generation_config,
+        "schema": _schema_fingerprint(schema) if schema is not None else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + optional SQLite) TTL cache of parsed JSON responses."""
+
+    def __init__(self, max_entries: int = 512, sqlite_path: str | None = None):
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path or None
+        self._memory: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.stats = {"memory_hits": 0, "sqlite_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if self.sqlite_path:
+            self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value_json TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """True when reads and writes touch the SQLite tier (blocking I/O)."""
+        return self._conn is not None
+
+    def get(self, key: str, memory_only: bool = False) -> dict[str, Any] | None:
+        """Cached value or None; `memory_only` skips the SQLite tier and does not count a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+            if memory_only:
+                return None
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value_json, expires_at FROM llm_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], copy.deepcopy(value))
+                    self.stats["sqlite_hits"] += 1
+                    return value
+                if row:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, copy.deepcopy(value))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value_json, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._conn.commit()
+            self.stats["stores"] += 1
+
+    def prune(self) -> int:
+        """Drop expired rows from both tiers; returns the number removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]
+            for key in expired:
+                del self._memory[key]
+            removed = len(expired)
+            if self._conn is not None:
+                removed += self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+                self._conn.commit()
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def _remember(self, key: str, expires_at: float, value: dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+
+@lru_cache
+def get_llm_cache() -> LLMResponseCache | None:
+    """Process-wide cache built from settings; None when caching is disabled."""
+    settings = get_settings()
+    if not settings.llm_cache_enabled:
+        return None
+    return LLMResponseCache(max_entries=settings.llm_cache_max_entries, sqlite_path=settings.llm_cache_sqlite_path)
@@ -1,10 +1,14 @@
+import asyncio
 import json
 import re
+from collections.abc import AsyncIterator
 from typing import Any, TypeVar
 
 import google.generativeai as genai
 from pydantic import BaseModel, TypeAdapter
 
+from app.services.llm_cache import get_llm_cache, make_cache_key
+
 T = TypeVar("T", bound=BaseModel)
 
 
@@ -38,6 +42,105 @@ def validate_json_response(text: str, schema: type[T]) -> T:
     return TypeAdapter(schema).validate_python(parse_json_response(text))
 
 
+def _attempt_prompt(prompt: str, attempt: int) -> str:
+    if not attempt:
+        return prompt
+    return (
+        f"{prompt}\n\nYour previous response was invalid JSON or failed schema validation. "
+        "Return ONLY one valid JSON object matching the requested schema."
+    )
+
+
+def _generation_config(temperature: float, max_output_tokens: int) -> Any:
+    return genai.types.GenerationConfig(
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        response_mime_type="application/json",
+    )
+
+
+def _parse_response(text: str, schema: type[T] | None) -> T | dict[str, Any]:
+    if schema is None:
+        return parse_json_response(text)
+    return validate_json_response(text, schema)
+
+
+def _cache_key(
+    model: Any,
+    prompt: str,
+    schema: type[T] | None,
+    temperature: float,
+    max_output_tokens: int,
+    cache_ttl: float,
+    bypass_cache: bool,
+) -> str | None:
+    """The call's cache key, or None when caching is off or this call is not cacheable."""
+    if get_llm_cache() is None or bypass_cache or cache_ttl <= 0:
+        return None
+    return make_cache_key(model, prompt, schema, temperature=temperature, max_output_tokens=max_output_tokens)
+
+
+def _cached_result(cached: dict[str, Any] | None, schema: type[T] | None) -> T | dict[str, Any] | None:
+    if cached is None or schema is None:
+        return cached
+    return TypeAdapter(schema).validate_python(cached)
+
+
+def _cache_lookup(
+    model: Any,
+    prompt: str,
+    schema: type[T] | None,
+    temperature: float,
+    max_output_tokens: int,
+    cache_ttl: float,
+    bypass_cache: bool,
+) -> tuple[str | None, T | dict[str, Any] | None]:
+    """Return `(cache_key, cached_result)`; the key is None when this call is not cacheable."""
+    key = _cache_key(model, prompt, schema, temperature, max_output_tokens, cache_ttl, bypass_cache)
+    if key is None:
+        return None, None
+    return key, _cached_result(get_llm_cache().get(key), schema)
+
+
+async def _cache_lookup_async(
+    model: Any,
+    prompt: str,
+    schema: type[T] | None,
+    temperature: float,
+    max_output_tokens: int,
+    cache_ttl: float,
+    bypass_cache: bool,
+) -> tuple[str | None, T | dict[str, Any] | None]:
+    """`_cache_lookup` that reads the SQLite tier in a worker thread; memory hits stay inline."""
+    key = _cache_key(model, prompt, schema, temperature, max_output_tokens, cache_ttl, bypass_cache)
+    if key is None:
+        return None, None
+    cache = get_llm_cache()
+    if not cache.persistent:
+        return key, _cached_result(cache.get(key), schema)
+    cached = cache.get(key, memory_only=True)
+    if cached is None:
+        cached = await asyncio.to_thread(cache.get, key)
+    return key, _cached_result(cached, schema)
+
+
+def _cache_store(key: str | None, result: T | dict[str, Any], cache_ttl: float) -> None:
+    cache = get_llm_cache()
+    if key is None or cache is None:
+        return
+    value = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+    cache.set(key, value, cache_ttl)
+
+
+async def _cache_store_async(key: str | None, result: T | dict[str, Any], cache_ttl: float) -> None:
+    """`_cache_store` that writes the SQLite tier in a worker thread."""
+    cache = get_llm_cache()
+    if key is not None and cache is not None and cache.persistent:
+        await asyncio.to_thread(_cache_store, key, result, cache_ttl)
+    else:
+        _cache_store(key, result, cache_ttl)
+
+
 def generate_json(
     model: Any,
     prompt: str,
@@ -46,31 +149,195 @@ def generate_json(
     temperature: float = 0.2,
     max_output_tokens: int = 2048,
     retries: int = 1,
+    cache_ttl: float = 0,
+    bypass_cache: bool = False,
 ) -> T | dict[str, Any]:
-    """Generate JSON from a Gemini/Gemma model with bounded retry validation."""
+    """
+    Generate JSON from a Gemini/Gemma model with bounded retry validation.
+
+    Responses are cached for `cache_ttl` seconds (0 disables caching for the call site);
+    `bypass_cache` skips both lookup and store, e.g. for high-temperature agents.
+    """
+    cache_key, cached = _cache_lookup(model, prompt, schema, temperature, max_output_tokens, cache_ttl, bypass_cache)
+    if cached is not None:
+        return cached
+
     last_error: Exception | None = None
 
     for attempt in range(retries + 1):
-        retry_prompt = prompt
-        if attempt:
-            retry_prompt = (
-                f"{prompt}\n\nYour previous response was invalid JSON or failed schema validation. "
-                "Return ONLY one valid JSON object matching the requested schema."
+        try:
+            response = model.generate_content(
+                _attempt_prompt(prompt, attempt),
+                generation_config=_generation_config(temperature, max_output_tokens),
             )
+            result = _parse_response(response.text, schema)
+            _cache_store(cache_key, result, cache_ttl)
+            return result
+        except Exception as exc:
+            last_error = exc
 
+    raise LLMJSONError(f"Could not generate valid JSON after {retries + 1} attempt(s): {last_error}")
+
+
+async def generate_json_async(
+    model: Any,
+    prompt: str,
+    schema: type[T] | None = None,
+    *,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    retries: int = 1,
+    cache_ttl: float = 0,
+    bypass_cache: bool = False,
+) -> T | dict[str, Any]:
+    """Awaitable variant of `generate_json` that does not block the event loop."""
+    cache_key, cached = await _cache_lookup_async(
+        model, prompt, schema, temperature, max_output_tokens, cache_ttl, bypass_cache
+    )
+    if cached is not None:
+        return cached
+
+    last_error: Exception | None = None
+
+    for attempt in range(retries + 1):
         try:
-            response = model.generate_content(
-                retry_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens,
-                    response_mime_type="application/json",
-                ),
+            response = await model.generate_content_async(
+                _attempt_prompt(prompt, attempt),
+                generation_config=_generation_config(temperature, max_output_tokens),
             )
-            if schema is None:
-                return parse_json_response(response.text)
-            return validate_json_response(response.text, schema)
+            result = _parse_response(response.text, schema)
+            await _cache_store_async(cache_key, result, cache_ttl)
+            return result
         except Exception as exc:
             last_error = exc
 
     raise LLMJSONError(f"Could not generate valid JSON after {retries + 1} attempt(s): {last_error}")
+
+
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONStringFieldStream:
+    """Incrementally decode one string field of a JSON object that is still being generated."""
+
+    def __init__(self, field: str):
+        self.field_pattern = re.compile(rf'"{re.escape(field)}"\s*:\s*"')
+        self.buffer = ""
+        self.position: int | None = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Append raw model output and return any newly decoded characters of the field."""
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.position is None:
+            match = self.field_pattern.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+
+        decoded: list[str] = []
+        index = self.position
+        buffer = self.buffer
+        while index < len(buffer):
+            char = buffer[index]
+            if char == '"':
+                self.done = True
+                index += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                index += 1
+                continue
+
+            # Escape sequence: wait for the rest of it if the chunk boundary split it.
+            if index + 1 >= len(buffer):
+                break
+            escape = buffer[index + 1]
+            if escape != "u":
+                decoded.append(_JSON_ESCAPES.get(escape, escape))
+                index += 2
+                continue
+            if index + 6 > len(buffer):
+                break
+            code = int(buffer[index + 2 : index + 6], 16)
+            if 0xD800 <= code <= 0xDBFF:
+                # High surrogate: decode together with the following \uDCxx escape.
+                if index + 12 > len(buffer):
+                    break
+                decoded.append(json.loads(f'"{buffer[index : index + 12]}"'))
+                index += 12
+                continue
+            decoded.append(chr(code))
+            index += 6
+
+        self.position = index
+        return "".join(decoded)
+
+
+def _chunk_text(chunk: Any) -> str:
+    try:
+        return chunk.text or ""
+    except (ValueError, AttributeError):
+        # Chunks without text parts (e.g. a bare finish reason) raise on `.text`.
+        return ""
+
+
+async def stream_json_field(
+    model: Any,
+    prompt: str,
+    schema: type[T] | None,
+    field: str,
+    *,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    retries: int = 1,
+    cache_ttl: float = 0,
+    bypass_cache: bool = False,
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Stream the text of one string `field` as the model generates it, then the validated result.
+
+    Yields `("delta", text)` tuples followed by exactly one `("result", parsed)` tuple. If the
+    streamed reply does not validate, falls back to `generate_json_async` with retries; the
+    final result is authoritative over any deltas already sent.
+    """
+    cache_key, cached = await _cache_lookup_async(
+        model, prompt, schema, temperature, max_output_tokens, cache_ttl, bypass_cache
+    )
+    if cached is not None:
+        text = cached.get(field) if isinstance(cached, dict) else getattr(cached, field, "")
+        if text:
+            yield "delta", text
+        yield "result", cached
+        return
+
+    field_stream = JSONStringFieldStream(field)
+    try:
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=_generation_config(temperature, max_output_tokens),
+            stream=True,
+        )
+        async for chunk in response:
+            delta = field_stream.feed(_chunk_text(chunk))
+            if delta:
+                yield "delta", delta
+        result = _parse_response(field_stream.buffer, schema)
+    except Exception as exc:
+        print(f"[LLMJSON] Streamed response unusable, retrying without streaming: {exc}")
+        result = await generate_json_async(
+            model,
+            prompt,
+            schema,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            retries=retries,
+            cache_ttl=cache_ttl,
+            bypass_cache=bypass_cache,
+        )
+    else:
+        await _cache_store_async(cache_key, result, cache_ttl)
+
+    yield "result", result
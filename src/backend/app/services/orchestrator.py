@@ -4,12 +4,17 @@ Analyzes user input and routes to the appropriate specialized agent.
 Uses Flash model for minimal latency on the routing decision.
 """
 
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime
 from typing import Any
 
 import google.generativeai as genai
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
+from app.database import AnySession, run_db
 from app.models.conversation import Conversation
 from app.models.item import Item
 from app.models.reflection import Reflection
@@ -18,7 +23,11 @@ from app.services.agents.brain_dump import BrainDumpAgent
 from app.services.agents.planner import PlannerAgent
 from app.services.agents.reflection import ReflectionAgent
 from app.services.agents.scheduler import SchedulerAgent
-from app.services.llm_json import generate_json
+from app.services.intent_router import LocalIntentRouter
+from app.services.llm_json import generate_json, generate_json_async
+from app.services.token_index import UserTokenIndex, token_index
+
+PLANNER_ITEMS_PER_GROUP = 100
 
 
 class Orchestrator:
@@ -27,10 +36,17 @@ class Orchestrator:
     Uses gemini-2.5-flash for fast routing decisions.
     """
 
+    ROUTER_GENERATION_KWARGS = {"temperature": 0.1, "max_output_tokens": 1024, "retries": 1, "cache_ttl": 24 * 3600}
+
     def __init__(self):
         settings = get_settings()
         genai.configure(api_key=settings.google_api_key)
         self.router_model = genai.GenerativeModel(settings.gemini_flash_model)
+        self.local_router = LocalIntentRouter(
+            threshold=settings.local_router_threshold,
+            shadow_rate=settings.local_router_shadow_rate,
+        )
+        self._shadow_tasks: set[asyncio.Task] = set()
 
         # Initialize all agents
         self.agents = {
@@ -83,63 +99,215 @@ class Orchestrator:
             # Fallback to brain_dump
             return self._run_brain_dump(user_input, user_profile, chat_history, db, user_id)
 
-    def _classify_intent(self, user_input: str) -> dict[str, Any]:
-        """Use Flash to quickly classify the user's intent for routing."""
-        prompt = f"""You are a router that classifies user messages into exactly one agent category.
+    async def route_and_execute_async(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict[str, Any]],
+        db: AnySession,
+        user_id: int,
+    ) -> dict[str, Any]:
+        """Awaitable variant of `route_and_execute`; LLM calls do not block the event loop."""
+        routing = await self._classify_intent_async(user_input)
+        agent_name = routing.get("agent", "brain_dump")
 
-**Agents:**
-- "brain_dump": For unstructured thoughts, task lists, ideas, things the user wants to capture and organize. Keywords: "I need to", "remind me", "I have an idea", listing tasks, capturing thoughts.
-- "reflection": For introspective questions about patterns, habits, mental state, how they've been doing. Keywords: "how am I doing", "what patterns", "reflect", "my habits", "mental state".
-- "scheduler": For scheduling, planning a day/week, time management, organizing when to do things. Keywords: "plan my day", "schedule", "when should I", "organize my time", "weekly plan".
-- "planner": For strategic/long-term questions about goals, life direction, progress assessment. Keywords: "am I on track", "my goals", "career progress", "long-term", "strategic", "life plan".
+        if agent_name == "reflection":
+            return await self._run_reflection_async(user_input, user_profile, chat_history, db, user_id)
+        elif agent_name == "scheduler":
+            return await self._run_scheduler_async(user_input, user_profile, chat_history, db, user_id)
+        elif agent_name == "planner":
+            return await self._run_planner_async(user_input, user_profile, chat_history, db, user_id)
+        else:
+            return await self._run_brain_dump_async(user_input, user_profile, chat_history, db, user_id)
 
-**User Message:** "{user_input}"
+    async def route_and_stream(
+        self,
+        user_input: str,
+        user_profile: dict,
+        chat_history: list[dict[str, Any]],
+        db: AnySession,
+        user_id: int,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Streaming variant of `route_and_execute_async`.
 
-Return JSON: {{"agent": "brain_dump|reflection|scheduler|planner", "confidence": 0.0-1.0, "reasoning": "brief explanation"}}"""
+        Yields, in order: one `routing` event, zero or more `delta` events with reply text,
+        and one `result` event carrying the same standardized response dict.
+        """
+        routing = await self._classify_intent_async(user_input)
+        agent_name = routing.get("agent", "brain_dump")
+        if agent_name not in self.agents:
+            agent_name = "brain_dump"
+        yield {"type": "routing", **routing, "agent": agent_name}
+
+        if agent_name == "reflection":
+            context_args = await run_db(db, self._reflection_context, user_id)
 
+            async def finish(result):
+                return await run_db(db, lambda session: self._finish_reflection(result, session, user_id))
+        elif agent_name == "scheduler":
+            context_args = await run_db(db, self._scheduler_context, user_id)
+
+            async def finish(result):
+                return await run_db(db, lambda session: self._finish_scheduler(result, session, user_id))
+        elif agent_name == "planner":
+            context_args = await run_db(db, self._planner_context, user_id)
+
+            async def finish(result):
+                return self._finish_planner(result)
+        else:
+            context_args = (await run_db(db, self._brain_dump_context, user_id),)
+
+            async def finish(result):
+                return self._finish_brain_dump(result)
+
+        async for event in self.agents[agent_name].process_stream(
+            user_input, user_profile, chat_history, *context_args
+        ):
+            if event["type"] == "result":
+                yield {"type": "result", "result": await finish(event["result"])}
+            else:
+                yield event
+
+    def _classify_intent(self, user_input: str) -> dict[str, Any]:
+        """Route locally when confident; otherwise use Flash to classify the user's intent."""
+        local = self.local_router.classify(user_input)
+        if self.local_router.is_confident(local):
+            if self.local_router.should_shadow():
+                self._record_shadow(local, self._classify_intent_llm(user_input))
+            return self._local_routing(local)
+
+        self.local_router.record_decision(short_circuited=False)
+        return self._classify_intent_llm(user_input)
+
+    async def _classify_intent_async(self, user_input: str) -> dict[str, Any]:
+        """Awaitable variant of `_classify_intent`; shadow checks run in the background."""
+        local = self.local_router.classify(user_input)
+        if self.local_router.is_confident(local):
+            if self.local_router.should_shadow():
+                task = asyncio.create_task(self._shadow_check_async(local, user_input))
+                self._shadow_tasks.add(task)
+                task.add_done_callback(self._shadow_tasks.discard)
+            return self._local_routing(local)
+
+        self.local_router.record_decision(short_circuited=False)
+        return await self._classify_intent_llm_async(user_input)
+
+    def _local_routing(self, local: dict[str, Any]) -> dict[str, Any]:
+        self.local_router.record_decision(short_circuited=True)
+        print(f"[Orchestrator] Routed locally to '{local['agent']}' (confidence: {local['confidence']})")
+        return {"agent": local["agent"], "confidence": local["confidence"], "source": "local"}
+
+    def _record_shadow(self, local: dict[str, Any], routing: dict[str, Any]) -> None:
+        if routing.get("source") == "llm":
+            self.local_router.record_shadow(local["agent"], routing["agent"])
+
+    async def _shadow_check_async(self, local: dict[str, Any], user_input: str) -> None:
+        self._record_shadow(local, await self._classify_intent_llm_async(user_input))
+
+    def _classify_intent_llm(self, user_input: str) -> dict[str, Any]:
+        """Use Flash to quickly classify the user's intent for routing."""
         try:
             result = generate_json(
                 self.router_model,
-                prompt,
+                self._build_router_prompt(user_input),
                 RouterLLMResponse,
-                temperature=0.1,
-                max_output_tokens=1024,
-                retries=1,
+                **self.ROUTER_GENERATION_KWARGS,
             )
-            agent = result.agent
+            return self._routing_from_result(result)
 
-            # Validate agent name
-            if agent not in self.agents:
-                agent = "brain_dump"
+        except Exception as e:
+            print(f"[Orchestrator] Routing error, falling back to brain_dump: {e}")
+            return {"agent": "brain_dump", "confidence": 0.0, "source": "fallback"}
 
-            print(f"[Orchestrator] Routed to '{agent}' (confidence: {result.confidence}): {result.reasoning}")
-            return {"agent": agent}
+    async def _classify_intent_llm_async(self, user_input: str) -> dict[str, Any]:
+        try:
+            result = await generate_json_async(
+                self.router_model,
+                self._build_router_prompt(user_input),
+                RouterLLMResponse,
+                **self.ROUTER_GENERATION_KWARGS,
+            )
+            return self._routing_from_result(result)
 
         except Exception as e:
             print(f"[Orchestrator] Routing error, falling back to brain_dump: {e}")
-            return {"agent": "brain_dump"}
+            return {"agent": "brain_dump", "confidence": 0.0, "source": "fallback"}
+
+    def _routing_from_result(self, result: RouterLLMResponse) -> dict[str, Any]:
+        agent = result.agent
+
+        # Validate agent name
+        if agent not in self.agents:
+            agent = "brain_dump"
+
+        print(f"[Orchestrator] Routed to '{agent}' (confidence: {result.confidence}): {result.reasoning}")
+        return {"agent": agent, "confidence": result.confidence, "source": "llm"}
+
+    def _build_router_prompt(self, user_input: str) -> str:
+        return f"""You are a router that classifies user messages into exactly one agent category.
+
+**Agents:**
+- "brain_dump": For unstructured thoughts, task lists, ideas, things the user wants to capture and organize. Keywords: "I need to", "remind me", "I have an idea", listing tasks, capturing thoughts.
+- "reflection": For introspective questions about patterns, habits, mental state, how they've been doing. Keywords: "how am I doing", "what patterns", "reflect", "my habits", "mental state".
+- "scheduler": For scheduling, planning a day/week, time management, organizing when to do things. Keywords: "plan my day", "schedule", "when should I", "organize my time", "weekly plan".
+- "planner": For strategic/long-term questions about goals, life direction, progress assessment. Keywords: "am I on track", "my goals", "career progress", "long-term", "strategic", "life plan".
+
+**User Message:** "{user_input}"
+
+Return JSON: {{"agent": "brain_dump|reflection|scheduler|planner", "confidence": 0.0-1.0, "reasoning": "brief explanation"}}"""
 
+    # ------------------------------------------------------------------
+    # Brain Dump
+    # ------------------------------------------------------------------
     def _run_brain_dump(
         self, user_input: str, user_profile: dict, chat_history: list[dict], db: Session, user_id: int
     ) -> dict[str, Any]:
         """Execute Brain Dump agent with existing items for link detection."""
-        existing_items = db.query(Item).filter(Item.user_id == user_id).order_by(Item.created_at.desc()).limit(50).all()
-        existing_items_data = [
-            {"id": i.id, "title": i.title, "life_area": i.life_area, "category": i.category} for i in existing_items
-        ]
-
+        existing_items_data = self._brain_dump_context(db, user_id)
         result = self.agents["brain_dump"].process(user_input, user_profile, chat_history, existing_items_data)
+        return self._finish_brain_dump(result)
+
+    async def _run_brain_dump_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], db: AnySession, user_id: int
+    ) -> dict[str, Any]:
+        existing_items_data = await run_db(db, self._brain_dump_context, user_id)
+        result = await self.agents["brain_dump"].process_async(
+            user_input, user_profile, chat_history, existing_items_data
+        )
+        return self._finish_brain_dump(result)
+
+    def _brain_dump_context(self, db: Session, user_id: int) -> UserTokenIndex:
+        # Inverted title index over the user's whole history, kept current by session hooks
+        return token_index.get(db, user_id)
 
+    def _finish_brain_dump(self, result: dict[str, Any]) -> dict[str, Any]:
         # Ensure standard response shape
         result.setdefault("schedule", [])
         result.setdefault("reflection", None)
         result.setdefault("profile_updates", [])
         return result
 
+    # ------------------------------------------------------------------
+    # Reflection
+    # ------------------------------------------------------------------
     def _run_reflection(
         self, user_input: str, user_profile: dict, chat_history: list[dict], db: Session, user_id: int
     ) -> dict[str, Any]:
         """Execute Reflection agent with historical context."""
+        context = self._reflection_context(db, user_id)
+        result = self.agents["reflection"].process(user_input, user_profile, chat_history, *context)
+        return self._finish_reflection(result, db, user_id)
+
+    async def _run_reflection_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], db: AnySession, user_id: int
+    ) -> dict[str, Any]:
+        context = await run_db(db, self._reflection_context, user_id)
+        result = await self.agents["reflection"].process_async(user_input, user_profile, chat_history, *context)
+        return await run_db(db, lambda session: self._finish_reflection(result, session, user_id))
+
+    def _reflection_context(self, db: Session, user_id: int) -> tuple[list[dict], list[dict], dict | None]:
+        """Load recent items, legacy conversations and the last reflection for the Reflection agent."""
         # Get recent items
         recent_items = db.query(Item).filter(Item.user_id == user_id).order_by(Item.created_at.desc()).limit(50).all()
         recent_items_data = [
@@ -178,10 +346,9 @@ Return JSON: {{"agent": "brain_dump|reflection|scheduler|planner", "confidence":
                 "suggestions": last_reflection.suggestions or [],
             }
 
-        result = self.agents["reflection"].process(
-            user_input, user_profile, chat_history, recent_items_data, recent_convos_data, last_reflection_data
-        )
+        return recent_items_data, recent_convos_data, last_reflection_data
 
+    def _finish_reflection(self, result: dict[str, Any], db: Session, user_id: int) -> dict[str, Any]:
         # Save the new reflection if we got one
         if result.get("reflection"):
             new_reflection = Reflection(
@@ -200,51 +367,79 @@ Return JSON: {{"agent": "brain_dump|reflection|scheduler|planner", "confidence":
         result.setdefault("profile_updates", [])
         return result
 
+    # ------------------------------------------------------------------
+    # Scheduler
+    # ------------------------------------------------------------------
     def _run_scheduler(
         self, user_input: str, user_profile: dict, chat_history: list[dict], db: Session, user_id: int
     ) -> dict[str, Any]:
         """Execute Scheduler agent with pending tasks."""
-        pending_items = (
+        pending_data, busy_blocks = self._scheduler_context(db, user_id)
+        result = self.agents["scheduler"].process(user_input, user_profile, chat_history, pending_data, busy_blocks)
+        return self._finish_scheduler(result, db, user_id)
+
+    async def _run_scheduler_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], db: AnySession, user_id: int
+    ) -> dict[str, Any]:
+        pending_data, busy_blocks = await run_db(db, self._scheduler_context, user_id)
+        result = await self.agents["scheduler"].process_async(
+            user_input, user_profile, chat_history, pending_data, busy_blocks
+        )
+        return await run_db(db, lambda session: self._finish_scheduler(result, session, user_id))
+
+    def _scheduler_context(
+        self, db: Session, user_id: int
+    ) -> tuple[list[dict[str, Any]], list[tuple[datetime, datetime]]]:
+        """
+        Pending tasks to place, and the blocks already booked from now on.
+
+        Tasks with an upcoming block (scheduled earlier, or moved by hand) keep it and count as
+        booked; tasks whose block has passed without being done are placed again.
+        """
+        now = datetime.now()
+        open_items = (
             db.query(Item)
-            .filter(
-                Item.user_id == user_id,
-                Item.status == "pending",
-                Item.category == "task",
-            )
+            .filter(Item.user_id == user_id, Item.status.in_(("pending", "in_progress")))
             .order_by(Item.priority.desc(), Item.deadline.asc())
             .all()
         )
 
-        pending_data = [
-            {
-                "id": i.id,
-                "title": i.title,
-                "priority": i.priority,
-                "category": i.category,
-                "subcategory": i.subcategory,
-                "deadline": i.deadline.isoformat() if i.deadline else None,
-            }
-            for i in pending_items
-        ]
-
-        result = self.agents["scheduler"].process(user_input, user_profile, chat_history, pending_data)
-
+        pending_data, busy_blocks = [], []
+        for i in open_items:
+            if i.scheduled_start and i.scheduled_end and i.scheduled_end > now:
+                busy_blocks.append((i.scheduled_start, i.scheduled_end))
+            elif i.status == "pending" and i.category == "task":
+                pending_data.append(
+                    {
+                        "id": i.id,
+                        "title": i.title,
+                        "priority": i.priority,
+                        "category": i.category,
+                        "subcategory": i.subcategory,
+                        "deadline": i.deadline.isoformat() if i.deadline else None,
+                        "estimated_duration": i.estimated_duration,
+                    }
+                )
+        return pending_data, busy_blocks
+
+    def _finish_scheduler(self, result: dict[str, Any], db: Session, user_id: int) -> dict[str, Any]:
         # Update items with schedule data
-        for block in result.get("schedule", []):
-            item_id = block.get("item_id")
-            if item_id:
-                item = db.query(Item).filter(Item.id == item_id, Item.user_id == user_id).first()
-                if item:
-                    item.estimated_duration = block.get("estimated_duration_minutes")
-                    try:
-                        from datetime import datetime
-
-                        if block.get("scheduled_start"):
-                            item.scheduled_start = datetime.fromisoformat(block["scheduled_start"])
-                        if block.get("scheduled_end"):
-                            item.scheduled_end = datetime.fromisoformat(block["scheduled_end"])
-                    except (ValueError, TypeError):
-                        pass
+        blocks = [block for block in result.get("schedule", []) if block.get("item_id")]
+        item_ids = {block["item_id"] for block in blocks}
+        items = {}
+        if item_ids:
+            items = {item.id: item for item in db.query(Item).filter(Item.id.in_(item_ids), Item.user_id == user_id)}
+        for block in blocks:
+            item = items.get(block["item_id"])
+            if item:
+                item.estimated_duration = block.get("estimated_duration_minutes")
+                try:
+                    if block.get("scheduled_start"):
+                        item.scheduled_start = datetime.fromisoformat(block["scheduled_start"])
+                    if block.get("scheduled_end"):
+                        item.scheduled_end = datetime.fromisoformat(block["scheduled_end"])
+                except (ValueError, TypeError):
+                    pass
         db.commit()
 
         # Ensure standard response shape
@@ -254,26 +449,74 @@ Return JSON: {{"agent": "brain_dump|reflection|scheduler|planner", "confidence":
         result.setdefault("profile_updates", [])
         return result
 
+    # ------------------------------------------------------------------
+    # Planner
+    # ------------------------------------------------------------------
     def _run_planner(
         self, user_input: str, user_profile: dict, chat_history: list[dict], db: Session, user_id: int
     ) -> dict[str, Any]:
-        """Execute Planner agent with all items."""
-        all_items = db.query(Item).filter(Item.user_id == user_id).all()
-        all_items_data = [
-            {
-                "id": i.id,
-                "title": i.title,
-                "category": i.category,
-                "subcategory": i.subcategory,
-                "status": i.status,
-                "life_area": i.life_area,
-                "priority": i.priority,
-            }
-            for i in all_items
-        ]
+        """Execute Planner agent with a bounded sample of the user's items and per-group totals."""
+        context = self._planner_context(db, user_id)
+        result = self.agents["planner"].process(user_input, user_profile, chat_history, *context)
+        return self._finish_planner(result)
 
-        result = self.agents["planner"].process(user_input, user_profile, chat_history, all_items_data)
+    async def _run_planner_async(
+        self, user_input: str, user_profile: dict, chat_history: list[dict], db: AnySession, user_id: int
+    ) -> dict[str, Any]:
+        context = await run_db(db, self._planner_context, user_id)
+        result = await self.agents["planner"].process_async(user_input, user_profile, chat_history, *context)
+        return self._finish_planner(result)
+
+    def _planner_context(self, db: Session, user_id: int) -> tuple[list[dict[str, Any]], dict[str, int]]:
+        """
+        Up to PLANNER_ITEMS_PER_GROUP open tasks (by priority, then deadline), recently completed
+        items and recent ideas/thoughts, plus the total count of each group. The planner trims
+        these further to its token budget.
+        """
+        columns = (
+            Item.id,
+            Item.title,
+            Item.category,
+            Item.subcategory,
+            Item.status,
+            Item.life_area,
+            Item.priority,
+            Item.deadline,
+            Item.created_at,
+            Item.updated_at,
+        )
+        owned = Item.user_id == user_id
+        groups = {
+            "pending": select(*columns)
+            .where(owned, Item.status == "pending")
+            .order_by(Item.priority.desc().nulls_last(), Item.deadline.asc().nulls_last(), Item.created_at.desc()),
+            "done": select(*columns).where(owned, Item.status == "done").order_by(Item.updated_at.desc()),
+            "ideas": select(*columns)
+            .where(owned, Item.category.in_(("idea", "thought")), Item.status != "done")
+            .order_by(Item.created_at.desc()),
+        }
+        items: dict[int, dict[str, Any]] = {}
+        for query in groups.values():
+            for row in db.execute(query.limit(PLANNER_ITEMS_PER_GROUP)):
+                items[row.id] = {
+                    "id": row.id,
+                    "title": row.title,
+                    "category": row.category,
+                    "subcategory": row.subcategory,
+                    "status": row.status,
+                    "life_area": row.life_area,
+                    "priority": row.priority,
+                    "deadline": row.deadline.date().isoformat() if row.deadline else "",
+                    "created_at": row.created_at.isoformat() if row.created_at else "",
+                    "updated_at": row.updated_at.isoformat() if row.updated_at else "",
+                }
+        counts = {
+            name: db.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar_one()
+            for name, query in groups.items()
+        }
+        return list(items.values()), counts
 
+    def _finish_planner(self, result: dict[str, Any]) -> dict[str, Any]:
         # Ensure standard response shape
         result.setdefault("items", [])
         result.setdefault("schedule", [])
@@ -5,12 +5,14 @@ import google.generativeai as genai
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
+from app.database import AnySession, run_db
 from app.models.profile_update import ProfileUpdate
 from app.models.user_context import UserContext
 from app.schemas import MemoryExtractionLLMResponse
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async
 
 VALID_MEMORY_CATEGORIES = {"identity", "constraint", "goal", "general"}
+MEMORY_GENERATION_KWARGS = {"temperature": 0.1, "max_output_tokens": 1024, "retries": 1, "cache_ttl": 3600}
 
 
 def _memory_key(category: str, fact: str) -> str:
@@ -114,30 +116,33 @@ Return ONLY valid JSON:
 }}"""
 
 
+def _memory_model(model=None):
+    if model is not None:
+        return model
+    settings = get_settings()
+    genai.configure(api_key=settings.google_api_key)
+    return genai.GenerativeModel(settings.gemini_flash_model)
+
+
 def extract_memory_candidates(
     db: Session,
     user_id: int,
     user_input: str,
     *,
     agent_message: str | None = None,
+    existing_facts: list[str] | None = None,
     model=None,
 ) -> list[dict]:
     """Return unsaved memory candidates; callers decide whether to persist."""
-    existing_facts = active_context_facts(db, user_id)
-
-    if model is None:
-        settings = get_settings()
-        genai.configure(api_key=settings.google_api_key)
-        model = genai.GenerativeModel(settings.gemini_flash_model)
+    if existing_facts is None:
+        existing_facts = active_context_facts(db, user_id)
 
     try:
         result = generate_json(
-            model,
+            _memory_model(model),
             _build_memory_extraction_prompt(user_input, existing_facts, agent_message),
             MemoryExtractionLLMResponse,
-            temperature=0.1,
-            max_output_tokens=1024,
-            retries=1,
+            **MEMORY_GENERATION_KWARGS,
         )
     except Exception as exc:
         print(f"[ProfileMemory] Candidate extraction failed: {exc}")
@@ -150,6 +155,38 @@ def extract_memory_candidates(
     )
 
 
+async def extract_memory_candidates_async(
+    db: AnySession,
+    user_id: int,
+    user_input: str,
+    *,
+    agent_message: str | None = None,
+    existing_facts: list[str] | None = None,
+    model=None,
+) -> list[dict]:
+    """Awaitable variant of `extract_memory_candidates`."""
+    if existing_facts is None:
+        existing_facts = await run_db(db, active_context_facts, user_id)
+
+    try:
+        result = await generate_json_async(
+            _memory_model(model),
+            _build_memory_extraction_prompt(user_input, existing_facts, agent_message),
+            MemoryExtractionLLMResponse,
+            **MEMORY_GENERATION_KWARGS,
+        )
+    except Exception as exc:
+        print(f"[ProfileMemory] Candidate extraction failed: {exc}")
+        return []
+
+    return await run_db(
+        db,
+        filter_new_memory_candidates,
+        user_id,
+        [candidate.model_dump() for candidate in result.memory_candidates],
+    )
+
+
 def save_profile_memory(
     db: Session,
     user_id: int,
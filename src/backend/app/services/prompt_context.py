@@ -0,0 +1,163 @@
+"""
+Token-budgeted prompt context shared by the agents.
+
+Prompt size used to grow with the user's history: every context fact, the last
+messages verbatim, and item lists of 50 (or all) entries as indented JSON. Each
+agent now declares a `ContextBudget`, and `PromptContext` fills every section up
+to its share: facts and items ranked by relevance to the user's message (shared
+title tokens, see `similarity.tokenize`) and then recency, chat history newest
+first. Lists are encoded as `|`-separated tables with a single header row instead
+of repeating JSON keys per item. Token counts are estimated locally (~4 characters
+per token) and logged per call with what each section kept and dropped.
+"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.similarity import tokenize
+
+CHARS_PER_TOKEN = 4
+HISTORY_MESSAGE_CHARS = 600  # longest chat message kept verbatim
+TABLE_CELL_CHARS = 160  # longest table cell, unless the caller asks otherwise
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate (Gemini averages about four characters per token on English text)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _cell(value: Any, max_chars: int | None) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list | tuple | set):
+        value = ",".join(str(part) for part in value)
+    text = " ".join(str(value).split()).replace("|", "/")
+    if max_chars is not None and len(text) > max_chars:
+        text = text[: max_chars - 1].rstrip() + "…"
+    return text
+
+
+def table_header(columns: Sequence[str]) -> str:
+    return "|".join(columns)
+
+
+def table_row(row: dict[str, Any], columns: Sequence[str], max_cell: int | None = TABLE_CELL_CHARS) -> str:
+    return "|".join(_cell(row.get(column), max_cell) for column in columns)
+
+
+def encode_table(
+    rows: Iterable[dict[str, Any]], columns: Sequence[str], max_cell: int | None = TABLE_CELL_CHARS
+) -> str:
+    """Rows as a header line plus one `|`-separated line each (pipes and newlines inside cells are flattened)."""
+    return "\n".join([table_header(columns), *(table_row(row, columns, max_cell) for row in rows)])
+
+
+def goals_text(goals: dict | list | str | None, empty: str = "  (None specified yet)") -> str:
+    """Goals as `  - Area: goal` lines."""
+    if not goals:
+        return empty
+    if isinstance(goals, dict):
+        return "\n".join(f"  - {str(area).capitalize()}: {goal}" for area, goal in goals.items())
+    if isinstance(goals, list):
+        return "\n".join(f"  - {goal}" for goal in goals)
+    return f"  - {goals}"
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """Estimated-token budget per prompt section."""
+
+    facts: int = 300
+    history: int = 600
+    items: int = 1500
+
+
+class PromptContext:
+    """Fills one prompt's context sections within an agent's budget and logs the result."""
+
+    def __init__(self, agent: str, budget: ContextBudget, query: str = ""):
+        self.agent = agent
+        self.budget = budget
+        self.query_tokens = set(tokenize(query))
+        self.sections: dict[str, dict[str, int]] = {}
+        self.prompt_tokens = 0
+
+    def fill(self, section: str, lines: Iterable[str], budget: int) -> list[str]:
+        """Keep `lines` in order while they fit in `budget` tokens; the rest are counted as omitted."""
+        kept, used, omitted = [], 0, 0
+        for line in lines:
+            cost = estimate_tokens(line) + 1
+            if omitted or used + cost > budget:
+                omitted += 1
+                continue
+            kept.append(line)
+            used += cost
+        report = self.sections.setdefault(section, {"tokens": 0, "kept": 0, "omitted": 0})
+        report["tokens"] += used
+        report["kept"] += len(kept)
+        report["omitted"] += omitted
+        return kept
+
+    def relevance(self, text: str) -> int:
+        return len(self.query_tokens.intersection(tokenize(text))) if self.query_tokens else 0
+
+    def facts(self, facts: Sequence[str], empty: str = "  (None specified yet)") -> str:
+        """Facts most related to the message first, then newest first (the order they are stored in)."""
+        ranked = sorted(facts, key=lambda fact: -self.relevance(fact))
+        return "\n".join(self.fill("facts", (f"  - {fact}" for fact in ranked), self.budget.facts)) or empty
+
+    def history(self, chat_history: Sequence[dict[str, Any]], indent: str = "") -> str:
+        """As many of the newest messages as fit (each cut to HISTORY_MESSAGE_CHARS), oldest first."""
+        lines = []
+        for message in reversed(chat_history):
+            role = "Assistant" if message.get("role") == "assistant" else "User"
+            content = " ".join(str(message.get("content") or "").split())
+            if len(content) > HISTORY_MESSAGE_CHARS:
+                content = content[: HISTORY_MESSAGE_CHARS - 1].rstrip() + "…"
+            lines.append(f"{indent}[{role}]: {content}")
+        return "\n".join(reversed(self.fill("history", lines, self.budget.history)))
+
+    def items(
+        self,
+        section: str,
+        items: Sequence[dict[str, Any]],
+        columns: Sequence[str],
+        budget: int | None = None,
+        recency: bool = True,
+        empty: str = "  (None)",
+    ) -> str:
+        """
+        Items as a table, most relevant to the message first, then most recently updated or created
+        (or in the given order with `recency=False`).
+
+        Rows beyond `budget` (default: the whole items budget) are dropped and summarized in one line.
+        """
+        if not items:
+            return empty
+        if recency:
+            items = sorted(
+                items, key=lambda item: str(item.get("updated_at") or item.get("created_at") or ""), reverse=True
+            )
+        ranked = sorted(items, key=lambda item: -self.relevance(f"{item.get('title')} {item.get('description')}"))
+        header = table_header(columns)
+        rows = self.fill(
+            section,
+            (table_row(item, columns) for item in ranked),
+            (budget if budget is not None else self.budget.items) - estimate_tokens(header),
+        )
+        omitted = len(items) - len(rows)
+        more = [f"(+{omitted} more not shown)"] if omitted else []
+        return "\n".join([header, *rows, *more]) if rows else f"  ({len(items)} not shown)"
+
+    def finish(self, prompt: str) -> str:
+        """Record and log the prompt's estimated size; returns the prompt unchanged."""
+        self.prompt_tokens = estimate_tokens(prompt)
+        details = ", ".join(
+            f"{name} {report['tokens']}" + (f" (-{report['omitted']})" if report["omitted"] else "")
+            for name, report in self.sections.items()
+        )
+        print(
+            f"[PromptContext] {self.agent}: ~{self.prompt_tokens} prompt tokens" + (f"; {details}" if details else "")
+        )
+        return prompt
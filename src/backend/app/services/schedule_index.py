@@ -0,0 +1,206 @@
+"""
+Per-user in-memory interval index over scheduled time blocks.
+
+Open items (pending / in progress) with a `scheduled_start < scheduled_end` block
+are kept sorted by start next to the longest block length, so every block that
+overlaps `[start, end)` lies in one bisected slice of the start list: range,
+conflict and free-slot queries cost O(log n + k) instead of a scan. Overlapping
+pairs are found once per build with a sweep. Indexes live in a small LRU keyed
+by user; session hooks drop a user's entry after a committed write that touches
+a block, and entries expire after `max_age` seconds like the graph index.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.services.scheduling import SchedulingRules, free_intervals
+
+_PENDING_KEY = "schedule_index_pending"
+OPEN_STATUSES = ("pending", "in_progress")
+BLOCK_FIELDS = ("user_id", "title", "status", "scheduled_start", "scheduled_end")
+
+
+@dataclass(frozen=True)
+class Block:
+    start: datetime
+    end: datetime
+    item_id: int
+    title: str
+
+
+@dataclass
+class UserSchedule:
+    blocks: list[Block] = field(default_factory=list)  # sorted by (start, end, item_id)
+    starts: list[datetime] = field(default_factory=list)
+    max_length: timedelta = timedelta(0)
+    conflicts: list[tuple[Block, Block]] = field(default_factory=list)  # sorted by overlap start
+    conflict_starts: list[datetime] = field(default_factory=list)
+    built_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_blocks(cls, blocks: list[Block]) -> "UserSchedule":
+        schedule = cls(blocks=sorted(blocks, key=lambda block: (block.start, block.end, block.item_id)))
+        schedule.starts = [block.start for block in schedule.blocks]
+        schedule.max_length = max((block.end - block.start for block in schedule.blocks), default=timedelta(0))
+
+        active: list[tuple[datetime, int, Block]] = []  # min-heap of blocks still running, by end
+        for block in schedule.blocks:
+            while active and active[0][0] <= block.start:
+                heapq.heappop(active)
+            schedule.conflicts.extend((other, block) for _, _, other in active)
+            heapq.heappush(active, (block.end, block.item_id, block))
+        schedule.conflicts.sort(key=lambda pair: (pair[1].start, pair[0].item_id, pair[1].item_id))
+        schedule.conflict_starts = [later.start for _, later in schedule.conflicts]
+        return schedule
+
+    @classmethod
+    def load(cls, db: Session, user_id: int) -> "UserSchedule":
+        rows = db.execute(
+            select(Item.id, Item.title, Item.scheduled_start, Item.scheduled_end).where(
+                Item.user_id == user_id,
+                Item.status.in_(OPEN_STATUSES),
+                Item.scheduled_start.isnot(None),
+                Item.scheduled_end > Item.scheduled_start,
+            )
+        )
+        return cls.from_blocks([Block(row.scheduled_start, row.scheduled_end, row.id, row.title) for row in rows])
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def overlapping(self, start: datetime, end: datetime) -> list[Block]:
+        """Blocks with `block.start < end` and `block.end > start`, in start order."""
+        low = bisect_left(self.starts, start - self.max_length)
+        high = bisect_left(self.starts, end)
+        return [block for block in self.blocks[low:high] if block.end > start]
+
+    def conflicts_between(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> list[tuple[Block, Block, datetime, datetime]]:
+        """Overlapping block pairs as `(earlier, later, overlap_start, overlap_end)`, optionally within a range."""
+        low, high = 0, len(self.conflicts)
+        if start is not None:
+            low = bisect_left(self.conflict_starts, start - self.max_length)
+        if end is not None:
+            high = bisect_left(self.conflict_starts, end)
+        result = []
+        for earlier, later in self.conflicts[low:high]:
+            overlap_end = min(earlier.end, later.end)
+            if start is None or overlap_end > start:
+                result.append((earlier, later, later.start, overlap_end))
+        return result
+
+    def free_slots(
+        self, now: datetime, minutes: int, rules: SchedulingRules = SchedulingRules()
+    ) -> list[tuple[datetime, datetime]]:
+        """Working-hour gaps of at least `minutes` from `now` over the rules' horizon (breaks kept around blocks)."""
+        horizon_end = datetime.combine(now.date() + timedelta(days=rules.horizon_days), rules.day_start)
+        pad = timedelta(minutes=rules.break_minutes)
+        busy = [(block.start, block.end) for block in self.overlapping(now - pad, horizon_end + pad)]
+        length = timedelta(minutes=minutes)
+        return [(start, end) for start, end in free_intervals(now, busy, rules) if end - start >= length]
+
+
+class ScheduleIndexCache:
+    """LRU of `UserSchedule`s with write-driven invalidation."""
+
+    def __init__(self, max_users: int = 256, max_age: float = 300):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._schedules: OrderedDict[int, UserSchedule] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "invalidations": 0}
+
+    def get(self, db: Session, user_id: int) -> UserSchedule:
+        with self._lock:
+            schedule = self._schedules.get(user_id)
+            if schedule is not None and time.monotonic() - schedule.built_at < self.max_age:
+                self._schedules.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return schedule
+
+        schedule = UserSchedule.load(db, user_id)
+        with self._lock:
+            self._schedules[user_id] = schedule
+            self._schedules.move_to_end(user_id)
+            while len(self._schedules) > self.max_users:
+                self._schedules.popitem(last=False)
+            self.stats["builds"] += 1
+        return schedule
+
+    def invalidate(self, user_ids: set[int] = frozenset(), item_ids: set[int] = frozenset()) -> None:
+        """Drop schedules for `user_ids` and any cached schedule holding a block of one of `item_ids`."""
+        with self._lock:
+            stale = [
+                user_id
+                for user_id, schedule in self._schedules.items()
+                if user_id in user_ids or any(block.item_id in item_ids for block in schedule.blocks)
+            ]
+            for user_id in stale:
+                del self._schedules[user_id]
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schedules.clear()
+
+
+schedule_index = ScheduleIndexCache()
+
+
+def _touches_block(obj: Item, session: Session, fields: tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    if obj in session.new:
+        return state.dict.get("scheduled_start") is not None
+    if obj in session.deleted:
+        return "scheduled_start" not in state.dict or state.dict["scheduled_start"] is not None
+    return any(state.attrs[name].history.has_changes() for name in fields)
+
+
+def schedule_writes(session: Session, fields: tuple[str, ...] = BLOCK_FIELDS) -> tuple[set[int], set[int]] | None:
+    """
+    `(user_ids, item_ids)` of flushed items that gained, lost or edited (`fields`) a scheduled block.
+
+    Reads loaded state only; returns None when no flushed item qualifies.
+    """
+    user_ids, item_ids = set(), set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Item) or not _touches_block(obj, session, fields):
+            continue
+        state = inspect(obj)
+        user_ids.update(
+            value for value in (state.dict.get("user_id"), *state.attrs.user_id.history.deleted) if value is not None
+        )
+        if state.identity:
+            item_ids.add(state.identity[0])
+    return (user_ids, item_ids) if user_ids or item_ids else None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_schedule_writes(session: Session, flush_context) -> None:
+    writes = schedule_writes(session)
+    if writes:
+        pending = session.info.setdefault(_PENDING_KEY, (set(), set()))
+        pending[0].update(writes[0])
+        pending[1].update(writes[1])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        schedule_index.invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,172 @@
+"""
+Deterministic schedule packing for the Scheduler Agent.
+
+Free time is the working window (09:00-20:00) of each day in the horizon minus
+the blocks that are already booked, each padded by a break. Pending tasks are
+placed first-fit into it: tasks due inside the horizon earliest deadline first,
+then the rest by priority. Every placed block is followed by a break. Pure
+Python over a short sorted interval list, so hundreds of tasks pack in a few
+milliseconds.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Any
+
+WORKDAY_START = time(9, 0)
+WORKDAY_END = time(20, 0)
+BREAK_MINUTES = 10
+MIN_BLOCK_MINUTES = 15
+MAX_BLOCK_MINUTES = 120
+DEFAULT_DURATION_MINUTES = 45
+SLOT_MINUTES = 5  # blocks start on 5-minute boundaries
+DEFAULT_PRIORITY = 5
+
+
+@dataclass(frozen=True)
+class SchedulingRules:
+    day_start: time = WORKDAY_START
+    day_end: time = WORKDAY_END
+    break_minutes: int = BREAK_MINUTES
+    horizon_days: int = 7
+
+
+@dataclass
+class SchedulePlan:
+    blocks: list[dict[str, Any]] = field(default_factory=list)  # ScheduleBlock fields, in start order
+    unscheduled: list[dict[str, Any]] = field(default_factory=list)  # tasks that did not fit the horizon
+    late_ids: list[int] = field(default_factory=list)  # scheduled, but ending after their deadline
+
+
+def clamp_duration(minutes: Any) -> int:
+    """Block length for a task estimate: DEFAULT when missing, else within MIN..MAX minutes."""
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        return DEFAULT_DURATION_MINUTES
+    if minutes <= 0:
+        return DEFAULT_DURATION_MINUTES
+    return max(MIN_BLOCK_MINUTES, min(MAX_BLOCK_MINUTES, minutes))
+
+
+def _as_datetime(value: datetime | str | None) -> datetime | None:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _ceil_to_slot(moment: datetime) -> datetime:
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    step = timedelta(minutes=SLOT_MINUTES)
+    return midnight + -(-(moment - midnight) // step) * step
+
+
+def free_intervals(
+    now: datetime, busy: list[tuple[datetime, datetime]], rules: SchedulingRules = SchedulingRules()
+) -> list[list[datetime]]:
+    """Sorted, disjoint `[start, end]` working intervals from `now` that do not touch a busy block or its breaks."""
+    start = _ceil_to_slot(now)
+    windows = []
+    for offset in range(rules.horizon_days):
+        day = now.date() + timedelta(days=offset)
+        window_start = max(datetime.combine(day, rules.day_start), start)
+        window_end = datetime.combine(day, rules.day_end)
+        if window_start < window_end:
+            windows.append([window_start, window_end])
+
+    pad = timedelta(minutes=rules.break_minutes)
+    blocked = sorted((block_start - pad, block_end + pad) for block_start, block_end in busy if block_start < block_end)
+    intervals, first = [], 0
+    for window_start, window_end in windows:
+        while first < len(blocked) and blocked[first][1] <= window_start:
+            first += 1
+        cursor, index = window_start, first
+        while index < len(blocked) and blocked[index][0] < window_end:
+            block_start, block_end = blocked[index]
+            if block_start > cursor:
+                intervals.append([cursor, block_start])
+            cursor = max(cursor, _ceil_to_slot(block_end))
+            index += 1
+        if cursor < window_end:
+            intervals.append([cursor, window_end])
+    min_length = timedelta(minutes=MIN_BLOCK_MINUTES)
+    return [interval for interval in intervals if interval[1] - interval[0] >= min_length]
+
+
+def _urgency(task: dict[str, Any], horizon_end: datetime) -> tuple:
+    priority = task.get("priority") or DEFAULT_PRIORITY
+    deadline = _as_datetime(task.get("deadline"))
+    if deadline is not None and deadline <= horizon_end:
+        return (0, deadline, -priority, task["id"])
+    return (1, -priority, deadline or datetime.max, task["id"])
+
+
+def pack_schedule(
+    tasks: list[dict[str, Any]],
+    busy: list[tuple[datetime, datetime]] | None = None,
+    now: datetime | None = None,
+    rules: SchedulingRules = SchedulingRules(),
+    durations: dict[int, int] | None = None,
+) -> SchedulePlan:
+    """
+    Place `tasks` (dicts with id, title, priority, deadline, estimated_duration) around `busy` blocks.
+
+    `durations` overrides per-task estimates (minutes); deterministic for the same inputs.
+    """
+    now = now or datetime.now()
+    durations = durations or {}
+    free = free_intervals(now, busy or [], rules)
+    horizon_end = datetime.combine(now.date() + timedelta(days=rules.horizon_days - 1), rules.day_end)
+    pause = timedelta(minutes=rules.break_minutes)
+    min_length = timedelta(minutes=MIN_BLOCK_MINUTES)
+
+    plan = SchedulePlan()
+    for task in sorted(tasks, key=lambda task: _urgency(task, horizon_end)):
+        minutes = clamp_duration(durations.get(task["id"], task.get("estimated_duration")))
+        length = timedelta(minutes=minutes)
+        slot = next((index for index, (start, end) in enumerate(free) if end - start >= length), None)
+        if slot is None:
+            plan.unscheduled.append(task)
+            continue
+
+        start, end = free[slot]
+        block_end = start + length
+        next_start = _ceil_to_slot(block_end + pause)
+        if end - next_start >= min_length:
+            free[slot][0] = next_start
+        else:
+            del free[slot]
+
+        deadline = _as_datetime(task.get("deadline"))
+        if deadline is not None and block_end > deadline:
+            plan.late_ids.append(task["id"])
+        plan.blocks.append(
+            {
+                "item_id": task["id"],
+                "title": task.get("title", ""),
+                "estimated_duration_minutes": minutes,
+                "scheduled_start": start.isoformat(timespec="seconds"),
+                "scheduled_end": block_end.isoformat(timespec="seconds"),
+            }
+        )
+
+    plan.blocks.sort(key=lambda block: block["scheduled_start"])
+    return plan
+
+
+def describe_plan(plan: SchedulePlan, rules: SchedulingRules = SchedulingRules()) -> str:
+    """Plain summary of a plan, used when no LLM writes one."""
+    if not plan.blocks:
+        return f"None of your {len(plan.unscheduled)} pending tasks fit into the next {rules.horizon_days} days."
+    first = datetime.fromisoformat(plan.blocks[0]["scheduled_start"])
+    last = datetime.fromisoformat(plan.blocks[-1]["scheduled_end"])
+    noun = "task" if len(plan.blocks) == 1 else "tasks"
+    parts = [f"Scheduled {len(plan.blocks)} {noun} between {first:%a %H:%M} and {last:%a %H:%M}, with breaks."]
+    if plan.late_ids:
+        parts.append(f"{len(plan.late_ids)} will finish after their deadline.")
+    if plan.unscheduled:
+        parts.append(f"{len(plan.unscheduled)} did not fit into the next {rules.horizon_days} days.")
+    return " ".join(parts)
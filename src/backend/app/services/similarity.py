@@ -0,0 +1,117 @@
+"""
+Local text similarity for knowledge-graph candidate generation.
+
+Items are embedded as hashed bag-of-words vectors (title, description and tags),
+weighted by TF-IDF over the batch being analyzed and L2-normalized, so a matrix
+product gives cosine similarity. `candidate_pairs` keeps the top-k neighbours of
+each item, which lets the Graph Analyzer send the LLM a short list of promising
+pairs instead of every item against every other item.
+"""
+
+import math
+import re
+import zlib
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+VECTOR_DIMS = 4096
+# Rows per similarity block; bounds the temporary n x block matrix for large users.
+BLOCK_ROWS = 512
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a about above after again all am an and any are as at be been before being below between both but by can
+    could did do does doing done down during each few for from further get got had has have having he her here
+    hers him his how i if in into is it its itself just me more most my myself need no nor not now of off on
+    once only or other our ours out over own same she should so some such than that the their them then there
+    these they this those through to too under until up very was we were what when where which while who whom
+    why will with would you your yours
+    """.split()
+)
+
+_SUFFIXES = ("ations", "ation", "ings", "ing", "ies", "ied", "ed", "es", "ly", "s")
+
+
+def stem(token: str) -> str:
+    """Strip one common English suffix ("planning" -> "plann", "studies" -> "stud")."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stemmed content words of `text` (stopwords and 1-letter tokens dropped)."""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def item_text(item: dict[str, Any]) -> str:
+    return " ".join([item.get("title") or "", item.get("description") or "", *(item.get("tags") or [])])
+
+
+def _bucket(token: str, dims: int) -> int:
+    return zlib.crc32(token.encode()) % dims
+
+
+def vectorize(texts: Iterable[str], dims: int = VECTOR_DIMS) -> np.ndarray:
+    """TF-IDF weighted, L2-normalized hashed vectors as a float32 `(len(texts), dims)` matrix."""
+    texts = list(texts)
+    matrix = np.zeros((len(texts), dims), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            matrix[row, _bucket(token, dims)] += 1.0
+    if not texts:
+        return matrix
+
+    present = matrix > 0
+    idf = np.log((1.0 + len(texts)) / (1.0 + present.sum(axis=0, dtype=np.float32))) + 1.0
+    np.log1p(matrix, out=matrix)  # sublinear term frequency
+    matrix *= idf.astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def candidate_pairs(
+    items: list[dict[str, Any]],
+    k: int = 5,
+    focus_ids: set[int] | None = None,
+    min_score: float = 0.05,
+    dims: int = VECTOR_DIMS,
+) -> list[tuple[int, int, float]]:
+    """
+    Top-`k` most similar partners per item, as deduplicated `(id_a, id_b, score)` pairs (id_a < id_b).
+
+    With `focus_ids`, only those items look for partners, so every pair touches one of them.
+    Pairs scoring below `min_score` (no meaningful shared vocabulary) are dropped. Sorted by score.
+    """
+    if len(items) < 2 or k < 1:
+        return []
+
+    ids = np.array([item["id"] for item in items])
+    matrix = vectorize((item_text(item) for item in items), dims)
+    rows = np.arange(len(items))
+    if focus_ids is not None:
+        rows = rows[np.isin(ids, list(focus_ids))]
+    k = min(k, len(items) - 1)
+
+    best: dict[tuple[int, int], float] = {}
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block = rows[start : start + BLOCK_ROWS]
+        scores = matrix[block] @ matrix.T
+        scores[np.arange(len(block)), block] = -1.0  # never pair an item with itself
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for offset, row in enumerate(block):
+            for col in top[offset]:
+                score = float(scores[offset, col])
+                if score < min_score:
+                    continue
+                a, b = int(ids[row]), int(ids[col])
+                key = (a, b) if a < b else (b, a)
+                best[key] = max(score, best.get(key, -math.inf))
+
+    return sorted(((a, b, score) for (a, b), score in best.items()), key=lambda pair: -pair[2])
@@ -0,0 +1,200 @@
+"""
+Per-user inverted token index over item titles, for Brain Dump link detection.
+
+Maps `(life_area, token)` to the ids of the user's items whose title contains
+that token (stopwords dropped, lightly stemmed, see `similarity.tokenize`), so
+finding related items for a new one is a few dict lookups over the user's whole
+history. Indexes are built lazily per user, kept in a small LRU and patched in
+place by session hooks after item inserts, edits and deletes are committed.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.item import Item
+from app.services.similarity import tokenize
+
+_PENDING_KEY = "token_index_pending"
+
+
+def _area(life_area: str | None) -> str:
+    return (life_area or "").lower()
+
+
+@dataclass
+class UserTokenIndex:
+    postings: dict[tuple[str, str], set[int]] = field(default_factory=dict)
+    entries: dict[int, tuple[str, frozenset[str]]] = field(default_factory=dict)  # id -> (area, tokens)
+    built_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict[str, Any]]) -> "UserTokenIndex":
+        index = cls()
+        for item in items:
+            if item.get("id") is not None:
+                index.add(item["id"], item.get("title"), item.get("life_area"))
+        return index
+
+    @classmethod
+    def load(cls, db: Session, user_id: int) -> "UserTokenIndex":
+        rows = db.execute(select(Item.id, Item.title, Item.life_area).where(Item.user_id == user_id))
+        return cls.from_items(row._mapping for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, item_id: int, title: str | None, life_area: str | None) -> None:
+        self.remove(item_id)
+        area, tokens = _area(life_area), frozenset(tokenize(title or ""))
+        self.entries[item_id] = (area, tokens)
+        for token in tokens:
+            self.postings.setdefault((area, token), set()).add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        area, tokens = self.entries.pop(item_id, ("", frozenset()))
+        for token in tokens:
+            ids = self.postings.get((area, token))
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self.postings[(area, token)]
+
+    def related(self, title: str, life_area: str | None, limit: int = 5) -> list[int]:
+        """Ids of items in the same life area sharing a title token, most shared tokens (then newest) first."""
+        area = _area(life_area)
+        if not area:
+            return []
+        counts = Counter()
+        for token in set(tokenize(title)):
+            counts.update(self.postings.get((area, token), ()))
+        return [item_id for item_id, _ in sorted(counts.items(), key=lambda entry: (-entry[1], -entry[0]))[:limit]]
+
+
+class TokenIndexCache:
+    """
+    LRU of `UserTokenIndex`es, patched in place on committed item writes.
+
+    A write committed while an index is being loaded cannot be patched into it, so
+    every applied change bumps a generation and a load that saw it move is returned
+    but not cached.
+    """
+
+    def __init__(self, max_users: int = 256, max_age: float = 900):
+        self.max_users = max_users
+        self.max_age = max_age
+        self._indexes: OrderedDict[int, UserTokenIndex] = OrderedDict()
+        self._generations: dict[int | None, int] = {}  # None: changes with an unknown owner
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0, "updates": 0, "invalidations": 0}
+
+    def _cached(self, user_id: int) -> UserTokenIndex | None:
+        index = self._indexes.get(user_id)
+        if index is None or time.monotonic() - index.built_at >= self.max_age:
+            return None
+        self._indexes.move_to_end(user_id)
+        self.stats["hits"] += 1
+        return index
+
+    def _generation(self, user_id: int) -> tuple[int, int]:
+        return self._generations.get(user_id, 0), self._generations.get(None, 0)
+
+    def get(self, db: Session, user_id: int) -> UserTokenIndex:
+        with self._lock:
+            index = self._cached(user_id)
+            if index is not None:
+                return index
+            generation = self._generation(user_id)
+
+        index = UserTokenIndex.load(db, user_id)
+        with self._lock:
+            self.stats["builds"] += 1
+            cached = self._cached(user_id)
+            if cached is not None:
+                return cached  # another request built it first (and it has been patched since)
+            if self._generation(user_id) != generation:
+                return index  # a write landed mid-load; the next lookup loads again
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def apply(self, changes: list[tuple[str, int | None, int, str | None, str | None]]) -> None:
+        """
+        Apply `(action, user_id, item_id, title, life_area)` changes to cached indexes.
+
+        `action` is "add" (insert or edit), "remove", or "drop" (state unknown: rebuild the user's
+        index, or every cached index when the owner is unknown too).
+        """
+        with self._lock:
+            for action, user_id, item_id, title, life_area in changes:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                if action == "drop":
+                    stale = [user_id] if user_id in self._indexes else []
+                    if user_id is None:
+                        stale = list(self._indexes)
+                    for key in stale:
+                        del self._indexes[key]
+                    self.stats["invalidations"] += len(stale)
+                    continue
+                targets = [self._indexes.get(user_id)] if user_id is not None else list(self._indexes.values())
+                for index in filter(None, targets):
+                    if action == "remove":
+                        index.remove(item_id)
+                    else:
+                        index.add(item_id, title, life_area)
+                    self.stats["updates"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+            self._generations.clear()
+
+
+token_index = TokenIndexCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_item_writes(session: Session, flush_context) -> None:
+    # Read loaded state only; an edit whose title, area or owner is not loaded drops the
+    # affected index instead of triggering a lazy load here.
+    pending = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Item):
+            continue
+        state = inspect(obj)
+        values = state.dict
+        item_id = values.get("id") or (state.identity[0] if state.identity else None)
+        if item_id is None:
+            continue
+        pending = pending if pending is not None else session.info.setdefault(_PENDING_KEY, [])
+        user_id = values.get("user_id")
+        if obj in session.deleted:
+            pending.append(("remove", user_id, item_id, None, None))
+            continue
+        if not all(attr in values for attr in ("user_id", "title", "life_area")):
+            pending.append(("drop", user_id, item_id, None, None))
+            continue
+        previous_owner = state.attrs.user_id.history.deleted
+        if previous_owner and previous_owner[0] != user_id:
+            pending.append(("remove", previous_owner[0], item_id, None, None))
+        pending.append(("add", user_id, item_id, values["title"], values["life_area"]))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        token_index.apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
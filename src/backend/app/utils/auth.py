@@ -1,3 +1,6 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from jose import JWTError, jwt
@@ -7,8 +10,10 @@ from app.config import get_settings
 
 settings = get_settings()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+CALENDAR_SCOPE = "calendar"
+
+# Password hashing context; hashes with a different cost are upgraded on the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 
 def hash_password(password: str) -> str:
@@ -21,6 +26,68 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordPoolSaturated(Exception):
+    """Raised when too many hash/verify calls are already waiting for a worker."""
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool for bcrypt, so hashing never blocks the event loop.
+
+    bcrypt releases the GIL, so worker threads hash in parallel with request handling.
+    At most `max_pending` calls may be queued or running; beyond that callers get
+    `PasswordPoolSaturated` instead of an ever-growing queue. With `workers=0` calls run
+    inline on the event loop (the pre-pool behaviour, kept for comparison runs).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt") if workers else None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "completed": 0, "rejected": 0, "max_queue_depth": 0}
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise PasswordPoolSaturated()
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._in_flight - self.workers)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.stats["completed"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+            }
+
+
+password_pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_max_pending)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the worker pool"""
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify on the worker pool; also returns a new hash when the stored one uses another bcrypt cost"""
+    return await password_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -36,6 +103,22 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
+def create_calendar_token(user_id: int, feed_secret: str) -> str:
+    """Create a long-lived token that only authorizes the user's calendar feed while `feed_secret` is current"""
+    return create_access_token(
+        {"sub": str(user_id), "scope": CALENDAR_SCOPE, "feed": feed_secret},
+        timedelta(days=settings.calendar_feed_token_days),
+    )
+
+
+def verify_calendar_token(token: str) -> tuple[int, str] | None:
+    """`(user_id, feed_secret)` of a valid calendar feed token; the caller checks the secret is current"""
+    payload = verify_token(token)
+    if not payload or payload.get("scope") != CALENDAR_SCOPE or not payload.get("sub") or not payload.get("feed"):
+        return None
+    return int(payload["sub"]), payload["feed"]
+
+
 def verify_token(token: str) -> dict | None:
     """Verify and decode a JWT token"""
     try:
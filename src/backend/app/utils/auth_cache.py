@@ -0,0 +1,144 @@
+"""
+Verified-token cache for `get_current_user`.
+
+Maps a bearer token that already passed JWT verification to a snapshot of its
+user's columns, so warm requests skip both the signature check and the users
+query. An entry lives for `ttl` seconds at most and never past the token's own
+`exp`. Session hooks drop a user's entries after any committed write to that
+user (e.g. `PUT /users/me`), and a per-user generation keeps a snapshot loaded
+before such a write from being cached after it.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.config import get_settings
+from app.models.user import User
+
+_PENDING_KEY = "auth_cache_pending"
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    user_id: int
+    snapshot: dict[str, Any]  # column values
+    expires_at: float  # epoch seconds
+
+
+def snapshot_user(user: User) -> dict[str, Any]:
+    return {column.key: copy.deepcopy(getattr(user, column.key)) for column in User.__table__.columns}
+
+
+def attach_user(db: Session, snapshot: dict[str, Any]) -> User:
+    """A persistent `User` in `db` built from a snapshot, without a query; edits and commits work as usual."""
+    existing = db.identity_map.get(identity_key(User, snapshot["id"]))
+    if existing is not None:
+        return existing
+    user = User(**copy.deepcopy(snapshot))
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
+class TokenUserCache:
+    """LRU + TTL map of verified token -> user snapshot, with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedUser] = OrderedDict()
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0}
+
+    def get(self, token: str) -> CachedUser | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and time.time() >= entry.expires_at:
+                del self._entries[token]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(token)
+            self.stats["hits"] += 1
+            return entry
+
+    def generation(self, user_id: int) -> int:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, token: str, user: User, token_exp: float | None, generation: int) -> None:
+        """Cache `user` for `token` unless the user was written since `generation` was read."""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        entry = CachedUser(user.id, snapshot_user(user), expires_at)
+        with self._lock:
+            if self._generations.get(user.id, 0) != generation:
+                return
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: set[int]) -> None:
+        """Drop every cached token of `user_ids`."""
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            stale = [token for token, entry in self._entries.items() if entry.user_id in user_ids]
+            for token in stale:
+                del self._entries[token]
+            self.stats["invalidations"] += len(stale)
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "hit_rate": round(self.hit_rate(), 4)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+settings = get_settings()
+auth_cache = TokenUserCache(max_entries=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_writes(session: Session, flush_context) -> None:
+    user_ids = {
+        inspect(obj).identity[0]
+        for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, User) and inspect(obj).identity
+    }
+    if user_ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        auth_cache.invalidate(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,17 +1,28 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import AnySession, get_session, run_db
 from app.models.user import User
 from app.utils.auth import verify_token
+from app.utils.auth_cache import attach_user, auth_cache
 
 security = HTTPBearer()
 
 
-async def get_current_user(credentials: str = Depends(security), db: Session = Depends(get_db)) -> User:
+def _load_user(db: Session, user_id: int) -> User | None:
+    return db.query(User).filter(User.id == user_id).first()
+
+
+async def get_current_user(credentials: str = Depends(security), db: AnySession = Depends(get_session)) -> User:
     """
-    Dependency to get the current authenticated user from JWT token
+    Dependency to get the current authenticated user from JWT token.
+
+    Verified tokens are cached with a snapshot of their user (see `app.utils.auth_cache`),
+    so repeat requests skip JWT decoding and the users query. The user belongs to the
+    request's `get_session` session (shared with the route), and a cache miss queries it
+    through `run_db`, so async mode does no blocking I/O here.
     """
     # Extract token from credentials
     if isinstance(credentials, str):
@@ -20,18 +31,24 @@ async def get_current_user(credentials: str = Depends(security), db: Session = D
         # credentials is an HTTPAuthCredentials object
         token = credentials.credentials
 
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return attach_user(db.sync_session if isinstance(db, AsyncSession) else db, cached.snapshot)
+
     payload = verify_token(token)
 
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
 
     user_id = payload.get("sub")
-    if not user_id:
+    if not user_id or payload.get("scope"):  # scoped tokens (calendar feeds) are not API sessions
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    generation = auth_cache.generation(int(user_id))
+    user = await run_db(db, _load_user, int(user_id))
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
+    auth_cache.put(token, user, payload.get("exp"), generation)
     return user
@@ -0,0 +1,94 @@
+"""
+Phase 4 Migration Script
+Adds composite indexes for the hot per-user query shapes and unique indexes
+for graph links and profile facts (matching the model declarations).
+Safe to run multiple times.
+"""
+
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "clearmind.db")
+
+INDEXES = [
+    ("ix_items_user_created", "items", "user_id, created_at"),
+    ("ix_items_user_status_category", "items", "user_id, status, category"),
+    ("ix_items_user_scheduled_start", "items", "user_id, scheduled_start"),
+    ("ix_messages_user_timestamp", "messages", "user_id, timestamp"),
+    ("ix_item_links_source_id", "item_links", "source_id"),
+    ("ix_item_links_target_id", "item_links", "target_id"),
+    ("ix_reflections_user_created", "reflections", "user_id, created_at"),
+    ("ix_profile_updates_user_id", "profile_updates", "user_id"),
+]
+
+UNIQUE_INDEXES = [
+    ("ux_item_links_source_target_type", "item_links", ("source_id", "target_id", "link_type")),
+    ("ix_user_context_user_key", "user_context", ("user_id", "key")),
+]
+
+
+def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table,),
+    ).fetchone()
+    return row is not None
+
+
+def _index_exists(cursor: sqlite3.Cursor, name: str) -> bool:
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name=?",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+def _drop_duplicates(cursor: sqlite3.Cursor, table: str, columns: tuple[str, ...]) -> int:
+    """Keep the oldest row per unique key so the unique index can be built."""
+    key = ", ".join(columns)
+    cursor.execute(f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {key})")
+    return cursor.rowcount
+
+
+def migrate(db_path: str = DB_PATH):
+    """Run all Phase 4 migrations."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print(f"[Migration] Connected to {db_path}")
+
+    for name, table, columns in INDEXES:
+        if not _table_exists(cursor, table):
+            print(f"  [!] {table} table not found; skipped {name}")
+            continue
+        if _index_exists(cursor, name):
+            print(f"  [=] Index {name} already exists")
+            continue
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+        print(f"  [+] Created index {name} on {table} ({columns})")
+
+    for name, table, columns in UNIQUE_INDEXES:
+        if not _table_exists(cursor, table):
+            print(f"  [!] {table} table not found; skipped {name}")
+            continue
+        if _index_exists(cursor, name):
+            print(f"  [=] Unique index {name} already exists")
+            continue
+        removed = _drop_duplicates(cursor, table, columns)
+        if removed:
+            print(f"  [-] Removed {removed} duplicate {table} rows")
+        cursor.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({', '.join(columns)})")
+        print(f"  [+] Created unique index {name} on {table} ({', '.join(columns)})")
+
+    cursor.execute("ANALYZE")
+    print("  [+] Refreshed query planner statistics")
+
+    conn.commit()
+    conn.close()
+    print("[Migration] Done!")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    migrate(path)
@@ -0,0 +1,115 @@
+"""
+Phase 5 Migration Script
+Adds FTS5 full-text indexes (Porter-stemmed) over item titles/descriptions and
+chat message content (external-content tables kept in sync by triggers), and
+backfills them, plus the composite index behind keyset pagination of item lists.
+Safe to run multiple times.
+"""
+
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "clearmind.db")
+
+# (fts table, content table, indexed columns)
+FTS_TABLES = [
+    ("items_fts", "items", ("title", "description")),
+    ("messages_fts", "messages", ("content",)),
+]
+
+INDEXES = [
+    ("ix_items_user_priority_created", "items", "user_id, priority, created_at"),
+]
+
+
+def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table,),
+    ).fetchone()
+    return row is not None
+
+
+def _index_exists(cursor: sqlite3.Cursor, name: str) -> bool:
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name=?",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+def _fts5_available(cursor: sqlite3.Cursor) -> bool:
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _create_triggers(cursor: sqlite3.Cursor, fts: str, table: str, columns: tuple[str, ...]) -> None:
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    cursor.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {names}) VALUES (new.id, {new_values});
+        END;
+    """)
+
+
+def migrate(db_path: str = DB_PATH):
+    """Run all Phase 5 migrations."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print(f"[Migration] Connected to {db_path}")
+
+    for name, table, columns in INDEXES:
+        if not _table_exists(cursor, table):
+            print(f"  [!] {table} table not found; skipped {name}")
+            continue
+        if _index_exists(cursor, name):
+            print(f"  [=] Index {name} already exists")
+            continue
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+        print(f"  [+] Created index {name} on {table} ({columns})")
+
+    if not _fts5_available(cursor):
+        print("  [!] SQLite was built without FTS5; search will use the LIKE fallback")
+        conn.commit()
+        conn.close()
+        return
+
+    for fts, table, columns in FTS_TABLES:
+        if not _table_exists(cursor, table):
+            print(f"  [!] {table} table not found; skipped {fts}")
+            continue
+        if _table_exists(cursor, fts):
+            print(f"  [=] {fts} already exists")
+        else:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, content='{table}', content_rowid='id', "
+                "tokenize='porter unicode61')"
+            )
+            cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+            print(f"  [+] Created {fts} over {table} ({', '.join(columns)}) and indexed existing rows")
+        _create_triggers(cursor, fts, table, columns)
+        print(f"  [+] Sync triggers for {fts} ready")
+
+    conn.commit()
+    conn.close()
+    print("[Migration] Done!")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    migrate(path)
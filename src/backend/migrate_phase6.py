@@ -0,0 +1,139 @@
+"""
+Phase 6 Migration Script
+Creates the `user_daily_stats` dashboard rollup (one row per user per day) and
+backfills it from items, item links, profile updates and reflections, so
+dashboard analytics cover history created before the rollup existed. The app
+may already have created the table and written rows for recent activity, so the
+backfill rebuilds every user not yet recorded in `user_daily_stats_backfills`
+(replacing their rows) and records them. Later repairs go through
+scripts/rebuild_daily_stats.py. Safe to run multiple times.
+"""
+
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "clearmind.db")
+
+CREATE_TABLE = """
+    CREATE TABLE user_daily_stats (
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        day DATE NOT NULL,
+        tasks INTEGER NOT NULL DEFAULT 0,
+        ideas INTEGER NOT NULL DEFAULT 0,
+        thoughts INTEGER NOT NULL DEFAULT 0,
+        links INTEGER NOT NULL DEFAULT 0,
+        profile_updates INTEGER NOT NULL DEFAULT 0,
+        reflections INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day)
+    )
+"""
+
+CREATE_BACKFILLS_TABLE = """
+    CREATE TABLE user_daily_stats_backfills (
+        user_id INTEGER NOT NULL PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+        backfilled_at TIMESTAMP NOT NULL
+    )
+"""
+
+PENDING_USERS = "SELECT id FROM users WHERE id NOT IN (SELECT user_id FROM user_daily_stats_backfills)"
+
+COUNTERS = ("tasks", "ideas", "thoughts", "links", "profile_updates", "reflections")
+
+# (source table, owner, timestamp, counter values for one row, FROM/WHERE clause)
+SOURCES = [
+    (
+        "items",
+        "user_id",
+        "created_at",
+        ("category = 'task'", "category = 'idea'", "category NOT IN ('task', 'idea')", "0", "0", "0"),
+        "FROM items WHERE created_at IS NOT NULL",
+    ),
+    (
+        "item_links",
+        "s.user_id",
+        "l.created_at",
+        ("0", "0", "0", "1", "0", "0"),
+        """FROM item_links l
+           JOIN items s ON s.id = l.source_id
+           JOIN items t ON t.id = l.target_id
+           WHERE s.user_id = t.user_id AND l.created_at IS NOT NULL""",
+    ),
+    (
+        "profile_updates",
+        "user_id",
+        "created_at",
+        ("0", "0", "0", "0", "1", "0"),
+        "FROM profile_updates WHERE created_at IS NOT NULL",
+    ),
+    (
+        "reflections",
+        "user_id",
+        "created_at",
+        ("0", "0", "0", "0", "0", "1"),
+        "FROM reflections WHERE created_at IS NOT NULL",
+    ),
+]
+
+
+def _source_query(owner: str, timestamp: str, values: tuple[str, ...], clause: str) -> str:
+    counters = ", ".join(f"{value} AS {column}" for value, column in zip(values, COUNTERS, strict=True))
+    return f"SELECT {owner} AS owner, date({timestamp}) AS day, {counters} {clause}"
+
+
+def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table,),
+    ).fetchone()
+    return row is not None
+
+
+def migrate(db_path: str = DB_PATH):
+    """Run all Phase 6 migrations."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print(f"[Migration] Connected to {db_path}")
+
+    for table, create in (("user_daily_stats", CREATE_TABLE), ("user_daily_stats_backfills", CREATE_BACKFILLS_TABLE)):
+        if _table_exists(cursor, table):
+            print(f"  [=] {table} already exists")
+        else:
+            cursor.execute(create)
+            print(f"  [+] Created {table}")
+
+    pending = cursor.execute(f"SELECT COUNT(*) FROM ({PENDING_USERS})").fetchone()[0]
+    if not pending:
+        print("  [=] Every user is already backfilled; use scripts/rebuild_daily_stats.py to repair")
+    else:
+        parts = []
+        for table, owner, timestamp, values, clause in SOURCES:
+            if _table_exists(cursor, table) and (table != "item_links" or _table_exists(cursor, "items")):
+                parts.append(_source_query(owner, timestamp, values, clause))
+            else:
+                print(f"  [!] {table} table not found; not counted")
+        # Rows the app's hooks wrote for these users only cover recent activity; rebuild them from scratch.
+        cursor.execute(f"DELETE FROM user_daily_stats WHERE user_id IN ({PENDING_USERS})")
+        if parts:
+            cursor.execute(f"""
+                INSERT INTO user_daily_stats (user_id, day, {", ".join(COUNTERS)})
+                SELECT owner, day, {", ".join(f"SUM({column})" for column in COUNTERS)}
+                FROM ({" UNION ALL ".join(parts)})
+                WHERE owner IN ({PENDING_USERS})
+                GROUP BY owner, day
+            """)
+            print(f"  [+] Backfilled {cursor.rowcount} user_daily_stats rows")
+        cursor.execute(
+            f"INSERT INTO user_daily_stats_backfills (user_id, backfilled_at) SELECT id, CURRENT_TIMESTAMP FROM ({PENDING_USERS})"
+        )
+        print(f"  [+] Marked {pending} users backfilled")
+
+    conn.commit()
+    conn.close()
+    print("[Migration] Done!")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    migrate(path)
@@ -0,0 +1,45 @@
+"""
+Phase 7 Migration Script
+Adds `items.content_updated_at`, the time of the last edit to an item's title,
+description or classification. Incremental graph analysis compares it (instead
+of `updated_at`) with its watermark, so status and schedule changes no longer
+re-send items to the LLM. Existing rows start from `updated_at`, which re-sends
+items changed since the last analysis once. Safe to run multiple times.
+"""
+
+import os
+import sqlite3
+import sys
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "clearmind.db")
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> set[str]:
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def migrate(db_path: str = DB_PATH):
+    """Run all Phase 7 migrations."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print(f"[Migration] Connected to {db_path}")
+
+    columns = _columns(cursor, "items")
+    if not columns:
+        print("  [!] items table not found; skipped")
+    elif "content_updated_at" in columns:
+        print("  [=] Column items.content_updated_at already exists")
+    else:
+        cursor.execute("ALTER TABLE items ADD COLUMN content_updated_at TIMESTAMP")
+        cursor.execute("UPDATE items SET content_updated_at = COALESCE(updated_at, created_at)")
+        print(f"  [+] Added column items.content_updated_at (backfilled {cursor.rowcount} rows)")
+
+    conn.commit()
+    conn.close()
+    print("[Migration] Done!")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    migrate(path)
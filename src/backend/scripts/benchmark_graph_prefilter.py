@@ -0,0 +1,111 @@
+"""
+Recall benchmark for the Graph Analyzer candidate-pair prefilter.
+
+Generates a synthetic item set: topics (life areas) made of projects, each
+project with its own vocabulary, and items that mix project words, topic words
+and generic filler. Items of the same project are the links the full-prompt
+baseline is expected to find. For each k the script reports how many of those
+pairs survive the TF-IDF top-k prefilter, how many pairs would be sent to the
+LLM, and the largest batched prompt versus one prompt over every item.
+"Item recall" counts items that keep at least one same-project partner.
+
+No LLM calls are made.
+
+Usage: python scripts/benchmark_graph_prefilter.py [--items 400] [--k 1 3 5 10] [--seed 7]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-key")
+
+backend_root = Path(__file__).resolve().parents[1]
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from app.services.agents.graph_analyzer import graph_analyzer
+from app.services.similarity import candidate_pairs
+
+TOPICS = {
+    "career": "work job manager promotion interview resume office colleague meeting salary",
+    "health": "gym run doctor sleep diet workout yoga weight vitamins stretch",
+    "learning": "course book study exam lecture thesis paper notes professor research",
+    "finance": "budget rent bank tax invoice savings loan payment insurance expenses",
+    "home": "kitchen laundry garden repair cleaning furniture plumber groceries paint move",
+    "relationships": "mom dad friend birthday dinner wedding call partner gift visit",
+}
+FILLER = "finish start plan check update review prepare send write think try make sort look organize".split()
+
+
+def _synthetic_items(count: int, rng: random.Random) -> tuple[list[dict], set[tuple[int, int]]]:
+    projects = []
+    for topic, words in TOPICS.items():
+        vocab = words.split()
+        for index in range(max(2, count // (len(TOPICS) * 5))):
+            keywords = [f"{topic[:3]}{index}x{n}" for n in range(3)]
+            projects.append((topic, vocab, keywords))
+
+    items, members = [], {}
+    for item_id in range(1, count + 1):
+        topic, vocab, keywords = rng.choice(projects)
+        title = rng.sample(keywords, 2) + rng.sample(vocab, 1) + rng.sample(FILLER, 2)
+        description = rng.sample(vocab, 3) + rng.sample(FILLER, 3) + rng.sample(keywords, 1)
+        rng.shuffle(title)
+        items.append(
+            {
+                "id": item_id,
+                "type": rng.choice(["task", "idea", "thought"]),
+                "title": " ".join(title),
+                "description": " ".join(description),
+                "tags": [topic],
+            }
+        )
+        members.setdefault(tuple(keywords), []).append(item_id)
+
+    truth = {pair for ids in members.values() for pair in itertools.combinations(sorted(ids), 2)}
+    return items, truth
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure recall of the graph candidate-pair prefilter.")
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    items, truth = _synthetic_items(args.items, random.Random(args.seed))
+    all_pairs = args.items * (args.items - 1) // 2
+    full_prompt_chars = len(graph_analyzer._build_prompt(items))
+    print(f"[Benchmark] {args.items} items, {len(truth)} baseline pairs, {all_pairs} possible pairs")
+    print(f"[Benchmark] full prompt: 1 request, {full_prompt_chars} chars")
+
+    for k in args.k:
+        started = time.perf_counter()
+        pairs = {(a, b) for a, b, _ in candidate_pairs(items, k)}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        graph_analyzer.candidate_k = k
+        graph_analyzer.prefilter_min_items = 0
+        requests = graph_analyzer.plan_requests(items)
+        largest_prompt = max((len(prompt) for prompt, _ in requests), default=0)
+
+        covered = {item_id for pair in pairs & truth for item_id in pair}
+        linked_items = {item_id for pair in truth for item_id in pair}
+        print(
+            f"[Benchmark] k={k:<3} pairs={len(pairs):<6} ({len(pairs) / all_pairs:.1%} of all) "
+            f"pair recall={len(pairs & truth) / len(truth):.1%} "
+            f"item recall={len(covered) / len(linked_items):.1%} "
+            f"precision={len(pairs & truth) / max(1, len(pairs)):.1%} "
+            f"requests={len(requests)} largest prompt={largest_prompt} chars prefilter={elapsed_ms:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Query-plan benchmark for the Phase 4 indexes.
+
+Builds a throwaway SQLite database with 100k items (plus messages and links)
+spread over many users, strips the Phase 4 indexes, records EXPLAIN QUERY PLAN
+and timings for the hot per-user queries, runs `migrate_phase4.migrate`, and
+records them again.
+
+Usage: python scripts/benchmark_indexes.py [--items 100000] [--users 200]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+backend_root = Path(__file__).resolve().parents[1]
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import create_engine
+
+import app.models.conversation  # noqa: F401
+import app.models.item  # noqa: F401
+import app.models.item_link  # noqa: F401
+import app.models.message  # noqa: F401
+import app.models.profile_update  # noqa: F401
+import app.models.reflection  # noqa: F401
+import app.models.user  # noqa: F401
+import app.models.user_context  # noqa: F401
+import migrate_phase4
+from app.database import Base
+
+# Hot query shapes, as issued by the routes/orchestrator (one user at a time)
+QUERIES = {
+    "items list (GET /items)": "SELECT * FROM items WHERE user_id = ? ORDER BY priority DESC, created_at DESC",
+    "brain dump context": "SELECT * FROM items WHERE user_id = ? ORDER BY created_at DESC LIMIT 50",
+    "scheduler context": (
+        "SELECT * FROM items WHERE user_id = ? AND status = 'pending' AND category = 'task' "
+        "ORDER BY priority DESC, deadline ASC"
+    ),
+    "schedule range (GET /schedule)": (
+        "SELECT * FROM items WHERE user_id = ? AND scheduled_start IS NOT NULL ORDER BY scheduled_start ASC"
+    ),
+    "dashboard activity": "SELECT * FROM items WHERE user_id = ? AND created_at >= ?",
+    "chat history": "SELECT * FROM messages WHERE user_id = ? ORDER BY timestamp DESC LIMIT 10",
+    "user's links": (
+        "SELECT * FROM item_links WHERE source_id IN (SELECT id FROM items WHERE user_id = ?) "
+        "AND target_id IN (SELECT id FROM items WHERE user_id = ?)"
+    ),
+}
+
+
+def _params(name: str, user_id: int) -> tuple:
+    if name == "dashboard activity":
+        return user_id, datetime.utcnow() - timedelta(days=60)
+    if name == "user's links":
+        return user_id, user_id
+    return (user_id,)
+
+
+def build_database(path: str, item_count: int, user_count: int) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (id, email, password_hash) VALUES (?, ?, 'x')",
+        [(user_id, f"user{user_id}@example.com") for user_id in range(1, user_count + 1)],
+    )
+
+    items = []
+    for item_id in range(1, item_count + 1):
+        created = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        scheduled = created + timedelta(days=rng.randint(1, 30)) if rng.random() < 0.2 else None
+        items.append(
+            (
+                item_id,
+                rng.randint(1, user_count),
+                f"Item {item_id}",
+                rng.choice(["task", "idea", "thought"]),
+                rng.choice(["pending", "in_progress", "done", "archived"]),
+                rng.randint(1, 10),
+                created,
+                created,
+                scheduled,
+                scheduled + timedelta(hours=1) if scheduled else None,
+            )
+        )
+    conn.executemany(
+        "INSERT INTO items (id, user_id, title, category, status, priority, created_at, updated_at, "
+        "scheduled_start, scheduled_end) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        items,
+    )
+
+    conn.executemany(
+        "INSERT INTO messages (user_id, role, content, timestamp) VALUES (?, 'user', 'hello', ?)",
+        [
+            (rng.randint(1, user_count), now - timedelta(minutes=rng.randint(0, 90 * 24 * 60)))
+            for _ in range(item_count // 2)
+        ],
+    )
+
+    links = {(rng.randint(1, item_count), rng.randint(1, item_count)) for _ in range(item_count // 2)}
+    conn.executemany(
+        "INSERT INTO item_links (source_id, target_id, link_type, created_at) VALUES (?, ?, 'relates_to', ?)",
+        [(source, target, now) for source, target in links if source != target],
+    )
+
+    # Start from the pre-Phase-4 schema
+    for name, _, _ in migrate_phase4.INDEXES + migrate_phase4.UNIQUE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+    conn.close()
+
+
+def measure(path: str, user_ids: list[int]) -> dict[str, tuple[list[str], float]]:
+    conn = sqlite3.connect(path)
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", _params(name, user_ids[0]))]
+        started = time.perf_counter()
+        for user_id in user_ids:
+            conn.execute(sql, _params(name, user_id)).fetchall()
+        results[name] = (plan, (time.perf_counter() - started) * 1000 / len(user_ids))
+    conn.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=25, help="users queried per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.db")
+        print(f"[Benchmark] Building {args.items} items for {args.users} users...")
+        build_database(path, args.items, args.users)
+        user_ids = random.Random(11).sample(range(1, args.users + 1), min(args.samples, args.users))
+
+        before = measure(path, user_ids)
+        migrate_phase4.migrate(path)
+        after = measure(path, user_ids)
+
+    for name in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = before[name], after[name]
+        print(f"\n=== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms ({ms_before / max(ms_after, 1e-6):.1f}x)")
+        print("  before: " + " | ".join(plan_before))
+        print("  after:  " + " | ".join(plan_after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Latency benchmark for GET /items/search.
+
+Fills a throwaway SQLite database with one user's items (bulk inserts, so the
+first search also measures the one-off embedding backfill), then times
+`search_items` (embed query, matrix-vector product, top-k, item fetch) and the
+raw index lookup over a set of queries.
+
+Usage: python scripts/benchmark_item_search.py [--items 100000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+backend_root = Path(__file__).resolve().parents[1]
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import app.models.conversation  # noqa: F401
+import app.models.item_link  # noqa: F401
+import app.models.message  # noqa: F401
+import app.models.profile_update  # noqa: F401
+import app.models.reflection  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.services.item_search import embed, search_items, vector_index
+
+WORDS = (
+    "thesis slides defense paper dentist gym run budget rent invoice garden laundry groceries mom birthday "
+    "flight passport interview resume course exam lecture notes kitchen repair doctor sleep yoga salary tax "
+    "project launch review meeting report email call plan book read write fix clean buy pay renew"
+).split()
+AREAS = ["career", "health", "learning", "finance", "home", "relationships"]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark item search latency.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'search.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        user = User(email="bench@example.com", password_hash="hash")
+        db.add(user)
+        db.commit()
+
+        db.execute(
+            insert(Item),
+            [
+                {
+                    "user_id": user.id,
+                    "title": " ".join(rng.sample(WORDS, 4)),
+                    "description": " ".join(rng.sample(WORDS, 8)),
+                    "category": rng.choice(["task", "idea", "thought"]),
+                    "life_area": rng.choice(AREAS),
+                }
+                for _ in range(args.items)
+            ],
+        )
+        db.commit()
+
+        started = time.perf_counter()
+        index = vector_index.get(db, user.id)
+        print(f"[Benchmark] first search: backfilled {len(index)} vectors in {time.perf_counter() - started:.2f}s")
+
+        queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(args.queries)]
+        lookup_ms, endpoint_ms = [], []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(embed(query), 20)
+            lookup_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            search_items(db, user.id, query, 20)
+            endpoint_ms.append((time.perf_counter() - started) * 1000)
+
+        for name, samples in (("index lookup", lookup_ms), ("search_items", endpoint_ms)):
+            print(
+                f"[Benchmark] {name:<13} {args.items} items: "
+                f"p50={statistics.median(samples):.2f}ms p95={_percentile(samples, 0.95):.2f}ms "
+                f"max={max(samples):.2f}ms"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Load test: /health latency during a burst of logins.
+
+Drives the ASGI app in-process (no HTTP client or server needed) against a
+throwaway SQLite database. Registers one user, measures GET /health while idle,
+then fires `--logins` concurrent POST /api/auth/login requests while probing
+/health on a fixed schedule, once with bcrypt inline on the event loop (the old
+behaviour, `PASSWORD_HASH_WORKERS=0`) and once on the worker pool. Latency is
+counted from each probe's due time. Reports /health latency percentiles and the
+pool's queue-depth metrics.
+
+Usage: python scripts/load_test_health.py [--logins 32] [--rounds 12] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure /health latency while logins hash passwords.")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login requests per burst")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=2, help="hashing worker threads for the pooled run")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="/health probe period")
+    return parser.parse_args()
+
+
+args = _parse_args()
+workdir = tempfile.mkdtemp(prefix="load-test-health-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(workdir) / 'load_test.db'}"
+os.environ["DATABASE_ASYNC"] = "false"
+os.environ.setdefault("SECRET_KEY", "load-test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "load-test-key")
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ["PASSWORD_HASH_MAX_PENDING"] = str(max(64, args.logins))
+
+backend_root = Path(__file__).resolve().parents[1]
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+import app.utils.auth as auth_utils
+from app.main import app
+
+EMAIL, PASSWORD = "load-test@example.com", "load-test-password"
+
+
+async def request(method: str, path: str, payload: dict | None = None) -> tuple[int, bytes]:
+    """One request through the ASGI app; returns (status, body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "server": ("loadtest", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    disconnected = asyncio.Event()
+    response = {"status": 0, "body": b""}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return response["status"], response["body"]
+
+
+async def probe_health(stop: asyncio.Event, interval: float, samples: int | None = None) -> list[float]:
+    """
+    Probe /health on a fixed schedule. Latency is measured from when each probe was due, so time the
+    event loop spends blocked (and the probes it delays) counts instead of disappearing.
+    """
+    latencies, started = [], time.perf_counter()
+    while not stop.is_set() and (samples is None or len(latencies) < samples):
+        due = started + len(latencies) * interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        status, _ = await request("GET", "/health")
+        latencies.append(time.perf_counter() - due)
+        assert status == 200, status
+    return latencies
+
+
+async def burst(logins: int, interval: float) -> tuple[list[float], float]:
+    stop = asyncio.Event()
+    prober = asyncio.ensure_future(probe_health(stop, interval))
+    await asyncio.sleep(interval)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(request("POST", "/api/auth/login", {"email": EMAIL, "password": PASSWORD}) for _ in range(logins))
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    statuses = {status for status, _ in results}
+    assert statuses == {200}, statuses
+    return await prober, elapsed
+
+
+def _report(label: str, latencies: list[float], elapsed: float | None = None) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    logins = f"  logins took {elapsed:6.2f}s" if elapsed is not None else ""
+    print(
+        f"{label:<28} n={len(ordered):4d}  p50={statistics.median(ordered) * 1000:7.2f}ms  "
+        f"p95={p95 * 1000:7.2f}ms  max={ordered[-1] * 1000:7.2f}ms{logins}"
+    )
+
+
+async def main() -> None:
+    interval = args.interval_ms / 1000
+    status, body = await request("POST", "/api/auth/register", {"email": EMAIL, "password": PASSWORD})
+    assert status == 201, body
+
+    print(f"bcrypt cost {args.rounds}, {args.logins} concurrent logins, /health probed every {args.interval_ms}ms\n")
+    _report("idle", await probe_health(asyncio.Event(), interval, samples=200))
+
+    auth_utils.password_pool = auth_utils.PasswordHashPool(workers=0)
+    latencies, elapsed = await burst(args.logins, interval)
+    _report("logins, inline bcrypt", latencies, elapsed)
+
+    auth_utils.password_pool = auth_utils.PasswordHashPool(args.workers, max(64, args.logins))
+    latencies, elapsed = await burst(args.logins, interval)
+    _report(f"logins, {args.workers} hash workers", latencies, elapsed)
+    print(f"\npool metrics: {auth_utils.password_pool.metrics()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+"""
+Backfill or repair the `user_daily_stats` dashboard rollup from the source tables.
+
+Usage: python scripts/rebuild_daily_stats.py [--user-id N]
+Uses DATABASE_URL (from .env) like the app itself.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+backend_root = Path(__file__).resolve().parents[1]
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from app.database import SessionLocal, engine
+from app.models.user_daily_stats import UserDailyStats, UserDailyStatsBackfill
+from app.services.daily_stats import rebuild_daily_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the user_daily_stats rollup table.")
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's rows")
+    args = parser.parse_args()
+
+    UserDailyStats.__table__.create(bind=engine, checkfirst=True)
+    UserDailyStatsBackfill.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_stats(db, user_id=args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"[DailyStats] Rebuilt {rows} rollup rows for {scope}")
+
+
+if __name__ == "__main__":
+    main()
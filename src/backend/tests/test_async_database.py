@@ -0,0 +1,153 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, async_database_url, run_db
+from app.models.item import Item
+from app.models.message import Message
+from app.models.user import User
+from app.routes.chat import get_chat_history, send_message
+from app.routes.dashboard import get_dashboard_analytics
+from app.routes.graph import create_link, get_graph_data
+from app.routes.items import create_item, get_items, update_item_status
+from app.routes.schedule import get_schedule
+from app.routes.users import update_my_profile
+from app.schemas import ChatMessage, ItemCreate, ItemLinkCreate, UserProfile
+from app.utils.auth import create_access_token
+from app.utils.auth_cache import auth_cache
+from app.utils.dependencies import get_current_user
+
+
+class AsyncDatabaseUrlTests(unittest.TestCase):
+    def test_sync_urls_map_to_async_drivers(self):
+        self.assertEqual(async_database_url("sqlite:///./digital_twin.db"), "sqlite+aiosqlite:///./digital_twin.db")
+        self.assertEqual(async_database_url("postgresql://u:p@db/app"), "postgresql+asyncpg://u:p@db/app")
+        self.assertEqual(async_database_url("postgresql+psycopg2://u:p@db/app"), "postgresql+asyncpg://u:p@db/app")
+
+    def test_async_and_unknown_urls_are_left_alone(self):
+        self.assertEqual(async_database_url("sqlite+aiosqlite:///x.db"), "sqlite+aiosqlite:///x.db")
+        self.assertEqual(async_database_url("mysql://u:p@db/app"), "mysql://u:p@db/app")
+
+
+class AsyncSessionRouteTests(unittest.TestCase):
+    """The hot routes run unchanged on an AsyncSession via `run_db`."""
+
+    def _run(self, scenario):
+        async def wrapper():
+            engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            try:
+                async with Session() as db:
+                    user = User(email="async@example.com", password_hash="hash", name="Async")
+                    db.add(user)
+                    await db.commit()
+                    await scenario(db, user)
+            finally:
+                await engine.dispose()
+
+        asyncio.run(wrapper())
+
+    def test_item_graph_schedule_and_dashboard_routes(self):
+        async def scenario(db, user):
+            first = await create_item(ItemCreate(title="Draft", category="task"), current_user=user, db=db)
+            second = await create_item(ItemCreate(title="Outline", category="idea"), current_user=user, db=db)
+            await update_item_status(first.id, {"status": "done"}, current_user=user, db=db)
+
+            items = await get_items(
+                Response(),
+                category=None,
+                status=None,
+                life_area=None,
+                limit=100,
+                cursor=None,
+                fields=None,
+                current_user=user,
+                db=db,
+            )
+            self.assertEqual({item["title"] for item in items}, {"Draft", "Outline"})
+
+            await create_link(
+                ItemLinkCreate(source_id=first.id, target_id=second.id, link_type="relates_to"),
+                current_user=user,
+                db=db,
+            )
+            graph = await get_graph_data(current_user=user, db=db)
+            self.assertEqual(len(graph.nodes), 2)
+            self.assertEqual(len(graph.links), 1)
+
+            self.assertEqual(await get_schedule(start_date=None, end_date=None, current_user=user, db=db), [])
+
+            analytics = await get_dashboard_analytics(days=30, current_user=user, db=db)
+            self.assertEqual(analytics.telemetry.graph_connections, 1)
+            self.assertEqual(analytics.activity[-1].total, 2)
+
+        self._run(scenario)
+
+    @patch("app.services.chat_pipeline.extract_memory_candidates_async", new_callable=AsyncMock, return_value=[])
+    def test_chat_round_trip(self, _mock_memory):
+        async def scenario(db, user):
+            result = {"agent": "brain_dump", "message": "Saved.", "items": [{"title": "Call", "category": "task"}]}
+            with patch(
+                "app.services.chat_pipeline.orchestrator.route_and_execute_async",
+                new_callable=AsyncMock,
+                return_value=result,
+            ):
+                response = await send_message(ChatMessage(message="call the bank"), current_user=user, db=db)
+
+            self.assertEqual(response.message, "Saved.")
+            history = await get_chat_history(Response(), limit=10, cursor=None, fields=None, current_user=user, db=db)
+            self.assertEqual([message["role"] for message in history], ["user", "assistant"])
+            items = await run_db(db, lambda session: session.query(Item).filter(Item.user_id == user.id).count())
+            self.assertEqual(items, 1)
+
+        self._run(scenario)
+
+    def test_current_user_resolves_on_the_route_session(self):
+        async def scenario(db, user):
+            token = create_access_token({"sub": str(user.id)})
+            user_id = user.id
+            db.expunge(user)
+            auth_cache.clear()
+            self.addCleanup(auth_cache.clear)
+
+            cold = await get_current_user(token, db=db)  # cache miss: users query through run_db
+            self.assertIn(cold, db.sync_session)
+            db.expunge(cold)
+            warm = await get_current_user(token, db=db)  # cache hit: attached without a query
+            self.assertIn(warm, db.sync_session)
+
+            profile = UserProfile(name="Async Two", goals={}, personality={}, life_areas=["Work"])
+            updated = await update_my_profile(profile, current_user=warm, db=db)
+
+            self.assertEqual((cold.id, warm.id, updated.name), (user_id, user_id, "Async Two"))
+            stored = await run_db(db, lambda session: session.get(User, user_id, populate_existing=True))
+            self.assertEqual(stored.life_areas, ["Work"])
+
+        self._run(scenario)
+
+    def test_run_db_serializes_concurrent_calls_on_one_session(self):
+        async def scenario(db, user):
+            def add_message(session, content):
+                session.add(Message(user_id=user.id, role="user", content=content))
+                session.commit()
+
+            await asyncio.gather(*(run_db(db, add_message, f"m{index}") for index in range(5)))
+            count = await run_db(db, lambda session: session.query(Message).count())
+            self.assertEqual(count, 5)
+
+        self._run(scenario)
+
+
+if __name__ == "__main__":
+    unittest.main()
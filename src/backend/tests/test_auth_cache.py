@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.user import User
+from app.routes.users import update_my_profile
+from app.schemas import UserProfile
+from app.utils.auth import create_access_token
+from app.utils.auth_cache import TokenUserCache, auth_cache
+from app.utils.dependencies import get_current_user
+
+
+class AuthCacheTests(unittest.TestCase):
+    def setUp(self):
+        auth_cache.clear()
+        self.stats = dict(auth_cache.stats)
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        db = self.sessions()
+        user = User(email="cache@example.com", password_hash="hash", name="Ana", goals={"health": "run"})
+        db.add(user)
+        db.commit()
+        self.user_id = user.id
+        db.close()
+        self.token = create_access_token({"sub": str(self.user_id)})
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: self.statements.append(args[2]))
+
+    def tearDown(self):
+        Base.metadata.drop_all(bind=self.engine)
+        auth_cache.clear()
+
+    def _stat(self, name):
+        return auth_cache.stats[name] - self.stats[name]
+
+    def _current_user(self, token=None):
+        db = self.sessions()
+        self.addCleanup(db.close)
+        return asyncio.run(get_current_user(token or self.token, db=db)), db
+
+    def test_warm_requests_skip_the_users_query(self):
+        cold, _ = self._current_user()
+        self.assertEqual(len(self.statements), 1)
+
+        warm, db = self._current_user()
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn(warm, db)
+        self.assertEqual((warm.id, warm.name, warm.goals), (cold.id, "Ana", {"health": "run"}))
+        warm.goals["health"] = "swim"  # snapshots are copied per request
+        self.assertEqual(self._current_user()[0].goals, {"health": "run"})
+        self.assertEqual((self._stat("hits"), self._stat("misses")), (2, 1))
+
+        with self.assertRaises(HTTPException):
+            self._current_user("not-a-token")
+
+    def test_profile_update_invalidates_and_persists(self):
+        self._current_user()
+        cached, db = self._current_user()
+        profile = UserProfile(name="Ana Maria", goals={"health": "swim"}, personality={}, life_areas=["Health"])
+        updated = asyncio.run(update_my_profile(profile, current_user=cached, db=db))
+        self.assertEqual(updated.name, "Ana Maria")
+        self.assertEqual(self._stat("invalidations"), 1)
+
+        fresh, _ = self._current_user()
+        self.assertEqual((fresh.name, fresh.life_areas), ("Ana Maria", ["Health"]))
+        self.assertEqual(self._stat("misses"), 2)
+
+    def test_entries_never_outlive_the_token(self):
+        short = create_access_token({"sub": str(self.user_id)}, timedelta(seconds=5))
+        self._current_user(short)
+        self.assertEqual(auth_cache.get(short).user_id, self.user_id)
+        with patch("app.utils.auth_cache.time.time", return_value=time.time() + 10):
+            self.assertIsNone(auth_cache.get(short))
+        self.assertEqual(self._stat("expired"), 1)
+
+    def test_lru_bound_and_stale_puts(self):
+        cache = TokenUserCache(max_entries=2, ttl=60)
+        db = self.sessions()
+        self.addCleanup(db.close)
+        user = db.get(User, self.user_id)
+        for token in ("a", "b", "c"):
+            cache.put(token, user, None, cache.generation(user.id))
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+        generation = cache.generation(user.id)
+        cache.invalidate({user.id})
+        cache.put("d", user, None, generation)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.metrics()["entries"], 0)
+        self.assertAlmostEqual(cache.metrics()["hit_rate"], 0.3333)
+        TokenUserCache(ttl=0).put("e", user, None, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
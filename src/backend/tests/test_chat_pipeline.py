@@ -0,0 +1,112 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.message import Message
+from app.models.user import User
+from app.services.chat_pipeline import build_chat_context, run_chat_pipeline
+
+
+class ChatPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="test@example.com", password_hash="hash", name="Ada")
+        self.db.add(self.user)
+        self.db.commit()
+        self.db.refresh(self.user)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_build_chat_context_returns_chronological_history(self):
+        self.db.add_all([Message(user_id=self.user.id, role="user", content=f"msg {index}") for index in range(12)])
+        self.db.commit()
+
+        profile, history = build_chat_context(self.db, self.user)
+
+        self.assertEqual(profile["name"], "Ada")
+        self.assertEqual(profile["context_facts"], [])
+        self.assertEqual(len(history), 10)
+
+    def test_memory_extraction_runs_concurrently_with_agent(self):
+        events = []
+
+        async def fake_route(*args, **kwargs):
+            events.append("route:start")
+            await asyncio.sleep(0.05)
+            events.append("route:end")
+            return {"agent": "brain_dump", "message": "done"}
+
+        async def fake_memory(db, user_id, user_input, **kwargs):
+            events.append("memory:start")
+            self.assertNotIn("agent_message", kwargs)
+            await asyncio.sleep(0.05)
+            events.append("memory:end")
+            return [{"category": "goal", "fact": "User wants X."}]
+
+        with (
+            patch("app.services.chat_pipeline.orchestrator.route_and_execute_async", side_effect=fake_route),
+            patch("app.services.chat_pipeline.extract_memory_candidates_async", side_effect=fake_memory),
+        ):
+            result, memory = asyncio.run(
+                run_chat_pipeline(self.db, self.user.id, "hi", {"context_facts": []}, [], agent_hint=False)
+            )
+
+        self.assertEqual(result["agent"], "brain_dump")
+        self.assertEqual(len(memory), 1)
+        self.assertLess(events.index("memory:start"), events.index("route:end"))
+
+    def test_agent_hint_waits_for_agent_message(self):
+        async def fake_route(*args, **kwargs):
+            return {"agent": "reflection", "message": "You seem busy."}
+
+        async def fake_memory(db, user_id, user_input, **kwargs):
+            return [kwargs["agent_message"]]
+
+        with (
+            patch("app.services.chat_pipeline.orchestrator.route_and_execute_async", side_effect=fake_route),
+            patch("app.services.chat_pipeline.extract_memory_candidates_async", side_effect=fake_memory),
+        ):
+            _, memory = asyncio.run(run_chat_pipeline(self.db, self.user.id, "hi", {}, [], agent_hint=True))
+
+        self.assertEqual(memory, ["You seem busy."])
+
+    def test_agent_failure_cancels_memory_extraction(self):
+        cancelled = []
+
+        async def fake_route(*args, **kwargs):
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        async def fake_memory(*args, **kwargs):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with (
+            patch("app.services.chat_pipeline.orchestrator.route_and_execute_async", side_effect=fake_route),
+            patch("app.services.chat_pipeline.extract_memory_candidates_async", side_effect=fake_memory),
+        ):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(run_chat_pipeline(self.db, self.user.id, "hi", {}, [], agent_hint=False))
+
+        self.assertEqual(cancelled, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import unittest
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.models.profile_update import ProfileUpdate
+from app.models.reflection import Reflection
+from app.models.user import User
+from app.models.user_daily_stats import UserDailyStats, UserDailyStatsBackfill
+from app.routes.dashboard import get_dashboard_analytics
+from app.services.daily_stats import bucket_start, rebuild_daily_stats
+
+
+class DailyStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="stats@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+        self.db.refresh(self.user)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _rollup(self):
+        rows = self.db.execute(select(UserDailyStats).order_by(UserDailyStats.day)).scalars()
+        return {
+            row.day: (row.tasks, row.ideas, row.thoughts, row.links, row.profile_updates, row.reflections)
+            for row in rows
+            if any((row.tasks, row.ideas, row.thoughts, row.links, row.profile_updates, row.reflections))
+        }
+
+    def test_incremental_updates_match_rebuild(self):
+        monday = datetime(2026, 3, 2, 9, 0)
+        task = Item(user_id=self.user.id, title="Task", category="task", created_at=monday)
+        idea = Item(user_id=self.user.id, title="Idea", category="idea", created_at=monday + timedelta(days=1))
+        goal = Item(user_id=self.user.id, title="Goal", category="goal", created_at=monday + timedelta(days=1))
+        self.db.add_all([task, idea, goal])
+        self.db.flush()
+        self.db.add_all(
+            [
+                ItemLink(source_id=task.id, target_id=idea.id, created_at=monday + timedelta(days=1)),
+                ProfileUpdate(user_id=self.user.id, category="goal", fact="f", new_value_json={}, created_at=monday),
+                Reflection(user_id=self.user.id, summary="s", created_at=monday + timedelta(days=2)),
+            ]
+        )
+        self.db.commit()
+
+        # Re-categorize one item and delete another (its link goes with it).
+        idea.category = "task"
+        self.db.delete(goal)
+        self.db.commit()
+        self.db.delete(task)
+        self.db.commit()
+
+        incremental = self._rollup()
+        self.assertEqual(
+            incremental,
+            {
+                monday.date(): (0, 0, 0, 0, 1, 0),
+                monday.date() + timedelta(days=1): (1, 0, 0, 0, 0, 0),
+                monday.date() + timedelta(days=2): (0, 0, 0, 0, 0, 1),
+            },
+        )
+
+        rebuild_daily_stats(self.db)
+        self.db.commit()
+        self.assertEqual(self._rollup(), incremental)
+
+    def test_week_and_month_granularity_over_custom_range(self):
+        start = date.today() - timedelta(days=70)
+        for offset in (0, 1, 8, 40):
+            created = datetime.combine(start + timedelta(days=offset), datetime.min.time()) + timedelta(hours=12)
+            self.db.add(Item(user_id=self.user.id, title=f"Item {offset}", category="task", created_at=created))
+        self.db.add(Item(user_id=self.user.id, title="Old", category="idea", created_at=datetime(2020, 1, 1)))
+        self.db.commit()
+
+        weekly = asyncio.run(
+            get_dashboard_analytics(
+                start_date=start, end_date=date.today(), granularity="week", current_user=self.user, db=self.db
+            )
+        )
+        monthly = asyncio.run(
+            get_dashboard_analytics(
+                start_date=start, end_date=date.today(), granularity="month", current_user=self.user, db=self.db
+            )
+        )
+
+        self.assertEqual(weekly.activity[0].date, start)
+        self.assertTrue(all(point.date == bucket_start(point.date, "week") for point in weekly.activity[1:]))
+        self.assertEqual(sum(point.total for point in weekly.activity), 4)
+        self.assertEqual(sum(point.total for point in monthly.activity), 4)
+        self.assertLessEqual(len(monthly.activity), 4)
+        self.assertEqual(weekly.velocity[0].nodes, 1 + weekly.activity[0].total)
+        self.assertEqual(weekly.velocity[-1].nodes, 5)
+        self.assertEqual(monthly.velocity[-1].nodes, 5)
+
+    def test_history_without_rollup_rows_is_backfilled_on_first_read(self):
+        created = datetime.combine(date.today() - timedelta(days=3), datetime.min.time()) + timedelta(hours=9)
+        self.db.execute(
+            insert(Item),
+            [
+                {"user_id": self.user.id, "title": f"Legacy {n}", "category": "task", "created_at": created}
+                for n in range(3)
+            ],
+        )
+        self.db.execute(delete(UserDailyStats))  # bulk SQL bypasses the hooks, as on a pre-rollup database
+        self.db.commit()
+
+        result = asyncio.run(get_dashboard_analytics(days=30, current_user=self.user, db=self.db))
+
+        self.assertEqual(sum(day.tasks for day in result.activity), 3)
+        self.assertEqual(self._rollup(), {created.date(): (3, 0, 0, 0, 0, 0)})
+
+    def test_rows_written_by_hooks_before_first_read_do_not_skip_the_backfill(self):
+        legacy = datetime.combine(date.today() - timedelta(days=10), datetime.min.time())
+        self.db.execute(
+            insert(Item), [{"user_id": self.user.id, "title": "Legacy", "category": "idea", "created_at": legacy}]
+        )
+        self.db.commit()
+        # A chat write after the upgrade goes through the hooks and creates today's rollup row first.
+        self.db.add(Item(user_id=self.user.id, title="New", category="task"))
+        self.db.commit()
+
+        result = asyncio.run(get_dashboard_analytics(days=30, current_user=self.user, db=self.db))
+
+        self.assertEqual(sum(day.ideas for day in result.activity), 1)
+        self.assertEqual(sum(day.tasks for day in result.activity), 1)
+        self.assertEqual(self.db.get(UserDailyStatsBackfill, self.user.id).user_id, self.user.id)
+
+    def test_invalid_range_is_rejected(self):
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(
+                get_dashboard_analytics(
+                    start_date=date.today(),
+                    end_date=date.today() - timedelta(days=1),
+                    current_user=self.user,
+                    db=self.db,
+                )
+            )
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
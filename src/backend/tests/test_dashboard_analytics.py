@@ -96,6 +96,33 @@ class DashboardAnalyticsTests(unittest.TestCase):
         self.assertEqual(result.velocity[-1].connections, 1)
         self.assertEqual(result.telemetry.hidden_connections, 1)
 
+    def test_velocity_starts_from_items_and_links_before_window(self):
+        long_ago = datetime.utcnow() - timedelta(days=120)
+        today = datetime.utcnow()
+        old_a = Item(user_id=self.user.id, title="Old A", category="task", created_at=long_ago)
+        old_b = Item(user_id=self.user.id, title="Old B", category="goal", created_at=long_ago)
+        new_item = Item(user_id=self.user.id, title="New", category="goal", created_at=today)
+        other = Item(user_id=self.other_user.id, title="Other", category="task", created_at=long_ago)
+        self.db.add_all([old_a, old_b, new_item, other])
+        self.db.flush()
+        self.db.add_all(
+            [
+                ItemLink(source_id=old_a.id, target_id=old_b.id, created_at=long_ago),
+                ItemLink(source_id=old_a.id, target_id=new_item.id, created_at=today, weight=80),
+                ItemLink(source_id=old_a.id, target_id=other.id, created_at=today),
+            ]
+        )
+        self.db.commit()
+
+        result = self._run_analytics(days=30)
+
+        self.assertEqual((result.velocity[0].nodes, result.velocity[0].connections), (2, 1))
+        self.assertEqual((result.velocity[-1].nodes, result.velocity[-1].connections), (3, 2))
+        self.assertEqual(result.activity[-1].thoughts, 1)
+        self.assertEqual(sum(day.total for day in result.activity), 1)
+        self.assertEqual(result.telemetry.graph_connections, 2)
+        self.assertEqual(result.telemetry.hidden_connections, 1)
+
     def test_telemetry_is_scoped_to_current_user(self):
         now = datetime.utcnow()
         self.db.add_all(
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+import migrate_phase5
+from app.database import Base
+from app.models.item import Item
+from app.models.message import Message
+from app.models.user import User
+from app.routes.search import full_text_search
+from app.services.full_text import fts_query, highlight, parse_terms
+
+
+class SearchTestMixin:
+    def _seed(self):
+        self.user = User(email="fts@example.com", password_hash="hash")
+        self.other = User(email="fts-other@example.com", password_hash="hash")
+        self.db.add_all([self.user, self.other])
+        self.db.commit()
+        self.slides = Item(
+            user_id=self.user.id, title="Thesis slides", description="Prepare the defense deck", category="task"
+        )
+        self.budget = Item(
+            user_id=self.user.id, title="Monthly budget", description="Track grocery spending", category="task"
+        )
+        self.db.add_all(
+            [
+                self.slides,
+                self.budget,
+                Item(user_id=self.other.id, title="Thesis draft", category="task"),
+                Message(user_id=self.user.id, role="user", content="I keep postponing the thesis defense rehearsal"),
+                Message(user_id=self.user.id, role="assistant", content="Let's plan the grocery run"),
+            ]
+        )
+        self.db.commit()
+
+    def _search(self, q, scope="items", limit=20, offset=0):
+        return asyncio.run(
+            full_text_search(q=q, scope=scope, limit=limit, offset=offset, current_user=self.user, db=self.db)
+        )
+
+    def test_snippets_escape_item_and_message_markup(self):
+        self.db.add_all(
+            [
+                Item(
+                    user_id=self.user.id,
+                    title="<script>alert(1)</script> payload",
+                    description="<img src=x onerror=alert(1)> payload",
+                    category="task",
+                ),
+                Message(user_id=self.user.id, role="user", content="<b>payload</b> & more"),
+            ]
+        )
+        self.db.commit()
+        for scope in ("items", "messages"):
+            snippet = self._search("payload", scope=scope).results[0].snippet
+            self.assertIn("<mark>payload</mark>", snippet)
+            self.assertNotIn("<script", snippet)
+            self.assertNotIn("<img", snippet)
+            self.assertNotIn("<b>", snippet)
+            self.assertIn("&lt;", snippet)
+
+
+class FullTextSearchFtsTests(SearchTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "clearmind.db")
+        self.engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=self.engine)
+        with redirect_stdout(StringIO()):
+            migrate_phase5.migrate(path)
+            migrate_phase5.migrate(path)  # idempotent
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self._seed()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_ranked_snippets_scoped_to_user(self):
+        result = self._search("thesis")
+        self.assertEqual(result.engine, "fts5")
+        self.assertEqual([hit.id for hit in result.results], [self.slides.id])
+        self.assertIn("<mark>Thesis</mark>", result.results[0].snippet)
+        self.assertIsNotNone(result.results[0].score)
+
+        phrase = self._search('"defense rehearsal"', scope="messages")
+        self.assertEqual(len(phrase.results), 1)
+        self.assertEqual(phrase.results[0].title, "user")
+        self.assertEqual(self._search('"rehearsal defense"', scope="messages").results, [])
+
+    def test_triggers_follow_edits_and_deletes(self):
+        self.budget.description = "Compare grocery prices"
+        self.db.commit()
+        self.assertEqual([hit.id for hit in self._search("prices").results], [self.budget.id])
+        self.assertEqual(self._search("spending").results, [])
+
+        self.db.delete(self.budget)
+        self.db.commit()
+        self.assertEqual(self._search("grocery").results, [])
+
+    def test_pagination_and_stemming(self):
+        self.db.add_all(Item(user_id=self.user.id, title=f"Planning session {n}", category="task") for n in range(5))
+        self.db.commit()
+
+        first = self._search("plans", limit=3)
+        second = self._search("plans", limit=3, offset=first.next_offset)
+        self.assertEqual((len(first.results), first.next_offset), (3, 3))
+        self.assertEqual((len(second.results), second.next_offset), (2, None))
+        self.assertFalse({hit.id for hit in first.results} & {hit.id for hit in second.results})
+
+
+class FullTextSearchLikeTests(SearchTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self._seed()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_like_fallback_matches_every_term(self):
+        result = self._search("THESIS deck")
+        self.assertEqual(result.engine, "like")
+        self.assertEqual([hit.id for hit in result.results], [self.slides.id])
+        self.assertIn("<mark>deck</mark>", result.results[0].snippet)
+        self.assertIsNone(result.results[0].score)
+
+        messages = self._search("grocery", scope="messages")
+        self.assertEqual([hit.title for hit in messages.results], ["assistant"])
+        self.assertEqual(self._search("100%").results, [])
+        self.assertEqual(self._search("!!!").results, [])
+
+
+class QueryParsingTests(unittest.TestCase):
+    def test_terms_phrases_and_highlight(self):
+        terms = parse_terms('thesis "defense  deck" AND* ( ')
+        self.assertEqual(terms, ["thesis", "defense deck", "AND"])
+        self.assertEqual(fts_query(terms), '"thesis" "defense deck" "AND"')
+        snippet = highlight("x" * 100 + " the Thesis defense deck " + "y" * 100, ["thesis"], width=40)
+        self.assertTrue(snippet.startswith("…") and snippet.endswith("…"))
+        self.assertIn("<mark>Thesis</mark>", snippet)
+        self.assertEqual(
+            highlight('<i title="x">deck</i> \x02deck\x03', ["deck"]),
+            "&lt;i title=&quot;x&quot;&gt;<mark>deck</mark>&lt;/i&gt; <mark>deck</mark>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
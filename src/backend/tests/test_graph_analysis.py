@@ -0,0 +1,185 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.graph_analysis_state import GraphAnalysisState
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.models.user import User
+from app.routes.graph import ANALYSIS_CONTEXT_LIMIT, analyze_graph
+from app.schemas import GraphAnalyzerLLMResponse
+from app.services.agents.graph_analyzer import GraphAnalysisRun, graph_analyzer
+
+
+class IncrementalGraphAnalysisTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="analysis@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+
+        self.old = [Item(user_id=self.user.id, title=f"Old {n}", category="task", life_area="health") for n in range(3)]
+        self.db.add_all(self.old)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _analyze(self, full: bool = False):
+        return asyncio.run(analyze_graph(full=full, current_user=self.user, db=self.db))
+
+    def _sent(self, mock_analyze):
+        items, focus_ids = mock_analyze.call_args.args
+        return {item["id"] for item in items}, focus_ids
+
+    @patch("app.routes.graph.graph_analyzer.analyze_chunks_async", new_callable=AsyncMock)
+    def test_second_run_only_analyzes_new_and_edited_items(self, mock_analyze):
+        mock_analyze.return_value = GraphAnalysisRun()
+        first = self._analyze()
+        self.assertFalse(first.incremental)
+        self.assertEqual(first.analyzed_count, 3)
+        state = self.db.get(GraphAnalysisState, self.user.id)
+        self.assertEqual(state.last_item_id, self.old[-1].id)
+
+        # Nothing changed: no LLM call at all.
+        mock_analyze.reset_mock()
+        idle = self._analyze()
+        self.assertEqual(idle.analyzed_count, 0)
+        mock_analyze.assert_not_called()
+
+        new = Item(user_id=self.user.id, title="New", category="idea", life_area="health")
+        self.db.add(new)
+        self.old[0].title = "Old, renamed"
+        self.old[1].status = "done"  # not a content edit: not re-sent
+        self.old[2].scheduled_start = datetime.utcnow() + timedelta(days=1)
+        self.db.commit()
+        mock_analyze.return_value = GraphAnalysisRun(
+            links=[
+                {"source_id": new.id, "target_id": self.old[1].id, "link_type": "related", "weight": 80},
+                {"source_id": new.id, "target_id": self.old[1].id, "link_type": "related", "weight": 80},
+            ]
+        )
+
+        result = self._analyze()
+        sent, focus_ids = self._sent(mock_analyze)
+        self.assertTrue(result.incremental)
+        self.assertEqual(result.analyzed_count, 2)
+        self.assertEqual(focus_ids, {new.id, self.old[0].id})
+        self.assertEqual(sent, {item.id for item in self.old} | {new.id})
+        self.assertEqual((result.created_count, result.skipped_count), (1, 1))
+        self.assertEqual(self.db.get(GraphAnalysisState, self.user.id).last_item_id, new.id)
+
+    @patch("app.routes.graph.graph_analyzer.analyze_chunks_async", new_callable=AsyncMock)
+    def test_existing_links_are_not_recreated(self, mock_analyze):
+        mock_analyze.return_value = GraphAnalysisRun()
+        self._analyze()
+        new = Item(user_id=self.user.id, title="New", category="task")
+        self.db.add(new)
+        self.db.flush()
+        self.db.add(ItemLink(source_id=new.id, target_id=self.old[0].id, link_type="relates_to", weight=60))
+        self.db.commit()
+
+        mock_analyze.return_value = GraphAnalysisRun(
+            links=[{"source_id": new.id, "target_id": self.old[0].id, "link_type": "related", "weight": 90}]
+        )
+        result = self._analyze()
+        self.assertEqual((result.created_count, result.skipped_count), (0, 1))
+
+    @patch("app.routes.graph.graph_analyzer.analyze_chunks_async", new_callable=AsyncMock)
+    def test_full_override_and_partial_failure_keeps_watermark(self, mock_analyze):
+        mock_analyze.return_value = GraphAnalysisRun()
+        self._analyze()
+        new = Item(user_id=self.user.id, title="New", category="idea")
+        self.db.add(new)
+        self.db.commit()
+
+        mock_analyze.return_value = GraphAnalysisRun(
+            links=[{"source_id": new.id, "target_id": self.old[0].id, "link_type": "relates_to", "weight": 70}],
+            chunks=[
+                {"index": 0, "pairs": 5, "elapsed_ms": 12.5, "link_count": 1, "error": None},
+                {"index": 1, "pairs": 5, "elapsed_ms": 30.0, "link_count": 0, "error": "quota"},
+            ],
+        )
+        partial = self._analyze()
+        self.assertEqual((partial.created_count, partial.failed_chunks), (1, 1))
+        self.assertEqual([chunk.elapsed_ms for chunk in partial.chunks], [12.5, 30.0])
+        self.assertEqual(self.db.get(GraphAnalysisState, self.user.id).last_item_id, self.old[-1].id)
+
+        mock_analyze.return_value = GraphAnalysisRun()
+        full = self._analyze(full=True)
+        sent, focus_ids = self._sent(mock_analyze)
+        self.assertFalse(full.incremental)
+        self.assertIsNone(focus_ids)
+        self.assertEqual(sent, {item.id for item in self.old} | {new.id})
+        self.assertEqual(self.db.get(GraphAnalysisState, self.user.id).last_item_id, new.id)
+
+    @patch("app.routes.graph.graph_analyzer.analyze_chunks_async", new_callable=AsyncMock)
+    def test_context_is_bounded_and_prefers_related_items(self, mock_analyze):
+        mock_analyze.return_value = GraphAnalysisRun()
+        self.db.add_all(
+            Item(user_id=self.user.id, title=f"Filler {n}", category="thought", life_area="career")
+            for n in range(ANALYSIS_CONTEXT_LIMIT + 10)
+        )
+        self.db.commit()
+        self._analyze()
+
+        new = Item(user_id=self.user.id, title="Run", category="idea", life_area="health")
+        self.db.add(new)
+        self.db.commit()
+        self._analyze()
+
+        sent, _ = self._sent(mock_analyze)
+        self.assertEqual(len(sent), ANALYSIS_CONTEXT_LIMIT + 1)
+        self.assertTrue({item.id for item in self.old} <= sent)
+
+
+class GraphAnalyzerFocusTests(unittest.TestCase):
+    @patch("app.services.agents.graph_analyzer.generate_json_async", new_callable=AsyncMock)
+    def test_focus_ids_filter_links_and_reach_prompt(self, mock_generate):
+        mock_generate.return_value = GraphAnalyzerLLMResponse.model_validate(
+            {
+                "suggested_links": [
+                    {"source_id": 1, "target_id": 2, "link_type": "relates_to", "weight": 80, "ai_reasoning": "old"},
+                    {"source_id": 3, "target_id": 1, "link_type": "relates_to", "weight": 80, "ai_reasoning": "new"},
+                ]
+            }
+        )
+        items = [{"id": n, "type": "task", "title": str(n), "description": "", "tags": []} for n in (1, 2, 3)]
+
+        links = asyncio.run(graph_analyzer.analyze_async(items, {3}))
+
+        self.assertEqual([link["ai_reasoning"] for link in links], ["new"])
+        self.assertIn("NEW_ITEM_IDS: [3]", mock_generate.call_args.args[1])
+
+    @patch("app.services.agents.graph_analyzer.generate_json_async", new_callable=AsyncMock)
+    def test_errors_are_raised_only_on_request(self, mock_generate):
+        mock_generate.side_effect = RuntimeError("boom")
+        items = [{"id": n, "type": "task", "title": str(n), "description": "", "tags": []} for n in (1, 2)]
+
+        self.assertEqual(asyncio.run(graph_analyzer.analyze_async(items)), [])
+        with self.assertRaises(RuntimeError):
+            asyncio.run(graph_analyzer.analyze_async(items, raise_errors=True))
+
+        run = asyncio.run(graph_analyzer.analyze_chunks_async(items))
+        self.assertEqual(run.failed_chunks, 1)
+        self.assertEqual(run.chunks[0]["error"], "boom")
+
+
+if __name__ == "__main__":
+    unittest.main()
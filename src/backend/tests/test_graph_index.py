@@ -0,0 +1,134 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.models.user import User
+from app.routes.graph import get_graph_neighborhood
+from app.services.graph_index import UserGraph, graph_index
+
+
+class GraphNeighborhoodTests(unittest.TestCase):
+    def setUp(self):
+        graph_index.clear()
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="graph@example.com", password_hash="hash")
+        self.other_user = User(email="other@example.com", password_hash="hash")
+        self.db.add_all([self.user, self.other_user])
+        self.db.commit()
+
+        # chain: a - b - c - d, plus a - e (career, weak link)
+        self.items = {
+            name: Item(user_id=self.user.id, title=name.upper(), category="task", life_area=area, status="pending")
+            for name, area in [("a", "health"), ("b", "health"), ("c", "health"), ("d", "health"), ("e", "career")]
+        }
+        self.db.add_all(self.items.values())
+        self.db.flush()
+        ids = {name: item.id for name, item in self.items.items()}
+        self.ids = ids
+        self.db.add_all(
+            [
+                ItemLink(source_id=ids["a"], target_id=ids["b"], link_type="relates_to", weight=80),
+                ItemLink(source_id=ids["c"], target_id=ids["b"], link_type="related", weight=70),
+                ItemLink(source_id=ids["c"], target_id=ids["d"], link_type="blocks", weight=90),
+                ItemLink(source_id=ids["a"], target_id=ids["e"], link_type="relates_to", weight=10),
+            ]
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        graph_index.clear()
+
+    def _neighborhood(self, node, depth=1, limit=200, user=None, **filters):
+        params = {"life_area": None, "status": None, "category": None, "min_weight": None, **filters}
+        return asyncio.run(
+            get_graph_neighborhood(
+                node_id=self.ids.get(node, node),
+                depth=depth,
+                limit=limit,
+                current_user=user or self.user,
+                db=self.db,
+                **params,
+            )
+        )
+
+    def _titles(self, result):
+        return sorted(node["title"] for node in result.nodes)
+
+    def test_k_hop_expansion_follows_links_both_ways(self):
+        self.assertEqual(self._titles(self._neighborhood("a", depth=1)), ["A", "B", "E"])
+        result = self._neighborhood("a", depth=2)
+        self.assertEqual(self._titles(result), ["A", "B", "C", "E"])
+        self.assertEqual(len(result.links), 3)
+        self.assertEqual({link.link_type for link in result.links}, {"relates_to"})
+        self.assertEqual({node["title"]: node["depth"] for node in result.nodes}["C"], 2)
+        self.assertEqual(self._titles(self._neighborhood("a", depth=0)), ["A"])
+
+    def test_filters_and_limit(self):
+        self.assertEqual(self._titles(self._neighborhood("a", depth=3, life_area="health")), ["A", "B", "C", "D"])
+        self.assertEqual(self._titles(self._neighborhood("a", depth=3, min_weight=50)), ["A", "B", "C", "D"])
+        limited = self._neighborhood("a", depth=3, limit=2)
+        self.assertEqual(len(limited.nodes), 2)
+        self.assertTrue(limited.truncated)
+
+    def test_index_is_cached_and_invalidated_on_writes(self):
+        self._neighborhood("d", depth=1)
+        builds = graph_index.stats["builds"]
+        self._neighborhood("d", depth=1)
+        self.assertEqual(graph_index.stats["builds"], builds)
+
+        new_item = Item(user_id=self.user.id, title="F", category="idea")
+        self.db.add(new_item)
+        self.db.flush()
+        self.db.add(ItemLink(source_id=self.ids["d"], target_id=new_item.id, link_type="relates_to"))
+        self.db.commit()
+
+        self.assertEqual(self._titles(self._neighborhood("d", depth=1)), ["C", "D", "F"])
+        self.assertEqual(graph_index.stats["builds"], builds + 1)
+
+        self.db.delete(new_item)
+        self.db.commit()
+        self.assertEqual(self._titles(self._neighborhood("d", depth=1)), ["C", "D"])
+
+    def test_graph_loaded_during_a_write_is_not_cached(self):
+        real_load = UserGraph.load
+
+        def load_then_link(db, user_id):
+            graph = real_load(db, user_id)
+            # Another request links E and D and commits after the graph read the links
+            with self.Session() as other:
+                other.add(ItemLink(source_id=self.ids["e"], target_id=self.ids["d"], link_type="relates_to"))
+                other.commit()
+            return graph
+
+        with patch.object(UserGraph, "load", side_effect=load_then_link):
+            self.assertEqual(self._titles(self._neighborhood("d", depth=1)), ["C", "D"])
+
+        self.assertEqual(self._titles(self._neighborhood("d", depth=1)), ["C", "D", "E"])
+
+    def test_unknown_or_foreign_node_is_404(self):
+        with self.assertRaises(HTTPException) as ctx:
+            self._neighborhood("a", user=self.other_user)
+        self.assertEqual(ctx.exception.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+
+from app.main import health_check, internal_metrics, settings
+
+
+class HealthTests(unittest.TestCase):
+    def test_health_is_a_bare_liveness_check(self):
+        self.assertEqual(asyncio.run(health_check()), {"status": "healthy"})
+
+    def test_metrics_need_the_configured_token(self):
+        with patch.object(settings, "metrics_token", ""), self.assertRaises(HTTPException) as disabled:
+            asyncio.run(internal_metrics(x_metrics_token=""))
+        self.assertEqual(disabled.exception.status_code, 404)
+
+        with patch.object(settings, "metrics_token", "s3cret"):
+            with self.assertRaises(HTTPException) as denied:
+                asyncio.run(internal_metrics(x_metrics_token="guess"))
+            self.assertEqual(denied.exception.status_code, 401)
+
+            metrics = asyncio.run(internal_metrics(x_metrics_token="s3cret"))
+        self.assertEqual(set(metrics), {"auth_cache", "password_hashing"})
+        self.assertIn("hit_rate", metrics["auth_cache"])
+
+
+if __name__ == "__main__":
+    unittest.main()
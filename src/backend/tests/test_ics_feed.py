@@ -0,0 +1,190 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+from icalendar import Calendar, Event
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.routes.schedule import calendar_feed, export_ics, get_calendar_feed_url, rotate_calendar_feed_url
+from app.services.ics_feed import ics_cache
+from app.utils.auth import create_access_token
+from app.utils.dependencies import get_current_user
+
+
+def _request(path="/api/schedule/export", headers=None):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "path": path,
+            "query_string": b"",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        }
+    )
+
+
+def _body(response):
+    if hasattr(response, "body_iterator"):
+
+        async def collect():
+            return b"".join([chunk async for chunk in response.body_iterator])
+
+        return asyncio.run(collect())
+    return response.body
+
+
+class IcsFeedTests(unittest.TestCase):
+    def setUp(self):
+        ics_cache.clear()
+        self.stats = dict(ics_cache.stats)
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="ics@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+        start = datetime(2026, 3, 2, 9)
+        self.items = [
+            Item(
+                user_id=self.user.id,
+                title=f"Block {n}",
+                category="task",
+                priority=n + 3,
+                description="Bring notes" if n == 0 else None,
+                scheduled_start=start + timedelta(hours=2 * n),
+                scheduled_end=start + timedelta(hours=2 * n + 1),
+            )
+            for n in range(3)
+        ]
+        self.db.add_all([*self.items, Item(user_id=self.user.id, title="Unscheduled", category="task")])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        ics_cache.clear()
+
+    def _stat(self, name):
+        return ics_cache.stats[name] - self.stats[name]
+
+    def _export(self, **headers):
+        return asyncio.run(export_ics(_request(headers=headers), current_user=self.user, db=self.db))
+
+    def test_streamed_body_matches_full_calendar_and_is_cached(self):
+        expected = Calendar()
+        expected.add("prodid", "-//ClearMind//Phase2//EN")
+        expected.add("version", "2.0")
+        expected.add("calscale", "GREGORIAN")
+        for item in self.items:
+            event = Event()
+            event.add("summary", item.title)
+            event.add("description", item.description or f"Category: {item.category}")
+            event.add("dtstart", item.scheduled_start)
+            event.add("dtend", item.scheduled_end)
+            event.add("priority", max(1, min(9, 10 - item.priority)))
+            event.add("uid", f"clearmind-item-{item.id}@clearmind.app")
+            expected.add_component(event)
+
+        first = self._export()
+        self.assertTrue(hasattr(first, "body_iterator"))
+        self.assertEqual(_body(first), expected.to_ical())
+        self.assertEqual(first.headers["content-disposition"], "attachment; filename=clearmind-schedule.ics")
+
+        second = self._export()
+        self.assertFalse(hasattr(second, "body_iterator"))
+        self.assertEqual(second.body, expected.to_ical())
+        self.assertEqual(second.headers["etag"], first.headers["etag"])
+        self.assertEqual(self._stat("renders"), 1)
+        self.assertEqual(self._stat("hits"), 1)
+
+    def test_conditional_requests_and_invalidation(self):
+        first = self._export()
+        _body(first)
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+        self.assertEqual(self._export(**{"If-None-Match": f"W/{etag}"}).status_code, 304)
+        self.assertEqual(self._export(**{"If-Modified-Since": last_modified}).status_code, 304)
+        self.assertEqual(self._export(**{"If-None-Match": '"other"'}).status_code, 200)
+        self.assertEqual(self._export(**{"If-Modified-Since": "not a date"}).status_code, 200)
+
+        self.items[0].status = "done"  # not exported: the cached body is reused
+        self.db.commit()
+        self.assertEqual(self._export(**{"If-None-Match": etag}).status_code, 304)
+        self.assertEqual(self._stat("renders"), 1)
+
+        self.items[1].title = "Renamed"
+        self.db.commit()
+        changed = self._export(**{"If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn(b"SUMMARY:Renamed", _body(changed))
+        self.assertNotEqual(changed.headers["etag"], etag)
+
+        self.db.delete(self.items[2])
+        self.db.commit()
+        after_delete = self._export(**{"If-None-Match": changed.headers["etag"]})
+        self.assertEqual(after_delete.status_code, 200)
+        self.assertNotIn(b"Block 2", _body(after_delete))
+        self.assertEqual(self._stat("renders"), 3)
+
+    def test_webcal_feed_uses_a_calendar_scoped_token(self):
+        links = asyncio.run(
+            get_calendar_feed_url(_request("/api/schedule/feed-url"), current_user=self.user, db=self.db)
+        )
+        url = urlsplit(links["url"])
+        self.assertEqual((url.scheme, url.netloc, url.path), ("webcal", "testserver", "/api/schedule/feed.ics"))
+        self.assertTrue(links["https_url"].startswith("http://testserver/api/schedule/feed.ics?token="))
+        token = parse_qs(url.query)["token"][0]
+
+        feed = asyncio.run(calendar_feed(_request("/api/schedule/feed.ics"), token=token, db=self.db))
+        self.assertIn(b"SUMMARY:Block 0", _body(feed))
+        self.assertTrue(feed.headers["content-disposition"].startswith("inline"))
+
+        access_token = create_access_token({"sub": str(self.user.id)})
+        for bad in (access_token, "garbage"):
+            with self.assertRaises(HTTPException) as raised:
+                asyncio.run(calendar_feed(_request("/api/schedule/feed.ics"), token=bad, db=self.db))
+            self.assertEqual(raised.exception.status_code, 401)
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(get_current_user(token, db=self.db))
+        self.assertEqual(raised.exception.status_code, 401)
+
+    def test_rotating_the_feed_secret_revokes_issued_urls(self):
+        def token_of(links):
+            return parse_qs(urlsplit(links["https_url"]).query)["token"][0]
+
+        issued = token_of(
+            asyncio.run(get_calendar_feed_url(_request("/api/schedule/feed-url"), current_user=self.user, db=self.db))
+        )
+        again = asyncio.run(
+            get_calendar_feed_url(_request("/api/schedule/feed-url"), current_user=self.user, db=self.db)
+        )
+        self.assertEqual(asyncio.run(calendar_feed(_request(), token=token_of(again), db=self.db)).status_code, 200)
+
+        rotated = asyncio.run(
+            rotate_calendar_feed_url(_request("/api/schedule/feed-url/rotate"), current_user=self.user, db=self.db)
+        )
+        self.assertTrue(rotated["https_url"].startswith("http://testserver/api/schedule/feed.ics?token="))
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(calendar_feed(_request(), token=issued, db=self.db))
+        self.assertEqual(raised.exception.status_code, 401)
+        self.assertEqual(asyncio.run(calendar_feed(_request(), token=token_of(rotated), db=self.db)).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
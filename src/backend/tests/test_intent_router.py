@@ -0,0 +1,58 @@
+import os
+import unittest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from app.services.intent_router import LocalIntentRouter
+
+
+class LocalIntentRouterTests(unittest.TestCase):
+    def setUp(self):
+        self.router = LocalIntentRouter(threshold=0.85, shadow_rate=0.0)
+
+    def test_prompt_keywords_route_confidently(self):
+        cases = {
+            "Plan my day please": "scheduler",
+            "remind me to call the dentist": "brain_dump",
+            "Am I on track with my thesis?": "planner",
+            "how am I doing with my habits": "reflection",
+        }
+        for text, agent in cases.items():
+            decision = self.router.classify(text)
+            self.assertEqual(decision["agent"], agent, text)
+            self.assertTrue(self.router.is_confident(decision), text)
+
+    def test_vague_or_conflicting_input_defers_to_llm(self):
+        self.assertFalse(self.router.is_confident(self.router.classify("x")))
+        self.assertFalse(self.router.is_confident(self.router.classify("plan my day around my goals")))
+
+    def test_keyword_alone_does_not_short_circuit(self):
+        cases = {
+            "check my calendar app subscription renewal": "scheduler",
+            "my goals are: run a marathon, learn spanish": "planner",
+        }
+        for text, keyword_agent in cases.items():
+            decision = self.router.classify(text)
+            self.assertFalse(
+                decision["agent"] == keyword_agent and self.router.is_confident(decision),
+                f"{text} -> {decision}",
+            )
+
+    def test_stats_track_short_circuits_and_shadow_disagreements(self):
+        self.router.record_decision(short_circuited=True)
+        self.router.record_decision(short_circuited=False)
+        self.router.record_shadow("scheduler", "scheduler")
+        self.router.record_shadow("scheduler", "planner")
+
+        self.assertEqual(self.router.stats["decisions"], 2)
+        self.assertEqual(self.router.stats["short_circuits"], 1)
+        self.assertEqual(self.router.stats["llm_fallbacks"], 1)
+        self.assertEqual(self.router.stats["shadow_checks"], 2)
+        self.assertEqual(self.router.stats["shadow_disagreements"], 1)
+        self.assertFalse(self.router.should_shadow())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import unittest
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.item_link import ItemLink
+from app.models.user import User
+from app.routes.items import batch_items
+from app.schemas import ItemBatchRequest
+
+
+class ItemBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="batch@example.com", password_hash="hash")
+        self.other = User(email="batch-other@example.com", password_hash="hash")
+        self.db.add_all([self.user, self.other])
+        self.db.commit()
+        self.items = [Item(user_id=self.user.id, title=f"Task {n}", category="task") for n in range(3)]
+        self.foreign = Item(user_id=self.other.id, title="Someone else's", category="task")
+        self.db.add_all([*self.items, self.foreign])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _batch(self, operations, atomic=True):
+        request = ItemBatchRequest(operations=operations, atomic=atomic)
+        return asyncio.run(batch_items(request, current_user=self.user, db=self.db))
+
+    def test_mixed_batch_applies_in_one_commit(self):
+        first, second, third = (item.id for item in self.items)
+        self.db.add(ItemLink(source_id=first, target_id=third, link_type="relates_to"))
+        self.db.commit()
+        commits = []
+        event.listen(self.db, "after_commit", commits.append)
+
+        response = self._batch(
+            [
+                {"op": "create", "data": {"title": "New idea", "category": "idea"}},
+                {"op": "status", "item_id": first, "status": "done"},
+                {"op": "update", "item_id": second, "data": {"title": "Renamed", "priority": 7}},
+                {"op": "delete", "item_id": third},
+            ]
+        )
+
+        self.assertTrue(response.applied)
+        self.assertEqual([result.status_code for result in response.results], [201, 200, 200, 204])
+        self.assertEqual(response.results[0].item.title, "New idea")
+        self.assertEqual(response.results[1].item.status, "done")
+        self.assertEqual((response.results[2].item.title, response.results[2].item.priority), ("Renamed", 7))
+        self.assertIsNone(response.results[3].item)
+        self.assertEqual(len(commits), 1)
+
+        self.db.expire_all()
+        self.assertIsNone(self.db.get(Item, third))
+        self.assertEqual(self.db.query(ItemLink).count(), 0)
+        self.assertEqual(self.db.query(Item).filter(Item.user_id == self.user.id).count(), 3)
+
+    def test_atomic_batch_with_a_failure_applies_nothing(self):
+        response = self._batch(
+            [
+                {"op": "create", "data": {"title": "Never saved", "category": "task"}},
+                {"op": "status", "item_id": self.items[0].id, "status": "done"},
+                {"op": "delete", "item_id": self.foreign.id},
+            ]
+        )
+
+        self.assertFalse(response.applied)
+        self.assertEqual([result.status_code for result in response.results], [424, 424, 404])
+        self.assertFalse(any(result.ok for result in response.results))
+        self.db.expire_all()
+        self.assertEqual(self.db.get(Item, self.items[0].id).status, "pending")
+        self.assertEqual(self.db.query(Item).filter(Item.title == "Never saved").count(), 0)
+        self.assertIsNotNone(self.db.get(Item, self.foreign.id))
+
+    def test_non_atomic_batch_reports_failures_and_commits_the_rest(self):
+        first = self.items[0].id
+        response = self._batch(
+            [
+                {"op": "status", "item_id": first, "status": "finished"},
+                {"op": "update", "data": {"title": "No target"}},
+                {"op": "create", "data": {"title": "Missing category"}},
+                {"op": "update", "item_id": first, "data": {"priority": "high"}},
+                {"op": "delete", "item_id": first},
+                {"op": "status", "item_id": first, "status": "done"},
+            ],
+            atomic=False,
+        )
+
+        self.assertTrue(response.applied)
+        self.assertEqual([result.status_code for result in response.results], [400, 422, 422, 422, 204, 404])
+        self.assertIn("category", response.results[2].error)
+        self.assertIn("priority", response.results[3].error)
+        self.db.expire_all()
+        self.assertIsNone(self.db.get(Item, first))
+
+    def test_status_batch_uses_a_constant_number_of_statements(self):
+        self.db.add_all(Item(user_id=self.user.id, title=f"Bulk {n}", category="task") for n in range(40))
+        self.db.commit()
+        ids = [item_id for (item_id,) in self.db.query(Item.id).filter(Item.user_id == self.user.id)]
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        response = self._batch([{"op": "status", "item_id": item_id, "status": "done"} for item_id in ids])
+
+        self.assertTrue(all(result.ok for result in response.results))
+        self.assertEqual(len(ids), 43)
+        self.assertLessEqual(len(statements), 6)
+        self.assertEqual(self.db.query(Item).filter(Item.status == "done").count(), 43)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.item_vector import ItemVector
+from app.models.user import User
+from app.routes.items import search_user_items
+from app.services.item_search import (
+    SEARCH_DIMS,
+    UserVectorIndex,
+    VectorIndexCache,
+    embed,
+    search_items,
+    vector_index,
+)
+
+
+class UserVectorIndexTests(unittest.TestCase):
+    def test_upsert_remove_and_search(self):
+        index = UserVectorIndex()
+        for item_id, text in enumerate(["dentist appointment", "thesis slides", "thesis defense", "pay rent"], 1):
+            index.upsert(item_id, embed(text))
+        self.assertEqual(len(index), 4)
+        self.assertEqual({item_id for item_id, _ in index.search(embed("thesis"))}, {2, 3})
+
+        index.remove(2)
+        index.upsert(3, embed("garden watering"))
+        self.assertEqual(index.search(embed("thesis")), [])
+        self.assertEqual(index.search(embed("rent"))[0][0], 4)
+        self.assertEqual(index.search(embed("the and of")), [])
+
+    def test_embeddings_are_unit_float32(self):
+        vector = embed("Prepare the thesis slides")
+        self.assertEqual((vector.dtype, vector.shape), (np.float32, (SEARCH_DIMS,)))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+
+class ItemSearchTests(unittest.TestCase):
+    def setUp(self):
+        vector_index.clear()
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="search@example.com", password_hash="hash")
+        self.other = User(email="other-search@example.com", password_hash="hash")
+        self.db.add_all([self.user, self.other])
+        self.db.commit()
+
+    def tearDown(self):
+        vector_index.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _titles(self, query: str) -> list[str]:
+        return [item.title for item, _ in search_items(self.db, self.user.id, query)]
+
+    def test_search_follows_item_writes(self):
+        dentist = Item(user_id=self.user.id, title="Book dentist", description="teeth cleaning", category="task")
+        slides = Item(user_id=self.user.id, title="Thesis slides", category="task", life_area="learning")
+        self.db.add_all([dentist, slides, Item(user_id=self.other.id, title="Dentist for kids", category="task")])
+        self.db.commit()
+        self.assertEqual(self.db.scalar(select(func.count()).select_from(ItemVector)), 3)
+
+        self.assertEqual(self._titles("dentist cleaning"), ["Book dentist"])
+        self.assertEqual(self._titles("learning"), ["Thesis slides"])
+
+        slides.title = "Dentist follow-up"
+        self.db.commit()
+        self.assertEqual(set(self._titles("dentist")), {"Dentist follow-up", "Book dentist"})
+
+        self.db.delete(dentist)
+        self.db.commit()
+        self.assertEqual(self._titles("dentist"), ["Dentist follow-up"])
+        self.assertEqual(self.db.scalar(select(func.count()).select_from(ItemVector)), 2)
+
+    def test_items_without_vectors_are_backfilled(self):
+        self.db.execute(
+            insert(Item),
+            [{"user_id": self.user.id, "title": f"Garden chore {n}", "category": "task"} for n in range(3)],
+        )
+        self.db.commit()
+        self.assertEqual(self.db.scalar(select(func.count()).select_from(ItemVector)), 0)
+
+        results = asyncio.run(search_user_items(q="garden", limit=2, current_user=self.user, db=self.db))
+
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(hit.score > 0 for hit in results))
+        self.assertEqual(self.db.scalar(select(func.count()).select_from(ItemVector)), 3)
+
+    def test_cache_expires_and_skips_loads_raced_by_writes(self):
+        self.db.add(Item(user_id=self.user.id, title="Garden", category="task"))
+        self.db.commit()
+        cache = VectorIndexCache(max_age=900)
+        first = cache.get(self.db, self.user.id)
+        self.assertIs(cache.get(self.db, self.user.id), first)
+
+        cache.max_age = 0
+        self.assertIsNot(cache.get(self.db, self.user.id), first)
+
+        cache.max_age = 900
+        cache.clear()
+        load = UserVectorIndex.load
+
+        def load_then_write(db, user_id):
+            index = load(db, user_id)
+            cache.apply([(user_id, 99, embed("written during load"))])
+            return index
+
+        with patch.object(UserVectorIndex, "load", side_effect=load_then_write):
+            raced = cache.get(self.db, self.user.id)
+        self.assertNotIn(99, raced.rows)
+        self.assertIsNot(cache.get(self.db, self.user.id), raced)
+
+
+class ConcurrentBackfillTests(unittest.TestCase):
+    def test_concurrent_first_searches_do_not_conflict(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_engine(f"sqlite:///{Path(workdir) / 'search.db'}")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            with Session() as db:
+                user = User(email="race@example.com", password_hash="hash")
+                db.add(user)
+                db.commit()
+                db.execute(
+                    insert(Item), [{"user_id": user.id, "title": f"Chore {n}", "category": "task"} for n in range(3)]
+                )
+                db.commit()
+                user_id = user.id
+
+            real_embed, raced = embed, []
+
+            def embed_after_other_request(text):
+                # Another request embeds and commits the same items after this one found them missing
+                if not raced:
+                    raced.append(True)
+                    with Session() as other:
+                        UserVectorIndex.load(other, user_id)
+                return real_embed(text)
+
+            with Session() as db, patch("app.services.item_search.embed", side_effect=embed_after_other_request):
+                index = UserVectorIndex.load(db, user_id)
+                self.assertEqual(len(index), 3)
+                self.assertEqual(db.scalar(select(func.count()).select_from(ItemVector)), 3)
+            engine.dispose()
+
+    def test_backfill_leaves_the_callers_transaction_alone(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            engine = create_engine(f"sqlite:///{Path(workdir) / 'search.db'}")
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            with Session() as db:
+                user = User(email="txn@example.com", password_hash="hash")
+                db.add(user)
+                db.commit()
+                db.execute(insert(Item), [{"user_id": user.id, "title": "Legacy chore", "category": "task"}])
+                db.commit()
+
+                db.add(Item(user_id=user.id, title="Unsaved draft", category="task"))
+                self.assertEqual(len(UserVectorIndex.load(db, user.id)), 1)
+                db.rollback()
+
+                self.assertEqual(db.scalar(select(func.count()).select_from(Item)), 1)
+                self.assertEqual(db.scalar(select(func.count()).select_from(ItemVector)), 1)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
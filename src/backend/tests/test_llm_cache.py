@@ -0,0 +1,134 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from pydantic import BaseModel
+
+from app.services.llm_cache import LLMResponseCache, make_cache_key
+from app.services.llm_json import generate_json, generate_json_async
+
+
+class ExamplePayload(BaseModel):
+    name: str
+    count: int
+
+
+class LLMResponseCacheTests(unittest.TestCase):
+    def test_key_depends_on_prompt_config_and_schema(self):
+        model = SimpleNamespace(model_name="models/flash")
+        base = make_cache_key(model, "prompt", ExamplePayload, temperature=0.1)
+
+        self.assertEqual(base, make_cache_key(model, "prompt", ExamplePayload, temperature=0.1))
+        self.assertNotEqual(base, make_cache_key(model, "prompt 2", ExamplePayload, temperature=0.1))
+        self.assertNotEqual(base, make_cache_key(model, "prompt", ExamplePayload, temperature=0.7))
+        self.assertNotEqual(base, make_cache_key(model, "prompt", None, temperature=0.1))
+        self.assertNotEqual(
+            base, make_cache_key(SimpleNamespace(model_name="models/pro"), "prompt", ExamplePayload, temperature=0.1)
+        )
+
+    def test_lru_eviction_and_ttl_expiry(self):
+        cache = LLMResponseCache(max_entries=2)
+        cache.set("a", {"v": 1}, ttl=60)
+        cache.set("b", {"v": 2}, ttl=60)
+        cache.get("a")
+        cache.set("c", {"v": 3}, ttl=60)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": 1})
+        self.assertEqual(cache.stats["evictions"], 1)
+
+        cache.set("expired", {"v": 0}, ttl=-1)
+        self.assertIsNone(cache.get("expired"))
+        self.assertEqual(cache.stats["memory_hits"], 2)
+
+    def test_callers_cannot_mutate_cached_values(self):
+        cache = LLMResponseCache()
+        stored = {"items": [{"title": "a"}]}
+        cache.set("key", stored, ttl=60)
+        stored["items"].append({"title": "b"})
+        cache.get("key")["items"].clear()
+
+        self.assertEqual(cache.get("key"), {"items": [{"title": "a"}]})
+
+        model = MagicMock(model_name="models/flash")
+        model.generate_content.return_value = SimpleNamespace(text='{"items": [1]}')
+        with patch("app.services.llm_json.get_llm_cache", return_value=cache):
+            generate_json(model, "prompt", cache_ttl=60)["items"].append(2)
+            self.assertEqual(generate_json(model, "prompt", cache_ttl=60), {"items": [1]})
+
+    def test_sqlite_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm_cache.db")
+            LLMResponseCache(sqlite_path=path).set("key", {"ok": True}, ttl=60)
+
+            fresh = LLMResponseCache(sqlite_path=path)
+            self.assertEqual(fresh.get("key"), {"ok": True})
+            self.assertEqual(fresh.stats["sqlite_hits"], 1)
+            self.assertEqual(fresh.get("key"), {"ok": True})
+            self.assertEqual(fresh.stats["memory_hits"], 1)
+
+            fresh.set("old", {"ok": False}, ttl=-1)
+            self.assertEqual(fresh.prune(), 2)
+
+    def test_generate_json_serves_repeat_prompts_from_cache(self):
+        cache = LLMResponseCache()
+        model = MagicMock(model_name="models/flash")
+        model.generate_content.return_value = SimpleNamespace(text='{"name": "tasks", "count": 2}')
+
+        with patch("app.services.llm_json.get_llm_cache", return_value=cache):
+            first = generate_json(model, "prompt", ExamplePayload, cache_ttl=60)
+            second = generate_json(model, "prompt", ExamplePayload, cache_ttl=60)
+            generate_json(model, "prompt", ExamplePayload, cache_ttl=60, bypass_cache=True)
+            generate_json(model, "prompt", ExamplePayload)
+
+        self.assertEqual(first, second)
+        self.assertIsInstance(second, ExamplePayload)
+        self.assertEqual(model.generate_content.call_count, 3)
+        self.assertEqual(cache.stats["memory_hits"], 1)
+        self.assertEqual(cache.stats["stores"], 1)
+
+    def test_generate_json_async_does_sqlite_io_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LLMResponseCache(sqlite_path=os.path.join(tmp, "llm_cache.db"))
+            sqlite_threads = []
+            conn = cache._conn
+
+            class RecordingConnection:
+                def execute(self, *args):
+                    sqlite_threads.append(threading.get_ident())
+                    return conn.execute(*args)
+
+                def __getattr__(self, name):
+                    return getattr(conn, name)
+
+            cache._conn = RecordingConnection()
+            model = MagicMock(model_name="models/flash")
+            model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text='{"name": "a", "count": 1}'))
+
+            async def run():
+                loop_thread = threading.get_ident()
+                first = await generate_json_async(model, "prompt", ExamplePayload, cache_ttl=60)
+                second = await generate_json_async(model, "prompt", ExamplePayload, cache_ttl=60)
+                return loop_thread, first, second
+
+            with patch("app.services.llm_json.get_llm_cache", return_value=cache):
+                loop_thread, first, second = asyncio.run(run())
+            conn.close()
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.generate_content_async.await_count, 1)
+        self.assertEqual(cache.stats["memory_hits"], 1)
+        self.assertTrue(sqlite_threads)
+        self.assertNotIn(loop_thread, sqlite_threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,38 @@
+import asyncio
 import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
 from pydantic import BaseModel
 
-from app.services.llm_json import LLMJSONError, parse_json_response, validate_json_response
+from app.services.llm_json import (
+    JSONStringFieldStream,
+    LLMJSONError,
+    generate_json,
+    generate_json_async,
+    parse_json_response,
+    stream_json_field,
+    validate_json_response,
+)
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield SimpleNamespace(text=chunk)
+
+
+def _collect(agen):
+    async def run():
+        return [event async for event in agen]
+
+    return asyncio.run(run())
 
 
 class ExamplePayload(BaseModel):
@@ -26,6 +56,70 @@ class LLMJSONTests(unittest.TestCase):
         with self.assertRaises(LLMJSONError):
             parse_json_response("[1, 2, 3]")
 
+    def test_generate_json_retries_then_validates(self):
+        model = MagicMock()
+        model.generate_content.side_effect = [
+            SimpleNamespace(text="not json"),
+            SimpleNamespace(text='{"name": "tasks", "count": 2}'),
+        ]
+
+        payload = generate_json(model, "prompt", ExamplePayload, retries=1)
+
+        self.assertEqual(payload.count, 2)
+        self.assertEqual(model.generate_content.call_count, 2)
+        self.assertIn("previous response was invalid", model.generate_content.call_args.args[0])
+
+    def test_generate_json_async_awaits_model(self):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text='{"name": "ideas", "count": 1}'))
+
+        payload = asyncio.run(generate_json_async(model, "prompt", ExamplePayload))
+
+        self.assertEqual(payload.name, "ideas")
+        model.generate_content.assert_not_called()
+
+    def test_generate_json_async_raises_after_retries(self):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text="[1]"))
+
+        with self.assertRaises(LLMJSONError):
+            asyncio.run(generate_json_async(model, "prompt", retries=1))
+        self.assertEqual(model.generate_content_async.await_count, 2)
+
+    def test_field_stream_decodes_escapes_split_across_chunks(self):
+        payload = '{"name": "Line \\"one\\"\\nCaf\\u00e9 \\ud83d\\ude00", "count": 1}'
+        expected = 'Line "one"\nCafé \U0001f600'
+        for size in (1, 3, 7):
+            stream = JSONStringFieldStream("name")
+            decoded = "".join(stream.feed(payload[i : i + size]) for i in range(0, len(payload), size))
+            self.assertEqual(decoded, expected)
+            self.assertTrue(stream.done)
+
+    def test_stream_json_field_yields_deltas_then_result(self):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=FakeStream(['{"name": "ta', 'sks", ', '"count": 4}']))
+
+        events = _collect(stream_json_field(model, "prompt", ExamplePayload, "name"))
+
+        self.assertEqual([kind for kind, _ in events], ["delta", "delta", "result"])
+        self.assertEqual("".join(text for kind, text in events if kind == "delta"), "tasks")
+        self.assertEqual(events[-1][1].count, 4)
+        self.assertTrue(model.generate_content_async.call_args.kwargs["stream"])
+
+    def test_stream_json_field_falls_back_when_stream_is_invalid(self):
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(
+            side_effect=[
+                FakeStream(['{"name": "broken']),
+                SimpleNamespace(text='{"name": "fixed", "count": 1}'),
+            ]
+        )
+
+        events = _collect(stream_json_field(model, "prompt", ExamplePayload, "name"))
+
+        self.assertEqual(events[-1][0], "result")
+        self.assertEqual(events[-1][1].name, "fixed")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import migrate_phase4
+
+
+class MigratePhase4Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "clearmind.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE items (id INTEGER PRIMARY KEY, user_id INTEGER, status TEXT, category TEXT,
+                                created_at TIMESTAMP, scheduled_start TIMESTAMP);
+            CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id INTEGER, timestamp TIMESTAMP);
+            CREATE TABLE item_links (id INTEGER PRIMARY KEY, source_id INTEGER, target_id INTEGER, link_type TEXT);
+            INSERT INTO item_links (source_id, target_id, link_type) VALUES
+                (1, 2, 'blocks'), (1, 2, 'blocks'), (1, 2, 'relates_to');
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _migrate(self):
+        with redirect_stdout(StringIO()) as output:
+            migrate_phase4.migrate(self.db_path)
+        return output.getvalue()
+
+    def test_creates_indexes_and_dedupes_links(self):
+        output = self._migrate()
+
+        conn = sqlite3.connect(self.db_path)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        links = conn.execute("SELECT source_id, target_id, link_type FROM item_links ORDER BY id").fetchall()
+        conn.close()
+
+        self.assertTrue(
+            {"ix_items_user_created", "ix_messages_user_timestamp", "ux_item_links_source_target_type"} <= indexes
+        )
+        self.assertEqual(links, [(1, 2, "blocks"), (1, 2, "relates_to")])
+        self.assertIn("Removed 1 duplicate item_links rows", output)
+        self.assertIn("user_context table not found", output)
+
+    def test_is_idempotent(self):
+        self._migrate()
+        output = self._migrate()
+
+        self.assertIn("[=] Index ix_items_user_created already exists", output)
+        self.assertNotIn("[+] Created", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import migrate_phase6
+
+
+class MigratePhase6Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "clearmind.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE users (id INTEGER PRIMARY KEY);
+            CREATE TABLE items (id INTEGER PRIMARY KEY, user_id INTEGER, category TEXT, created_at TIMESTAMP);
+            CREATE TABLE item_links (id INTEGER PRIMARY KEY, source_id INTEGER, target_id INTEGER,
+                                     created_at TIMESTAMP);
+            CREATE TABLE reflections (id INTEGER PRIMARY KEY, user_id INTEGER, created_at TIMESTAMP);
+            INSERT INTO users (id) VALUES (1), (2);
+            INSERT INTO items (id, user_id, category, created_at) VALUES
+                (1, 1, 'task', '2026-03-02 09:00:00.000000'),
+                (2, 1, 'idea', '2026-03-02 18:30:00.000000'),
+                (3, 1, 'goal', '2026-03-03 08:00:00.000000'),
+                (4, 2, 'task', '2026-03-02 10:00:00.000000'),
+                (5, 1, 'task', NULL);
+            INSERT INTO item_links (source_id, target_id, created_at) VALUES
+                (1, 2, '2026-03-03 12:00:00.000000'),
+                (1, 4, '2026-03-03 12:00:00.000000');
+            INSERT INTO reflections (user_id, created_at) VALUES (1, '2026-03-04 07:00:00.000000');
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _migrate(self):
+        with redirect_stdout(StringIO()) as output:
+            migrate_phase6.migrate(self.db_path)
+        return output.getvalue()
+
+    def _rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT * FROM user_daily_stats ORDER BY user_id, day").fetchall()
+        conn.close()
+        return rows
+
+    def test_creates_and_backfills_rollup(self):
+        output = self._migrate()
+
+        self.assertIn("[+] Created user_daily_stats", output)
+        self.assertIn("profile_updates table not found", output)
+        # (user_id, day, tasks, ideas, thoughts, links, profile_updates, reflections)
+        self.assertEqual(
+            self._rows(),
+            [
+                (1, "2026-03-02", 1, 1, 0, 0, 0, 0),
+                (1, "2026-03-03", 0, 0, 1, 1, 0, 0),
+                (1, "2026-03-04", 0, 0, 0, 0, 0, 1),
+                (2, "2026-03-02", 1, 0, 0, 0, 0, 0),
+            ],
+        )
+
+    def test_is_idempotent(self):
+        self._migrate()
+        output = self._migrate()
+
+        self.assertIn("[=] user_daily_stats already exists", output)
+        self.assertIn("already backfilled", output)
+        self.assertEqual(len(self._rows()), 4)
+
+    def test_rebuilds_users_with_rows_written_before_the_backfill(self):
+        # The app created the table at startup and its hooks counted one new item before the migration ran.
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(migrate_phase6.CREATE_TABLE)
+        conn.execute(
+            "INSERT INTO items (id, user_id, category, created_at) VALUES (6, 1, 'idea', '2026-03-05 10:00:00')"
+        )
+        conn.execute("INSERT INTO user_daily_stats (user_id, day, ideas) VALUES (1, '2026-03-05', 1)")
+        conn.commit()
+        conn.close()
+
+        output = self._migrate()
+
+        self.assertIn("[+] Marked 2 users backfilled", output)
+        self.assertEqual(
+            [row[:2] for row in self._rows()],
+            [(1, "2026-03-02"), (1, "2026-03-03"), (1, "2026-03-04"), (1, "2026-03-05"), (2, "2026-03-02")],
+        )
+        self.assertEqual(self._rows()[3], (1, "2026-03-05", 0, 1, 0, 0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import migrate_phase7
+
+
+class MigratePhase7Tests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "clearmind.db")
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE items (id INTEGER PRIMARY KEY, created_at TIMESTAMP, updated_at TIMESTAMP);
+            INSERT INTO items (id, created_at, updated_at) VALUES
+                (1, '2026-03-01 09:00:00', '2026-03-04 10:00:00'),
+                (2, '2026-03-02 09:00:00', NULL);
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _migrate(self):
+        with redirect_stdout(StringIO()) as output:
+            migrate_phase7.migrate(self.db_path)
+        return output.getvalue()
+
+    def test_adds_and_backfills_content_timestamp_once(self):
+        self.assertIn("[+] Added column items.content_updated_at (backfilled 2 rows)", self._migrate())
+        self.assertIn("[=] Column items.content_updated_at already exists", self._migrate())
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT id, content_updated_at FROM items ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual(rows, [(1, "2026-03-04 10:00:00"), (2, "2026-03-02 09:00:00")])
+
+
+if __name__ == "__main__":
+    unittest.main()
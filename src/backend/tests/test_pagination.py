@@ -0,0 +1,150 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.item import Item
+from app.models.message import Message
+from app.models.user import User
+from app.routes.chat import get_chat_history
+from app.routes.items import get_items
+from app.schemas import ItemListEntry
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+
+class KeysetPaginationTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="pages@example.com", password_hash="hash")
+        self.other = User(email="pages-other@example.com", password_hash="hash")
+        self.db.add_all([self.user, self.other])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _items_page(self, limit, cursor=None, fields=None, status=None):
+        response = Response()
+        items = asyncio.run(
+            get_items(
+                response,
+                category=None,
+                status=status,
+                life_area=None,
+                limit=limit,
+                cursor=cursor,
+                fields=fields,
+                current_user=self.user,
+                db=self.db,
+            )
+        )
+        return items, response.headers.get(NEXT_CURSOR_HEADER)
+
+    def _history_page(self, limit, cursor=None, fields=None):
+        response = Response()
+        messages = asyncio.run(
+            get_chat_history(response, limit=limit, cursor=cursor, fields=fields, current_user=self.user, db=self.db)
+        )
+        return messages, response.headers.get(NEXT_CURSOR_HEADER)
+
+    def test_items_walk_priority_then_newest_including_unprioritized(self):
+        start = datetime(2026, 1, 1)
+        priorities = [8, None, 3, 8, None, 10, 3, 8]
+        self.db.add_all(
+            Item(
+                user_id=self.user.id,
+                title=f"Item {n}",
+                category="task",
+                priority=priority,
+                # Two rows share a timestamp so the id tiebreaker matters
+                created_at=start + timedelta(hours=min(n, 6)),
+            )
+            for n, priority in enumerate(priorities)
+        )
+        self.db.add(Item(user_id=self.other.id, title="Not mine", category="task", priority=9))
+        self.db.commit()
+        expected = [
+            item.id
+            for item in sorted(
+                self.db.query(Item).filter(Item.user_id == self.user.id),
+                key=lambda item: (item.priority is None, -(item.priority or 0), -item.created_at.timestamp(), -item.id),
+            )
+        ]
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            items, cursor = self._items_page(3, cursor)
+            seen += [item["id"] for item in items]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+        page, _ = self._items_page(50, status="done")
+        self.assertEqual(page, [])
+
+    def test_fields_projection_skips_unrequested_columns(self):
+        slides = Item(user_id=self.user.id, title="Slides", description="x" * 5000, category="task", priority=4)
+        self.db.add(slides)
+        self.db.commit()
+        self.db.expire_all()
+
+        items, cursor = self._items_page(10, fields="title, priority")
+        self.assertIsNone(cursor)
+        self.assertEqual(list(items[0]), ["id", "title", "priority"])
+        self.assertNotIn("title", inspect(slides).unloaded)
+        self.assertIn("description", inspect(slides).unloaded)
+        self.assertEqual(
+            ItemListEntry.model_validate(items[0]).model_dump(exclude_unset=True),
+            {"id": items[0]["id"], "title": "Slides", "priority": 4},
+        )
+
+        full, _ = self._items_page(10)
+        self.assertEqual(full[0]["description"], "x" * 5000)
+
+        with self.assertRaises(HTTPException) as error:
+            self._items_page(10, fields="title,password_hash")
+        self.assertEqual(error.exception.status_code, 400)
+
+    def test_history_pages_back_in_time(self):
+        start = datetime(2026, 2, 1, 9)
+        self.db.add_all(
+            Message(user_id=self.user.id, role="user", content=f"m{n}", timestamp=start + timedelta(minutes=n))
+            for n in range(5)
+        )
+        self.db.commit()
+
+        latest, cursor = self._history_page(2, fields="content")
+        self.assertEqual([message["content"] for message in latest], ["m3", "m4"])
+        self.assertNotIn("role", latest[0])
+        older, cursor = self._history_page(2, cursor)
+        self.assertEqual([message["content"] for message in older], ["m1", "m2"])
+        oldest, cursor = self._history_page(2, cursor)
+        self.assertEqual([message["content"] for message in oldest], ["m0"])
+        self.assertIsNone(cursor)
+
+    def test_malformed_cursors_are_rejected(self):
+        self.assertEqual(
+            decode_cursor(encode_cursor(None, datetime(2026, 1, 1), 7), 3), [None, "2026-01-01T00:00:00", 7]
+        )
+        for cursor in ("not-a-cursor", encode_cursor("x", 1), encode_cursor(5, "yesterday", 1)):
+            with self.assertRaises(HTTPException) as error:
+                self._items_page(5, cursor)
+            self.assertEqual(error.exception.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
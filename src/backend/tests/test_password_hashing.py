@@ -0,0 +1,127 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.user import User
+from app.routes.auth import login, register
+from app.schemas import UserLogin, UserRegister
+from app.utils.auth import PasswordHashPool, PasswordPoolSaturated, verify_token
+
+OLD_COST = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+NEW_COST = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+
+
+class PasswordRoutesTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="hash@example.com", password_hash=OLD_COST.hash("secret123"))
+        self.db.add(self.user)
+        self.db.commit()
+        patcher = patch("app.utils.auth.pwd_context", NEW_COST)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _login(self, email, password):
+        return asyncio.run(login(UserLogin(email=email, password=password), db=self.db))
+
+    def test_login_rehashes_when_the_cost_changes(self):
+        token = self._login("hash@example.com", "secret123")
+        self.assertEqual(verify_token(token["access_token"])["sub"], str(self.user.id))
+        upgraded = self.user.password_hash
+        self.assertTrue(upgraded.startswith("$2b$05$"))
+
+        self._login("hash@example.com", "secret123")
+        self.assertEqual(self.user.password_hash, upgraded)
+
+        for email, password in (("hash@example.com", "wrong"), ("nobody@example.com", "secret123")):
+            with self.assertRaises(HTTPException) as raised:
+                self._login(email, password)
+            self.assertEqual(raised.exception.status_code, 401)
+
+    def test_register_hashes_on_the_pool_and_reports_saturation(self):
+        payload = UserRegister(email="new@example.com", password="secret123")
+        asyncio.run(register(payload, db=self.db))
+        created = self.db.query(User).filter(User.email == "new@example.com").one()
+        self.assertTrue(NEW_COST.verify("secret123", created.password_hash))
+
+        with patch("app.routes.auth.hash_password_async", side_effect=PasswordPoolSaturated):
+            with self.assertRaises(HTTPException) as raised:
+                asyncio.run(register(UserRegister(email="busy@example.com", password="secret123"), db=self.db))
+        self.assertEqual(raised.exception.status_code, 503)
+        with patch("app.routes.auth.verify_and_update_password", side_effect=PasswordPoolSaturated):
+            with self.assertRaises(HTTPException) as raised:
+                self._login("hash@example.com", "secret123")
+        self.assertEqual(raised.exception.status_code, 503)
+
+
+class PasswordHashPoolTests(unittest.TestCase):
+    def test_bounded_queue_rejects_and_counts(self):
+        pool = PasswordHashPool(workers=1, max_pending=2)
+        release = threading.Event()
+
+        async def burst():
+            first = asyncio.ensure_future(pool.run(release.wait, 5))
+            second = asyncio.ensure_future(pool.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            self.assertEqual(pool.metrics()["queue_depth"], 1)
+            with self.assertRaises(PasswordPoolSaturated):
+                await pool.run(release.wait, 5)
+            release.set()
+            return await asyncio.gather(first, second)
+
+        self.assertEqual(asyncio.run(burst()), [True, True])
+        metrics = pool.metrics()
+        self.assertEqual((metrics["completed"], metrics["rejected"], metrics["in_flight"]), (2, 1, 0))
+        self.assertEqual(metrics["max_queue_depth"], 1)
+
+    def test_event_loop_stays_responsive_during_hashing(self):
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10)
+
+        def longest_stall(pool):
+            async def run():
+                stalls, finished = [], asyncio.Event()
+
+                async def ticker():
+                    while not finished.is_set():
+                        started = time.perf_counter()
+                        await asyncio.sleep(0.005)
+                        stalls.append(time.perf_counter() - started)
+
+                tick = asyncio.ensure_future(ticker())
+                await asyncio.sleep(0)
+                await asyncio.gather(*(pool.run(context.hash, "secret123") for _ in range(4)))
+                finished.set()
+                await tick
+                return max(stalls)
+
+            return asyncio.run(run())
+
+        inline = longest_stall(PasswordHashPool(workers=0))
+        pooled = longest_stall(PasswordHashPool(workers=2))
+        self.assertGreater(inline, 0.15)
+        self.assertLess(pooled, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
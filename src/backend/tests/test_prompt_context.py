@@ -0,0 +1,158 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.services.agents.graph_analyzer import graph_analyzer
+from app.services.agents.planner import PlannerAgent
+from app.services.orchestrator import PLANNER_ITEMS_PER_GROUP, orchestrator
+from app.services.prompt_context import ContextBudget, PromptContext, encode_table, estimate_tokens
+
+
+class PromptContextTests(unittest.TestCase):
+    def test_table_flattens_pipes_and_newlines(self):
+        table = encode_table(
+            [{"id": 1, "title": "Plan | review\nweek", "tags": ["a", "b"]}, {"id": 2, "title": None}],
+            ("id", "title", "tags"),
+        )
+        self.assertEqual(table, "id|title|tags\n1|Plan / review week|a,b\n2||")
+
+    def test_facts_rank_related_first_and_stop_at_budget(self):
+        context = PromptContext("test", ContextBudget(facts=12), "how is my thesis going")
+        facts = context.facts(["Lives in Berlin", "Writing a thesis on graph models", "Runs every morning"])
+        self.assertEqual(facts.splitlines()[0], "  - Writing a thesis on graph models")
+        self.assertEqual(context.sections["facts"]["omitted"], 2)
+        self.assertEqual(PromptContext("test", ContextBudget()).facts([]), "  (None specified yet)")
+
+    def test_history_keeps_newest_messages_in_order(self):
+        history = [{"role": "user", "content": f"message number {n} " + "x" * 40} for n in range(10)]
+        history[-1] = {"role": "assistant", "content": "y" * 5000}
+        context = PromptContext("test", ContextBudget(history=200))
+        lines = context.history(history).splitlines()
+        self.assertTrue(lines[-1].startswith("[Assistant]: yyy"))
+        self.assertLess(len(lines[-1]), 700)
+        self.assertIn("message number 8", lines[-2])
+        self.assertNotIn("message number 0", "\n".join(lines))
+        self.assertLessEqual(context.sections["history"]["tokens"], 200)
+
+    def test_items_rank_by_relevance_then_recency_and_report_omitted(self):
+        items = [{"title": f"Chore {n}", "status": "pending", "created_at": f"2026-01-{n + 1:02d}"} for n in range(20)]
+        items.append({"title": "Draft thesis chapter", "status": "pending", "created_at": "2025-01-01"})
+        context = PromptContext("test", ContextBudget(items=30), "thesis progress")
+        lines = context.items("items", items, ("title", "status")).splitlines()
+        self.assertEqual(lines[:3], ["title|status", "Draft thesis chapter|pending", "Chore 19|pending"])
+        self.assertRegex(lines[-1], r"^\(\+\d+ more not shown\)$")
+        self.assertEqual(context.sections["items"]["kept"] + int(lines[-1][2:].split()[0]), 21)
+
+    def test_finish_logs_estimated_prompt_tokens(self):
+        context = PromptContext("test", ContextBudget(), "hello")
+        context.facts(["one"])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            prompt = context.finish("x" * 400)
+        self.assertEqual(prompt, "x" * 400)
+        self.assertEqual(context.prompt_tokens, 100)
+        self.assertIn("[PromptContext] test: ~100 prompt tokens; facts", out.getvalue())
+
+
+class AgentPromptTests(unittest.TestCase):
+    def test_planner_prompt_stays_within_budget_for_large_histories(self):
+        planner = PlannerAgent()
+        items = [
+            {
+                "id": n,
+                "title": f"Task number {n} about something",
+                "category": "task",
+                "subcategory": "general",
+                "status": "pending" if n % 2 else "done",
+                "life_area": "career",
+                "priority": n % 10,
+                "created_at": f"2026-01-01T00:{n % 60:02d}:00",
+            }
+            for n in range(2000)
+        ]
+        profile = {
+            "goals": {"career": "Ship the app"},
+            "context_facts": [f"fact {n} " + "z" * 80 for n in range(200)],
+        }
+        history = [{"role": "user", "content": "w" * 2000} for _ in range(30)]
+        with redirect_stdout(io.StringIO()):
+            prompt = planner._build_prompt("how is my career", profile, history, items, {"pending": 1000})
+
+        budget = PlannerAgent.CONTEXT_BUDGET
+        self.assertLess(estimate_tokens(prompt), budget.facts + budget.history + budget.items + 1200)
+        self.assertIn("**Pending Tasks (1000):**", prompt)
+        self.assertIn("title|category|subcategory|life_area|priority|deadline", prompt)
+        self.assertIn("more not shown", prompt)
+        self.assertIn("  - Career: Ship the app", prompt)
+
+    def test_graph_prompt_sends_items_as_a_table(self):
+        items = [
+            {"id": 1, "type": "task", "title": "Write report", "description": "Q3 | numbers", "tags": ["work"]},
+            {"id": 2, "type": "idea", "title": "Report template", "description": "", "tags": []},
+        ]
+        prompt = graph_analyzer._build_prompt(items, {2})
+        self.assertIn(
+            "id|type|title|description|tags\n1|task|Write report|Q3 / numbers|work\n2|idea|Report template||", prompt
+        )
+        self.assertIn("NEW_ITEM_IDS: [2]", prompt)
+        self.assertNotIn('"title"', prompt)
+
+
+class PlannerContextTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="planner@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_planner_context_is_bounded_per_group_with_totals(self):
+        start = datetime(2026, 1, 1)
+        extra = PLANNER_ITEMS_PER_GROUP + 20
+        for n in range(extra):
+            self.db.add(
+                Item(
+                    user_id=self.user.id,
+                    title=f"Open {n}",
+                    category="task",
+                    status="pending",
+                    priority=n % 10,
+                    created_at=start + timedelta(minutes=n),
+                )
+            )
+            self.db.add(Item(user_id=self.user.id, title=f"Done {n}", category="task", status="done"))
+        self.db.add(Item(user_id=self.user.id, title="Idea", category="idea", status="pending"))
+        self.db.add(Item(user_id=self.user.id, title="Musing", category="thought", status="pending"))
+        self.db.commit()
+
+        items, counts = orchestrator._planner_context(self.db, self.user.id)
+        self.assertEqual(counts, {"pending": extra + 2, "done": extra, "ideas": 2})
+        pending = [item for item in items if item["status"] == "pending"]
+        done = [item for item in items if item["status"] == "done"]
+        self.assertLessEqual(len(pending), PLANNER_ITEMS_PER_GROUP + 2)
+        self.assertEqual(len(done), PLANNER_ITEMS_PER_GROUP)
+        self.assertEqual(pending[0]["priority"], 9)
+        self.assertIn("Idea", {item["title"] for item in items})
+
+
+if __name__ == "__main__":
+    unittest.main()
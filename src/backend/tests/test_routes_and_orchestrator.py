@@ -2,9 +2,9 @@ import asyncio
 import os
 import unittest
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -19,7 +19,7 @@ from app.models.item_link import ItemLink
 from app.models.message import Message
 from app.models.reflection import Reflection
 from app.models.user import User
-from app.routes.chat import send_message
+from app.routes.chat import send_message, stream_message
 from app.routes.graph import analyze_graph, create_link, delete_link, get_graph_data
 from app.routes.items import (
     create_item,
@@ -30,6 +30,7 @@ from app.routes.items import (
     update_item_status,
 )
 from app.schemas import ChatMessage, ItemCreate, ItemLinkCreate, ItemUpdate, RouterLLMResponse
+from app.services.agents.graph_analyzer import GraphAnalysisRun
 from app.services.orchestrator import Orchestrator
 
 
@@ -70,10 +71,20 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
         self.db.commit()
 
         filtered = self._run(
-            get_items(category="task", status=None, life_area=None, current_user=self.user, db=self.db)
+            get_items(
+                Response(),
+                category="task",
+                status=None,
+                life_area=None,
+                limit=100,
+                cursor=None,
+                fields=None,
+                current_user=self.user,
+                db=self.db,
+            )
         )
         self.assertEqual(len(filtered), 1)
-        self.assertEqual(filtered[0].category, "task")
+        self.assertEqual(filtered[0]["category"], "task")
 
         loaded = self._run(get_item(created.id, current_user=self.user, db=self.db))
         self.assertEqual(loaded.id, created.id)
@@ -149,6 +160,27 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
 
         self._run(delete_link(new_link.id, current_user=self.user, db=self.db))
 
+    def test_graph_links_are_scoped_by_item_owner(self):
+        own_a, own_b = (
+            Item(user_id=self.user.id, title="A", category="task"),
+            Item(user_id=self.user.id, title="B", category="task"),
+        )
+        foreign = Item(user_id=self.other_user.id, title="Foreign", category="task")
+        self.db.add_all([own_a, own_b, foreign])
+        self.db.flush()
+        self.db.add_all(
+            [
+                ItemLink(source_id=own_a.id, target_id=own_b.id, link_type="blocks"),
+                ItemLink(source_id=own_a.id, target_id=foreign.id, link_type="relates_to"),
+            ]
+        )
+        self.db.commit()
+
+        data = self._run(get_graph_data(current_user=self.user, db=self.db))
+
+        self.assertEqual(len(data.nodes), 2)
+        self.assertEqual([(link.source_id, link.target_id) for link in data.links], [(own_a.id, own_b.id)])
+
     def test_graph_routes_error_and_edge_paths(self):
         own = Item(user_id=self.user.id, title="Own", category="task")
         other = Item(user_id=self.other_user.id, title="Other", category="task")
@@ -180,7 +212,7 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
             self._run(delete_link(9999, current_user=self.user, db=self.db))
         self.assertEqual(missing_link.exception.status_code, 404)
 
-    @patch("app.routes.graph.graph_analyzer.analyze")
+    @patch("app.routes.graph.graph_analyzer.analyze_chunks_async", new_callable=AsyncMock)
     def test_graph_analyze_happy_with_skips(self, mock_analyze):
         i1 = Item(user_id=self.user.id, title="A", category="task", status="pending")
         i2 = Item(user_id=self.user.id, title="B", category="idea", status="pending")
@@ -191,9 +223,11 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
         self.db.refresh(i2)
         self.db.refresh(i3)
 
-        mock_analyze.return_value = [
-            {"source_id": i2.id, "target_id": i3.id, "link_type": "related", "weight": 85, "ai_reasoning": "valid"},
-        ]
+        mock_analyze.return_value = GraphAnalysisRun(
+            links=[
+                {"source_id": i2.id, "target_id": i3.id, "link_type": "related", "weight": 85, "ai_reasoning": "valid"},
+            ]
+        )
 
         result = self._run(analyze_graph(current_user=self.user, db=self.db))
         self.assertEqual(result.created_count, 1)
@@ -203,9 +237,9 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
     # ------------------------------------------------------------------
     # Chat Route Coverage (happy + error + edge)
     # ------------------------------------------------------------------
-    @patch("app.routes.chat.extract_memory_candidates")
-    @patch("app.routes.chat.active_context_facts")
-    @patch("app.routes.chat.orchestrator.route_and_execute")
+    @patch("app.services.chat_pipeline.extract_memory_candidates_async", new_callable=AsyncMock)
+    @patch("app.services.chat_pipeline.active_context_facts")
+    @patch("app.services.chat_pipeline.orchestrator.route_and_execute_async", new_callable=AsyncMock)
     def test_chat_routes_happy_and_edge_paths(self, mock_route, mock_context, mock_memory):
         # seed one history message for history endpoint and chat context
         self.db.add(Message(user_id=self.user.id, role="assistant", content="Old", agent_used="brain_dump"))
@@ -242,12 +276,73 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
         self.assertEqual(self.db.query(Item).filter(Item.user_id == self.user.id).count(), 0)
         self.assertGreaterEqual(self.db.query(Message).filter(Message.user_id == self.user.id).count(), 3)
 
-    @patch("app.routes.chat.active_context_facts", return_value=[])
-    @patch("app.routes.chat.orchestrator.route_and_execute", side_effect=RuntimeError("boom"))
+    @patch("app.services.chat_pipeline.active_context_facts", return_value=[])
+    @patch(
+        "app.services.chat_pipeline.orchestrator.route_and_execute_async",
+        new_callable=AsyncMock,
+        side_effect=RuntimeError("boom"),
+    )
     def test_chat_send_message_error_path(self, _mock_route, _mock_context):
         with self.assertRaises(RuntimeError):
             self._run(send_message(ChatMessage(message="hello"), current_user=self.user, db=self.db))
 
+    @patch("app.services.chat_pipeline.extract_memory_candidates_async", new_callable=AsyncMock)
+    @patch("app.services.chat_pipeline.active_context_facts", return_value=[])
+    def test_chat_stream_emits_ordered_events_and_persists(self, _mock_context, mock_memory):
+        mock_memory.return_value = [{"category": "goal", "fact": "User wants a thesis.", "confidence": 0.9}]
+
+        async def fake_stream(*args, **kwargs):
+            yield {"type": "routing", "agent": "brain_dump", "confidence": 0.99, "source": "local"}
+            yield {"type": "delta", "text": "Got it! "}
+            yield {
+                "type": "result",
+                "result": {
+                    "agent": "brain_dump",
+                    "message": "Got it! ",
+                    "items": [{"title": "Write intro", "category": "task", "priority": 6}],
+                    "links": [],
+                    "schedule": [],
+                    "reflection": None,
+                },
+            }
+
+        async def read_body(response):
+            return "".join([chunk async for chunk in response.body_iterator])
+
+        user_id = self.user.id
+        with patch("app.services.chat_pipeline.orchestrator.route_and_stream", side_effect=fake_stream):
+            response = self._run(
+                stream_message(ChatMessage(message="remind me to write the intro"), current_user=self.user, db=self.db)
+            )
+            body = self._run(read_body(response))
+
+        self.assertEqual(response.media_type, "text/event-stream")
+        events = [block.split("\n")[0].removeprefix("event: ") for block in body.strip().split("\n\n")]
+        self.assertEqual(events, ["routing", "delta", "result", "memory", "done"])
+        self.assertIn('"items": [{"title": "Write intro"', body)
+        self.assertIn("User wants a thesis.", body)
+        # The stream closes its session when done, so re-query by id.
+        self.assertEqual(self.db.query(Item).filter(Item.user_id == user_id).count(), 1)
+        self.assertEqual(self.db.query(Message).filter(Message.user_id == user_id).count(), 2)
+
+    @patch("app.services.chat_pipeline.active_context_facts", return_value=[])
+    def test_chat_stream_reports_errors_as_event(self, _mock_context):
+        async def failing_stream(*args, **kwargs):
+            raise RuntimeError("boom")
+            yield  # pragma: no cover
+
+        async def read_body(response):
+            return "".join([chunk async for chunk in response.body_iterator])
+
+        with (
+            patch("app.services.chat_pipeline.orchestrator.route_and_stream", side_effect=failing_stream),
+            patch("app.services.chat_pipeline.extract_memory_candidates_async", new_callable=AsyncMock),
+        ):
+            response = self._run(stream_message(ChatMessage(message="hi"), current_user=self.user, db=self.db))
+            body = self._run(read_body(response))
+
+        self.assertTrue(body.startswith("event: error"))
+
     # ------------------------------------------------------------------
     # Orchestrator Coverage with mocked Gemini integration
     # ------------------------------------------------------------------
@@ -287,6 +382,40 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
             routed = orch._classify_intent("anything")
             self.assertEqual(routed["agent"], "brain_dump")
 
+    def test_orchestrator_local_router_short_circuits_and_shadows(self):
+        orch = self._build_orchestrator()
+        orch.local_router.shadow_rate = 0.0
+
+        with patch("app.services.orchestrator.generate_json") as mock_llm:
+            routed = orch._classify_intent("Plan my day")
+        mock_llm.assert_not_called()
+        self.assertEqual(routed, {"agent": "scheduler", "confidence": routed["confidence"], "source": "local"})
+        self.assertEqual(orch.local_router.stats["short_circuits"], 1)
+
+        orch.local_router.shadow_rate = 1.0
+        with patch(
+            "app.services.orchestrator.generate_json",
+            return_value=RouterLLMResponse(agent="planner", confidence=0.8, reasoning="goals"),
+        ):
+            routed = orch._classify_intent("Plan my day")
+        self.assertEqual(routed["agent"], "scheduler")
+        self.assertEqual(orch.local_router.stats["shadow_disagreements"], 1)
+
+        async def route_with_background_shadow():
+            routed = await orch._classify_intent_async("Plan my day")
+            await asyncio.gather(*orch._shadow_tasks)
+            return routed
+
+        with patch(
+            "app.services.orchestrator.generate_json_async",
+            new_callable=AsyncMock,
+            return_value=RouterLLMResponse(agent="scheduler", confidence=0.9, reasoning="day plan"),
+        ):
+            routed = self._run(route_with_background_shadow())
+        self.assertEqual(routed["source"], "local")
+        self.assertEqual(orch.local_router.stats["shadow_checks"], 2)
+        self.assertEqual(orch.local_router.stats["shadow_disagreements"], 1)
+
     def test_orchestrator_route_dispatch_and_fallback(self):
         orch = self._build_orchestrator()
         db = self.db
@@ -305,6 +434,62 @@ class RoutesAndOrchestratorTests(unittest.TestCase):
             self.assertTrue(sc.called)
             self.assertTrue(pl.called)
 
+    def test_orchestrator_async_route_awaits_agent_variants(self):
+        orch = self._build_orchestrator()
+        task = Item(user_id=self.user.id, title="Pending task", category="task", status="pending", priority=7)
+        self.db.add(task)
+        self.db.commit()
+
+        orch.agents["brain_dump"].process_async = AsyncMock(return_value={"agent": "brain_dump", "message": "ok"})
+        orch.agents["reflection"].process_async = AsyncMock(
+            return_value={"agent": "reflection", "message": "r", "reflection": {"summary": "s"}}
+        )
+        orch.agents["scheduler"].process_async = AsyncMock(return_value={"agent": "scheduler", "schedule": []})
+        orch.agents["planner"].process_async = AsyncMock(return_value={"agent": "planner", "message": "p"})
+
+        for agent in ["brain_dump", "reflection", "scheduler", "planner", "unknown"]:
+            with patch(
+                "app.services.orchestrator.generate_json_async",
+                new_callable=AsyncMock,
+                return_value=SimpleNamespace(agent=agent, confidence=0.9, reasoning="test"),
+            ):
+                result = self._run(orch.route_and_execute_async("x", {}, [], self.db, self.user.id))
+            expected = "brain_dump" if agent == "unknown" else agent
+            self.assertEqual(result["agent"], expected)
+            self.assertIn("schedule", result)
+
+        orch.agents["brain_dump"].process.assert_not_called()
+        self.assertEqual(orch.agents["brain_dump"].process_async.await_count, 2)
+        self.assertEqual(self.db.query(Reflection).filter(Reflection.user_id == self.user.id).count(), 1)
+
+        with patch("app.services.orchestrator.generate_json_async", new_callable=AsyncMock, side_effect=Exception("x")):
+            routed = self._run(orch._classify_intent_async("anything"))
+        self.assertEqual(routed["agent"], "brain_dump")
+
+    def test_orchestrator_route_and_stream_finishes_agent_result(self):
+        orch = self._build_orchestrator()
+        orch.local_router.shadow_rate = 0.0
+
+        async def reflection_stream(*args, **kwargs):
+            yield {"type": "delta", "text": "You have "}
+            yield {"type": "delta", "text": "been busy."}
+            yield {
+                "type": "result",
+                "result": {"agent": "reflection", "message": "You have been busy.", "reflection": {"summary": "s"}},
+            }
+
+        orch.agents["reflection"].process_stream = reflection_stream
+
+        async def collect():
+            return [event async for event in orch.route_and_stream("how am I doing?", {}, [], self.db, self.user.id)]
+
+        events = self._run(collect())
+
+        self.assertEqual([event["type"] for event in events], ["routing", "delta", "delta", "result"])
+        self.assertEqual(events[0]["agent"], "reflection")
+        self.assertEqual(events[-1]["result"]["schedule"], [])
+        self.assertEqual(self.db.query(Reflection).filter(Reflection.user_id == self.user.id).count(), 1)
+
     def test_orchestrator_run_methods_happy_error_and_edge(self):
         orch = self._build_orchestrator()
 
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+import unittest
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.routes.schedule import get_free_slots, get_schedule, get_schedule_conflicts, update_schedule_block
+from app.schemas import ScheduleUpdate
+from app.services.schedule_index import Block, UserSchedule, schedule_index
+from app.services.scheduling import SchedulingRules
+
+DAY = datetime(2026, 3, 2)
+
+
+def _at(hours: float) -> datetime:
+    return DAY + timedelta(hours=hours)
+
+
+class UserScheduleTests(unittest.TestCase):
+    def setUp(self):
+        self.schedule = UserSchedule.from_blocks(
+            [
+                Block(_at(9), _at(10), 1, "Standup"),
+                Block(_at(9.5), _at(11), 2, "Review"),
+                Block(_at(10.5), _at(12), 3, "Lunch prep"),
+                Block(_at(14), _at(15), 4, "Gym"),
+                Block(_at(15), _at(16), 5, "Back to back"),
+            ]
+        )
+
+    def test_overlap_query_includes_blocks_straddling_the_range(self):
+        ids = [block.item_id for block in self.schedule.overlapping(_at(10.75), _at(14.5))]
+        self.assertEqual(ids, [2, 3, 4])
+        self.assertEqual(self.schedule.overlapping(_at(12), _at(14)), [])
+        self.assertEqual([block.item_id for block in self.schedule.overlapping(_at(15), _at(15.1))], [5])
+
+    def test_conflicts_are_overlapping_pairs_not_touching_ones(self):
+        pairs = [(a.item_id, b.item_id, start, end) for a, b, start, end in self.schedule.conflicts_between()]
+        self.assertEqual(pairs, [(1, 2, _at(9.5), _at(10)), (2, 3, _at(10.5), _at(11))])
+        in_range = self.schedule.conflicts_between(_at(10.75), _at(13))
+        self.assertEqual([(a.item_id, b.item_id) for a, b, _, _ in in_range], [(2, 3)])
+        self.assertEqual(self.schedule.conflicts_between(_at(11), _at(13)), [])
+
+    def test_free_slots_respect_blocks_breaks_and_duration(self):
+        rules = SchedulingRules(horizon_days=1)
+        slots = self.schedule.free_slots(_at(8), 60, rules)
+        lunch_gap = (_at(12) + timedelta(minutes=10), _at(14) - timedelta(minutes=10))
+        self.assertEqual(slots, [lunch_gap, (_at(16) + timedelta(minutes=10), _at(20))])
+        self.assertEqual(self.schedule.free_slots(_at(8), 120, rules), slots[1:])
+        self.assertEqual(self.schedule.free_slots(_at(17), 60, rules), [(_at(17), _at(20))])
+
+    def test_queries_stay_fast_on_long_histories(self):
+        blocks = [Block(_at(n), _at(n + 0.75), n, f"Block {n}") for n in range(20_000)]
+        schedule = UserSchedule.from_blocks(blocks)
+        started = time.perf_counter()
+        for _ in range(1000):
+            schedule.overlapping(_at(10_000), _at(10_024))
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(len(schedule.overlapping(_at(10_000), _at(10_024))), 24)
+        self.assertEqual(schedule.conflicts, [])
+
+
+class ScheduleRoutesTests(unittest.TestCase):
+    def setUp(self):
+        schedule_index.clear()
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="schedule@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        schedule_index.clear()
+
+    def _block(self, title, start, end, status="pending"):
+        item = Item(
+            user_id=self.user.id, title=title, category="task", status=status, scheduled_start=start, scheduled_end=end
+        )
+        self.db.add(item)
+        self.db.commit()
+        return item
+
+    def test_range_query_returns_blocks_straddling_the_edges(self):
+        self._block("Late night", datetime(2026, 3, 1, 23), datetime(2026, 3, 2, 1))
+        self._block("Inside", datetime(2026, 3, 3, 9), datetime(2026, 3, 3, 10))
+        self._block("Evening", datetime(2026, 3, 4, 22), datetime(2026, 3, 5, 2))
+        self._block("Later", datetime(2026, 3, 6, 9), datetime(2026, 3, 6, 10))
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2:4]))
+        blocks = asyncio.run(
+            get_schedule(start_date="2026-03-02", end_date="2026-03-04", current_user=self.user, db=self.db)
+        )
+        self.assertEqual([block["title"] for block in blocks], ["Late night", "Inside", "Evening"])
+        statement, parameters = next(entry for entry in statements if "FROM items" in entry[0])
+        plan = self.db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        self.assertIn("ix_items_user_scheduled_start", str(plan))
+
+    def test_conflicts_follow_committed_writes(self):
+        first = self._block("Write", datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 10))
+        second = self._block("Call", datetime(2026, 3, 2, 11), datetime(2026, 3, 2, 12))
+        self._block("Done already", datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 12), status="done")
+
+        def conflicts():
+            return asyncio.run(
+                get_schedule_conflicts(start_date=None, end_date=None, current_user=self.user, db=self.db)
+            )
+
+        self.assertEqual(conflicts(), [])
+        moved = asyncio.run(
+            update_schedule_block(
+                second.id,
+                ScheduleUpdate(scheduled_start="2026-03-02T09:30:00", scheduled_end="2026-03-02T10:30:00"),
+                current_user=self.user,
+                db=self.db,
+            )
+        )
+        self.assertEqual(moved["conflicts_with"], [first.id])
+        [conflict] = conflicts()
+        self.assertEqual((conflict.item_id, conflict.other_item_id), (first.id, second.id))
+        self.assertEqual((conflict.overlap_start, conflict.overlap_minutes), ("2026-03-02T09:30:00", 30))
+
+        first.status = "done"
+        self.db.commit()
+        self.assertEqual(conflicts(), [])
+        self.assertGreaterEqual(schedule_index.stats["invalidations"], 2)
+
+    def test_free_slots_skip_booked_time(self):
+        tomorrow = date.today() + timedelta(days=1)
+        self._block("Deep work", datetime.combine(tomorrow, datetime.min.time()).replace(hour=9), None)
+        self._block(
+            "Workshop",
+            datetime.combine(tomorrow, datetime.min.time()).replace(hour=9),
+            datetime.combine(tomorrow, datetime.min.time()).replace(hour=12),
+        )
+
+        slots = asyncio.run(get_free_slots(duration=90, days=2, limit=20, current_user=self.user, db=self.db))
+        tomorrow_slots = [slot for slot in slots if slot.start.startswith(tomorrow.isoformat())]
+        self.assertEqual(tomorrow_slots[0].start, f"{tomorrow.isoformat()}T12:10:00")
+        self.assertEqual(tomorrow_slots[0].duration_minutes, 470)
+        self.assertTrue(all(slot.duration_minutes >= 90 for slot in slots))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+import asyncio
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.schemas import DurationEstimate, DurationEstimateLLMResponse, ScheduleSummaryLLMResponse
+from app.services.agents.scheduler import SchedulerAgent
+from app.services.orchestrator import Orchestrator
+from app.services.scheduling import (
+    DEFAULT_DURATION_MINUTES,
+    SchedulingRules,
+    clamp_duration,
+    describe_plan,
+    free_intervals,
+    pack_schedule,
+)
+
+MONDAY = datetime(2026, 3, 2, 7, 30)
+
+
+def _task(item_id, priority=5, deadline=None, minutes=60, title=None):
+    return {
+        "id": item_id,
+        "title": title or f"Task {item_id}",
+        "priority": priority,
+        "deadline": deadline.isoformat() if deadline else None,
+        "estimated_duration": minutes,
+    }
+
+
+def _spans(plan):
+    return [
+        (datetime.fromisoformat(block["scheduled_start"]), datetime.fromisoformat(block["scheduled_end"]))
+        for block in plan.blocks
+    ]
+
+
+class SchedulingEngineTests(unittest.TestCase):
+    def test_blocks_stay_in_working_hours_with_breaks_and_around_busy_time(self):
+        busy = [(datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 10, 0))]
+        plan = pack_schedule([_task(n, minutes=90) for n in range(1, 15)], busy, now=MONDAY)
+
+        spans = _spans(plan)
+        self.assertEqual(spans[0][0], datetime(2026, 3, 2, 10, 10))
+        for start, end in spans:
+            self.assertGreaterEqual(start.time(), datetime(2026, 3, 2, 9).time())
+            self.assertLessEqual(end.time(), datetime(2026, 3, 2, 20).time())
+            self.assertEqual(start.date(), end.date())
+        for (_, previous_end), (next_start, _) in zip(spans, spans[1:], strict=False):
+            if previous_end.date() == next_start.date():
+                self.assertGreaterEqual(next_start - previous_end, timedelta(minutes=10))
+        self.assertEqual(plan.unscheduled, [])
+
+    def test_deadlines_first_then_priority(self):
+        tomorrow = datetime(2026, 3, 3, 18, 0)
+        tasks = [_task(1, priority=10), _task(2, priority=2, deadline=tomorrow), _task(3, priority=7)]
+        plan = pack_schedule(tasks, now=MONDAY)
+        self.assertEqual([block["item_id"] for block in plan.blocks], [2, 1, 3])
+
+        overdue = pack_schedule([_task(4, deadline=datetime(2026, 3, 1))], now=MONDAY)
+        self.assertEqual(overdue.late_ids, [4])
+        self.assertIn("after their deadline", describe_plan(overdue))
+
+    def test_start_time_rounds_up_and_rolls_over_to_next_day(self):
+        midday = pack_schedule([_task(1, minutes=30)], now=datetime(2026, 3, 2, 13, 2, 30))
+        self.assertEqual(midday.blocks[0]["scheduled_start"], "2026-03-02T13:05:00")
+
+        late = pack_schedule([_task(1, minutes=30)], now=datetime(2026, 3, 2, 19, 50))
+        self.assertEqual(late.blocks[0]["scheduled_start"], "2026-03-03T09:00:00")
+
+    def test_overflow_is_reported_and_short_tasks_fill_gaps(self):
+        busy = [(datetime(2026, 3, 2, 9, 40), datetime(2026, 3, 2, 19, 0))]
+        plan = pack_schedule(
+            [_task(1, priority=9, minutes=120), _task(2, priority=1, minutes=20)],
+            busy,
+            now=MONDAY,
+            rules=SchedulingRules(horizon_days=1),
+        )
+        self.assertEqual([block["item_id"] for block in plan.blocks], [2])
+        self.assertEqual(plan.blocks[0]["scheduled_start"], "2026-03-02T09:00:00")
+        self.assertEqual([task["id"] for task in plan.unscheduled], [1])
+        self.assertIn("did not fit", describe_plan(plan))
+        nothing = pack_schedule([_task(1)], now=MONDAY, rules=SchedulingRules(horizon_days=0))
+        self.assertIn("None of your 1 pending tasks", describe_plan(nothing))
+
+    def test_durations_are_clamped(self):
+        self.assertEqual(clamp_duration(None), DEFAULT_DURATION_MINUTES)
+        self.assertEqual(clamp_duration("soon"), DEFAULT_DURATION_MINUTES)
+        self.assertEqual(clamp_duration(0), DEFAULT_DURATION_MINUTES)
+        self.assertEqual(clamp_duration(5), 15)
+        self.assertEqual(clamp_duration(600), 120)
+
+    def test_hundreds_of_tasks_pack_fast_and_deterministically(self):
+        tasks = [
+            _task(
+                n, priority=n % 10 + 1, deadline=MONDAY + timedelta(hours=n) if n % 3 == 0 else None, minutes=n % 7 * 15
+            )
+            for n in range(1, 501)
+        ]
+        busy = [(MONDAY + timedelta(hours=2 + 5 * n), MONDAY + timedelta(hours=3 + 5 * n)) for n in range(40)]
+        rules = SchedulingRules(horizon_days=30)
+
+        started = time.perf_counter()
+        plan = pack_schedule(tasks, busy, now=MONDAY, rules=rules)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual(len(plan.blocks) + len(plan.unscheduled), 500)
+        self.assertEqual(plan.blocks, pack_schedule(tasks, busy, now=MONDAY, rules=rules).blocks)
+        spans = sorted(_spans(plan))
+        self.assertTrue(all(previous[1] <= current[0] for previous, current in zip(spans, spans[1:], strict=False)))
+        free = free_intervals(MONDAY, busy, rules)
+        self.assertTrue(all(end - start >= timedelta(minutes=15) for start, end in free))
+
+
+class SchedulerAgentTests(unittest.TestCase):
+    def setUp(self):
+        self.agent = SchedulerAgent()
+        self.agent.fast_mode = False
+        self.tasks = [_task(1, minutes=None, title="Write report"), _task(2, minutes=30, title="Email Ana")]
+
+    def test_fast_mode_makes_no_llm_calls(self):
+        self.agent.fast_mode = True
+        with patch("app.services.agents.scheduler.generate_json") as generate:
+            result = self.agent.process("plan my day", {}, [], self.tasks)
+        generate.assert_not_called()
+        self.assertEqual(len(result["schedule"]), 2)
+        self.assertTrue(result["message"].startswith("Scheduled 2 tasks"))
+
+    def test_llm_estimates_missing_durations_and_narrates(self):
+        responses = [
+            DurationEstimateLLMResponse(estimates=[DurationEstimate(item_id=1, estimated_duration_minutes=90)]),
+            ScheduleSummaryLLMResponse(summary="Report first, then email."),
+        ]
+        with patch("app.services.agents.scheduler.generate_json", side_effect=responses) as generate:
+            result = self.agent.process("plan my day", {"context_facts": ["Works mornings"]}, [], self.tasks)
+
+        self.assertEqual(generate.call_count, 2)
+        estimate_prompt = generate.call_args_list[0].args[1]
+        self.assertIn("Write report", estimate_prompt)
+        self.assertNotIn("Email Ana", estimate_prompt)
+        self.assertIn("Works mornings", generate.call_args_list[1].args[1])
+        self.assertEqual(result["message"], "Report first, then email.")
+        durations = {block["item_id"]: block["estimated_duration_minutes"] for block in result["schedule"]}
+        self.assertEqual(durations, {1: 90, 2: 30})
+
+    def test_llm_failures_fall_back_to_local_defaults(self):
+        with patch("app.services.agents.scheduler.generate_json", side_effect=Exception("quota")):
+            result = self.agent.process("plan", {}, [], self.tasks)
+        self.assertEqual(result["schedule"][0]["estimated_duration_minutes"], DEFAULT_DURATION_MINUTES)
+        self.assertTrue(result["message"].startswith("Scheduled"))
+
+        self.agent.fast_mode = True
+        with patch("app.services.agents.scheduler.pack_schedule", side_effect=ValueError("bad")):
+            self.assertEqual(self.agent.process("plan", {}, [], self.tasks)["schedule"], [])
+
+        empty = self.agent.process("plan", {}, [], [], [(MONDAY, MONDAY + timedelta(hours=1))])
+        self.assertIn("already have a time slot", empty["message"])
+
+    def test_async_and_stream_variants(self):
+        async def summary_stream(*args, **kwargs):
+            yield "delta", "All "
+            yield "delta", "set."
+            yield "result", ScheduleSummaryLLMResponse(summary="All set.")
+
+        async def collect():
+            return [event async for event in self.agent.process_stream("plan", {}, [], self.tasks)]
+
+        with (
+            patch(
+                "app.services.agents.scheduler.generate_json_async",
+                new_callable=AsyncMock,
+                return_value=DurationEstimateLLMResponse(estimates=[]),
+            ),
+            patch("app.services.agents.scheduler.stream_json_field", summary_stream),
+        ):
+            events = asyncio.run(collect())
+        self.assertEqual([event["type"] for event in events], ["delta", "delta", "result"])
+        self.assertEqual(events[-1]["result"]["message"], "All set.")
+
+        self.agent.fast_mode = True
+        result = asyncio.run(self.agent.process_async("plan", {}, [], self.tasks))
+        self.assertEqual(len(result["schedule"]), 2)
+        events = asyncio.run(collect())
+        self.assertEqual([event["type"] for event in events], ["delta", "result"])
+
+
+class SchedulerContextTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+        self.user = User(email="scheduler@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_upcoming_blocks_are_kept_and_stale_ones_rescheduled(self):
+        now = datetime.now()
+        upcoming = (now + timedelta(hours=1), now + timedelta(hours=2))
+        self.db.add_all(
+            [
+                Item(user_id=self.user.id, title="Fresh", category="task", estimated_duration=25),
+                Item(
+                    user_id=self.user.id,
+                    title="Booked",
+                    category="task",
+                    scheduled_start=upcoming[0],
+                    scheduled_end=upcoming[1],
+                ),
+                Item(
+                    user_id=self.user.id,
+                    title="Missed",
+                    category="task",
+                    scheduled_start=now - timedelta(days=1, hours=1),
+                    scheduled_end=now - timedelta(days=1),
+                ),
+                Item(user_id=self.user.id, title="Done", category="task", status="done"),
+                Item(user_id=self.user.id, title="Idea", category="idea"),
+            ]
+        )
+        self.db.commit()
+
+        with patch("app.services.orchestrator.genai"):
+            orchestrator = Orchestrator.__new__(Orchestrator)
+        pending, busy = orchestrator._scheduler_context(self.db, self.user.id)
+
+        self.assertEqual(sorted(task["title"] for task in pending), ["Fresh", "Missed"])
+        self.assertEqual(next(task for task in pending if task["title"] == "Fresh")["estimated_duration"], 25)
+        self.assertEqual(busy, [upcoming])
+
+
+if __name__ == "__main__":
+    unittest.main()
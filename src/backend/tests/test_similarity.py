@@ -0,0 +1,128 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import numpy as np
+
+from app.schemas import GraphAnalyzerLLMResponse
+from app.services.agents.graph_analyzer import graph_analyzer
+from app.services.similarity import candidate_pairs, tokenize, vectorize
+
+ITEMS = [
+    {"id": 1, "title": "Book dentist appointment", "description": "teeth cleaning", "tags": ["health"]},
+    {"id": 2, "title": "Dentist cleaning reminder", "description": "", "tags": ["health"]},
+    {"id": 3, "title": "Prepare thesis slides", "description": "defense presentation", "tags": ["learning"]},
+    {"id": 4, "title": "Thesis defense rehearsal", "description": "slides timing", "tags": ["learning"]},
+    {"id": 5, "title": "Pay rent", "description": "", "tags": ["finance"]},
+]
+
+
+def _llm_response(*pairs):
+    return GraphAnalyzerLLMResponse.model_validate(
+        {
+            "suggested_links": [
+                {"source_id": a, "target_id": b, "link_type": "relates_to", "weight": 80, "ai_reasoning": "r"}
+                for a, b in pairs
+            ]
+        }
+    )
+
+
+class SimilarityTests(unittest.TestCase):
+    def test_tokenize_drops_stopwords_and_stems(self):
+        self.assertEqual(tokenize("I need to finish the planning of studies"), ["finish", "plann", "stud"])
+
+    def test_vectors_are_normalized_float32(self):
+        matrix = vectorize(["thesis slides", "thesis defense", ""])
+        self.assertEqual(matrix.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(matrix[:2], axis=1), [1.0, 1.0], rtol=1e-5)
+        self.assertEqual(float(np.abs(matrix[2]).sum()), 0.0)
+
+    def test_top_k_pairs_find_related_items(self):
+        pairs = {(a, b) for a, b, _ in candidate_pairs(ITEMS, k=1)}
+        self.assertEqual(pairs, {(1, 2), (3, 4)})
+
+    def test_focus_ids_restrict_pairs(self):
+        pairs = candidate_pairs(ITEMS, k=4, focus_ids={3})
+        self.assertTrue(pairs)
+        self.assertTrue(all(3 in (a, b) for a, b, _ in pairs))
+        self.assertEqual(pairs[0][:2], (3, 4))
+
+
+class GraphAnalyzerPrefilterTests(unittest.TestCase):
+    def setUp(self):
+        self.saved = (graph_analyzer.candidate_k, graph_analyzer.prefilter_min_items, graph_analyzer.pair_batch_size)
+        graph_analyzer.candidate_k, graph_analyzer.prefilter_min_items, graph_analyzer.pair_batch_size = 1, 3, 1
+
+    def tearDown(self):
+        graph_analyzer.candidate_k, graph_analyzer.prefilter_min_items, graph_analyzer.pair_batch_size = self.saved
+
+    def test_small_inputs_use_single_full_prompt(self):
+        graph_analyzer.prefilter_min_items = 40
+        requests = graph_analyzer.plan_requests(ITEMS)
+        self.assertEqual(len(requests), 1)
+        self.assertIsNone(requests[0][1])
+
+    @patch("app.services.agents.graph_analyzer.generate_json_async", new_callable=AsyncMock)
+    def test_candidate_pairs_are_batched_and_enforced(self, mock_generate):
+        def respond(model, prompt, schema, **kwargs):
+            # Each batch answers with its own pair plus one that was never a candidate.
+            if "CANDIDATE_PAIRS: [[1,2]]" in prompt:
+                return _llm_response((2, 1), (1, 5))
+            self.assertIn("CANDIDATE_PAIRS: [[3,4]]", prompt)
+            return _llm_response((3, 4), (4, 5))
+
+        mock_generate.side_effect = respond
+
+        links = asyncio.run(graph_analyzer.analyze_async(ITEMS))
+
+        self.assertEqual(mock_generate.await_count, 2)
+        self.assertEqual(sorted((link["source_id"], link["target_id"]) for link in links), [(2, 1), (3, 4)])
+
+    @patch("app.services.agents.graph_analyzer.generate_json_async", new_callable=AsyncMock)
+    def test_chunks_run_concurrently_within_the_limit(self, mock_generate):
+        graph_analyzer.max_concurrency, saved = 2, graph_analyzer.max_concurrency
+        self.addCleanup(setattr, graph_analyzer, "max_concurrency", saved)
+        in_flight, peak = 0, 0
+
+        async def respond(model, prompt, schema, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if "[[3,4]]" in prompt:
+                raise RuntimeError("timeout")
+            return _llm_response((1, 2), (2, 1))
+
+        mock_generate.side_effect = respond
+        items = ITEMS + [
+            {"id": 6, "title": "Rent contract renewal", "description": "pay deposit", "tags": ["finance"]},
+            {"id": 7, "title": "Garden watering", "description": "", "tags": ["home"]},
+            {"id": 8, "title": "Water the garden plants", "description": "", "tags": ["home"]},
+        ]
+
+        run = asyncio.run(graph_analyzer.analyze_chunks_async(items))
+
+        self.assertEqual(len(run.chunks), 4)
+        self.assertEqual(peak, 2)
+        self.assertEqual(run.failed_chunks, 1)
+        self.assertIsNone(run.error)
+        self.assertEqual({(link["source_id"], link["target_id"]) for link in run.links}, {(1, 2), (2, 1)})
+        self.assertTrue(all(chunk["elapsed_ms"] >= 0 for chunk in run.chunks))
+
+    @patch("app.services.agents.graph_analyzer.generate_json")
+    def test_sync_analyze_uses_the_same_plan(self, mock_generate):
+        mock_generate.return_value = _llm_response((1, 2), (3, 4))
+        links = graph_analyzer.analyze(ITEMS)
+        self.assertEqual(mock_generate.call_count, 2)
+        self.assertEqual(len(links), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
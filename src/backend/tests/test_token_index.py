@@ -0,0 +1,130 @@
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.profile_update  # noqa: F401
+import app.models.user_context  # noqa: F401
+from app.database import Base
+from app.models.item import Item
+from app.models.user import User
+from app.services.agents.brain_dump import BrainDumpAgent
+from app.services.token_index import UserTokenIndex, token_index
+
+
+class UserTokenIndexTests(unittest.TestCase):
+    def test_related_ranks_by_shared_tokens_within_life_area(self):
+        index = UserTokenIndex.from_items(
+            [
+                {"id": 1, "title": "Thesis slides", "life_area": "learning"},
+                {"id": 2, "title": "Thesis defense slides", "life_area": "Learning"},
+                {"id": 3, "title": "Thesis budget", "life_area": "finance"},
+                {"id": 4, "title": "Read the paper", "life_area": "learning"},
+            ]
+        )
+        self.assertEqual(index.related("Finish the thesis defense slides", "learning"), [2, 1])
+        self.assertEqual(index.related("Thesis", None), [])
+
+        index.remove(2)
+        self.assertEqual(index.related("defense slides", "learning"), [1])
+        self.assertNotIn(("learning", "defense"), index.postings)
+
+    def test_detect_links_accepts_plain_item_lists(self):
+        with patch("app.services.agents.brain_dump.genai"):
+            agent = BrainDumpAgent()
+        links = agent._detect_links(
+            [{"title": "Call the dentist about cleaning", "life_area": "health"}],
+            [
+                {"id": 7, "title": "Dentist cleaning", "life_area": "health"},
+                {"id": 8, "title": "Call mom", "life_area": "relationships"},
+            ],
+        )
+        self.assertEqual(
+            links, [{"source_title": "Call the dentist about cleaning", "target_id": 7, "link_type": "relates_to"}]
+        )
+        self.assertEqual(agent._detect_links([{"title": "x", "life_area": "health"}], []), [])
+
+
+class TokenIndexCacheTests(unittest.TestCase):
+    def setUp(self):
+        token_index.clear()
+        self.engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.user = User(email="tokens@example.com", password_hash="hash")
+        self.db.add(self.user)
+        self.db.commit()
+
+    def tearDown(self):
+        token_index.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def test_whole_history_is_indexed_and_kept_current(self):
+        old = Item(user_id=self.user.id, title="Marathon training plan", category="task", life_area="health")
+        self.db.add(old)
+        self.db.add_all(
+            Item(user_id=self.user.id, title=f"Errand {n}", category="task", life_area="health") for n in range(60)
+        )
+        self.db.commit()
+
+        builds = token_index.stats["builds"]
+        index = token_index.get(self.db, self.user.id)
+        self.assertEqual(len(index), 61)
+        self.assertEqual(index.related("marathon shoes", "health"), [old.id])
+
+        new = Item(user_id=self.user.id, title="Buy marathon shoes", category="task", life_area="health")
+        self.db.add(new)
+        self.db.commit()
+        old.title = "Half marathon"
+        self.db.commit()
+        self.assertIs(token_index.get(self.db, self.user.id), index)
+        self.assertEqual(index.related("shoes", "health"), [new.id])
+        self.assertEqual(index.related("training", "health"), [])
+
+        self.db.delete(new)
+        self.db.commit()
+        self.assertEqual(index.related("marathon", "health"), [old.id])
+        self.assertEqual(token_index.stats["builds"], builds + 1)
+
+    def test_rolled_back_writes_are_ignored(self):
+        index = token_index.get(self.db, self.user.id)
+        self.db.add(Item(user_id=self.user.id, title="Draft budget", category="task", life_area="finance"))
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(len(index), 0)
+
+    def test_index_loaded_during_a_write_is_not_cached(self):
+        real_load = UserTokenIndex.load
+
+        def load_then_insert(db, user_id):
+            index = real_load(db, user_id)
+            # Another request commits an item after the index read the user's titles
+            with self.Session() as other:
+                other.add(Item(user_id=user_id, title="Quarterly budget", category="task", life_area="finance"))
+                other.commit()
+            return index
+
+        with patch.object(UserTokenIndex, "load", side_effect=load_then_insert):
+            self.assertEqual(len(token_index.get(self.db, self.user.id)), 0)
+
+        self.assertEqual(len(token_index.get(self.db, self.user.id).related("budget", "finance")), 1)
+
+    def test_drop_rebuilds_one_user_or_all_when_owner_unknown(self):
+        index = token_index.get(self.db, self.user.id)
+        token_index.apply([("drop", self.user.id + 1, 1, None, None)])
+        self.assertIs(token_index.get(self.db, self.user.id), index)
+
+        token_index.apply([("drop", None, 1, None, None)])
+        self.assertIsNot(token_index.get(self.db, self.user.id), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,8 @@ import type {
     Item,
     AgentChatResponse,
     ScheduleBlock,
+    ScheduleConflict,
+    FreeSlot,
     GraphData,
     GraphAnalyzeResponse,
     GraphLinkType,
@@ -69,8 +71,15 @@ export const chat = {
 
 export const items = {
     getAll: async (filters?: any): Promise<Item[]> => {
-        const { data } = await api.get('/items', { params: filters });
-        return data;
+        // The list is keyset-paginated; follow X-Next-Cursor until the last page
+        const all: Item[] = [];
+        let cursor: string | undefined;
+        do {
+            const response = await api.get('/items', { params: { ...filters, cursor } });
+            all.push(...response.data);
+            cursor = response.headers['x-next-cursor'];
+        } while (cursor);
+        return all;
     },
     create: async (itemData: Partial<Item>): Promise<Item> => {
         const { data } = await api.post('/items', itemData);
@@ -87,6 +96,10 @@ export const items = {
         const { data } = await api.patch(`/items/${id}/status`, { status });
         return data;
     },
+    batch: async (operations: any[], atomic: boolean = true): Promise<any> => {
+        const { data } = await api.post('/items/batch', { operations, atomic });
+        return data;
+    },
 };
 
 // ============================================================================
@@ -105,10 +118,29 @@ export const schedule = {
         const { data } = await api.put(`/schedule/${itemId}`, updateData);
         return data;
     },
+    getConflicts: async (startDate?: string, endDate?: string): Promise<ScheduleConflict[]> => {
+        const params: any = {};
+        if (startDate) params.start_date = startDate;
+        if (endDate) params.end_date = endDate;
+        const { data } = await api.get('/schedule/conflicts', { params });
+        return data;
+    },
+    getFreeSlots: async (duration: number, days?: number): Promise<FreeSlot[]> => {
+        const { data } = await api.get('/schedule/free-slots', { params: { duration, days } });
+        return data;
+    },
     exportIcs: async (): Promise<Blob> => {
         const response = await api.get('/schedule/export', { responseType: 'blob' });
         return response.data;
     },
+    getFeedUrl: async (): Promise<{ url: string; https_url: string }> => {
+        const { data } = await api.get('/schedule/feed-url');
+        return data;
+    },
+    rotateFeedUrl: async (): Promise<{ url: string; https_url: string }> => {
+        const { data } = await api.post('/schedule/feed-url/rotate');
+        return data;
+    },
 };
 
 export const graph = {
@@ -54,6 +54,22 @@ export interface ScheduleBlock {
     scheduled_end: string;
 }
 
+export interface ScheduleConflict {
+    item_id: number;
+    title: string;
+    other_item_id: number;
+    other_title: string;
+    overlap_start: string;
+    overlap_end: string;
+    overlap_minutes: number;
+}
+
+export interface FreeSlot {
+    start: string;
+    end: string;
+    duration_minutes: number;
+}
+
 export interface ReflectionSummary {
     summary: string;
     patterns: string[];